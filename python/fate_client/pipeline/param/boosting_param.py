@@ -132,13 +132,16 @@ class DecisionTreeParam(BaseParam):
     deterministic: bool, ensure stability when computing histogram. Set this to true to ensure stable result when using
                          same data and same parameter. But it may slow down computation.
 
+    n_jobs: int, positive integer, number of processes guest uses to decrypt host split info packages when
+            cipher compressing is on, default: 1, decrypt in current process.
+
     """
 
     def __init__(self, criterion_method="xgboost", criterion_params=[0.1, 0], max_depth=3,
                  min_sample_split=2, min_impurity_split=1e-3, min_leaf_node=1,
                  max_split_nodes=consts.MAX_SPLIT_NODES, feature_importance_type="split",
                  n_iter_no_change=True, tol=0.001, min_child_weight=0,
-                 use_missing=False, zero_as_missing=False, deterministic=False):
+                 use_missing=False, zero_as_missing=False, deterministic=False, n_jobs=1):
 
         super(DecisionTreeParam, self).__init__()
 
@@ -156,6 +159,7 @@ class DecisionTreeParam(BaseParam):
         self.use_missing = use_missing
         self.zero_as_missing = zero_as_missing
         self.deterministic = deterministic
+        self.n_jobs = n_jobs
 
     def check(self):
         descr = "decision tree param"
@@ -217,6 +221,7 @@ class DecisionTreeParam(BaseParam):
 
         self.check_nonnegative_number(self.min_child_weight, 'min_child_weight')
         self.check_boolean(self.deterministic, 'deterministic')
+        self.check_positive_integer(self.n_jobs, 'n_jobs')
 
         return True
 
@@ -99,6 +99,10 @@ ALIAS = {
     ('jaccard', ): JACCARD_SIMILARITY_SCORE
 }
 
+# evaluation modes of binary metrics
+EVAL_EXACT = 'exact'
+EVAL_APPROX = 'approx'
+
 # default evaluation metrics
 DEFAULT_BINARY_METRIC = [AUC, KS]
 DEFAULT_REGRESSION_METRIC = [ROOT_MEAN_SQUARED_ERROR, MEAN_ABSOLUTE_ERROR]
@@ -35,10 +35,20 @@ class EvaluateParam(BaseParam):
 
     need_run: bool, default True
         Indicate if this module needed to be run
+
+    eval_mode: {'exact', 'approx'}, default 'exact'
+        binary metrics are computed from histograms of predict scores built and merged partition by partition,
+        predict results are not collected. 'exact' keeps an entry for every distinct score and gives the same
+        metrics as computing on all predict results; 'approx' groups scores into bin_num equal-width bins, thresholds
+        of curves are chosen among bins. To bound memory, 'exact' falls back to grouping scores into 1000000
+        equal-width bins if there are more samples than that.
+
+    bin_num: int, default 10000, number of score bins in 'approx' eval_mode
     """
 
     def __init__(self, eval_type="binary", pos_label=1, need_run=True, metrics=None,
-                 run_clustering_arbiter_metric=False, unfold_multi_result=False):
+                 run_clustering_arbiter_metric=False, unfold_multi_result=False, eval_mode=consts.EVAL_EXACT,
+                 bin_num=10000):
         super().__init__()
         self.eval_type = eval_type
         self.pos_label = pos_label
@@ -46,6 +56,8 @@ class EvaluateParam(BaseParam):
         self.metrics = metrics
         self.unfold_multi_result = unfold_multi_result
         self.run_clustering_arbiter_metric = run_clustering_arbiter_metric
+        self.eval_mode = eval_mode
+        self.bin_num = bin_num
 
         self.default_metrics = {
             consts.BINARY: consts.ALL_BINARY_METRICS,
@@ -135,6 +147,10 @@ class EvaluateParam(BaseParam):
 
         self.check_boolean(self.unfold_multi_result, 'multi_result_unfold')
 
+        self.eval_mode = self.check_and_change_lower(self.eval_mode, [consts.EVAL_EXACT, consts.EVAL_APPROX],
+                                                     descr + "eval_mode")
+        self.check_positive_integer(self.bin_num, descr + "bin_num")
+
         self.metrics = self._check_valid_metric(self.metrics)
 
         LOGGER.info("Finish evaluation parameter check!")
@@ -28,13 +28,16 @@ class KmeansParam(BaseParam):
     max_iter : int, default 300.
         Maximum number of iterations of the hetero-k-means algorithm to run.
     tol : float, default 0.001。
+    mini_batch_fraction : None or float in (0, 1], default None.
+        If set, every iteration updates centroids with a fraction of data blocks sampled randomly.
 
     """
-    def __init__(self, k=5, max_iter=300, tol=0.001):
+    def __init__(self, k=5, max_iter=300, tol=0.001, mini_batch_fraction=None):
         super(KmeansParam, self).__init__()
         self.k = k
         self.max_iter = max_iter
         self.tol = tol
+        self.mini_batch_fraction = mini_batch_fraction
 
     def check(self):
         descr = "Kmeans_param's"
@@ -60,5 +63,15 @@ class KmeansParam(BaseParam):
             raise ValueError(
                 descr + "tol not supported, should be larger than or equal to 0".format(self.tol))
 
+        if self.mini_batch_fraction is not None:
+            if not isinstance(self.mini_batch_fraction, (float, int)) or isinstance(self.mini_batch_fraction, bool):
+                raise ValueError(
+                    descr + "mini_batch_fraction {} not supported, should be float type".format(
+                        self.mini_batch_fraction))
+            elif not 0 < self.mini_batch_fraction <= 1:
+                raise ValueError(
+                    descr + "mini_batch_fraction {} not supported, should be in (0, 1]".format(
+                        self.mini_batch_fraction))
+
 
 
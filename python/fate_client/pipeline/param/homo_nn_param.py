@@ -23,6 +23,7 @@ from types import SimpleNamespace
 from pipeline.param.base_param import BaseParam
 from pipeline.param.cross_validation_param import CrossValidationParam
 from pipeline.param.predict_param import PredictParam
+from pipeline.param.staleness_param import StalenessParam
 import json
 
 
@@ -54,6 +55,10 @@ class HomoNNParam(BaseParam):
                 b)  weight_diff: Use difference between weights of two consecutive iterations
                 c)	abs: Use the absolute value of loss to judge whether converge. i.e. if loss < eps, it is converged.
         encode_label : encode label to one_hot.
+        aggregate_fan_in: int or None, if set, clients sum their models through an aggregation tree with this fan-in,
+            and arbiter receives one pre-aggregated model per subtree. Should be no less than 2. defaults to None.
+        staleness_param: StalenessParam object, bounded-staleness aggregation setting, in which arbiter aggregates
+            once a quorum of models arrived. Can't be enabled together with aggregation tree.
     """
 
     def __init__(self,
@@ -68,6 +73,8 @@ class HomoNNParam(BaseParam):
                  batch_size: int = -1,
                  early_stop: typing.Union[str, dict, SimpleNamespace] = "diff",
                  encode_label: bool = False,
+                 aggregate_fan_in: int = None,
+                 staleness_param=StalenessParam(),
                  predict_param=PredictParam(),
                  cv_param=CrossValidationParam()):
         super(HomoNNParam, self).__init__()
@@ -85,6 +92,8 @@ class HomoNNParam(BaseParam):
         self.metrics = metrics
         self.optimizer = optimizer
         self.loss = loss
+        self.aggregate_fan_in = aggregate_fan_in
+        self.staleness_param = copy.deepcopy(staleness_param)
 
         self.predict_param = copy.deepcopy(predict_param)
         self.cv_param = copy.deepcopy(cv_param)
@@ -96,6 +105,12 @@ class HomoNNParam(BaseParam):
         self.early_stop = _parse_early_stop(self.early_stop)
         self.metrics = _parse_metrics(self.metrics)
         self.optimizer = _parse_optimizer(self.optimizer)
+        if self.aggregate_fan_in is not None and \
+                (type(self.aggregate_fan_in).__name__ != "int" or self.aggregate_fan_in < 2):
+            raise ValueError(f"aggregate_fan_in should be None or int no less than 2, got {self.aggregate_fan_in}")
+        self.staleness_param.check()
+        if self.staleness_param.enable and self.aggregate_fan_in is not None:
+            raise ValueError("bounded-staleness aggregation and aggregation tree can't be enabled together")
 
     def restore_from_pb(self, pb):
         self.secure_aggregate = pb.secure_aggregate
@@ -26,6 +26,7 @@ from pipeline.param.init_model_param import InitParam
 from pipeline.param.predict_param import PredictParam
 from pipeline.param.stepwise_param import StepwiseParam
 from pipeline.param.sqn_param import StochasticQuasiNewtonParam
+from pipeline.param.staleness_param import StalenessParam
 from pipeline.param import consts
 
 
@@ -256,6 +257,20 @@ class HomoLogisticParam(LogisticParam):
     mu: float, default 0.1
         To scale the proximal term
 
+    aggregate_fan_in: int or None, default: None
+        If set, guest and hosts sum their models through an aggregation tree with this fan-in,
+        and arbiter receives one pre-aggregated model per subtree. Should be no less than 2,
+        and is not supported when hosts encrypt their models by paillier.
+
+    staleness_param: StalenessParam object, default: default StalenessParam object
+        Bounded-staleness aggregation setting, arbiter aggregates once a quorum of models arrived.
+        Not supported when hosts encrypt their models by paillier, or together with aggregation tree.
+
+    secure_aggregate: bool, default: True
+        Whether guest and hosts mask their models by random pads before sending them to arbiter.
+        In bounded-staleness mode, late models are merged in later rounds only if it is False,
+        since masked models missing their round can't be unmasked without revealing them to arbiter.
+
     """
     def __init__(self, penalty='L2',
                  tol=1e-4, alpha=1.0, optimizer='rmsprop',
@@ -269,7 +284,10 @@ class HomoLogisticParam(LogisticParam):
                  metrics=['auc', 'ks'], floating_point_precision=23,
                  use_first_metric_only=False,
                  use_proximal=False,
-                 mu=0.1
+                 mu=0.1,
+                 aggregate_fan_in=None,
+                 staleness_param=StalenessParam(),
+                 secure_aggregate=True
                  ):
         super(HomoLogisticParam, self).__init__(penalty=penalty, tol=tol, alpha=alpha, optimizer=optimizer,
                                                 batch_size=batch_size,
@@ -286,6 +304,9 @@ class HomoLogisticParam(LogisticParam):
         self.aggregate_iters = aggregate_iters
         self.use_proximal = use_proximal
         self.mu = mu
+        self.aggregate_fan_in = aggregate_fan_in
+        self.staleness_param = copy.deepcopy(staleness_param)
+        self.secure_aggregate = secure_aggregate
 
     def check(self):
         super().check()
@@ -312,6 +333,26 @@ class HomoLogisticParam(LogisticParam):
         if self.optimizer == 'sqn':
             raise ValueError("'sqn' optimizer is supported for hetero mode only.")
 
+        if self.aggregate_fan_in is not None:
+            if type(self.aggregate_fan_in).__name__ != "int" or self.aggregate_fan_in < 2:
+                raise ValueError(
+                    "logistic_param's aggregate_fan_in {} not supported, should be None or int no less than 2".format(
+                        self.aggregate_fan_in))
+            if self.encrypt_param.method == consts.PAILLIER:
+                raise ValueError("aggregation tree is not supported in Paillier encryption mode.")
+
+        self.staleness_param.check()
+        if self.staleness_param.enable:
+            if self.encrypt_param.method == consts.PAILLIER:
+                raise ValueError("bounded-staleness aggregation is not supported in Paillier encryption mode.")
+            if self.aggregate_fan_in is not None:
+                raise ValueError("bounded-staleness aggregation and aggregation tree can't be enabled together.")
+
+        if type(self.secure_aggregate).__name__ != "bool":
+            raise ValueError(
+                "logistic_param's secure_aggregate {} not supported, should be bool type".format(
+                    self.secure_aggregate))
+
         return True
 
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+################################################################################
+
+from pipeline.param.base_param import BaseParam
+
+
+class StalenessParam(BaseParam):
+    """
+    Define bounded-staleness aggregation of homo models, in which arbiter doesn't wait for stragglers.
+
+    Parameters
+    ----------
+    enable : bool, default: False
+        Whether to aggregate in bounded-staleness mode.
+
+    quorum : int or None, default: None
+        Aggregate as soon as this many clients' models arrived, None means all clients.
+
+    deadline : float or None, default: None
+        Once quorum is reached, keep waiting for remaining models until this many seconds since start of the round.
+        None means no extra waiting.
+
+    max_staleness : int, default: 0
+        Models arriving at most this many rounds late are merged in later rounds, older ones are dropped.
+        Takes effect only if secure aggregate is disabled, e.g. secure_aggregate of homo LR or homo NN is False.
+        With secure aggregate, late masked models are always rejected, since pads they share with present clients
+        have been revealed to arbiter when recovering masks of their round, so unmasking them would reveal
+        single clients' models.
+
+    staleness_decay : float, default: 0.5
+        Late models are weighted by (1 + staleness) ^ (-staleness_decay).
+
+    """
+
+    def __init__(self, enable=False, quorum=None, deadline=None, max_staleness=0, staleness_decay=0.5):
+        super(StalenessParam, self).__init__()
+        self.enable = enable
+        self.quorum = quorum
+        self.deadline = deadline
+        self.max_staleness = max_staleness
+        self.staleness_decay = staleness_decay
+
+    def check(self):
+        descr = "staleness param's"
+        self.check_boolean(self.enable, descr + " enable")
+        if self.quorum is not None:
+            self.check_positive_integer(self.quorum, descr + " quorum")
+        if self.deadline is not None:
+            self.check_nonnegative_number(self.deadline, descr + " deadline")
+        if type(self.max_staleness).__name__ not in ["int", "long"] or self.max_staleness < 0:
+            raise ValueError(descr + " max_staleness {} not supported, should be non-negative integer".format(
+                self.max_staleness))
+        self.check_nonnegative_number(self.staleness_decay, descr + " staleness_decay")
+        return True
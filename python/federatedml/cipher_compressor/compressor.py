@@ -1,9 +1,39 @@
 import math
 from abc import ABC
 from abc import abstractmethod
+from concurrent import futures
+from federatedml.secureprotol import gmpy_math
+from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
 from federatedml.util import consts
 from typing import List
 
+import numpy as np
+
+# bit fields no wider than this are unpacked by int64 numpy ops
+_MAX_INT64_FIELD_BITS = 62
+
+
+def unpack_fields(compressed_plain_text, field_bits, field_num):
+    """
+    split lowest field_num * field_bits bits of compressed_plain_text into field_num unsigned ints,
+    the first field is the most significant one
+    """
+    total_bits = field_bits * field_num
+    compressed_plain_text &= (1 << total_bits) - 1
+    if field_bits > _MAX_INT64_FIELD_BITS:
+        fields = []
+        for _ in range(field_num):
+            fields.append(compressed_plain_text & ((1 << field_bits) - 1))
+            compressed_plain_text >>= field_bits
+        fields.reverse()
+        return np.array(fields, dtype=object)
+
+    byte_num = (total_bits + 7) // 8
+    bits = np.unpackbits(np.frombuffer(compressed_plain_text.to_bytes(byte_num, 'big'), dtype=np.uint8))
+    bits = bits[byte_num * 8 - total_bits:].reshape(field_num, field_bits).astype(np.int64)
+    weights = np.left_shift(1, np.arange(field_bits - 1, -1, -1, dtype=np.int64))
+    return bits @ weights
+
 
 class CipherPackage(ABC):
 
@@ -38,6 +68,13 @@ class NormalCipherPackage(CipherPackage):
 
         if self._cipher_text is None:
             self._cipher_text = cipher_text
+        elif self._is_raw_paillier_addable(cipher_text):
+            # Horner step on raw paillier ciphertexts: E(a) ** padding_num * E(b) = E(a * padding_num + b)
+            public_key = cipher_text.public_key
+            shifted = gmpy_math.powmod(self._cipher_text.ciphertext(False), self._padding_num, public_key.nsquare)
+            self._cipher_text = PaillierEncryptedNumber(public_key,
+                                                        shifted * cipher_text.ciphertext(False) % public_key.nsquare,
+                                                        cipher_text.exponent)
         else:
             self._cipher_text = self._cipher_text * self._padding_num
             self._cipher_text = self._cipher_text + cipher_text
@@ -46,17 +83,25 @@ class NormalCipherPackage(CipherPackage):
         if self._capacity_left == 0:
             self._has_space = False
 
+    def _is_raw_paillier_addable(self, cipher_text):
+        return isinstance(cipher_text, PaillierEncryptedNumber) and \
+            isinstance(self._cipher_text, PaillierEncryptedNumber) and \
+            self._cipher_text.public_key == cipher_text.public_key and \
+            self._cipher_text.exponent == cipher_text.exponent
+
     def unpack(self, decrypter):
+        return self.unpack_decrypted(int(decrypter.decrypt(self._cipher_text)))
 
-        unpack_result = []
-        compressed_plain_text = int(decrypter.decrypt(self._cipher_text))
-        bit_len = (self._padding_num - 1).bit_length()
-        for i in range(self.cur_cipher_contained()):
-            num = (compressed_plain_text & (self._padding_num - 1)) / (10 ** self._round_decimal)
-            compressed_plain_text = compressed_plain_text >> bit_len
-            unpack_result.insert(0, num)
+    def unpack_decrypted(self, compressed_plain_text):
+        """
+        unpack decrypted plain text of this package into a list of numbers
+        """
+        return self.unpack_array(compressed_plain_text).tolist()
 
-        return unpack_result
+    def unpack_array(self, compressed_plain_text):
+        bit_len = (self._padding_num - 1).bit_length()
+        fields = unpack_fields(compressed_plain_text, bit_len, self.cur_cipher_contained())
+        return fields / (10 ** self._round_decimal)
 
     def has_space(self):
         return self._has_space
@@ -90,17 +135,44 @@ class CipherEncoder(object):  # this class encode to large integer
 
 class CipherDecompressor(object):  # this class endcode and unzip cipher package
 
-    def __init__(self, encrypter):
+    def __init__(self, encrypter, max_workers=1):
+        """
+        Parameters
+        ----------
+        encrypter: decrypter of packages
+        max_workers: number of processes to decrypt packages, decrypt in current process if it is 1
+        """
         self.encrypter = encrypter
+        self.max_workers = max_workers
+
+    def decrypt_packages(self, packages: List[CipherPackage]):
+
+        cipher_texts = [p.retrieve() for p in packages]
+        if self.max_workers > 1 and len(cipher_texts) > 1:
+            chunk_size = max(1, len(cipher_texts) // (self.max_workers * 4))
+            with futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                plain_texts = list(executor.map(self.encrypter.decrypt, cipher_texts, chunksize=chunk_size))
+        else:
+            plain_texts = [self.encrypter.decrypt(c) for c in cipher_texts]
+        return [int(p) for p in plain_texts]
 
     def unpack(self, packages: List[CipherPackage]):
 
         rs_list = []
-        for p in packages:
-            rs_list.extend(p.unpack(self.encrypter))
+        for p, plain_text in zip(packages, self.decrypt_packages(packages)):
+            rs_list.extend(p.unpack_decrypted(plain_text))
 
         return rs_list
 
+    def unpack_array(self, packages: List[NormalCipherPackage]):
+        """
+        unpack numbers in packages into one numpy array
+        """
+        if not packages:
+            return np.array([])
+        return np.concatenate([p.unpack_array(plain_text)
+                               for p, plain_text in zip(packages, self.decrypt_packages(packages))])
+
 
 class CipherCompressor(object):
 
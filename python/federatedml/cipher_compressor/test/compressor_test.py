@@ -0,0 +1,94 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+
+import numpy as np
+
+from federatedml.cipher_compressor.compressor import CipherCompressor, CipherDecompressor, CipherEncoder, \
+    NormalCipherPackage, unpack_fields
+from federatedml.secureprotol import PaillierEncrypt
+from federatedml.util import consts
+
+
+def _unpack_by_shift(compressed_plain_text, field_bits, field_num):
+    fields = []
+    for _ in range(field_num):
+        fields.insert(0, compressed_plain_text & ((1 << field_bits) - 1))
+        compressed_plain_text >>= field_bits
+    return fields
+
+
+class TestCipherCompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.round_decimal = 7
+        self.encrypter = PaillierEncrypt()
+        self.encrypter.generate_key(1024)
+        self.values = np.random.random(50) + 1000
+        self.encoder = CipherEncoder(round_decimal=self.round_decimal)
+        self.compressor = CipherCompressor(consts.PAILLIER, self.values.max(), self.encrypter.public_key.max_int,
+                                           NormalCipherPackage, self.round_decimal)
+
+    def _packages(self):
+        return self.compressor.compress(self.encoder.encode_and_encrypt(self.values, self.encrypter))
+
+    def test_unpack_fields(self):
+        for field_bits, field_num in [(1, 7), (13, 5), (62, 3), (63, 3), (100, 4)]:
+            fields = [np.random.randint(0, 2 ** min(field_bits, 62)) for _ in range(field_num)]
+            fields[0] = (1 << field_bits) - 1
+            packed = 0
+            for f in fields:
+                packed = (packed << field_bits) | f
+            # bits above field_num * field_bits are ignored
+            packed |= 1 << (field_bits * field_num)
+            unpacked = unpack_fields(packed, field_bits, field_num)
+            self.assertListEqual([int(f) for f in unpacked], _unpack_by_shift(packed, field_bits, field_num))
+            self.assertListEqual([int(f) for f in unpacked], fields)
+
+    def test_horner_packing(self):
+        padding_length = 40
+        package = NormalCipherPackage(padding_length, max_capacity=3, round_decimal=self.round_decimal)
+        plain = [123, 0, 2 ** padding_length - 1]
+        for p in plain:
+            package.add(self.encrypter.encrypt(p))
+        expect = (plain[0] << (2 * padding_length)) + (plain[1] << padding_length) + plain[2]
+        self.assertEqual(int(self.encrypter.decrypt(package.retrieve())), expect)
+
+        # mixed exponents fall back to encrypted number arithmetic
+        mixed = NormalCipherPackage(padding_length, max_capacity=2, round_decimal=self.round_decimal)
+        mixed.add(self.encrypter.encrypt(7))
+        mixed.add(self.encrypter.encrypt(0.5) * 2)
+        self.assertEqual(int(self.encrypter.decrypt(mixed.retrieve())), (7 << padding_length) + 1)
+
+    def test_decrypt_packages(self):
+        packages = self._packages()
+        expect = [int(self.encrypter.decrypt(p.retrieve())) for p in packages]
+        self.assertListEqual(CipherDecompressor(self.encrypter).decrypt_packages(packages), expect)
+        self.assertListEqual(CipherDecompressor(self.encrypter, max_workers=2).decrypt_packages(packages), expect)
+
+    def test_unpack_array(self):
+        packages = self._packages()
+        decompressor = CipherDecompressor(self.encrypter)
+        unpacked = decompressor.unpack_array(packages)
+        self.assertEqual(unpacked.shape, self.values.shape)
+        self.assertTrue(np.allclose(unpacked, self.values, atol=10 ** -self.round_decimal * 2))
+        self.assertListEqual(unpacked.tolist(), decompressor.unpack(packages))
+        self.assertEqual(decompressor.unpack_array([]).size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
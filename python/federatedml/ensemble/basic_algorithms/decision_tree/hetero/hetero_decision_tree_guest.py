@@ -514,7 +514,8 @@ class HeteroDecisionTreeGuest(DecisionTree):
                                                    round_decimal=self.round_decimal, max_sample_weights=self.max_sample_weight)
 
         self.cipher_decompressor = GuestSplitInfoDecompressor(self.encrypter, task_type=consts.CLASSIFICATION,
-                                                              max_sample_weight=self.max_sample_weight)
+                                                              max_sample_weight=self.max_sample_weight,
+                                                              max_workers=self.n_jobs)
 
         max_capacity_int = self.encrypter.public_key.max_int
         para = {'max_capacity_int': max_capacity_int, 'en_type': self.get_encrypt_type(),
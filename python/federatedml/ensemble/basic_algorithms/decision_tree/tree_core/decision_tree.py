@@ -93,6 +93,9 @@ class DecisionTree(BasicAlgorithms, ABC):
         if self.deterministic:
             self.hist_computer.stable_reduce = True
 
+        # processes to decrypt host split info
+        self.n_jobs = tree_param.n_jobs
+
     def get_feature_importance(self):
         return self.feature_importance
 
@@ -36,8 +36,8 @@ class SplitInfoPackage(NormalCipherPackage):
     def has_space(self):
         return self._capacity_left - 2 >= 0  # g and h
 
-    def unpack(self, decrypter):
-        unpack_rs = super(SplitInfoPackage, self).unpack(decrypter)
+    def unpack_decrypted(self, compressed_plain_text):
+        unpack_rs = super(SplitInfoPackage, self).unpack_decrypted(compressed_plain_text)
         g_list, h_list = unpack_rs[0::2], unpack_rs[1::2]
         for split_info, g, h in zip(self._split_info_without_gh, g_list, h_list):
             split_info.sum_grad = g
@@ -72,8 +72,9 @@ class GuestGradHessEncoder(object):
 
 class GuestSplitInfoDecompressor(object):
 
-    def __init__(self, encrypter, task_type=consts.CLASSIFICATION, max_sample_weight=1):
+    def __init__(self, encrypter, task_type=consts.CLASSIFICATION, max_sample_weight=1, max_workers=1):
         self.encrypter = encrypter
+        self.max_workers = max_workers
         self.decompressor = {}
         self.g_offset, self.h_offset, self.g_max, self.h_max = get_g_h_info(task_type, max_sample_weight)
 
@@ -81,7 +82,7 @@ class GuestSplitInfoDecompressor(object):
 
         self.decompressor = {}  # initialize new decompressors
         for node_id, idx in node_map.items():
-            self.decompressor[node_id] = CipherDecompressor(self.encrypter)
+            self.decompressor[node_id] = CipherDecompressor(self.encrypter, max_workers=self.max_workers)
 
     def unpack_split_info(self, node_id, packages):
 
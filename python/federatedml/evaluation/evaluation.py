@@ -20,7 +20,8 @@ from fate_flow.entity.metric import Metric, MetricMeta
 from federatedml.param import EvaluateParam
 from federatedml.util import consts
 from federatedml.model_base import ModelBase
-from federatedml.evaluation.metric_interface import MetricInterface
+from federatedml.evaluation.metric_interface import MetricInterface, HistogramMetricInterface
+from federatedml.evaluation.metrics.histogram_metric import ScoreHistogram
 
 import numpy as np
 
@@ -60,8 +61,14 @@ class Evaluation(ModelBase):
         # where to call metric computations
         self.metric_interface: MetricInterface = None
 
+        # binary metrics are computed from score histograms instead of collected predict results
+        self.histogram_metric_interface = HistogramMetricInterface()
+        self.eval_mode = consts.EVAL_EXACT
+        self.bin_num = None
+
         self.psi_train_scores, self.psi_validate_scores = None, None
         self.psi_train_labels, self.psi_validate_labels = None, None
+        self.psi_train_histogram, self.psi_validate_histogram = None, None
 
         # multi unfold setting
         self.need_unfold_multi_result = False
@@ -76,6 +83,8 @@ class Evaluation(ModelBase):
         self.need_unfold_multi_result = self.model_param.unfold_multi_result
         self.metrics = model.metrics
         self.metric_interface = MetricInterface(pos_label=self.pos_label, eval_type=self.eval_type, )
+        self.eval_mode = self.model_param.eval_mode
+        self.bin_num = self.model_param.bin_num
 
     def _run_data(self, data_sets=None, stage=None):
         if not self.need_run:
@@ -166,6 +175,16 @@ class Evaluation(ModelBase):
         return (true_cluster_index, predicted_cluster_index, run_intra_metrics) if not run_intra_metrics else \
             (intra_cluster_data, inter_cluster_dist, run_intra_metrics)
 
+    @staticmethod
+    def _replace_inf(res):
+        try:
+            if math.isinf(res):
+                res = float(-9999999)
+                LOGGER.info("res is inf, set to {}".format(res))
+        except:
+            pass
+        return res
+
     def _evaluate_classification_and_regression_metrics(self, mode, data):
 
         labels, pred_results = self._classification_and_regression_extract(data)
@@ -174,13 +193,7 @@ class Evaluation(ModelBase):
             if eval_metric not in self.special_metric_list:
                 res = getattr(self.metric_interface, eval_metric)(labels, pred_results)
                 if res is not None:
-                    try:
-                        if math.isinf(res):
-                            res = float(-9999999)
-                            LOGGER.info("res is inf, set to {}".format(res))
-                    except:
-                        pass
-
+                    res = self._replace_inf(res)
                     eval_result[eval_metric].append(mode)
                     eval_result[eval_metric].append(res)
 
@@ -202,6 +215,32 @@ class Evaluation(ModelBase):
 
         return eval_result
 
+    def _evaluate_binary_metrics_with_histogram(self, mode, histogram):
+
+        eval_result = defaultdict(list)
+        for eval_metric in self.metrics:
+            if eval_metric not in self.special_metric_list:
+                res = getattr(self.histogram_metric_interface, eval_metric)(histogram)
+                if res is not None:
+                    res = self._replace_inf(res)
+                    eval_result[eval_metric].append(mode)
+                    eval_result[eval_metric].append(res)
+
+            elif eval_metric == consts.PSI:
+                if mode == 'train':
+                    self.psi_train_histogram = histogram
+                elif mode == 'validate':
+                    self.psi_validate_histogram = histogram
+
+                if self.psi_train_histogram is not None and self.psi_validate_histogram is not None:
+                    res = self.histogram_metric_interface.psi(self.psi_train_histogram, self.psi_validate_histogram)
+                    eval_result[eval_metric].append(mode)
+                    eval_result[eval_metric].append(res)
+                    # delete saved histograms after computing a psi pair
+                    self.psi_train_histogram, self.psi_validate_histogram = None, None
+
+        return eval_result
+
     def _evaluate_clustering_metrics(self, mode, data):
 
         eval_result = defaultdict(list)
@@ -316,6 +355,14 @@ class Evaluation(ModelBase):
                 LOGGER.debug('data with {} is None, skip metric computation'.format(key))
                 continue
 
+            if self.eval_type == consts.BINARY:
+                bin_num = self.bin_num if self.eval_mode == consts.EVAL_APPROX else None
+                histograms = ScoreHistogram.from_table(eval_data, pos_label=self.pos_label, bin_num=bin_num)
+                for mode in sorted(histograms):
+                    eval_result = self._evaluate_binary_metrics_with_histogram(mode, histograms[mode])
+                    self.eval_results[key].append(eval_result)
+                continue
+
             eval_data_local = list(eval_data.collect())
             if len(eval_data_local) == 0:
                 continue
@@ -8,6 +8,7 @@ from federatedml.util import LOGGER
 from federatedml.evaluation.metrics import classification_metric
 from federatedml.evaluation.metrics import regression_metric
 from federatedml.evaluation.metrics import clustering_metric
+from federatedml.evaluation.metrics import histogram_metric
 
 from functools import wraps
 
@@ -467,3 +468,104 @@ class MetricInterface(object):
         """
         return clustering_metric.DistanceMeasure().compute(cluster_avg_intra_dist, cluster_inter_dist, max_radius)
 
+
+class HistogramMetricInterface(object):
+    """
+    binary classification metrics computed from ScoreHistogram instead of labels and predict scores, results are
+    in the same format as those of MetricInterface
+    """
+
+    @staticmethod
+    def __to_int_list(array: np.ndarray):
+        return list(map(int, list(array)))
+
+    @staticmethod
+    def auc(histogram):
+        return histogram_metric.AUC.compute(histogram)
+
+    @staticmethod
+    def roc(histogram):
+        return histogram_metric.ROC.compute(histogram)
+
+    @staticmethod
+    def ks(histogram):
+        return histogram_metric.KS.compute(histogram)
+
+    @staticmethod
+    def lift(histogram):
+        confusion_mat, score_threshold, _ = histogram_metric.prepare_confusion_mat(histogram, add_to_end=False)
+        lifts_y, lifts_x = classification_metric.Lift().compute_metric_from_confusion_mat(confusion_mat,
+                                                                                           histogram.total_num)
+        return lifts_y, lifts_x, list(score_threshold)
+
+    @staticmethod
+    def gain(histogram):
+        confusion_mat, score_threshold, _ = histogram_metric.prepare_confusion_mat(histogram, add_to_end=False)
+        gain_y, gain_x = classification_metric.Gain().compute_metric_from_confusion_mat(confusion_mat,
+                                                                                         histogram.total_num)
+        return gain_y, gain_x, list(score_threshold)
+
+    @staticmethod
+    def precision(histogram):
+        confusion_mat, score_threshold, cuts = histogram_metric.prepare_confusion_mat(histogram)
+        metric_scores = classification_metric.BiClassPrecision().compute_metric_from_confusion_mat(confusion_mat)
+        return list(metric_scores), cuts, score_threshold
+
+    @staticmethod
+    def recall(histogram):
+        confusion_mat, score_threshold, cuts = histogram_metric.prepare_confusion_mat(histogram)
+        metric_scores = classification_metric.BiClassRecall().compute_metric_from_confusion_mat(confusion_mat)
+        return list(metric_scores), cuts, score_threshold
+
+    @staticmethod
+    def accuracy(histogram, normalize=True):
+        confusion_mat, score_threshold, cuts = histogram_metric.prepare_confusion_mat(histogram)
+        acc_res = classification_metric.BiClassAccuracy().compute_metric_from_confusion_mat(confusion_mat,
+                                                                                             normalize=normalize)
+        return list(acc_res), cuts[: len(acc_res)], score_threshold[: len(acc_res)]
+
+    @staticmethod
+    def f1_score(histogram, beta=1):
+        score_threshold, cuts = classification_metric.ThresholdCutter.cut_by_step(histogram.scores, steps=0.01)
+        score_threshold.append(0)
+        confusion_mat = histogram.confusion_mat(score_threshold)
+
+        p_score = classification_metric.BiClassPrecision().compute_metric_from_confusion_mat(confusion_mat,
+                                                                                             formatted=False)
+        r_score = classification_metric.BiClassRecall().compute_metric_from_confusion_mat(confusion_mat,
+                                                                                          formatted=False)
+        beta_2 = beta * beta
+        denominator = (beta_2 * p_score + r_score)
+        denominator[denominator == 0] = 1e-6  # in case denominator is 0
+        f_score = (1 + beta_2) * (p_score * r_score) / denominator
+
+        return list(f_score), list(cuts), list(score_threshold)
+
+    def confusion_mat(self, histogram):
+        score_threshold, cuts = classification_metric.ThresholdCutter.cut_by_step(histogram.scores, steps=0.01)
+        score_threshold.append(0)
+        confusion_mat = histogram.confusion_mat(score_threshold)
+        for ret_type in confusion_mat:
+            confusion_mat[ret_type] = self.__to_int_list(confusion_mat[ret_type])
+        return confusion_mat, cuts, score_threshold
+
+    def psi(self, train_histogram, validate_histogram):
+        psi_scores, total_psi, expected_interval, expected_percentage, actual_interval, actual_percentage, \
+            train_pos_perc, validate_pos_perc, intervals = histogram_metric.PSI.compute(train_histogram,
+                                                                                        validate_histogram,
+                                                                                        round_num=6)
+
+        return list(psi_scores), total_psi, self.__to_int_list(expected_interval), list(expected_percentage), \
+            self.__to_int_list(actual_interval), list(actual_percentage), list(train_pos_perc), \
+            list(validate_pos_perc), intervals
+
+    @staticmethod
+    def quantile_pr(histogram):
+        confusion_mat, score_threshold, _ = histogram_metric.prepare_confusion_mat(histogram, cut_method='quantile',
+                                                                                   remove_duplicate=False)
+        p_scores = classification_metric.BiClassPrecision().compute_metric_from_confusion_mat(confusion_mat)
+        r_scores = classification_metric.BiClassRecall().compute_metric_from_confusion_mat(confusion_mat)
+        p_scores = list(map(list, np.flip(p_scores, axis=0)))
+        r_scores = list(map(list, np.flip(r_scores, axis=0)))
+        score_threshold = list(np.flip(score_threshold))
+        return p_scores, r_scores, score_threshold
@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.metrics import roc_curve
+
+from federatedml.evaluation.metrics.classification_metric import ThresholdCutter, PSI as _PSI
+from federatedml.util import LOGGER
+
+# exact histograms are built for tables with no more samples than this, so that histograms held by driver are bounded
+MAX_EXACT_HISTOGRAM_SIZE = 1000000
+
+
+def _partition_score_stats(kv_iterator):
+    min_score, max_score, sample_num = np.inf, -np.inf, 0
+    for _, value in kv_iterator:
+        min_score = min(min_score, value[2])
+        max_score = max(max_score, value[2])
+        sample_num += 1
+    return min_score, max_score, sample_num
+
+
+def _merge_score_stats(stats1, stats2):
+    return min(stats1[0], stats2[0]), max(stats1[1], stats2[1]), stats1[2] + stats2[2]
+
+
+def _group_counts(keys, scores, pos_counts, neg_counts):
+    """
+    sum up counts of the same key, every key is represented by its max score
+    """
+    uniq_keys, inverse = np.unique(keys, return_inverse=True)
+    pos_counts = np.bincount(inverse, weights=pos_counts, minlength=len(uniq_keys))
+    neg_counts = np.bincount(inverse, weights=neg_counts, minlength=len(uniq_keys))
+    max_scores = np.full(len(uniq_keys), -np.inf)
+    np.maximum.at(max_scores, inverse, scores)
+    return uniq_keys, max_scores, pos_counts, neg_counts
+
+
+def _partition_histograms(kv_iterator, pos_label, score_range, bin_num):
+    labels, scores, modes = [], [], []
+    for _, value in kv_iterator:
+        labels.append(value[0] == pos_label)
+        scores.append(value[2])
+        modes.append(value[-1])
+
+    labels = np.array(labels, dtype=np.float64)
+    scores = np.array(scores, dtype=np.float64)
+    modes = np.array(modes)
+
+    if bin_num is None:
+        keys = scores
+    else:
+        min_score, max_score = score_range
+        bin_width = (max_score - min_score) / bin_num
+        if bin_width > 0:
+            keys = np.minimum(((scores - min_score) / bin_width).astype(np.int64), bin_num - 1)
+        else:
+            keys = np.zeros(len(scores), dtype=np.int64)
+
+    histograms = {}
+    for mode in np.unique(modes):
+        mask = modes == mode
+        histograms[str(mode)] = _group_counts(keys[mask], scores[mask], labels[mask], 1 - labels[mask])
+    return histograms
+
+
+def _merge_histograms(histograms1, histograms2):
+    merged = dict(histograms1)
+    for mode, histogram in histograms2.items():
+        if mode not in merged:
+            merged[mode] = histogram
+            continue
+        merged[mode] = _group_counts(*[np.concatenate([a, b]) for a, b in zip(merged[mode], histogram)])
+    return merged
+
+
+class ScoreHistogram(object):
+    """
+    numbers of positive and negative samples of every distinct predict score, scores are in descending order.
+
+    in approximate mode, scores are grouped into equal-width bins and every bin is represented by its max score:
+    confusion matrices at represented scores are still exact, but thresholds can only be chosen among bins.
+    """
+
+    def __init__(self, scores, pos_counts, neg_counts):
+        order = np.argsort(scores)[::-1]
+        self.scores = np.asarray(scores, dtype=np.float64)[order]
+        self.pos_counts = np.asarray(pos_counts).astype(np.int64)[order]
+        self.neg_counts = np.asarray(neg_counts).astype(np.int64)[order]
+
+        self._cum_pos = np.concatenate([[0], np.cumsum(self.pos_counts)])
+        self._cum_neg = np.concatenate([[0], np.cumsum(self.neg_counts)])
+        self._cum_total = self._cum_pos + self._cum_neg
+
+    @classmethod
+    def from_table(cls, eval_table, pos_label=1, bin_num=None, max_exact_size=MAX_EXACT_HISTOGRAM_SIZE):
+        """
+        build histograms of every data type(train, validate...) from table of predict results, partition by
+        partition, without collecting predict results.
+
+        Parameters
+        ----------
+        eval_table: table of [label, predict_label, predict_score, predict_detail, type]
+        pos_label: label of positive samples
+        bin_num: None for exact histograms, else number of equal-width score bins
+        max_exact_size: exact histograms have up to one entry per sample, if table has more samples than this,
+                        scores are grouped into max_exact_size equal-width bins instead
+
+        Returns
+        ----------
+        dict, data type -> ScoreHistogram
+        """
+        min_score, max_score, sample_num = eval_table.applyPartitions(_partition_score_stats).reduce(
+            _merge_score_stats)
+        score_range = (min_score, max_score)
+        if bin_num is None and sample_num > max_exact_size:
+            LOGGER.warning("{} samples exceed max size of exact score histogram, scores are grouped into {} "
+                           "equal-width bins".format(sample_num, max_exact_size))
+            bin_num = max_exact_size
+
+        def _histograms(kv_iterator):
+            return _partition_histograms(kv_iterator, pos_label, score_range, bin_num)
+
+        histograms = eval_table.applyPartitions(_histograms).reduce(_merge_histograms)
+        return {mode: cls(scores, pos_counts, neg_counts)
+                for mode, (_, scores, pos_counts, neg_counts) in histograms.items()}
+
+    @property
+    def pos_num(self):
+        return int(self._cum_pos[-1])
+
+    @property
+    def neg_num(self):
+        return int(self._cum_neg[-1])
+
+    @property
+    def total_num(self):
+        return int(self._cum_total[-1])
+
+    def confusion_mat(self, score_thresholds, ret=('tp', 'fp', 'fn', 'tn')):
+        """
+        same as ConfusionMatrix.compute, a sample is predicted positive if its score is larger than threshold
+        """
+        score_thresholds = np.asarray(score_thresholds, dtype=np.float64)
+        above_num = len(self.scores) - np.searchsorted(self.scores[::-1], score_thresholds, side='right')
+        tp = self._cum_pos[above_num]
+        fp = self._cum_neg[above_num]
+
+        ret_dict = {'tp': tp, 'fp': fp, 'fn': self.pos_num - tp, 'tn': self.neg_num - fp}
+        return {ret_type: ret_dict[ret_type] for ret_type in ret}
+
+    def score_at_rank(self, ranks):
+        """
+        scores at positions of samples sorted by score in descending order
+        """
+        return self.scores[np.searchsorted(self._cum_total[1:], ranks, side='right')]
+
+    def quantile(self, quantile_list):
+        """
+        same as np.quantile(scores, quantile_list, method='nearest')
+        """
+        ranks = np.around((self.total_num - 1) * np.asarray(quantile_list)).astype(np.int64)
+        return self.score_at_rank(self.total_num - 1 - ranks)
+
+    def count_in_intervals(self, left_bounds, right_bounds, closed='left', positive_only=False):
+        """
+        numbers of samples whose scores fall in intervals, closed is 'left' or 'both'
+        """
+        cum_counts = self._cum_pos if positive_only else self._cum_total
+        asc_scores = self.scores[::-1]
+        left_side = 'left' if closed in ['left', 'both'] else 'right'
+        right_side = 'right' if closed in ['right', 'both'] else 'left'
+        above_left = cum_counts[len(self.scores) - np.searchsorted(asc_scores, left_bounds, side=left_side)]
+        above_right = cum_counts[len(self.scores) - np.searchsorted(asc_scores, right_bounds, side=right_side)]
+        return above_left - above_right
+
+    def weighted_samples(self):
+        """
+        labels, scores and sample weights equivalent to the samples this histogram counts
+        """
+        labels = np.concatenate([np.ones(len(self.scores)), np.zeros(len(self.scores))])
+        scores = np.concatenate([self.scores, self.scores])
+        weights = np.concatenate([self.pos_counts, self.neg_counts]).astype(np.float64)
+        return labels, scores, weights
+
+
+def cut_by_index(histogram):
+    cuts = np.array([c / 100 for c in range(100)])
+    data_size = histogram.total_num
+    indexs = [int(data_size * cut) for cut in cuts]
+    score_threshold = list(histogram.score_at_rank(indexs))
+    return score_threshold, cuts
+
+
+def cut_by_quantile(histogram, quantile_list=None, remove_duplicate=True):
+    if quantile_list is None:  # default is 20 intervals
+        quantile_list = [round(i * 0.05, 3) for i in range(20)] + [1.0]
+    quantile_val = histogram.quantile(quantile_list)
+    if remove_duplicate:
+        quantile_val = sorted(list(set(quantile_val)))
+    else:
+        quantile_val = sorted(list(quantile_val))
+
+    if len(quantile_val) == 1:
+        quantile_val = [histogram.scores[-1], histogram.scores[0]]
+
+    return quantile_val
+
+
+def prepare_confusion_mat(histogram, cut_method='step', add_to_end=True, remove_duplicate=False):
+    """
+    same as BiClassMetric.prepare_confusion_mat
+    """
+    score_threshold, cuts = None, None
+
+    if cut_method == 'step':
+        score_threshold, cuts = ThresholdCutter.cut_by_step(histogram.scores, steps=0.01)
+        if add_to_end:
+            score_threshold.append(min(score_threshold) - 0.001)
+            cuts.append(1)
+
+    elif cut_method == 'quantile':
+        score_threshold = cut_by_quantile(histogram, remove_duplicate=remove_duplicate)
+        score_threshold = list(np.flip(score_threshold))
+
+    confusion_mat = histogram.confusion_mat(score_threshold)
+
+    return confusion_mat, score_threshold, cuts
+
+
+class AUC(object):
+
+    @staticmethod
+    def compute(histogram):
+        labels, scores, weights = histogram.weighted_samples()
+        return roc_auc_score(labels, scores, sample_weight=weights)
+
+
+class ROC(object):
+
+    @staticmethod
+    def compute(histogram, step=0.01):
+        labels, scores, weights = histogram.weighted_samples()
+        fpr, tpr, thresholds = roc_curve(labels, scores, sample_weight=weights, drop_intermediate=True)
+        fpr, tpr, thresholds = list(map(float, fpr)), list(map(float, tpr)), list(map(float, thresholds))
+
+        cuts = list(map(float, np.arange(0, 1, step)))
+        size = len(thresholds)
+        indexs = [int(size * cut) for cut in cuts]
+
+        return [fpr[idx] for idx in indexs], [tpr[idx] for idx in indexs], [thresholds[idx] for idx in indexs], cuts
+
+
+class KS(object):
+
+    @staticmethod
+    def compute(histogram):
+        score_threshold, cuts = cut_by_index(histogram)
+
+        confusion_mat = histogram.confusion_mat(score_threshold, ret=['tp', 'fp'])
+
+        pos_num, neg_num = histogram.pos_num, histogram.neg_num
+
+        assert pos_num > 0 and neg_num > 0, "error when computing KS metric, pos sample number and neg sample number" \
+                                            "must be larger than 0"
+
+        tpr = np.append(confusion_mat['tp'] / pos_num, np.array([1.0]))
+        fpr = np.append(confusion_mat['fp'] / neg_num, np.array([1.0]))
+        cuts = np.append(cuts, np.array([1.0]))
+
+        ks_curve = tpr[:-1] - fpr[:-1]
+        ks_val = np.max(ks_curve)
+
+        return ks_val, fpr, tpr, score_threshold, cuts
+
+
+class PSI(object):
+
+    @staticmethod
+    def compute(train_histogram, validate_histogram, round_num=3):
+        """
+        same as PSI.compute with labels and str intervals, counting samples in intervals of histograms
+        """
+        quantile_points = cut_by_quantile(train_histogram)
+        assert len(quantile_points) >= 2
+
+        # left edge and right edge of last interval are closed
+        intervals = [pd.Interval(left, right, closed='left')
+                     for left, right in zip(quantile_points[:-2], quantile_points[1:-1])]
+        intervals.append(pd.Interval(quantile_points[-2], quantile_points[-1], closed='both'))
+
+        def _count(histogram, positive_only=False):
+            return np.concatenate([histogram.count_in_intervals(quantile_points[:-2], quantile_points[1:-1],
+                                                                closed='left', positive_only=positive_only),
+                                   histogram.count_in_intervals(quantile_points[-2:-1], quantile_points[-1:],
+                                                                closed='both', positive_only=positive_only)])
+
+        train_count, validate_count = _count(train_histogram), _count(validate_histogram)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            train_pos_perc = _count(train_histogram, positive_only=True) / train_count
+            validate_pos_perc = _count(validate_histogram, positive_only=True) / validate_count
+
+        # handle special cases
+        train_pos_perc[train_pos_perc == np.inf] = -1
+        validate_pos_perc[validate_pos_perc == np.inf] = -1
+        train_pos_perc[np.isnan(train_pos_perc)] = 0
+        validate_pos_perc[np.isnan(validate_pos_perc)] = 0
+
+        psi_scores, total_psi, expected_interval, actual_interval, expected_percentage, actual_percentage \
+            = _PSI.psi_score(train_count.astype(np.float64), validate_count.astype(np.float64),
+                             train_histogram.total_num, validate_histogram.total_num)
+
+        return psi_scores, total_psi, expected_interval, expected_percentage, actual_interval, actual_percentage, \
+            train_pos_perc, validate_pos_perc, _PSI.intervals_to_str(intervals, round_num=round_num)
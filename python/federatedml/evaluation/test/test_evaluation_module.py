@@ -1,9 +1,12 @@
+import random
 import unittest
 
 import numpy as np
+from fate_arch.session import computing_session as session
 from federatedml.util import consts
 from federatedml.evaluation.metrics import classification_metric, clustering_metric, regression_metric
-from federatedml.evaluation.metric_interface import MetricInterface
+from federatedml.evaluation.metric_interface import MetricInterface, HistogramMetricInterface
+from federatedml.evaluation.metrics import histogram_metric
 
 
 class TestEvaluation(unittest.TestCase):
@@ -79,6 +82,80 @@ class TestEvaluation(unittest.TestCase):
         classification_metric.AveragePrecisionScore().compute(self.psi_train_score, self.psi_val_score,
                                                               self.psi_train_label, self.psi_val_label)
 
+    @staticmethod
+    def _histogram(labels, scores):
+        uniq_scores, inverse = np.unique(scores, return_inverse=True)
+        pos_counts = np.bincount(inverse, weights=labels)
+        neg_counts = np.bincount(inverse, weights=1 - labels)
+        return histogram_metric.ScoreHistogram(uniq_scores, pos_counts, neg_counts)
+
+    def _assert_same_result(self, rs1, rs2):
+        if isinstance(rs1, dict):
+            self.assertEqual(rs1.keys(), rs2.keys())
+            for k in rs1:
+                self._assert_same_result(rs1[k], rs2[k])
+        elif isinstance(rs1, (list, tuple, np.ndarray)):
+            self.assertEqual(len(rs1), len(rs2))
+            for v1, v2 in zip(rs1, rs2):
+                self._assert_same_result(v1, v2)
+        else:
+            self.assertAlmostEqual(rs1, rs2, places=10)
+
+    def test_histogram_binary(self):
+        print('testing histogram binary')
+        scores = np.round(self.psi_train_score, 3)  # with duplicate scores
+        labels = (np.random.random(len(scores)) < scores) + 0
+        histogram = self._histogram(labels, scores)
+
+        interface = MetricInterface(pos_label=1, eval_type=consts.BINARY)
+        histogram_interface = HistogramMetricInterface()
+        for metric in [consts.AUC, consts.KS, consts.LIFT, consts.GAIN, consts.PRECISION, consts.RECALL,
+                       consts.ACCURACY, consts.F1_SCORE, consts.CONFUSION_MAT]:
+            self._assert_same_result(getattr(interface, metric)(labels, scores),
+                                     getattr(histogram_interface, metric)(histogram))
+
+    def test_histogram_merge(self):
+        print('testing histogram merge')
+        data = [(i, [int(label), 0, float(score), {}, 'train']) for i, (label, score) in
+                enumerate(zip(self.psi_train_label, np.round(self.psi_train_score, 2)))]
+
+        partitions = [histogram_metric._partition_histograms(iter(data[i::3]), 1, None, None) for i in range(3)]
+        merged = partitions[0]
+        for partition in partitions[1:]:
+            merged = histogram_metric._merge_histograms(merged, partition)
+        _, scores, pos_counts, neg_counts = merged['train']
+        histogram = histogram_metric.ScoreHistogram(scores, pos_counts, neg_counts)
+
+        expected = self._histogram(self.psi_train_label, np.round(self.psi_train_score, 2))
+        self.assertTrue((histogram.scores == expected.scores).all())
+        self.assertTrue((histogram.pos_counts == expected.pos_counts).all())
+        self.assertTrue((histogram.neg_counts == expected.neg_counts).all())
+
+        score_range = (float(np.min(self.psi_train_score)), float(np.max(self.psi_train_score)))
+        approx = histogram_metric._partition_histograms(iter(data), 1, score_range, 10)['train']
+        self.assertLessEqual(len(approx[0]), 10)
+        self.assertEqual(approx[2].sum() + approx[3].sum(), len(data))
+
+    def test_histogram_exact_fallback(self):
+        print('testing histogram exact fallback')
+        session.init("test_histogram_exact_fallback" + str(random.random()), 0)
+        try:
+            data = [(i, [int(label), 0, float(score), {}, 'train']) for i, (label, score) in
+                    enumerate(zip(self.psi_train_label, self.psi_train_score))]
+            table = session.parallelize(data, include_key=True, partition=3)
+
+            exact = histogram_metric.ScoreHistogram.from_table(table, max_exact_size=len(data))['train']
+            self.assertEqual(len(exact.scores), len(np.unique(self.psi_train_score)))
+
+            fallback = histogram_metric.ScoreHistogram.from_table(table, max_exact_size=100)['train']
+            approx = histogram_metric.ScoreHistogram.from_table(table, bin_num=100)['train']
+            self.assertLessEqual(len(fallback.scores), 100)
+            self.assertEqual(fallback.total_num, len(data))
+            self.assertTrue((fallback.scores == approx.scores).all())
+            self.assertTrue((fallback.pos_counts == approx.pos_counts).all())
+        finally:
+            session.stop()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -19,9 +19,12 @@
 import bisect
 import functools
 import math
+import numbers
 import random
 import copy
 
+import numpy as np
+
 from federatedml.feature.binning.bin_inner_param import BinInnerParam
 from federatedml.feature.binning.bin_result import BinColResults, BinResults
 from federatedml.statistic.data_overview import get_header
@@ -164,25 +167,99 @@ class BaseBinning(object):
         data_bin_dict = data_instances.mapValues(f)
         return data_bin_dict
 
+    def get_data_bin_matrix(self, data_instances, split_points=None):
+        """
+        Same as get_data_bin, but each value is a compact unsigned int array of bin numbers,
+        ordered as bin_inner_param.bin_names, and data are binned by partition blocks.
+        Values in abnormal_list are put into bin 0, the same as nan values.
+
+        Returns
+        -------
+        data_bin_table : DTable.
+            e.g. it could be:
+            [array([1, 5, 2], dtype=uint8)
+            ...
+             ]
+        """
+        is_sparse = data_overview.is_sparse_data(data_instances)
+
+        if split_points is None:
+            split_points = self.fit_split_points(data_instances)
+
+        bin_names = self.bin_inner_param.bin_names
+        f = functools.partial(self._bin_data_block,
+                              sp_matrix=self.split_points_matrix([split_points[col_name] for col_name in bin_names]),
+                              bin_cols_idx=self.bin_inner_param.bin_indexes,
+                              dtype=self.bin_dtype({col_name: split_points[col_name] for col_name in bin_names}),
+                              is_sparse=is_sparse,
+                              abnormal_list=self.abnormal_list)
+        return data_instances.mapPartitions(f, use_previous_behavior=False, preserves_partitioning=True)
+
+    @staticmethod
+    def _bin_data_block(kv_iterator, sp_matrix, bin_cols_idx, dtype, is_sparse, abnormal_list=None):
+        keys, instances = [], []
+        for key, instance in kv_iterator:
+            keys.append(key)
+            instances.append(instance)
+        if not keys:
+            return []
+
+        if is_sparse:
+            # absent values are zeros, start from the bin 0 located at
+            zero_bins = BaseBinning.get_bin_nums(np.zeros(len(bin_cols_idx)), sp_matrix)
+            bin_matrix = np.tile(zero_bins, (len(keys), 1))
+            col_pos = {col_idx: pos for pos, col_idx in enumerate(bin_cols_idx)}
+            row_ids, positions, values = [], [], []
+            for row_id, instance in enumerate(instances):
+                for col_idx, col_value in instance.features.get_all_data():
+                    pos = col_pos.get(col_idx)
+                    if pos is not None:
+                        row_ids.append(row_id)
+                        positions.append(pos)
+                        values.append(col_value)
+            if values:
+                row_ids, positions = np.array(row_ids), np.array(positions)
+                values = BaseBinning._stack_values(values)
+                is_abnormal = BaseBinning.abnormal_mask(values, abnormal_list)
+                bin_matrix[row_ids[is_abnormal], positions[is_abnormal]] = 0
+                is_normal = ~is_abnormal
+                values = values[is_normal].astype(np.float64)
+                bin_matrix[row_ids[is_normal], positions[is_normal]] = \
+                    BaseBinning.get_bin_nums(values, sp_matrix[positions[is_normal]])
+        else:
+            features = BaseBinning._stack_values([instance.features for instance in instances])[:, bin_cols_idx]
+            bin_matrix = np.zeros(features.shape, dtype=np.int64)
+            for pos in range(len(bin_cols_idx)):
+                is_normal = ~BaseBinning.abnormal_mask(features[:, pos], abnormal_list)
+                col_values = features[is_normal, pos].astype(np.float64)
+                col_bins = np.searchsorted(sp_matrix[pos], col_values, side='left')
+                # bisect puts nan before all split points, abnormal values go to the same bin
+                col_bins[np.isnan(col_values)] = 0
+                bin_matrix[is_normal, pos] = col_bins
+
+        return list(zip(keys, bin_matrix.astype(dtype)))
+
     def convert_feature_to_woe(self, data_instances):
         is_sparse = data_overview.is_sparse_data(data_instances)
         schema = data_instances.schema
 
         if is_sparse:
-            f = functools.partial(self._convert_sparse_data,
+            f = functools.partial(self._convert_sparse_block,
                                   bin_inner_param=self.bin_inner_param,
                                   bin_results=self.bin_results,
                                   abnormal_list=self.abnormal_list,
                                   convert_type='woe'
                                   )
-            new_data = data_instances.mapValues(f)
+            new_data = data_instances.mapPartitions(f, use_previous_behavior=False,
+                                                    preserves_partitioning=True)
         else:
-            f = functools.partial(self._convert_dense_data,
+            f = functools.partial(self._convert_dense_block,
                                   bin_inner_param=self.bin_inner_param,
                                   bin_results=self.bin_results,
                                   abnormal_list=self.abnormal_list,
                                   convert_type='woe')
-            new_data = data_instances.mapValues(f)
+            new_data = data_instances.mapPartitions(f, use_previous_behavior=False,
+                                                    preserves_partitioning=True)
         new_data.schema = schema
         return new_data
 
@@ -197,20 +274,22 @@ class BaseBinning(object):
                 self.bin_results.put_col_split_points(col_name, sp)
 
         if is_sparse:
-            f = functools.partial(self._convert_sparse_data,
+            f = functools.partial(self._convert_sparse_block,
                                   bin_inner_param=self.bin_inner_param,
                                   bin_results=self.bin_results,
                                   abnormal_list=self.abnormal_list,
                                   convert_type='bin_num'
                                   )
-            new_data = data_instances.mapValues(f)
+            new_data = data_instances.mapPartitions(f, use_previous_behavior=False,
+                                                    preserves_partitioning=True)
         else:
-            f = functools.partial(self._convert_dense_data,
+            f = functools.partial(self._convert_dense_block,
                                   bin_inner_param=self.bin_inner_param,
                                   bin_results=self.bin_results,
                                   abnormal_list=self.abnormal_list,
                                   convert_type='bin_num')
-            new_data = data_instances.mapValues(f)
+            new_data = data_instances.mapPartitions(f, use_previous_behavior=False,
+                                                    preserves_partitioning=True)
         new_data.schema = schema
         bin_sparse = self.get_sparse_bin(self.bin_inner_param.transform_bin_indexes, split_points)
         split_points_result = self.bin_results.get_split_points_array(self.bin_inner_param.transform_bin_names)
@@ -244,42 +323,57 @@ class BaseBinning(object):
         self.set_bin_inner_param(self.bin_inner_param)
 
     @staticmethod
-    def _convert_sparse_data(instances, bin_inner_param: BinInnerParam, bin_results: BinResults,
-                             abnormal_list: list, convert_type: str = 'bin_num'):
-        instances = copy.deepcopy(instances)
-        all_data = instances.features.get_all_data()
-        data_shape = instances.features.get_shape()
-        indice = []
-        sparse_value = []
-        transform_cols_idx = bin_inner_param.transform_bin_indexes
-        split_points_dict = bin_results.all_split_points
+    def _convert_sparse_block(kv_iterator, bin_inner_param: BinInnerParam, bin_results: BinResults,
+                              abnormal_list: list, convert_type: str = 'bin_num'):
+        """
+        Convert a partition of sparse instances. Non-zero values of all instances are gathered into
+        flat arrays and binned at once against the stacked split points of their columns.
+        """
+        keys, instances, offsets = [], [], [0]
+        col_indices, col_values = [], []
+        for key, instance in kv_iterator:
+            for col_idx, col_value in instance.features.get_all_data():
+                col_indices.append(col_idx)
+                col_values.append(col_value)
+            keys.append(key)
+            instances.append(instance)
+            offsets.append(len(col_indices))
+        if not keys:
+            return []
 
-        for col_idx, col_value in all_data:
-            if col_idx in transform_cols_idx:
-                if col_value in abnormal_list:
-                    indice.append(col_idx)
-                    sparse_value.append(col_value)
-                    continue
-                # Maybe it is because missing value add in sparse value, but
-                col_name = bin_inner_param.header[col_idx]
-                split_points = split_points_dict[col_name]
-                bin_num = BaseBinning.get_bin_num(col_value, split_points)
-                indice.append(col_idx)
-                if convert_type == 'bin_num':
-                    sparse_value.append(bin_num)
-                elif convert_type == 'woe':
-                    col_results = bin_results.all_cols_results.get(col_name)
-                    woe_value = col_results.woe_array[bin_num]
-                    sparse_value.append(woe_value)
-                else:
-                    sparse_value.append(col_value)
+        transform_cols_idx = bin_inner_param.transform_bin_indexes
+        col_indices = np.array(col_indices, dtype=np.int64)
+        converted = np.empty(len(col_values), dtype=object)
+        converted[:] = col_values
+
+        # row of each column in stacked split points, -1 for columns not to transform
+        col_pos = np.full(len(bin_inner_param.header), -1, dtype=np.int64)
+        col_pos[transform_cols_idx] = np.arange(len(transform_cols_idx))
+        value_pos = col_pos[col_indices]
+        to_convert = value_pos >= 0
+        to_convert[to_convert] = ~BaseBinning.abnormal_mask(converted[to_convert], abnormal_list)
+
+        if convert_type in ('bin_num', 'woe') and to_convert.any():
+            transform_names = [bin_inner_param.header[col_idx] for col_idx in transform_cols_idx]
+            sp_matrix = BaseBinning.split_points_matrix(
+                [bin_results.all_split_points[col_name] for col_name in transform_names])
+            value_pos = value_pos[to_convert]
+            bin_nums = BaseBinning.get_bin_nums(converted[to_convert].astype(np.float64), sp_matrix[value_pos])
+            if convert_type == 'bin_num':
+                converted[to_convert] = bin_nums.tolist()
             else:
-                indice.append(col_idx)
-                sparse_value.append(col_value)
-
-        sparse_vector = SparseVector(indice, sparse_value, data_shape)
-        instances.features = sparse_vector
-        return instances
+                woe_matrix = BaseBinning._woe_matrix(transform_names, bin_results)
+                converted[to_convert] = woe_matrix[value_pos, bin_nums].tolist()
+
+        result = []
+        col_indices = col_indices.tolist()
+        for i, (key, instance) in enumerate(zip(keys, instances)):
+            start, end = offsets[i], offsets[i + 1]
+            instance = copy.copy(instance)
+            instance.features = SparseVector(col_indices[start: end], converted[start: end].tolist(),
+                                             instance.features.get_shape())
+            result.append((key, instance))
+        return result
 
     def get_sparse_bin(self, transform_cols_idx, split_points_dict):
         """
@@ -299,34 +393,109 @@ class BaseBinning(object):
         return result
 
     @staticmethod
-    def _convert_dense_data(instances, bin_inner_param: BinInnerParam, bin_results: BinResults,
-                            abnormal_list: list, convert_type: str = 'bin_num'):
-        instances = copy.deepcopy(instances)
-        features = instances.features
-        transform_cols_idx = bin_inner_param.transform_bin_indexes
-        split_points_dict = bin_results.all_split_points
-
-        transform_cols_idx_set = set(transform_cols_idx)
-
-        for col_idx, col_value in enumerate(features):
-            if col_idx in transform_cols_idx_set:
-                if col_value in abnormal_list:
-                    features[col_idx] = col_value
-                    continue
-                col_name = bin_inner_param.header[col_idx]
-                split_points = split_points_dict[col_name]
-                bin_num = BaseBinning.get_bin_num(col_value, split_points)
+    def _convert_dense_block(kv_iterator, bin_inner_param: BinInnerParam, bin_results: BinResults,
+                             abnormal_list: list, convert_type: str = 'bin_num'):
+        """
+        Convert a partition of dense instances. Features are stacked into a matrix and each
+        transform column is binned by np.searchsorted, abnormal values are kept by mask.
+        """
+        keys, instances = [], []
+        for key, instance in kv_iterator:
+            keys.append(key)
+            instances.append(instance)
+        if not keys:
+            return []
+
+        features = np.array([instance.features for instance in instances])
+        if convert_type in ('bin_num', 'woe'):
+            transform_cols_idx = bin_inner_param.transform_bin_indexes
+            transform_names = [bin_inner_param.header[col_idx] for col_idx in transform_cols_idx]
+            sp_matrix = BaseBinning.split_points_matrix(
+                [bin_results.all_split_points[col_name] for col_name in transform_names])
+            if convert_type == 'woe':
+                woe_matrix = BaseBinning._woe_matrix(transform_names, bin_results)
+
+            for pos, col_idx in enumerate(transform_cols_idx):
+                col_values = features[:, col_idx]
+                is_normal = ~BaseBinning.abnormal_mask(col_values, abnormal_list)
+                col_values = col_values[is_normal].astype(np.float64)
+                bin_nums = np.searchsorted(sp_matrix[pos], col_values, side='left')
+                # bisect puts nan before all split points
+                bin_nums[np.isnan(col_values)] = 0
                 if convert_type == 'bin_num':
-                    features[col_idx] = bin_num
-                elif convert_type == 'woe':
-                    col_results = bin_results.all_cols_results.get(col_name)
-                    woe_value = col_results.woe_array[bin_num]
-                    features[col_idx] = woe_value
+                    features[is_normal, col_idx] = bin_nums
                 else:
-                    features[col_idx] = col_value
+                    features[is_normal, col_idx] = woe_matrix[pos, bin_nums]
 
-        instances.features = features
-        return instances
+        result = []
+        for key, instance, row in zip(keys, instances, features):
+            instance = copy.copy(instance)
+            instance.features = row
+            result.append((key, instance))
+        return result
+
+    @staticmethod
+    def _stack_values(values):
+        """
+        values as an ndarray, mixed with strings such as abnormal values it is kept as objects instead of strings
+        """
+        arr = np.asarray(values)
+        if arr.dtype.kind in "US":
+            arr = np.array(values, dtype=object)
+        return arr
+
+    @staticmethod
+    def abnormal_mask(values, abnormal_list):
+        """
+        Boolean mask of values that are in abnormal_list
+        """
+        values = np.asarray(values)
+        if not abnormal_list:
+            return np.zeros(len(values), dtype=bool)
+        if values.dtype.kind in "biuf":
+            numeric_abnormal = [v for v in abnormal_list if isinstance(v, numbers.Number)]
+            return np.isin(values, numeric_abnormal)
+        return np.array([v in abnormal_list for v in values], dtype=bool)
+
+    @staticmethod
+    def split_points_matrix(split_points_list):
+        """
+        Stack split points of columns into a matrix, one row per column. The last split point of
+        each column is dropped and rows are padded by inf, so binning against a row is the same
+        as get_bin_num.
+        """
+        width = max([len(split_points) - 1 for split_points in split_points_list] + [0])
+        sp_matrix = np.full((len(split_points_list), width), np.inf)
+        for pos, split_points in enumerate(split_points_list):
+            sp_matrix[pos, :len(split_points) - 1] = split_points[:-1]
+        return sp_matrix
+
+    @staticmethod
+    def get_bin_nums(values, col_split_points):
+        """
+        Vectorized get_bin_num, values[i] is binned by row col_split_points[i] of a split points matrix
+        """
+        return (col_split_points < values[:, np.newaxis]).sum(axis=1)
+
+    @staticmethod
+    def bin_dtype(split_points):
+        """
+        Smallest unsigned int type that holds every bin index of split points dict
+        """
+        max_bin_idx = max([len(sp) - 1 for sp in split_points.values()] + [0])
+        for dtype in (np.uint8, np.uint16, np.uint32):
+            if max_bin_idx <= np.iinfo(dtype).max:
+                return dtype
+        return np.uint64
+
+    @staticmethod
+    def _woe_matrix(col_names, bin_results: BinResults):
+        woe_arrays = [bin_results.all_cols_results.get(col_name).woe_array for col_name in col_names]
+        width = max([len(woe_array) for woe_array in woe_arrays] + [0])
+        woe_matrix = np.zeros((len(woe_arrays), width))
+        for pos, woe_array in enumerate(woe_arrays):
+            woe_matrix[pos, :len(woe_array)] = woe_array
+        return woe_matrix
 
     def cal_local_iv(self, data_instances, label_counts, split_points=None, label_table=None):
         """
@@ -624,6 +793,53 @@ class BaseBinning(object):
 
         return list(result_sum.items())
 
+    @staticmethod
+    def sum_label_in_block(kv_iterator, sparse_bins, bin_nums):
+        """
+        Sum labels by bins over a partition, used to calculate woe and iv with encrypted labels
+
+        Parameters
+        ----------
+        kv_iterator : iterator of (id, (bin array, y)), bin arrays are from get_data_bin_matrix
+
+        sparse_bins: array of bin num which the 0 located at of each column, labels in these bins
+            are not summed, they could be filled by label counts, as fill_sparse_result does.
+
+        bin_nums: list of bin num of each column
+
+        Returns
+        -------
+        [("label_sum", (event_counts, total_counts))], both of shape (column num, max bin num),
+        event_counts is an object matrix of sum of y, total_counts is count of instances.
+        """
+        bin_rows, labels = [], []
+        for _, (bin_row, y) in kv_iterator:
+            bin_rows.append(bin_row)
+            labels.append(y)
+        if not bin_rows:
+            return []
+
+        bin_matrix = np.array(bin_rows)
+        labels = np.array(labels, dtype=object)
+        width = max(bin_nums)
+        event_counts = np.zeros((len(bin_nums), width), dtype=object)
+        total_counts = np.zeros((len(bin_nums), width), dtype=np.int64)
+        for pos, sparse_bin in enumerate(sparse_bins):
+            col_bins = bin_matrix[:, pos]
+            total_counts[pos] = np.bincount(col_bins, minlength=width)[:width]
+            to_sum = col_bins != sparse_bin
+            if not to_sum.any():
+                continue
+            order = np.argsort(col_bins[to_sum], kind='stable')
+            sorted_bins = col_bins[to_sum][order]
+            bins, starts = np.unique(sorted_bins, return_index=True)
+            event_counts[pos, bins] = np.add.reduceat(labels[to_sum][order], starts)
+        return [("label_sum", (event_counts, total_counts))]
+
+    @staticmethod
+    def aggregate_block_label_sum(sum1, sum2):
+        return sum1[0] + sum2[0], sum1[1] + sum2[1]
+
     def shuffle_static_counts(self, statistic_counts):
         """
         Shuffle bin orders, and stored orders in self.bin_results
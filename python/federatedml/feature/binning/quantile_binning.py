@@ -18,7 +18,8 @@
 
 import copy
 import functools
-import uuid
+
+import numpy as np
 
 from fate_arch.common.versions import get_eggroll_version
 from federatedml.feature.binning.base_binning import BaseBinning
@@ -146,24 +147,8 @@ class QuantileBinning(BaseBinning):
         for col_name, col_index in cols_dict.items():
             quantile_summaries = quantile_summary_factory(is_sparse=is_sparse, param_dict=summary_param)
             summary_dict[col_name] = quantile_summaries
-        _ = str(uuid.uuid1())
-        for _, instant in data_iter:
-            if not is_sparse:
-                if type(instant).__name__ == 'Instance':
-                    features = instant.features
-                else:
-                    features = instant
-                for col_name, summary in summary_dict.items():
-                    col_index = cols_dict[col_name]
-                    summary.insert(features[col_index])
-            else:
-                data_generator = instant.features.get_all_data()
-                for col_idx, col_value in data_generator:
-                    col_name = header[col_idx]
-                    if col_name not in cols_dict:
-                        continue
-                    summary = summary_dict[col_name]
-                    summary.insert(col_value)
+        QuantileBinning.insert_datas(data_iter, summary_dict, cols_dict, header, is_sparse,
+                                     block_size=params.head_size)
 
         result = []
         for features_name, summary_obj in summary_dict.items():
@@ -228,29 +213,47 @@ class QuantileBinning(BaseBinning):
             quantile_summaries = quantile_summary_factory(is_sparse=is_sparse, param_dict=summary_param)
             summary_dict[col_name] = quantile_summaries
 
-        QuantileBinning.insert_datas(data_instances, summary_dict, cols_dict, header, is_sparse)
+        QuantileBinning.insert_datas(data_instances, summary_dict, cols_dict, header, is_sparse,
+                                     block_size=params.head_size)
         for _, summary_obj in summary_dict.items():
             summary_obj.compress()
         return summary_dict
 
     @staticmethod
-    def insert_datas(data_instances, summary_dict, cols_dict, header, is_sparse):
-
-        for iter_key, instant in data_instances:
-            if not is_sparse:
-                if type(instant).__name__ == 'Instance':
-                    features = instant.features
-                else:
-                    features = instant
-                for col_name, summary in summary_dict.items():
-                    col_index = cols_dict[col_name]
-                    summary.insert(features[col_index])
-            else:
+    def insert_datas(data_instances, summary_dict, cols_dict, header, is_sparse,
+                     block_size=consts.DEFAULT_HEAD_SIZE):
+        """
+        Insert data into summaries block by block: values of each column in a block of
+        block_size instances are gathered into an array and inserted at once.
+        """
+        block = []
+        for _, instant in data_instances:
+            block.append(instant)
+            if len(block) >= block_size:
+                QuantileBinning._insert_block(block, summary_dict, cols_dict, header, is_sparse)
+                block = []
+        if block:
+            QuantileBinning._insert_block(block, summary_dict, cols_dict, header, is_sparse)
+
+    @staticmethod
+    def _insert_block(block, summary_dict, cols_dict, header, is_sparse):
+        if not is_sparse:
+            features = np.array([instant.features if type(instant).__name__ == 'Instance' else instant
+                                 for instant in block])
+            for col_name, summary in summary_dict.items():
+                col_index = cols_dict[col_name]
+                summary.insert_array(features[:, col_index])
+        else:
+            col_values = {col_name: [] for col_name in summary_dict}
+            for instant in block:
                 data_generator = instant.features.get_all_data()
                 for col_idx, col_value in data_generator:
                     col_name = header[col_idx]
-                    summary = summary_dict[col_name]
-                    summary.insert(col_value)
+                    if col_name not in col_values:
+                        continue
+                    col_values[col_name].append(col_value)
+            for col_name, summary in summary_dict.items():
+                summary.insert_array(col_values[col_name])
 
     @staticmethod
     def merge_summary_dict(s_dict1, s_dict2):
@@ -17,7 +17,11 @@
 #  limitations under the License.
 #
 
+import bisect
 import math
+import numbers
+
+import numpy as np
 
 from federatedml.util import consts, LOGGER
 
@@ -30,6 +34,11 @@ class Stats(object):
 
 
 class QuantileSummaries(object):
+    """
+    Greenwald-Khanna summaries whose sampled list is kept as three aligned numpy arrays
+    (value, g, delta), so that batches of observations are merged, compressed and queried
+    with array operations instead of one Stats object at a time.
+    """
     def __init__(self, compress_thres=consts.DEFAULT_COMPRESS_THRESHOLD,
                  head_size=consts.DEFAULT_HEAD_SIZE,
                  error=consts.DEFAULT_RELATIVE_ERROR,
@@ -38,7 +47,9 @@ class QuantileSummaries(object):
         self.head_size = head_size
         self.error = error
         self.head_sampled = []
-        self.sampled = []  # list of Stats
+        self._values = np.empty(0, dtype=np.float64)
+        self._g = np.empty(0, dtype=np.int64)
+        self._delta = np.empty(0, dtype=np.int64)
         self.count = 0  # Total observations appeared
         self.missing_count = 0
         if abnormal_list is None:
@@ -46,6 +57,19 @@ class QuantileSummaries(object):
         else:
             self.abnormal_list = abnormal_list
 
+    @property
+    def sampled(self):
+        """
+        list of Stats, view of sampled arrays
+        """
+        return [Stats(v, int(g), int(d)) for v, g, d in zip(self._values, self._g, self._delta)]
+
+    @sampled.setter
+    def sampled(self, stats_list):
+        self._values = np.array([s.value for s in stats_list], dtype=np.float64)
+        self._g = np.array([s.g for s in stats_list], dtype=np.int64)
+        self._delta = np.array([s.delta for s in stats_list], dtype=np.int64)
+
     # insert a number
     def insert(self, x):
         """
@@ -69,46 +93,84 @@ class QuantileSummaries(object):
         self.head_sampled.append(x)
         if len(self.head_sampled) >= self.head_size:
             self._insert_head_buffer()
-            if len(self.sampled) >= self.compress_thres:
+            if len(self._values) >= self.compress_thres:
                 self.compress()
 
+    def insert_array(self, values):
+        """
+        Insert a batch of observations, such as a column of a partition block, at once.
+        Equivalent to inserting them one by one, but sorted and merged into sampled list
+        as a whole.
+        Parameters
+        ----------
+        values : array-like
+            The observations that prepare to insert
+        """
+        values = self._valid_values(values)
+        self._insert_head_buffer()
+        self._insert_sorted(np.sort(values))
+        if len(self._values) >= self.compress_thres:
+            self.compress()
+
+    def _valid_values(self, values):
+        """
+        drop abnormal values and count them as missing, return the remains as float array
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in "biuf":
+            numeric_abnormal = [v for v in self.abnormal_list if isinstance(v, numbers.Number)]
+            if numeric_abnormal:
+                is_abnormal = np.isin(values, numeric_abnormal)
+                self.missing_count += int(is_abnormal.sum())
+                values = values[~is_abnormal]
+            return values.astype(np.float64)
+
+        valid_values = []
+        for x in values:
+            if x in self.abnormal_list:
+                self.missing_count += 1
+                continue
+            try:
+                valid_values.append(float(x))
+            except ValueError:
+                continue
+        return np.array(valid_values, dtype=np.float64)
+
     def _insert_head_buffer(self):
         if not len(self.head_sampled):  # If empty
             return
-        current_count = self.count
-        sorted_head = sorted(self.head_sampled)
-        new_sampled = []
-        sample_idx = 0
-        ops_idx = 0
-        while ops_idx < len(sorted_head):
-            current_sample = sorted_head[ops_idx]
-            while sample_idx < len(self.sampled) and self.sampled[sample_idx].value <= current_sample:
-                new_sampled.append(self.sampled[sample_idx])
-                sample_idx += 1
-
-            current_count += 1
-
-            # If it is the first one to insert or if it is the last one
-            if not new_sampled or (sample_idx == len(self.sampled) and
-                                   ops_idx == len(sorted_head) - 1):
-                delta = 0
-            else:
-                # delta = math.floor(2 * self.error * current_count) - 1
-                delta = math.floor(2 * self.error * current_count)
-
-            new_stats = Stats(current_sample, 1, delta)
-            new_sampled.append(new_stats)
-            ops_idx += 1
-        self.sampled = new_sampled
+        self._insert_sorted(np.sort(np.array(self.head_sampled, dtype=np.float64)))
         self.head_sampled = []
-        self.count = current_count
+
+    def _insert_sorted(self, sorted_head):
+        head_num = len(sorted_head)
+        if not head_num:
+            return
+
+        # Each new sample take the count after its own insertion
+        current_counts = self.count + np.arange(1, head_num + 1, dtype=np.int64)
+        new_delta = np.floor(2 * self.error * current_counts).astype(np.int64)
+
+        # If it is the first one to insert or if it is the last one
+        insert_pos = np.searchsorted(self._values, sorted_head, side='right')
+        if insert_pos[0] == 0:
+            new_delta[0] = 0
+        if insert_pos[-1] == len(self._values):
+            new_delta[-1] = 0
+
+        # Stable sort keeps existing samples ahead of new ones with equal value
+        values = np.concatenate((self._values, sorted_head))
+        order = np.argsort(values, kind='stable')
+        self._values = values[order]
+        self._g = np.concatenate((self._g, np.ones(head_num, dtype=np.int64)))[order]
+        self._delta = np.concatenate((self._delta, new_delta))[order]
+        self.count += head_num
 
     def compress(self):
         self._insert_head_buffer()
         # merge_threshold = math.floor(2 * self.error * self.count) - 1
         merge_threshold = 2 * self.error * self.count
-        compressed = self._compress_immut(merge_threshold)
-        self.sampled = compressed
+        self._compress_sampled(merge_threshold)
 
     def merge(self, other):
         """
@@ -133,17 +195,8 @@ class QuantileSummaries(object):
             return other
 
         # merge two sorted array
-        new_sample = []
-        i, j = 0, 0
-        while i < len(self.sampled) and j < len(other.sampled):
-            if self.sampled[i].value < other.sampled[j].value:
-                new_sample.append(self.sampled[i])
-                i += 1
-            else:
-                new_sample.append(other.sampled[j])
-                j += 1
-        new_sample += self.sampled[i:]
-        new_sample += other.sampled[j:]
+        values = np.concatenate((self._values, other._values))
+        order = np.argsort(values, kind='stable')
 
         res_summary = self.__class__(compress_thres=self.compress_thres,
                                      head_size=self.head_size,
@@ -151,13 +204,13 @@ class QuantileSummaries(object):
                                      abnormal_list=self.abnormal_list)
         res_summary.count = self.count + other.count
         res_summary.missing_count = self.missing_count + other.missing_count
-        res_summary.sampled = new_sample
-        # self.sampled = new_sample
-        # self.count += other.count
+        res_summary._values = values[order]
+        res_summary._g = np.concatenate((self._g, other._g))[order]
+        res_summary._delta = np.concatenate((self._delta, other._delta))[order]
         # merge_threshold = math.floor(2 * self.error * self.count) - 1
         merge_threshold = 2 * self.error * res_summary.count
 
-        res_summary.sampled = res_summary._compress_immut(merge_threshold)
+        res_summary._compress_sampled(merge_threshold)
         return res_summary
 
     def query(self, quantile):
@@ -183,91 +236,77 @@ class QuantileSummaries(object):
             return 0
 
         if quantile <= self.error:
-            return self.sampled[0].value
+            return float(self._values[0])
 
         if quantile >= 1 - self.error:
-            return self.sampled[-1].value
+            return float(self._values[-1])
 
         rank = math.ceil(quantile * self.count)
         target_error = math.ceil(self.error * self.count)
-        min_rank = 0
-        i = 1
-        while i < len(self.sampled) - 1:
-            cur_sample = self.sampled[i]
-            min_rank += cur_sample.g
-            max_rank = min_rank + cur_sample.delta
-            if max_rank - target_error <= rank <= min_rank + target_error:
-                return cur_sample.value
-            i += 1
-        return self.sampled[-1].value
+        min_ranks = np.cumsum(self._g[1:-1])
+        max_ranks = min_ranks + self._delta[1:-1]
+        hits = np.flatnonzero((max_ranks - target_error <= rank) & (rank <= min_ranks + target_error))
+        if len(hits):
+            return float(self._values[hits[0] + 1])
+        return float(self._values[-1])
+
+    def _ranks(self, values):
+        """
+        approximate rank of each value, the middle of min and max rank of the last sample smaller than it
+        """
+        sample_num = np.searchsorted(self._values, values, side='left')
+        min_ranks = np.concatenate(([0], np.cumsum(self._g)))[sample_num]
+        max_ranks = min_ranks + np.concatenate(([0], self._delta))[sample_num]
+        return (min_ranks + max_ranks) // 2
 
     def value_to_rank(self, value):
-        min_rank, max_rank = 0, 0
-        for sample in self.sampled:
-            if sample.value < value:
-                min_rank += sample.g
-                max_rank = min_rank + sample.delta
-            else:
-                return (min_rank + max_rank) // 2
-        return (min_rank + max_rank) // 2
+        return int(self._ranks([value])[0])
 
     def query_value_list(self, values):
         """
         Given a sorted value list, return the rank of each element in this list
         """
         self.compress()
-        res = []
-        min_rank, max_rank = 0, 0
-        idx = 0
-        sample_idx = 0
-
-        while sample_idx < len(self.sampled):
-            v = values[idx]
-            sample = self.sampled[sample_idx]
-            if sample.value < v:
-                min_rank += sample.g
-                max_rank = min_rank + sample.delta
-                sample_idx += 1
-            else:
-                res.append((min_rank + max_rank) // 2)
-                idx += 1
-                if idx >= len(values):
-                    break
-
-        while idx < len(values):
-            res.append((min_rank + max_rank) // 2)
-            idx += 1
-        return res
-
-    def _compress_immut(self, merge_threshold):
-        if not self.sampled:
-            return self.sampled
+        return [int(r) for r in self._ranks(values)]
 
-        res = []
-
-        # Start from the last element
-        head = self.sampled[-1]
-        i = len(self.sampled) - 2  # Do not merge the last element
-
-        while i >= 1:
-            this_sample = self.sampled[i]
-            if this_sample.g + head.g + head.delta < merge_threshold:
-                head.g = head.g + this_sample.g
-            else:
-                res.append(head)
-                head = this_sample
-            i -= 1
-        res.append(head)
+    def _compress_sampled(self, merge_threshold):
+        """
+        Merge samples greedily from the last one, as Greenwald-Khanna compress does. Samples merged
+        into one head form a contiguous range, found by searching the prefix sum of g.
+        """
+        sample_num = len(self._values)
+        if not sample_num:
+            return
 
-        # If head of current sample is smaller than this new res's head
-        # Add current head into res
-        current_head = self.sampled[0]
-        if current_head.value <= head.value and len(self.sampled) > 1:
-            res.append(current_head)
+        # bisect on python lists is much cheaper than a numpy call per merged range
+        g_prefix = np.concatenate(([0], np.cumsum(self._g))).tolist()
+        delta = self._delta.tolist()
+        head_idx, head_g = [], []
+
+        # Start from the last element, do not merge the first element
+        head = sample_num - 1
+        while head >= 1 or not head_idx:
+            # samples in [low, head) could be merged if sum of their g + head.g + head.delta < merge_threshold
+            bound = g_prefix[head + 1] + delta[head] - merge_threshold
+            low = head
+            if head > 1 and g_prefix[head - 1] > bound:
+                low = bisect.bisect_right(g_prefix, bound, 1, head - 1)
+            head_idx.append(head)
+            head_g.append(g_prefix[head + 1] - g_prefix[low])
+            head = low - 1
+
+        # Keep the first element
+        if sample_num > 1:
+            head_idx.append(0)
+            head_g.append(self._g[0])
 
         # Python do not support prepend, thus, use reverse instead
-        res.reverse()
-        return res
+        head_idx.reverse()
+        head_g.reverse()
+        head_idx = np.array(head_idx, dtype=np.int64)
+        self._values = self._values[head_idx]
+        self._g = np.array(head_g, dtype=np.int64)
+        self._delta = self._delta[head_idx]
 
 
 class SparseQuantileSummaries(QuantileSummaries):
@@ -300,6 +339,13 @@ class SparseQuantileSummaries(QuantileSummaries):
             self.bigger_num += 1
         super(SparseQuantileSummaries, self).insert(x)
 
+    def insert_array(self, values):
+        values = self._valid_values(values)
+        smaller_num = int((values < consts.FLOAT_ZERO).sum())
+        self.smaller_num += smaller_num
+        self.bigger_num += len(values) - smaller_num
+        super(SparseQuantileSummaries, self).insert_array(values)
+
     def query(self, quantile):
         if self.zero_lower_bound < quantile < self.zero_upper_bound:
             return 0.0
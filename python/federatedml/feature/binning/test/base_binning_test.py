@@ -24,7 +24,11 @@ from fate_arch.session import computing_session as session
 
 session.init("123")
 
+from federatedml.feature.binning.base_binning import BaseBinning
+from federatedml.feature.binning.bin_inner_param import BinInnerParam
+from federatedml.feature.binning.bin_result import BinResults
 from federatedml.feature.instance import Instance
+from federatedml.feature.sparse_vector import SparseVector
 from federatedml.statistic.statics import MultivariateStatisticalSummary
 
 
@@ -73,5 +77,95 @@ class TestBaseBinningFunctions(unittest.TestCase):
         session.stop()
 
 
+class TestBinTransform(unittest.TestCase):
+    def setUp(self):
+        self.header = ['d' + str(x) for x in range(5)]
+        self.bin_inner_param = BinInnerParam()
+        self.bin_inner_param.set_header(self.header)
+        self.bin_inner_param.set_bin_all()
+        self.bin_inner_param.add_transform_bin_indexes([0, 2, 3])
+        self.bin_results = BinResults()
+        for i, col_name in enumerate(self.header):
+            split_points = sorted(np.random.randn(i + 2).tolist()) + [np.inf]
+            self.bin_results.put_col_split_points(col_name, split_points)
+        self.split_points = self.bin_results.all_split_points
+
+    def test_convert_dense_block(self):
+        features = np.random.randn(100, 5)
+        features[features > 1.5] = -999
+        data = [(i, Instance(features=features[i].copy())) for i in range(100)]
+        result = dict(BaseBinning._convert_dense_block(iter(data), self.bin_inner_param, self.bin_results,
+                                                       abnormal_list=[-999]))
+        for i, row in enumerate(features):
+            for col_idx, value in enumerate(row):
+                if col_idx in (0, 2, 3) and value != -999:
+                    value = BaseBinning.get_bin_num(value, self.split_points[self.header[col_idx]])
+                self.assertEqual(result[i].features[col_idx], value)
+
+    def test_convert_sparse_block(self):
+        data = [(i, Instance(features=SparseVector([1, 2], [np.random.randn(), -999], 5))) for i in range(10)]
+        data.append((10, Instance(features=SparseVector([0, 3], [0.5, 2.0], 5))))
+        result = dict(BaseBinning._convert_sparse_block(iter(data), self.bin_inner_param, self.bin_results,
+                                                        abnormal_list=[-999]))
+        for key, instance in data:
+            self.assertListEqual([idx for idx, _ in result[key].features.get_all_data()],
+                                 [idx for idx, _ in instance.features.get_all_data()])
+            self.assertEqual(result[key].features.get_data(1), instance.features.get_data(1))
+        self.assertEqual(result[0].features.get_data(2), -999)
+        self.assertEqual(result[10].features.get_data(0), BaseBinning.get_bin_num(0.5, self.split_points['d0']))
+        self.assertEqual(result[10].features.get_data(3), BaseBinning.get_bin_num(2.0, self.split_points['d3']))
+
+    def test_bin_data_block(self):
+        features = np.random.randn(50, 5)
+        data = [(i, Instance(features=features[i])) for i in range(50)]
+        sp_matrix = BaseBinning.split_points_matrix([self.split_points[col_name] for col_name in self.header])
+        dtype = BaseBinning.bin_dtype(self.split_points)
+        result = dict(BaseBinning._bin_data_block(iter(data), sp_matrix, list(range(5)), dtype, is_sparse=False))
+        for i, row in enumerate(features):
+            self.assertEqual(result[i].dtype, np.uint8)
+            expect = [BaseBinning.get_bin_num(v, self.split_points[col_name]) for v, col_name in zip(row, self.header)]
+            self.assertListEqual(result[i].tolist(), expect)
+
+    def test_bin_abnormal_data_block(self):
+        sp_matrix = BaseBinning.split_points_matrix([self.split_points[col_name] for col_name in self.header])
+        dtype = BaseBinning.bin_dtype(self.split_points)
+        features = np.random.randn(10, 5)
+        expect = [[BaseBinning.get_bin_num(v, self.split_points[col_name]) for v, col_name in zip(row, self.header)]
+                  for row in features]
+        dense_features = features.astype(object)
+        dense_features[0, 1], dense_features[3, 4] = "NA", -999
+        for row, pos in [(0, 1), (3, 4)]:
+            expect[row][pos] = 0
+
+        data = [(i, Instance(features=dense_features[i])) for i in range(10)]
+        result = dict(BaseBinning._bin_data_block(iter(data), sp_matrix, list(range(5)), dtype, is_sparse=False,
+                                                  abnormal_list=["NA", -999]))
+        for i in range(10):
+            self.assertListEqual(result[i].tolist(), expect[i])
+
+        data = [(i, Instance(features=SparseVector(list(range(5)), dense_features[i], 5))) for i in range(10)]
+        result = dict(BaseBinning._bin_data_block(iter(data), sp_matrix, list(range(5)), dtype, is_sparse=True,
+                                                  abnormal_list=["NA", -999]))
+        for i in range(10):
+            self.assertListEqual(result[i].tolist(), expect[i])
+
+    def test_sum_label_in_block(self):
+        bin_matrix = np.random.randint(0, 4, (200, 3)).astype(np.uint8)
+        labels = np.random.randint(0, 2, 200)
+        sparse_bins = np.array([0, 1, 2])
+        data = [(i, (bin_matrix[i], int(labels[i]))) for i in range(200)]
+        (_, (event_counts, total_counts)), = BaseBinning.sum_label_in_block(iter(data), sparse_bins, [4, 4, 4])
+        for pos in range(3):
+            for bin_idx in range(4):
+                in_bin = bin_matrix[:, pos] == bin_idx
+                self.assertEqual(total_counts[pos, bin_idx], in_bin.sum())
+                expect = 0 if bin_idx == sparse_bins[pos] else labels[in_bin].sum()
+                self.assertEqual(event_counts[pos, bin_idx], expect)
+
+    def test_bin_dtype(self):
+        self.assertEqual(BaseBinning.bin_dtype({'d0': list(range(256))}), np.uint8)
+        self.assertEqual(BaseBinning.bin_dtype({'d0': list(range(258))}), np.uint16)
+
+
 if __name__ == '__main__':
     unittest.main()
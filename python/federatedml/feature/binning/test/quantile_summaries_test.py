@@ -3,7 +3,7 @@ import unittest
 
 import numpy as np
 
-from federatedml.feature.binning.quantile_summaries import QuantileSummaries
+from federatedml.feature.binning.quantile_summaries import QuantileSummaries, SparseQuantileSummaries
 
 
 class TestQuantileSummaries(unittest.TestCase):
@@ -52,6 +52,50 @@ class TestQuantileSummaries(unittest.TestCase):
                                                         error=self.error)
             self.test_correctness()
 
+    def test_insert_array(self):
+        self.quantile_summaries.insert_array(self.table)
+        self.assertEqual(self.quantile_summaries.count, self.data_num)
+        self._assert_queries_correct()
+
+    def test_tree_merge(self):
+        summaries = []
+        for block in np.array_split(self.table, 8):
+            summary = QuantileSummaries(compress_thres=1000, head_size=500, error=self.error)
+            summary.insert_array(block)
+            summary.compress()
+            summaries.append(summary)
+        while len(summaries) > 1:
+            summaries = [summaries[i].merge(summaries[i + 1]) for i in range(0, len(summaries), 2)]
+        self.quantile_summaries = summaries[0]
+        self.assertEqual(self.quantile_summaries.count, self.data_num)
+        self._assert_queries_correct()
+
+    def test_abnormal_array(self):
+        summary = QuantileSummaries(abnormal_list=[-1, "NA"])
+        summary.insert_array(np.array([-1, 1, 2, 3, -1, 4]))
+        summary.insert_array(np.array(["NA", "5", "6"], dtype=object))
+        self.assertEqual(summary.missing_count, 3)
+        self.assertEqual(summary.count, 6)
+        self.assertEqual(summary.query(1), 6)
+        self.assertListEqual(summary.query_value_list([1, 3.5, 7]), [0, 3, 6])
+
+    def test_sparse_insert_array(self):
+        summary = SparseQuantileSummaries()
+        summary.insert_array([-2, -1, 1, 2, 3])
+        summary.set_total_count(10)
+        self.assertEqual(summary.smaller_num, 2)
+        self.assertEqual(summary.bigger_num, 3)
+        self.assertEqual(summary.zero_counts, 5)
+        self.assertEqual(summary.query(0.5), 0.0)
+
+    def _assert_queries_correct(self):
+        x = sorted(self.table)
+        for q_num in self.percentile_rate:
+            percent = q_num / 100
+            sk2 = self.quantile_summaries.query(percent)
+            min_rank = max(math.floor((percent - 2 * self.error) * self.data_num), 0)
+            max_rank = min(math.ceil((percent + 2 * self.error) * self.data_num), len(x) - 1)
+            self.assertTrue(x[min_rank] <= sk2 <= x[max_rank])
 
 
 if __name__ == '__main__':
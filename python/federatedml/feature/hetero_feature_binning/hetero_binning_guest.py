@@ -103,7 +103,6 @@ class HeteroFeatureBinningGuest(BaseFeatureBinning):
                 host_model_params.optimal_binning_param.min_bin_pct = optimal_binning_params.get('min_bin_pct')
 
                 self.binning_obj.event_total, self.binning_obj.non_event_total = self.get_histogram(data_instances)
-                result_counts = dict(result_counts.collect())
                 optimal_binning_cols = {x: y for x, y in result_counts.items() if x not in category_names}
                 host_binning_obj = self.optimal_binning_sync(optimal_binning_cols, data_instances.count(),
                                                              data_instances.partitions,
@@ -126,19 +125,18 @@ class HeteroFeatureBinningGuest(BaseFeatureBinning):
         return self.data_output
 
     def cipher_decompress(self, encrypted_bin_sum, cipher):
+        convert_format = self.convert_decompress_format
 
-        def _decompress(col_dict):
+        def _decompress(bin_sum_info):
             _decompressor = CipherDecompressor(encrypter=cipher)
-            event_counts = _decompressor.unpack(col_dict["event_counts"])
-            event_counts = [int(x) for x in event_counts]
-            non_event_counts = _decompressor.unpack(col_dict["non_event_counts"])
-            non_event_counts = [int(x) for x in non_event_counts]
-            res = list(zip(event_counts, non_event_counts))
-            return res
-
-        encrypted_bin_sum = encrypted_bin_sum.mapValues(_decompress)
-        # return self.convert_decompress_format(encrypted_bin_sum)
-        return encrypted_bin_sum
+            bin_sum_info["event_counts"] = _decompressor.unpack(bin_sum_info["event_counts"])
+            bin_sum_info["non_event_counts"] = _decompressor.unpack(bin_sum_info["non_event_counts"])
+            return convert_format(bin_sum_info)
+
+        result_counts = {}
+        for _, col_counts in encrypted_bin_sum.mapValues(_decompress).collect():
+            result_counts.update(col_counts)
+        return result_counts
 
     @staticmethod
     def convert_decompress_format(encrypted_bin_sum):
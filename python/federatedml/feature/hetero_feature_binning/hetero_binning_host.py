@@ -17,6 +17,8 @@
 import functools
 import operator
 
+import numpy as np
+
 from federatedml.cipher_compressor import compressor
 from federatedml.feature.hetero_feature_binning.base_feature_binning import BaseFeatureBinning
 from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
@@ -59,24 +61,20 @@ class HeteroFeatureBinningHost(BaseFeatureBinning):
 
     def _sync_init_bucket(self, data_instances, split_points, need_shuffle=False):
 
-        data_bin_table = self.binning_obj.get_data_bin(data_instances, split_points)
+        data_bin_table = self.binning_obj.get_data_bin_matrix(data_instances, split_points)
         LOGGER.debug("data_bin_table, count: {}".format(data_bin_table.count()))
 
         encrypted_label_table = self.transfer_variable.encrypted_label.get(idx=0)
 
         LOGGER.info("Get encrypted_label_table from guest")
 
-        encrypted_bin_sum = self.__static_encrypted_bin_label(data_bin_table, encrypted_label_table,
-                                                              self.bin_inner_param.bin_cols_map, split_points)
-
-        encode_name_f = functools.partial(self.bin_inner_param.encode_col_name_dict,
-                                          model=self,
-                                          col_name_maps=self.bin_inner_param.col_name_maps)
-        # encrypted_bin_sum = self.bin_inner_param.encode_col_name_dict(encrypted_bin_sum, self)
-        encrypted_bin_sum = encrypted_bin_sum.map(encode_name_f)
+        encrypted_bin_sum = self.__static_encrypted_bin_label(data_bin_table, encrypted_label_table, split_points)
 
         self.header_anonymous = self.bin_inner_param.encode_col_name_list(self.header, self)
-        encrypted_bin_sum = self.cipher_compress(encrypted_bin_sum, data_bin_table.count())
+        encoded_bin_names = self.bin_inner_param.encode_col_name_list(self.bin_inner_param.bin_names, self)
+        bin_nums = [len(split_points[col_name]) for col_name in self.bin_inner_param.bin_names]
+        encrypted_bin_sum = self.cipher_compress(encrypted_bin_sum, data_bin_table.count(),
+                                                 encoded_bin_names, bin_nums)
         self.transfer_variable.encrypted_bin_sum.remote(encrypted_bin_sum,
                                                         role=consts.GUEST,
                                                         idx=0)
@@ -96,84 +94,84 @@ class HeteroFeatureBinningHost(BaseFeatureBinning):
                                                         role=consts.GUEST,
                                                         idx=0)
 
-    def __static_encrypted_bin_label(self, data_bin_table, encrypted_label, cols_dict, split_points):
+    def __static_encrypted_bin_label(self, data_bin_table, encrypted_label, split_points):
         """
         Returns:
-            table with value like:
-                [[event_count, total_num], [event_count, total_num] ... ]
+            table with one value, (event_counts, non_event_counts), both are matrices of encrypted counts,
+            one row per bin column, and row i is padded after bin num of column i.
         """
         data_bin_with_label = data_bin_table.join(encrypted_label, lambda x, y: (x, y))
         event_sum = encrypted_label.reduce(operator.add)
-        label_counts = {0: encrypted_label.count() - event_sum,
-                        1: event_sum}
         sparse_bin_points = self.binning_obj.get_sparse_bin(self.bin_inner_param.bin_indexes,
                                                             self.binning_obj.split_points)
-        sparse_bin_points = {self.bin_inner_param.header[k]: v for k, v in sparse_bin_points.items()}
-
-        f = functools.partial(self.binning_obj.add_label_in_partition,
-                              sparse_bin_points=sparse_bin_points)
-
-        encrypted_bin_sum = data_bin_with_label.mapReducePartitions(f, self.binning_obj.aggregate_partition_label)
-
-        def cal_zeros(bin_results):
-            for b in bin_results:
-                b[1] = b[1] - b[0]
-            return bin_results
-
-        encrypted_bin_sum = encrypted_bin_sum.mapValues(cal_zeros)
-
-        f = functools.partial(self.binning_obj.fill_sparse_result,
-                              sparse_bin_points=sparse_bin_points,
-                              label_counts=label_counts)
-        encrypted_bin_sum = encrypted_bin_sum.map(f)
-
-        return encrypted_bin_sum
-
-    def cipher_compress(self, encrypted_bin_sum, max_value):
-        encrypted_bin_sum = encrypted_bin_sum.map(self.convert_compress_format)
+        sparse_bins = np.array([sparse_bin_points[col_idx] for col_idx in self.bin_inner_param.bin_indexes])
+        bin_nums = [len(split_points[col_name]) for col_name in self.bin_inner_param.bin_names]
+
+        f = functools.partial(self.binning_obj.sum_label_in_block,
+                              sparse_bins=sparse_bins,
+                              bin_nums=bin_nums)
+        label_sum = data_bin_with_label.mapReducePartitions(f, self.binning_obj.aggregate_block_label_sum)
+
+        def fill_sparse_bins(label_sum_matrices):
+            event_counts, total_counts = label_sum_matrices
+            # Empty bins are still plain zeros
+            is_plain = np.array([not isinstance(x, PaillierEncryptedNumber) for x in event_counts.flat],
+                                dtype=bool).reshape(event_counts.shape)
+            event_counts[is_plain] = event_counts[is_plain] + event_sum.public_key.encrypt(0)
+
+            # Labels in sparse bins are not summed, fill them by the event total
+            rows = np.arange(len(sparse_bins))
+            event_counts[rows, sparse_bins] = [event_sum - col_sum for col_sum in event_counts.sum(axis=1)]
+            non_event_counts = total_counts - event_counts
+            return event_counts, non_event_counts
+
+        return label_sum.mapValues(fill_sparse_bins)
+
+    def cipher_compress(self, encrypted_bin_sum, max_value, bin_names, bin_nums):
+        """
+        Pack counts of all bins of all columns into as few ciphertexts as possible, so that the
+        cost of guest decryption scales with packages rather than bins.
+        """
+        convert_format = self.convert_compress_format
 
-        def _compress(col_dict):
-            cipher_max_int = None
-            res = {}
-            event_counts = col_dict.get("event_counts")
-            for v in event_counts:
-                if isinstance(v, PaillierEncryptedNumber):
-                    cipher_max_int = v.public_key.max_int
-                    break
-            if cipher_max_int is None:
-                raise ValueError("All event counts are 0, please check data input.")
+        def _compress(bin_sum_matrices):
+            event_counts, non_event_counts = bin_sum_matrices
+            cipher_max_int = event_counts[0, 0].public_key.max_int
             _compressor = compressor.CipherCompressor(consts.PAILLIER, max_value,
                                                       cipher_max_int, compressor.NormalCipherPackage, 0)
-            res["event_counts"] = _compressor.compress(col_dict["event_counts"])
-            res["non_event_counts"] = _compressor.compress(col_dict["non_event_counts"])
+            res = convert_format(event_counts, non_event_counts, bin_names, bin_nums)
+            res["event_counts"] = _compressor.compress(res["event_counts"])
+            res["non_event_counts"] = _compressor.compress(res["non_event_counts"])
             return res
 
         converted_bin_sum = encrypted_bin_sum.mapValues(_compress)
         return converted_bin_sum
 
     @staticmethod
-    def convert_compress_format(col_name, encrypted_bin_sum):
+    def convert_compress_format(event_counts, non_event_counts, bin_names, bin_nums):
         """
         Parameters
         ----------
-        encrypted_bin_sum :  list.
-            It is like:
-                {'x1': [[event_count, non_event_count], [event_count, non_event_count] ... ],
-                 'x2': [[event_count, non_event_count], [event_count, non_event_count] ... ],
-                 ...
-                }
+        event_counts :  matrix of encrypted event counts, one row per column, padded after its bin num.
+
+        non_event_counts :  matrix of encrypted non-event counts, the same shape as event_counts.
 
         returns
         -------
         {"keys": ['x1', 'x2' ...],
          "event_counts": [...],
          "non_event_counts": [...],
-         "bin_num": [...]
+         "bin_nums": [...]
          }
         """
-        event_counts = [x[0] for x in encrypted_bin_sum]
-        non_event_counts = [x[1] for x in encrypted_bin_sum]
-        return col_name, {"event_counts": event_counts, "non_event_counts": non_event_counts}
+        flat_event_counts, flat_non_event_counts = [], []
+        for pos, bin_num in enumerate(bin_nums):
+            flat_event_counts.extend(event_counts[pos, :bin_num])
+            flat_non_event_counts.extend(non_event_counts[pos, :bin_num])
+        return {"keys": bin_names,
+                "event_counts": flat_event_counts,
+                "non_event_counts": flat_non_event_counts,
+                "bin_nums": bin_nums}
 
     def optimal_binning_sync(self):
         bucket_idx = self.transfer_variable.bucket_idx.get(idx=0)
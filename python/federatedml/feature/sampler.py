@@ -14,11 +14,11 @@
 #  limitations under the License.
 #
 
+import hashlib
 import random
 
-from sklearn.utils import resample
+import numpy as np
 
-from fate_arch.session import computing_session as session
 from fate_flow.entity.metric import Metric
 from fate_flow.entity.metric import MetricMeta
 from federatedml.model_base import ModelBase
@@ -28,6 +28,137 @@ from federatedml.util import consts
 from federatedml.util.schema_check import assert_schema_consistent
 from federatedml.util import LOGGER
 
+# priorities of samples are 64-bit hashes of keys, whose top bits bucket priorities when searching thresholds
+PRIORITY_BITS = 64
+BUCKET_BITS = 16
+
+
+def to_seed(random_state):
+    if random_state is None:
+        return random.randint(0, 2 ** 32 - 1)
+    if isinstance(random_state, np.random.RandomState):
+        return int(random_state.randint(0, 2 ** 31 - 1))
+    return int(random_state)
+
+
+def sample_priority(key, seed):
+    """
+    pseudo random priority of key, uniformly distributed in [0, 2 ** 64) and fixed by seed
+    """
+    digest = hashlib.blake2b("{}_{}".format(seed, key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _priority_bucket(priority):
+    return priority >> (PRIORITY_BITS - BUCKET_BITS)
+
+
+def _count_buckets(kv_iterator, seed, label_func):
+    buckets = {}
+    for key, value in kv_iterator:
+        buckets.setdefault(label_func(value), []).append(_priority_bucket(sample_priority(key, seed)))
+    return {label: np.bincount(bucket, minlength=1 << BUCKET_BITS) for label, bucket in buckets.items()}
+
+
+def _merge_counts(counts1, counts2):
+    merged = dict(counts1)
+    for label, counts in counts2.items():
+        merged[label] = merged[label] + counts if label in merged else counts
+    return merged
+
+
+def _collect_bucket_priorities(kv_iterator, seed, label_func, buckets):
+    priorities = {}
+    for key, value in kv_iterator:
+        label = label_func(value)
+        priority = sample_priority(key, seed)
+        if label in buckets and _priority_bucket(priority) == buckets[label]:
+            priorities.setdefault(label, []).append(priority)
+    return priorities
+
+
+def _merge_priorities(priorities1, priorities2):
+    merged = dict(priorities1)
+    for label, priorities in priorities2.items():
+        merged[label] = merged.get(label, []) + priorities
+    return merged
+
+
+def partition_sample_counts(data_inst, sample_num_func, seed, label_func):
+    """
+    decide how many times every sample occurs in sample result, partition by partition.
+
+    a sample of label occurs sample_num // label_num times, and once more if its priority is among the
+    sample_num % label_num smallest of label. only bucket counts of priorities and priorities in one bucket
+    per label are sent to driver to find the threshold of priorities, keys and values are never collected.
+
+    Parameters
+    ----------
+    data_inst : DTable
+        The input data
+
+    sample_num_func : function, (label, number of samples of label) -> sample number of label
+
+    seed : int, seed of sample priorities
+
+    label_func : function, value -> label, labels are sampled separately
+
+    Returns
+    -------
+    sample_counts : DTable, key -> occurrence number in sample result, keys not sampled are dropped
+
+    label_nums : dict, label -> (number of samples, sample number)
+    """
+    bucket_counts = data_inst.applyPartitions(lambda kvs: _count_buckets(kvs, seed, label_func)).reduce(_merge_counts)
+
+    copies, buckets, ranks, label_nums = {}, {}, {}, {}
+    for label, counts in bucket_counts.items():
+        label_num = int(counts.sum())
+        sample_num = sample_num_func(label, label_num)
+        label_nums[label] = (label_num, sample_num)
+        copies[label], remainder = divmod(sample_num, label_num)
+        if remainder > 0:
+            cum_counts = np.cumsum(counts)
+            buckets[label] = int(np.searchsorted(cum_counts, remainder))
+            ranks[label] = remainder - (int(cum_counts[buckets[label] - 1]) if buckets[label] > 0 else 0)
+
+    thresholds = {}
+    if buckets:
+        bucket_priorities = data_inst.applyPartitions(
+            lambda kvs: _collect_bucket_priorities(kvs, seed, label_func, buckets)).reduce(_merge_priorities)
+        for label, rank in ranks.items():
+            thresholds[label] = sorted(bucket_priorities[label])[rank - 1]
+
+    def _occurrence(key, value):
+        label = label_func(value)
+        count = copies.get(label, 0)
+        if label in thresholds and sample_priority(key, seed) <= thresholds[label]:
+            count += 1
+        return key, count
+
+    sample_counts = data_inst.map(_occurrence).filter(lambda key, count: count > 0)
+    return sample_counts, label_nums
+
+
+def apply_sample_counts(data_inst, sample_counts, method):
+    """
+    generate sample result from occurrence numbers of keys, in upsample, the i-th occurrence of key is keyed by
+    "{key}_{i}", so that every party generates the same keys from the same sample_counts
+    """
+    if method == "downsample":
+        return data_inst.join(sample_counts, lambda inst, count: inst)
+
+    return data_inst.join(sample_counts, lambda inst, count: (inst, count)).flatMap(
+        lambda key, value: [("{}_{}".format(key, i), value[0]) for i in range(value[1])])
+
+
+def _no_label(value):
+    return None
+
+
+def _instance_label(inst):
+    return inst.label
+
 
 class RandomSampler(object):
     """
@@ -62,7 +193,7 @@ class RandomSampler(object):
         data_inst : DTable
             The input data
 
-        sample_ids : None or list
+        sample_ids : None or DTable
             if None, will sample data from the class instance's parameters,
             otherwise, it will be sample transform process, which means use the samples_ids to generate data
 
@@ -71,7 +202,7 @@ class RandomSampler(object):
         new_data_inst: DTable
             the output sample data, same format with input
 
-        sample_ids: list, return only if sample_ids is None
+        sample_ids: DTable, key -> occurrence number of key in sample result, return only if sample_ids is None
 
 
         """
@@ -89,13 +220,14 @@ class RandomSampler(object):
             support down sample and up sample
                 if use down sample: should give a float ratio between [0, 1]
                 otherwise: should give a float ratio larger than 1.0
+            samples are chosen partition by partition, see partition_sample_counts
 
         Parameters
         ----------
         data_inst : DTable
             The input data
 
-        sample_ids : None or list
+        sample_ids : None or DTable
             if None, will sample data from the class instance's parameters,
             otherwise, it will be sample transform process, which means use the samples_ids to generate data
 
@@ -104,73 +236,38 @@ class RandomSampler(object):
         new_data_inst: DTable
             the output sample data, same format with input
 
-        sample_ids: list, return only if sample_ids is None
+        sample_ids: DTable, key -> occurrence number of key in sample result, return only if sample_ids is None
 
 
         """
         LOGGER.info("start to run random sampling")
 
-        return_sample_ids = False
-        if self.method == "downsample":
-            if sample_ids is None:
-                return_sample_ids = True
-                idset = [key for key, value in data_inst.mapValues(lambda val: None).collect()]
-                if self.fraction < 0 or self.fraction > 1:
-                    raise ValueError("sapmle fractions should be a numeric number between 0 and 1inclusive")
-
-                sample_num = max(1, int(self.fraction * len(idset)))
-
-                sample_ids = resample(idset,
-                                      replace=False,
-                                      n_samples=sample_num,
-                                      random_state=self.random_state)
-
-            sample_dtable = session.parallelize(zip(sample_ids, range(len(sample_ids))),
-                                                include_key=True,
-                                                partition=data_inst.partitions)
-            new_data_inst = data_inst.join(sample_dtable, lambda v1, v2: v1)
-
-            callback(self.tracker, "random", [Metric("count", new_data_inst.count())], summary_dict=self._summary_buf)
-
-            if return_sample_ids:
-                return new_data_inst, sample_ids
-            else:
-                return new_data_inst
-
-        elif self.method == "upsample":
-            data_set = list(data_inst.collect())
-            idset = [key for (key, value) in data_set]
-            id_maps = dict(zip(idset, range(len(idset))))
-
-            if sample_ids is None:
-                return_sample_ids = True
-                if self.fraction <= 0:
-                    raise ValueError("sapmle fractions should be a numeric number large than 0")
+        if self.method not in ["downsample", "upsample"]:
+            raise ValueError("random sampler not support method {} yet".format(self.method))
 
-                sample_num = int(self.fraction * len(idset))
-                sample_ids = resample(idset,
-                                      replace=True,
-                                      n_samples=sample_num,
-                                      random_state=self.random_state)
+        return_sample_ids = False
+        if sample_ids is None:
+            return_sample_ids = True
+            if self.method == "downsample" and (self.fraction < 0 or self.fraction > 1):
+                raise ValueError("sapmle fractions should be a numeric number between 0 and 1inclusive")
+            if self.method == "upsample" and self.fraction <= 0:
+                raise ValueError("sapmle fractions should be a numeric number large than 0")
 
-            new_data = []
-            for i in range(len(sample_ids)):
-                index = id_maps[sample_ids[i]]
-                new_data.append((i, data_set[index][1]))
+            def _sample_num(label, label_num):
+                if self.method == "downsample":
+                    return max(1, int(self.fraction * label_num))
+                return int(self.fraction * label_num)
 
-            new_data_inst = session.parallelize(new_data,
-                                                include_key=True,
-                                                partition=data_inst.partitions)
+            sample_ids, _ = partition_sample_counts(data_inst, _sample_num, to_seed(self.random_state), _no_label)
 
-            callback(self.tracker, "random", [Metric("count", new_data_inst.count())], summary_dict=self._summary_buf)
+        new_data_inst = apply_sample_counts(data_inst, sample_ids, self.method)
 
-            if return_sample_ids:
-                return new_data_inst, sample_ids
-            else:
-                return new_data_inst
+        callback(self.tracker, "random", [Metric("count", new_data_inst.count())], summary_dict=self._summary_buf)
 
+        if return_sample_ids:
+            return new_data_inst, sample_ids
         else:
-            raise ValueError("random sampler not support method {} yet".format(self.method))
+            return new_data_inst
 
     def get_summary(self):
         return self._summary_buf
@@ -221,7 +318,7 @@ class StratifiedSampler(object):
         data_inst : DTable
             The input data
 
-        sample_ids : None or list
+        sample_ids : None or DTable
             if None, will sample data from the class instance's key by sample parameters,
             otherwise, it will be sample transform process, which means use the samples_ids to generate data
 
@@ -230,7 +327,7 @@ class StratifiedSampler(object):
         new_data_inst: DTable
             the output sample data, same format with input
 
-        sample_ids: list, return only if sample_ids is None
+        sample_ids: DTable, key -> occurrence number of key in sample result, return only if sample_ids is None
 
 
         """
@@ -251,6 +348,7 @@ class StratifiedSampler(object):
             support down sample and up sample
                 if use down sample: should give a list of (category, ratio), where ratio is between [0, 1]
                 otherwise: should give a list (category, ratio), where the float ratio should no less than 1.0
+            samples of every category are chosen partition by partition, see partition_sample_counts
 
 
         Parameters
@@ -258,7 +356,7 @@ class StratifiedSampler(object):
         data_inst : DTable
             The input data
 
-        sample_ids : None or list
+        sample_ids : None or DTable
             if None, will sample data from the class instance's parameters,
             otherwise, it will be sample transform process, which means use the samples_ids the generate data
 
@@ -267,127 +365,48 @@ class StratifiedSampler(object):
         new_data_inst: DTable
             the output sample data, sample format with input
 
-        sample_ids: list, return only if sample_ids is None
+        sample_ids: DTable, key -> occurrence number of key in sample result, return only if sample_ids is None
 
 
         """
 
         LOGGER.info("start to run stratified sampling")
-        return_sample_ids = False
-        if self.method == "downsample":
-            if sample_ids is None:
-                idset = [[] for i in range(len(self.fractions))]
-                for label, fraction in self.fractions:
-                    if fraction < 0 or fraction > 1:
-                        raise ValueError("sapmle fractions should be a numeric number between 0 and 1inclusive")
-
-                return_sample_ids = True
-                for key, inst in data_inst.collect():
-                    label = inst.label
-                    if label not in self.label_mapping:
-                        raise ValueError("label not specify sample rate! check it please")
-                    idset[self.label_mapping[label]].append(key)
-
-                sample_ids = []
-
-                callback_sample_metrics = []
-                callback_original_metrics = []
-
-                for i in range(len(idset)):
-                    label_name = self.labels[i]
-                    callback_original_metrics.append(Metric(label_name, len(idset[i])))
-
-                    if idset[i]:
-                        sample_num = max(1, int(self.fractions[i][1] * len(idset[i])))
-
-                        _sample_ids = resample(idset[i],
-                                               replace=False,
-                                               n_samples=sample_num,
-                                               random_state=self.random_state)
-
-                        sample_ids.extend(_sample_ids)
-
-                        callback_sample_metrics.append(Metric(label_name, len(_sample_ids)))
-                    else:
-                        callback_sample_metrics.append(Metric(label_name, 0))
-
-                random.shuffle(sample_ids)
 
-                callback(self.tracker, "stratified", callback_sample_metrics, callback_original_metrics, self._summary_buf)
-
-            sample_dtable = session.parallelize(zip(sample_ids, range(len(sample_ids))),
-                                                include_key=True,
-                                                partition=data_inst.partitions)
-            new_data_inst = data_inst.join(sample_dtable, lambda v1, v2: v1)
-
-            if return_sample_ids:
-                return new_data_inst, sample_ids
-            else:
-                return new_data_inst
-
-        elif self.method == "upsample":
-            data_set = list(data_inst.collect())
-            ids = [key for (key, inst) in data_set]
-            id_maps = dict(zip(ids, range(len(ids))))
-
-            return_sample_ids = False
-
-            if sample_ids is None:
-                idset = [[] for i in range(len(self.fractions))]
-                for label, fraction in self.fractions:
-                    if fraction <= 0:
-                        raise ValueError("sapmle fractions should be a numeric number greater than 0")
-
-                for key, inst in data_set:
-                    label = inst.label
-                    if label not in self.label_mapping:
-                        raise ValueError("label not specify sample rate! check it please")
-                    idset[self.label_mapping[label]].append(key)
-
-                return_sample_ids = True
-
-                sample_ids = []
-                callback_sample_metrics = []
-                callback_original_metrics = []
-
-                for i in range(len(idset)):
-                    label_name = self.labels[i]
-                    callback_original_metrics.append(Metric(label_name, len(idset[i])))
-
-                    if idset[i]:
-                        sample_num = max(1, int(self.fractions[i][1] * len(idset[i])))
-
-                        _sample_ids = resample(idset[i],
-                                               replace=True,
-                                               n_samples=sample_num,
-                                               random_state=self.random_state)
-
-                        sample_ids.extend(_sample_ids)
+        if self.method not in ["downsample", "upsample"]:
+            raise ValueError("Stratified sampler not support method {} yet".format(self.method))
 
-                        callback_sample_metrics.append(Metric(label_name, len(_sample_ids)))
-                    else:
-                        callback_sample_metrics.append(Metric(label_name, 0))
+        return_sample_ids = False
+        if sample_ids is None:
+            return_sample_ids = True
+            for label, fraction in self.fractions:
+                if self.method == "downsample" and (fraction < 0 or fraction > 1):
+                    raise ValueError("sapmle fractions should be a numeric number between 0 and 1inclusive")
+                if self.method == "upsample" and fraction <= 0:
+                    raise ValueError("sapmle fractions should be a numeric number greater than 0")
 
-                random.shuffle(sample_ids)
+            def _sample_num(label, label_num):
+                if label not in self.label_mapping:
+                    raise ValueError("label not specify sample rate! check it please")
+                return max(1, int(self.fractions[self.label_mapping[label]][1] * label_num))
 
-                callback(self.tracker, "stratified", callback_sample_metrics, callback_original_metrics, self._summary_buf)
+            sample_ids, label_nums = partition_sample_counts(data_inst, _sample_num, to_seed(self.random_state),
+                                                             _instance_label)
 
-            new_data = []
-            for i in range(len(sample_ids)):
-                index = id_maps[sample_ids[i]]
-                new_data.append((i, data_set[index][1]))
+            callback_sample_metrics = []
+            callback_original_metrics = []
+            for label_name in self.labels:
+                label_num, sample_num = label_nums.get(label_name, (0, 0))
+                callback_original_metrics.append(Metric(label_name, label_num))
+                callback_sample_metrics.append(Metric(label_name, sample_num))
 
-            new_data_inst = session.parallelize(new_data,
-                                                include_key=True,
-                                                partition=data_inst.partitions)
+            callback(self.tracker, "stratified", callback_sample_metrics, callback_original_metrics, self._summary_buf)
 
-            if return_sample_ids:
-                return new_data_inst, sample_ids
-            else:
-                return new_data_inst
+        new_data_inst = apply_sample_counts(data_inst, sample_ids, self.method)
 
+        if return_sample_ids:
+            return new_data_inst, sample_ids
         else:
-            raise ValueError("Stratified sampler not support method {} yet".format(self.method))
+            return new_data_inst
 
     def get_summary(self):
         return self._summary_buf
@@ -441,7 +460,7 @@ class Sampler(ModelBase):
         data_inst : DTable
             The input data
 
-        sample_ids : None or list
+        sample_ids : None or DTable
             if None, will sample data from the class instance's parameters,
             otherwise, it will be sample transform process, which means use the samples_ids the generate data
 
@@ -39,11 +39,13 @@ class TestRandomSampler(unittest.TestCase):
         sampler.set_tracker(tracker)
         sample_data, sample_ids = sampler.sample(self.table)
 
-        self.assertTrue(sample_data.count() > 25 and sample_data.count() < 35)
-        self.assertTrue(len(set(sample_ids)) == len(sample_ids))
+        self.assertTrue(sample_data.count() == 30)
+        sample_counts = dict(sample_ids.collect())
+        self.assertTrue(len(sample_counts) == 30 and set(sample_counts.values()) == {1})
 
         new_data = list(sample_data.collect())
         data_dict = dict(self.data)
+        self.assertTrue(set(id for id, value in new_data) == set(sample_counts.keys()))
         for id, value in new_data:
             self.assertTrue(id in data_dict)
             self.assertTrue(np.abs(value - data_dict.get(id)) < consts.FLOAT_ZERO)
@@ -54,27 +56,33 @@ class TestRandomSampler(unittest.TestCase):
         trans_data = list(trans_sample_data.collect())
         trans_sample_ids = [id for (id, value) in trans_data]
         data_to_trans_dict = dict(self.data_to_trans)
-        sample_id_mapping = dict(zip(sample_ids, range(len(sample_ids))))
 
-        self.assertTrue(len(trans_data) == len(sample_ids))
-        self.assertTrue(set(trans_sample_ids) == set(sample_ids))
+        self.assertTrue(len(trans_data) == len(sample_counts))
+        self.assertTrue(set(trans_sample_ids) == set(sample_counts.keys()))
 
         for id, value in trans_data:
-            self.assertTrue(id in sample_id_mapping)
             self.assertTrue(np.abs(value - data_to_trans_dict.get(id)) < consts.FLOAT_ZERO)
 
     def test_upsample(self):
-        sampler = RandomSampler(fraction=3, method="upsample")
+        sampler = RandomSampler(fraction=3.5, method="upsample", random_state=7)
         tracker = TrackerMock()
         sampler.set_tracker(tracker)
         sample_data, sample_ids = sampler.sample(self.table)
 
-        self.assertTrue(sample_data.count() > 250 and sample_data.count() < 350)
+        self.assertTrue(sample_data.count() == 350)
+        sample_counts = dict(sample_ids.collect())
+        self.assertTrue(sum(sample_counts.values()) == 350 and set(sample_counts.values()) == {3, 4})
 
         data_dict = dict(self.data)
         new_data = list(sample_data.collect())
         for id, value in new_data:
-            self.assertTrue(np.abs(value - data_dict[sample_ids[id]]) < consts.FLOAT_ZERO)
+            real_id = int(id.rsplit("_", 1)[0])
+            self.assertTrue(np.abs(value - data_dict[real_id]) < consts.FLOAT_ZERO)
+
+        same_sampler = RandomSampler(fraction=3.5, method="upsample", random_state=7)
+        same_sampler.set_tracker(tracker)
+        same_sample_data, _ = same_sampler.sample(self.table)
+        self.assertTrue(dict(same_sample_data.collect()) == dict(new_data))
 
         trans_sampler = RandomSampler(method="upsample")
         trans_sampler.set_tracker(tracker)
@@ -82,9 +90,10 @@ class TestRandomSampler(unittest.TestCase):
         trans_data = list(trans_sample_data.collect())
         data_to_trans_dict = dict(self.data_to_trans)
 
-        self.assertTrue(len(trans_data) == len(sample_ids))
+        self.assertTrue(set(id for id, value in trans_data) == set(id for id, value in new_data))
         for id, value in trans_data:
-            self.assertTrue(np.abs(value - data_to_trans_dict[sample_ids[id]]) < consts.FLOAT_ZERO)
+            real_id = int(id.rsplit("_", 1)[0])
+            self.assertTrue(np.abs(value - data_to_trans_dict[real_id]) < consts.FLOAT_ZERO)
 
     def tearDown(self):
         session.stop()
@@ -111,7 +120,9 @@ class TestStratifiedSampler(unittest.TestCase):
         count_label = [0 for i in range(4)]
         new_data = list(sample_data.collect())
         data_dict = dict(self.data)
-        self.assertTrue(set(sample_ids) & set(data_dict.keys()) == set(sample_ids))
+        sample_counts = dict(sample_ids.collect())
+        self.assertTrue(set(sample_counts.keys()) & set(data_dict.keys()) == set(sample_counts.keys()))
+        self.assertTrue(set(id for id, inst in new_data) == set(sample_counts.keys()))
 
         for id, inst in new_data:
             count_label[inst.label] += 1
@@ -119,7 +130,7 @@ class TestStratifiedSampler(unittest.TestCase):
             self.assertTrue(inst.label == self.data[id][1].label and inst.features == self.data[id][1].features)
 
         for i in range(4):
-            self.assertTrue(np.abs(count_label[i] - 250 * fractions[i][1]) < 10)
+            self.assertTrue(count_label[i] == int(250 * fractions[i][1]))
 
         trans_sampler = StratifiedSampler(method="downsample")
         trans_sampler.set_tracker(tracker)
@@ -128,7 +139,7 @@ class TestStratifiedSampler(unittest.TestCase):
         trans_sample_ids = [id for (id, value) in trans_data]
         data_to_trans_dict = dict(self.data_to_trans)
 
-        self.assertTrue(set(trans_sample_ids) == set(sample_ids))
+        self.assertTrue(set(trans_sample_ids) == set(sample_counts.keys()))
         for id, inst in trans_data:
             self.assertTrue(inst.features == data_to_trans_dict.get(id).features)
 
@@ -140,29 +151,27 @@ class TestStratifiedSampler(unittest.TestCase):
         sample_data, sample_ids = sampler.sample(self.table)
         new_data = list(sample_data.collect())
         count_label = [0 for i in range(4)]
-        data_dict = dict(self.data)
 
         for id, inst in new_data:
             count_label[inst.label] += 1
-            self.assertTrue(type(id).__name__ == 'int' and id >= 0 and id < len(sample_ids))
-            real_id = sample_ids[id]
+            real_id = int(id.rsplit("_", 1)[0])
             self.assertTrue(inst.label == self.data[real_id][1].label and
                             inst.features == self.data[real_id][1].features)
 
         for i in range(4):
-            self.assertTrue(np.abs(count_label[i] - 250 * fractions[i][1]) < 10)
+            self.assertTrue(count_label[i] == int(250 * fractions[i][1]))
 
         trans_sampler = StratifiedSampler(method="upsample")
         trans_sampler.set_tracker(tracker)
         trans_sample_data = trans_sampler.sample(self.table_trans, sample_ids)
-        trans_data = (trans_sample_data.collect())
+        trans_data = list(trans_sample_data.collect())
         trans_sample_ids = [id for (id, value) in trans_data]
         data_to_trans_dict = dict(self.data_to_trans)
 
-        self.assertTrue(sorted(trans_sample_ids) == list(range(len(sample_ids))))
+        self.assertTrue(sorted(trans_sample_ids) == sorted(id for id, inst in new_data))
         for id, inst in trans_data:
-            real_id = sample_ids[id]
-            self.assertTrue(inst.features == data_to_trans_dict[real_id][1].features)
+            real_id = int(id.rsplit("_", 1)[0])
+            self.assertTrue(inst.features == data_to_trans_dict[real_id].features)
 
     def tearDown(self):
         session.stop()
@@ -136,9 +136,15 @@ class Client(secure_sum_aggregator.Client, secure_mean_aggregator.Client):
 
         send_func(table)
 
-    def send_table(self, table, suffix=tuple()):
+    def send_table(self, table, suffix=tuple(), dtype=None):
+        """
+        Send table of ndarray values, padded if secure aggregate is enabled. If dtype is set, padded values
+        are cast to it before sending, np.float32 for example, to halve transmission.
+        """
         def _func(_table):
             # LOGGER.debug(f"cipher table content: {list(_table.collect())[0]}")
+            if dtype is not None:
+                _table = _table.mapValues(lambda v: v.astype(dtype))
             self._table_sync.send_tables(_table, suffix=suffix)
 
         # LOGGER.debug(f"plantext table content: {list(table.collect())[0]}")
@@ -150,6 +156,6 @@ class Client(secure_sum_aggregator.Client, secure_mean_aggregator.Client):
     def get_aggregated_table(self, suffix=tuple()):
         return self._table_sync.get_tables(suffix=suffix)
 
-    def aggregate_then_get_table(self, table, suffix=tuple()):
-        self.send_table(table=table, suffix=suffix)
+    def aggregate_then_get_table(self, table, suffix=tuple(), dtype=None):
+        self.send_table(table=table, suffix=suffix, dtype=dtype)
         return self.get_aggregated_table(suffix=suffix)
@@ -13,9 +13,10 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
-from federatedml.framework.homo.blocks import model_broadcaster, model_scatter
+from federatedml.framework.homo.blocks import model_broadcaster, model_scatter, model_relay
 from federatedml.framework.homo.blocks.base import HomoTransferBase
 from federatedml.framework.homo.blocks.model_broadcaster import ModelBroadcasterTransVar
+from federatedml.framework.homo.blocks.model_relay import ModelRelayTransVar
 from federatedml.framework.homo.blocks.model_scatter import ModelScatterTransVar
 from federatedml.util import consts
 
@@ -25,16 +26,29 @@ class AggregatorTransVar(HomoTransferBase):
         super().__init__(server=server, clients=clients, prefix=prefix)
         self.model_scatter = ModelScatterTransVar(server=server, clients=clients, prefix=self.prefix)
         self.model_broadcaster = ModelBroadcasterTransVar(server=server, clients=clients, prefix=self.prefix)
+        self.model_relay = ModelRelayTransVar(server=server, clients=clients, prefix=self.prefix)
 
 
 class Server(object):
-    def __init__(self, trans_var: AggregatorTransVar = None):
+    """
+    Args:
+        aggregate_fan_in: if set, clients reduce models through an aggregation tree with this fan-in,
+            and server receives one pre-aggregated model per subtree. None means every client sends to server.
+    """
+
+    def __init__(self, trans_var: AggregatorTransVar = None, aggregate_fan_in=None):
         if trans_var is None:
             trans_var = AggregatorTransVar()
         self._model_broadcaster = model_broadcaster.Server(trans_var=trans_var.model_broadcaster)
         self._model_scatter = model_scatter.Server(trans_var=trans_var.model_scatter)
+        self.num_clients = len(trans_var.client_parties)
+        self._model_relay = None
+        if aggregate_fan_in:
+            self._model_relay = model_relay.Server(trans_var=trans_var.model_relay, fan_in=aggregate_fan_in)
 
     def get_models(self, suffix=tuple()):
+        if self._model_relay is not None:
+            return self._model_scatter.get_models(parties=self._model_relay.subtree_root_parties(), suffix=suffix)
         return self._model_scatter.get_models(suffix=suffix)
 
     def send_aggregated_model(self, model, suffix=tuple()):
@@ -42,13 +56,20 @@ class Server(object):
 
 
 class Client(object):
-    def __init__(self, trans_var: AggregatorTransVar = None):
+    def __init__(self, trans_var: AggregatorTransVar = None, aggregate_fan_in=None):
         if trans_var is None:
             trans_var = AggregatorTransVar()
         self._model_broadcaster = model_broadcaster.Client(trans_var=trans_var.model_broadcaster)
         self._model_scatter = model_scatter.Client(trans_var=trans_var.model_scatter)
+        self._model_relay = None
+        if aggregate_fan_in:
+            self._model_relay = model_relay.Client(trans_var=trans_var.model_relay, fan_in=aggregate_fan_in)
 
     def send_model(self, model, suffix=tuple()):
+        if self._model_relay is not None:
+            model = self._model_relay.merge_children_models(model, suffix=suffix)
+            if self._model_relay.relay_to_parent(model, suffix=suffix):
+                return
         self._model_scatter.send_model(model=model, suffix=suffix)
 
     def get_aggregated_model(self, suffix=tuple()):
@@ -36,10 +36,18 @@ class HomoTransferBase(BaseTransferVariables):
         name = f"{self.prefix}{name}"
         return Variable.get_or_create(name, lambda: Variable(name, self.server, self.clients))
 
+    def create_client_to_client_variable(self, name):
+        name = f"{self.prefix}{name}"
+        return Variable.get_or_create(name, lambda: Variable(name, self.clients, self.clients))
+
     @staticmethod
     def get_parties(roles):
         return session.get_latest_opened().parties.roles_to_parties(roles=roles)
 
+    @property
+    def local_party(self):
+        return session.get_latest_opened().parties.local_party
+
     @property
     def client_parties(self):
         return self.get_parties(roles=self.clients)
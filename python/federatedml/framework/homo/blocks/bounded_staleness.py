@@ -0,0 +1,256 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import functools
+import hashlib
+import queue
+import threading
+import time
+from concurrent import futures
+
+from federatedml.framework.homo.blocks.base import HomoTransferBase
+from federatedml.framework.homo.blocks.model_scatter import ModelScatterTransVar
+from federatedml.util import LOGGER
+from federatedml.util import consts
+
+
+class StalenessTransVar(HomoTransferBase):
+    def __init__(self, server=(consts.ARBITER,), clients=(consts.GUEST, consts.HOST), prefix=None):
+        super().__init__(server=server, clients=clients, prefix=prefix)
+        self.absent_clients = self.create_server_to_client_variable(name="absent_clients")
+        self.mask_correction = self.create_client_to_server_variable(name="mask_correction")
+
+
+class StalenessConf(object):
+    """
+    Args:
+        quorum: aggregate as soon as this many clients' models arrived (after waiting for `deadline`),
+            None means all clients.
+        deadline: once quorum is reached, keep waiting for remaining models until `deadline` seconds
+            since start of the round. None means no extra waiting once quorum is reached.
+        max_staleness: models arriving at most this many rounds late are merged in later rounds, older are dropped.
+            late models are merged only if secure aggregate is disabled,
+            since pads they share with present clients have been revealed to server.
+        staleness_decay: late models are weighted by (1 + staleness) ^ (-staleness_decay).
+    """
+
+    def __init__(self, quorum=None, deadline=None, max_staleness=0, staleness_decay=0.5):
+        self.quorum = quorum
+        self.deadline = deadline
+        self.max_staleness = max_staleness
+        self.staleness_decay = staleness_decay
+
+    @classmethod
+    def from_param(cls, param):
+        """
+        Args:
+            param: `federatedml.param.staleness_param.StalenessParam`
+
+        Returns:
+            None if bounded-staleness mode is disabled
+        """
+        if param is None or not param.enable:
+            return None
+        return cls(quorum=param.quorum, deadline=param.deadline, max_staleness=param.max_staleness,
+                   staleness_decay=param.staleness_decay)
+
+
+def staleness_weight(staleness, decay):
+    """polynomial staleness discount (1 + staleness) ^ (-decay)"""
+    return (1.0 + staleness) ** (-decay)
+
+
+def round_counter(suffix):
+    """counter of random pads for one aggregation round, identical on all clients sharing the same suffix"""
+    return int(hashlib.md5(f"{suffix}".encode("utf-8")).hexdigest(), 16)
+
+
+class _PartyReceiver(object):
+    """
+    receives models of one party round by round on a daemon thread.
+
+    a party never answering blocks only this thread, neither later rounds of other parties nor process exit.
+    models arriving for cancelled futures are discarded without being handed to caller.
+    """
+
+    def __init__(self, variable, party):
+        self._variable = variable
+        self._party = party
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"staleness-receiver-{party}", daemon=True)
+        self._thread.start()
+
+    def submit(self, suffix):
+        future = futures.Future()
+        self._requests.put((suffix, future))
+        return future
+
+    def _run(self):
+        while True:
+            suffix, future = self._requests.get()
+            try:
+                model = self._variable.get_parties(parties=[self._party], suffix=suffix)[0]
+            except BaseException as e:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+                continue
+            if future.set_running_or_notify_cancel():
+                future.set_result(model)
+            else:
+                LOGGER.warning(f"discard model of {self._party} with suffix {suffix}, it has been rejected")
+
+
+class Server(object):
+    """
+    bounded-staleness model collector, see `StalenessConf` for options.
+
+    Args:
+        merge_late_models: whether models missing their round are kept pending and merged in later rounds,
+            should be False if models are masked, in which case late models are rejected once they miss quorum.
+    """
+
+    def __init__(self, trans_var: StalenessTransVar = None, scatter_trans_var: ModelScatterTransVar = None,
+                 conf: StalenessConf = None, merge_late_models=True):
+        if trans_var is None:
+            trans_var = StalenessTransVar()
+        if scatter_trans_var is None:
+            scatter_trans_var = ModelScatterTransVar()
+        if conf is None:
+            conf = StalenessConf()
+        self._absent_clients = trans_var.absent_clients
+        self._mask_correction = trans_var.mask_correction
+        self._client_parties = trans_var.client_parties
+        self._receivers = {party: _PartyReceiver(scatter_trans_var.client_model, party)
+                           for party in self._client_parties}
+
+        num_clients = len(self._client_parties)
+        self._quorum = num_clients if conf.quorum is None else min(max(conf.quorum, 1), num_clients)
+        self._deadline = conf.deadline
+        self._max_staleness = conf.max_staleness
+        self._staleness_decay = conf.staleness_decay
+        self._merge_late_models = merge_late_models
+
+        self._round = 0
+        self._pending = []
+
+    def collect_models(self, suffix=tuple()):
+        """
+        Returns:
+            fresh: list of (party, model) arrived in this round
+            stale: list of (party, model, staleness) arrived late from previous rounds, within max_staleness
+            absent: list of parties whose model of this round hasn't arrived
+        """
+        self._round += 1
+        start = time.time()
+        round_futures = {party: self._receivers[party].submit(suffix) for party in self._client_parties}
+        to_wait = list(round_futures.values())
+
+        done = set()
+        while len(done) < self._quorum:
+            finished, _ = futures.wait(to_wait, return_when=futures.FIRST_COMPLETED)
+            done.update(finished)
+            to_wait = [f for f in to_wait if f not in done]
+        if to_wait and self._deadline is not None:
+            finished, _ = futures.wait(to_wait, timeout=max(0.0, self._deadline - (time.time() - start)))
+            done.update(finished)
+
+        fresh, absent = [], []
+        for party, future in round_futures.items():
+            if future in done:
+                fresh.append((party, future.result()))
+            else:
+                absent.append(party)
+                if self._merge_late_models:
+                    self._pending.append((party, self._round, future))
+                else:
+                    future.cancel()
+
+        stale, pending = [], []
+        for party, round_idx, future in self._pending:
+            staleness = self._round - round_idx
+            if round_idx == self._round:
+                pending.append((party, round_idx, future))
+            elif future.done():
+                if staleness <= self._max_staleness:
+                    stale.append((party, future.result(), staleness))
+                else:
+                    LOGGER.warning(f"drop model of {party} from round {round_idx}, staleness={staleness}")
+            elif staleness < self._max_staleness:
+                pending.append((party, round_idx, future))
+            else:
+                future.cancel()
+        self._pending = pending
+
+        LOGGER.info(f"round {self._round}: {len(fresh)} fresh, {len(stale)} stale, {len(absent)} absent models")
+        return fresh, stale, absent
+
+    def staleness_weight(self, staleness):
+        return staleness_weight(staleness, self._staleness_decay)
+
+    def recover_masks(self, absent_uuids, present_parties, suffix=tuple()):
+        """
+        broadcast uuids of absent clients, every present client returns its negated self mask
+        plus negated pads it shares with absent clients, which cancel masks left in the sum of present models.
+
+        absent clients never reveal their self masks, and their late models are rejected by `collect_models`
+        if `merge_late_models` is False, so pads revealed here never unmask a single client's model.
+        """
+        self._absent_clients.remote_parties(obj=absent_uuids, parties=self._client_parties, suffix=suffix)
+        return self._mask_correction.get_parties(parties=present_parties, suffix=suffix)
+
+
+class Client(object):
+    def __init__(self, trans_var: StalenessTransVar = None):
+        if trans_var is None:
+            trans_var = StalenessTransVar()
+        self._absent_clients = trans_var.absent_clients
+        self._mask_correction = trans_var.mask_correction
+        self._server_parties = trans_var.server_parties
+
+    def send_mask_correction(self, uuid, correction_func, suffix=tuple()):
+        """
+        Args:
+            uuid: uuid of local cipher
+            correction_func: maps uuids of absent clients to negated self mask and pads shared with them
+        """
+        absent_uuids = self._absent_clients.get_parties(parties=self._server_parties, suffix=suffix)[0]
+        if uuid in absent_uuids:
+            LOGGER.warning("local model missed quorum, it's rejected by server, self mask is kept secret")
+            return
+        LOGGER.info(f"{len(absent_uuids)} clients absent, sending mask correction")
+        correction = correction_func(absent_uuids)
+        self._mask_correction.remote_parties(obj=correction, parties=self._server_parties, suffix=suffix)
+
+
+@functools.singledispatch
+def model_zeros_like(model):
+    return model * 0.0
+
+
+@model_zeros_like.register(tuple)
+@model_zeros_like.register(list)
+def _(model):
+    return type(model)(model_zeros_like(x) for x in model)
+
+
+@functools.singledispatch
+def model_scale(model, scalar):
+    return model * scalar
+
+
+@model_scale.register(tuple)
+@model_scale.register(list)
+def _(model, scalar):
+    return type(model)(model_scale(x, scalar) for x in model)
@@ -35,8 +35,8 @@ class Server(object):
         parties = self._client_parties if parties is None else parties
         return self._scatter.get_parties(parties=parties, suffix=suffix)
 
-    def weighted_loss_mean(self, suffix):
-        losses = self.get_losses(suffix=suffix)
+    def weighted_loss_mean(self, suffix, parties=None):
+        losses = self.get_losses(parties=parties, suffix=suffix)
         total_loss = 0.0
         total_weight = 0.0
         for loss, weight in losses:
@@ -0,0 +1,120 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import functools
+
+from federatedml.framework.homo.blocks.base import HomoTransferBase
+from federatedml.util import LOGGER
+from federatedml.util import consts
+
+
+class ModelRelayTransVar(HomoTransferBase):
+    def __init__(self, server=(consts.ARBITER,), clients=(consts.GUEST, consts.HOST), prefix=None):
+        super().__init__(server=server, clients=clients, prefix=prefix)
+        self.relay_model = self.create_client_to_client_variable(name="relay_model")
+
+
+class AggregationTree(object):
+    """
+    k-ary aggregation tree over client parties, with server as virtual root.
+
+    clients are numbered 1..n following the order of `client_parties`, which is identical on every party.
+    node j reduces models from nodes j*k+1, ..., j*k+k, node 0 is the server,
+    so server receives at most k pre-aggregated models, one per subtree.
+    """
+
+    def __init__(self, parties, fan_in):
+        if fan_in < 2:
+            raise ValueError(f"fan_in of aggregation tree should be no less than 2, {fan_in} got")
+        self._parties = list(parties)
+        self._fan_in = fan_in
+
+    def _node(self, party):
+        return self._parties.index(party) + 1
+
+    def _party(self, node):
+        return self._parties[node - 1]
+
+    def _children_nodes(self, node):
+        start = node * self._fan_in + 1
+        return range(start, min(start + self._fan_in, len(self._parties) + 1))
+
+    def children(self, party):
+        return [self._party(node) for node in self._children_nodes(self._node(party))]
+
+    def parent(self, party):
+        """
+        parent party of `party`, None if `party` is a subtree root reporting to server directly
+        """
+        parent_node = (self._node(party) - 1) // self._fan_in
+        return None if parent_node == 0 else self._party(parent_node)
+
+    def roots(self):
+        return [self._party(node) for node in self._children_nodes(0)]
+
+
+class Server(object):
+    def __init__(self, trans_var: ModelRelayTransVar = None, fan_in=2):
+        if trans_var is None:
+            trans_var = ModelRelayTransVar()
+        self._tree = AggregationTree(trans_var.client_parties, fan_in)
+
+    def subtree_root_parties(self):
+        return self._tree.roots()
+
+
+class Client(object):
+    def __init__(self, trans_var: ModelRelayTransVar = None, fan_in=2):
+        if trans_var is None:
+            trans_var = ModelRelayTransVar()
+        self._relay = trans_var.relay_model
+        self._tree = AggregationTree(trans_var.client_parties, fan_in)
+        self._local_party = trans_var.local_party
+
+    def merge_children_models(self, model, suffix=tuple()):
+        """
+        reduce local model with pre-aggregated models of child subtrees.
+        models are still masked, masks cancel only after all subtrees are summed on server.
+        """
+        children = self._tree.children(self._local_party)
+        if not children:
+            return model
+        LOGGER.debug(f"merging models from {len(children)} child parties")
+        children_models = self._relay.get_parties(parties=children, suffix=suffix)
+        return functools.reduce(relay_model_add, children_models, model)
+
+    def relay_to_parent(self, model, suffix=tuple()):
+        """
+        send pre-aggregated model to parent party.
+
+        Returns:
+            False if local party is a subtree root, in which case model should be sent to server instead
+        """
+        parent = self._tree.parent(self._local_party)
+        if parent is None:
+            return False
+        self._relay.remote_parties(obj=model, parties=[parent], suffix=suffix)
+        return True
+
+
+@functools.singledispatch
+def relay_model_add(model, other):
+    return model + other
+
+
+@relay_model_add.register(tuple)
+@relay_model_add.register(list)
+def _(model, other):
+    return type(model)(relay_model_add(x, y) for x, y in zip(model, other))
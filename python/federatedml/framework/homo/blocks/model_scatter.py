@@ -31,8 +31,9 @@ class Server(object):
         self._scatter = trans_var.client_model
         self._client_parties = trans_var.client_parties
 
-    def get_models(self, suffix=tuple()):
-        models = self._scatter.get_parties(parties=self._client_parties, suffix=suffix)
+    def get_models(self, parties=None, suffix=tuple()):
+        parties = self._client_parties if parties is None else parties
+        models = self._scatter.get_parties(parties=parties, suffix=suffix)
         return models
 
 
@@ -44,6 +44,10 @@ class Server(object):
         LOGGER.info("Diffie-Hellman keys exchanging")
         self._dh.key_exchange()
 
+    @property
+    def party_uuid(self):
+        return self._uuid.party_uuid
+
 
 class Client(object):
 
@@ -71,3 +75,6 @@ class Client(object):
 
     def encrypt(self, transfer_weights):
         return self._cipher.encrypt(transfer_weights)
+
+    def encrypt_inplace(self, transfer_weights):
+        return self._cipher.encrypt_inplace(transfer_weights)
@@ -16,11 +16,14 @@
 import functools
 
 from federatedml.framework.homo.blocks import aggregator
+from federatedml.framework.homo.blocks import bounded_staleness
 from federatedml.framework.homo.blocks import random_padding_cipher
 from federatedml.framework.homo.blocks.aggregator import AggregatorTransVar
 from federatedml.framework.homo.blocks.base import HomoTransferBase
+from federatedml.framework.homo.blocks.bounded_staleness import StalenessConf, StalenessTransVar
 from federatedml.framework.homo.blocks.random_padding_cipher import RandomPaddingCipherTransVar
 from federatedml.secureprotol.encrypt import PadsCipher
+from federatedml.util import LOGGER
 from federatedml.util import consts
 
 
@@ -30,20 +33,79 @@ class SecureAggregatorTransVar(HomoTransferBase):
         self.aggregator_trans_var = AggregatorTransVar(server=server, clients=clients, prefix=self.prefix)
         self.random_padding_cipher_trans_var = \
             RandomPaddingCipherTransVar(server=server, clients=clients, prefix=self.prefix)
+        self.staleness_trans_var = StalenessTransVar(server=server, clients=clients, prefix=self.prefix)
 
 
 class Server(object):
-    def __init__(self, trans_var: SecureAggregatorTransVar = None, enable_secure_aggregate=True):
+    """
+    Args:
+        aggregate_fan_in: fan-in of aggregation tree, see `aggregator.Server`
+        staleness_conf: if set, aggregate in bounded-staleness mode, see `bounded_staleness.StalenessConf`,
+            clients should be created with `staleness_conf` too.
+    """
+
+    def __init__(self, trans_var: SecureAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf: StalenessConf = None):
         if trans_var is None:
             trans_var = SecureAggregatorTransVar()
-        self._aggregator = aggregator.Server(trans_var=trans_var.aggregator_trans_var)
+        if aggregate_fan_in and staleness_conf is not None:
+            raise ValueError("aggregation tree and bounded-staleness mode can't be enabled at the same time")
+        self._aggregator = aggregator.Server(trans_var=trans_var.aggregator_trans_var,
+                                             aggregate_fan_in=aggregate_fan_in)
         self.enable_secure_aggregate = enable_secure_aggregate
         if enable_secure_aggregate:
-            random_padding_cipher.Server(trans_var=trans_var.random_padding_cipher_trans_var) \
-                .exchange_secret_keys()
+            self._random_padding_cipher = \
+                random_padding_cipher.Server(trans_var=trans_var.random_padding_cipher_trans_var)
+            self._random_padding_cipher.exchange_secret_keys()
+
+        self._staleness = None
+        if staleness_conf is not None:
+            self._staleness = bounded_staleness.Server(
+                trans_var=trans_var.staleness_trans_var,
+                scatter_trans_var=trans_var.aggregator_trans_var.model_scatter,
+                conf=staleness_conf,
+                merge_late_models=not enable_secure_aggregate)
+        self._num_models = None
+        self._present_parties = None
+
+    @property
+    def num_models(self):
+        """
+        number of client models reduced in latest aggregation, late models count by their staleness weights
+        """
+        if self._num_models is None:
+            return self._aggregator.num_clients
+        return self._num_models
+
+    @property
+    def present_parties(self):
+        """
+        parties whose models of latest round arrived in time, None means all clients
+        """
+        return self._present_parties
 
     def get_models(self, suffix=tuple()):
-        return self._aggregator.get_models(suffix=suffix)
+        if self._staleness is None:
+            return self._aggregator.get_models(suffix=suffix)
+
+        fresh, stale, absent = self._staleness.collect_models(suffix=suffix)
+        models = [model for _, model in fresh]
+        self._num_models = float(len(models))
+        self._present_parties = [party for party, _ in fresh]
+
+        if self.enable_secure_aggregate:
+            # late masked models have been rejected by collector, only self masks and pads shared
+            # with absent clients of present clients are removed here
+            party_uuid = self._random_padding_cipher.party_uuid
+            models.extend(self._staleness.recover_masks(absent_uuids=[party_uuid[party] for party in absent],
+                                                        present_parties=self._present_parties,
+                                                        suffix=suffix))
+        else:
+            for _, model, staleness in stale:
+                weight = self._staleness.staleness_weight(staleness)
+                models.append(bounded_staleness.model_scale(model, weight))
+                self._num_models += weight
+        return models
 
     def aggregate(self, func, suffix=tuple()):
         models = self.get_models(suffix=suffix)
@@ -54,22 +116,55 @@ class Server(object):
 
 
 class Client(object):
-    def __init__(self, trans_var: SecureAggregatorTransVar = None, enable_secure_aggregate=True):
+    def __init__(self, trans_var: SecureAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf: StalenessConf = None):
         if trans_var is None:
             trans_var = SecureAggregatorTransVar()
         self.enable_secure_aggregate = enable_secure_aggregate
-        self._aggregator = aggregator.Client(trans_var=trans_var.aggregator_trans_var)
+        self._aggregator = aggregator.Client(trans_var=trans_var.aggregator_trans_var,
+                                             aggregate_fan_in=aggregate_fan_in)
         if enable_secure_aggregate:
             self._random_padding_cipher: PadsCipher = \
                 random_padding_cipher.Client(trans_var=trans_var.random_padding_cipher_trans_var).create_cipher()
 
-    def send_model(self, model, suffix=tuple()):
+        self._staleness = None
+        if staleness_conf is not None and enable_secure_aggregate:
+            self._staleness = bounded_staleness.Client(trans_var=trans_var.staleness_trans_var)
 
+    def _masked(self, model, suffix=tuple()):
+        """
+        in bounded-staleness mode, also returns a function to regenerate self mask and pads shared with absent clients
+        """
         # w  -> w  + \sum(\delta(i, j) * r_{ij}), namely， adding random mask.
+        if self._staleness is None:
+            return model_cipher_func(model)(self._random_padding_cipher), None
+
+        # w -> w + \sum(\delta(i, j) * r_{ij}) + b_i, with b_i a private self mask, so that pads shared
+        # with a late client revealed by present clients can't unmask its late model.
+        # pads derived from round counter could be regenerated from a zero template once absent clients are known
+        self._random_padding_cipher.set_rand_counter(bounded_staleness.round_counter(suffix), self_mask=True)
+        template = bounded_staleness.model_zeros_like(model)
+
+        def _correction(absent_uuids):
+            pads = model_cipher_func(template)(self._random_padding_cipher.pads_with(absent_uuids,
+                                                                                       with_self_mask=True))
+            return bounded_staleness.model_scale(pads, -1.0)
+
+        return model_cipher_func(model)(self._random_padding_cipher), _correction
+
+    def _send_mask_correction(self, correction_func, suffix=tuple()):
+        if self._staleness is not None:
+            self._staleness.send_mask_correction(uuid=self._random_padding_cipher.uuid,
+                                                 correction_func=correction_func,
+                                                 suffix=suffix)
+
+    def send_model(self, model, suffix=tuple()):
+        correction_func = None
         if self.enable_secure_aggregate:
-            model = model_cipher_func(model)(self._random_padding_cipher)
+            model, correction_func = self._masked(model, suffix=suffix)
 
         self._aggregator.send_model(model=model, suffix=suffix)
+        self._send_mask_correction(correction_func, suffix=suffix)
 
     def get_aggregated_model(self, suffix=tuple()):
         return self._aggregator.get_aggregated_model(suffix=suffix)
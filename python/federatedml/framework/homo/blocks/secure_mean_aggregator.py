@@ -16,7 +16,7 @@
 import functools
 
 from federatedml.framework.homo.blocks import secure_aggregator
-from federatedml.framework.homo.blocks.secure_aggregator import SecureAggregatorTransVar, model_cipher_func
+from federatedml.framework.homo.blocks.secure_aggregator import SecureAggregatorTransVar
 from federatedml.util import consts
 
 
@@ -26,14 +26,16 @@ class SecureMeanAggregatorTransVar(SecureAggregatorTransVar):
 
 
 class Server(secure_aggregator.Server):
-    def __init__(self, trans_var: SecureMeanAggregatorTransVar = None, enable_secure_aggregate=True):
+    def __init__(self, trans_var: SecureMeanAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf=None):
         if trans_var is None:
             trans_var = SecureMeanAggregatorTransVar()
-        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate)
+        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate,
+                         aggregate_fan_in=aggregate_fan_in, staleness_conf=staleness_conf)
 
     def mean_model(self, suffix=tuple()):
         def _func(models):
-            num = len(models)
+            num = self.num_models
             return model_div_scalar(functools.reduce(model_add, models), float(num))
 
         return self.aggregate(_func, suffix=suffix)
@@ -51,20 +53,24 @@ class Server(secure_aggregator.Server):
 
 
 class Client(secure_aggregator.Client):
-    def __init__(self, trans_var: SecureMeanAggregatorTransVar = None, enable_secure_aggregate=True):
+    def __init__(self, trans_var: SecureMeanAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf=None):
         if trans_var is None:
             trans_var = SecureMeanAggregatorTransVar()
-        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate)
+        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate,
+                         aggregate_fan_in=aggregate_fan_in, staleness_conf=staleness_conf)
 
     def send_weighted_model(self, weighted_model, weight: float, suffix=tuple()):
         # w -> w * weight
         weighted_model = model_mul_scalar(weighted_model, weight)
         # w * weight -> w * weight + \sum(\delta(i, j) * r_{ij}), namely， adding random mask.
+        correction_func = None
         if self.enable_secure_aggregate:
-            model_cipher = model_cipher_func(weighted_model)
-            weighted_model = model_cipher(self._random_padding_cipher)
+            weighted_model, correction_func = self._masked(weighted_model, suffix=suffix)
 
         self._aggregator.send_model((weighted_model, weight), suffix=suffix)
+        if correction_func is not None:
+            self._send_mask_correction(lambda absent_uuids: (correction_func(absent_uuids), 0.0), suffix=suffix)
 
 
 @functools.singledispatch
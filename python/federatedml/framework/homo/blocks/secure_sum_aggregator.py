@@ -31,10 +31,12 @@ class SecureSumAggregatorTransVar(SecureAggregatorTransVar):
 
 
 class Server(secure_aggregator.Server):
-    def __init__(self, trans_var: SecureSumAggregatorTransVar = None, enable_secure_aggregate=True):
+    def __init__(self, trans_var: SecureSumAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf=None):
         if trans_var is None:
             trans_var = SecureSumAggregatorTransVar()
-        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate)
+        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate,
+                         aggregate_fan_in=aggregate_fan_in, staleness_conf=staleness_conf)
 
     def sum_model(self, suffix=tuple()):
         def _func(models):
@@ -44,10 +46,12 @@ class Server(secure_aggregator.Server):
 
 
 class Client(secure_aggregator.Client):
-    def __init__(self, trans_var: SecureSumAggregatorTransVar = None, enable_secure_aggregate=True):
+    def __init__(self, trans_var: SecureSumAggregatorTransVar = None, enable_secure_aggregate=True,
+                 aggregate_fan_in=None, staleness_conf=None):
         if trans_var is None:
             trans_var = SecureSumAggregatorTransVar()
-        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate)
+        super().__init__(trans_var=trans_var, enable_secure_aggregate=enable_secure_aggregate,
+                         aggregate_fan_in=aggregate_fan_in, staleness_conf=staleness_conf)
 
 
 @functools.singledispatch
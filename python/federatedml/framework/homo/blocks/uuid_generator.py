@@ -32,6 +32,7 @@ class Server(object):
             trans_var = UUIDTransVar()
         self._uuid_transfer = trans_var.uuid
         self._uuid_set = set()
+        self._party_uuid = {}
         self._ind = -1
         self.client_parties = trans_var.client_parties
 
@@ -52,8 +53,13 @@ class Server(object):
     def validate_uuid(self):
         for party in self.client_parties:
             uid = self._next_uuid()
+            self._party_uuid[party] = uid
             self._uuid_transfer.remote_parties(obj=uid, parties=[party])
 
+    @property
+    def party_uuid(self):
+        return self._party_uuid
+
 
 class Client(object):
 
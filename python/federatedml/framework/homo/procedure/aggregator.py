@@ -18,12 +18,16 @@ import types
 import typing
 from functools import reduce
 
+from federatedml.framework.homo.blocks import bounded_staleness
 from federatedml.framework.homo.blocks import has_converged, loss_scatter, model_scatter, model_broadcaster
+from federatedml.framework.homo.blocks import model_relay
 from federatedml.framework.homo.blocks import random_padding_cipher
 from federatedml.framework.homo.blocks.base import HomoTransferBase
+from federatedml.framework.homo.blocks.bounded_staleness import StalenessConf, StalenessTransVar
 from federatedml.framework.homo.blocks.has_converged import HasConvergedTransVar
 from federatedml.framework.homo.blocks.loss_scatter import LossScatterTransVar
 from federatedml.framework.homo.blocks.model_broadcaster import ModelBroadcasterTransVar
+from federatedml.framework.homo.blocks.model_relay import ModelRelayTransVar, relay_model_add
 from federatedml.framework.homo.blocks.model_scatter import ModelScatterTransVar
 from federatedml.framework.homo.blocks.random_padding_cipher import RandomPaddingCipherTransVar
 from federatedml.framework.weights import Weights, NumericWeights, TransferableWeights
@@ -40,6 +44,8 @@ class LegacyAggregatorTransVar(HomoTransferBase):
         self.model_scatter = ModelScatterTransVar(server=server, clients=clients, prefix=self.prefix)
         self.model_broadcaster = ModelBroadcasterTransVar(server=server, clients=clients, prefix=self.prefix)
         self.random_padding_cipher = RandomPaddingCipherTransVar(server=server, clients=clients, prefix=self.prefix)
+        self.model_relay = ModelRelayTransVar(server=server, clients=clients, prefix=self.prefix)
+        self.staleness = StalenessTransVar(server=server, clients=clients, prefix=self.prefix)
 
 
 class Arbiter(object):
@@ -56,11 +62,36 @@ class Arbiter(object):
         self._model_scatter = model_scatter.Server(trans_var.model_scatter)
         self._model_broadcaster = model_broadcaster.Server(trans_var.model_broadcaster)
         self._random_padding_cipher = random_padding_cipher.Server(trans_var.random_padding_cipher)
+        self._model_relay_trans_var = trans_var.model_relay
+        self._model_relay = None
+        self._model_scatter_trans_var = trans_var.model_scatter
+        self._staleness_trans_var = trans_var.staleness
+        self._staleness = None
+        self._present_parties = None
+        self._enable_secure_aggregate = False
 
     # noinspection PyUnusedLocal,PyAttributeOutsideInit,PyProtectedMember
-    def register_aggregator(self, transfer_variables: BaseTransferVariables, enable_secure_aggregate=True):
+    def register_aggregator(self, transfer_variables: BaseTransferVariables, enable_secure_aggregate=True,
+                            aggregate_fan_in=None, staleness_conf: StalenessConf = None):
+        """
+        Args:
+            aggregate_fan_in: if set, clients reduce models through an aggregation tree with this fan-in,
+                see `federatedml.framework.homo.blocks.aggregator.Server`, hosts' models should not be encrypted.
+            staleness_conf: if set, aggregate in bounded-staleness mode, see `bounded_staleness.StalenessConf`,
+                hosts' models should not be encrypted.
+        """
+        if aggregate_fan_in and staleness_conf is not None:
+            raise ValueError("aggregation tree and bounded-staleness mode can't be enabled at the same time")
+        self._enable_secure_aggregate = enable_secure_aggregate
         if enable_secure_aggregate:
             self._random_padding_cipher.exchange_secret_keys()
+        if aggregate_fan_in:
+            self._model_relay = model_relay.Server(trans_var=self._model_relay_trans_var, fan_in=aggregate_fan_in)
+        if staleness_conf is not None:
+            self._staleness = bounded_staleness.Server(trans_var=self._staleness_trans_var,
+                                                       scatter_trans_var=self._model_scatter_trans_var,
+                                                       conf=staleness_conf,
+                                                       merge_late_models=not enable_secure_aggregate)
         return self
 
     def aggregate_model(self, ciphers_dict=None, suffix=tuple()) -> Weights:
@@ -83,6 +114,17 @@ class Arbiter(object):
         return model
 
     def get_models_for_aggregate(self, ciphers_dict=None, suffix=tuple()):
+        if self._model_relay is not None:
+            # pre-aggregated models of subtrees, weighted by total degree of each subtree
+            models = self._model_scatter.get_models(parties=self._model_relay.subtree_root_parties(), suffix=suffix)
+            for model in models:
+                yield model.weights, model.get_degree() or 1.0
+            return
+
+        if self._staleness is not None:
+            yield from self._get_models_with_staleness(suffix=suffix)
+            return
+
         models = self._model_scatter.get_models(suffix=suffix)
         guest_model = models[0]
         yield guest_model.weights, guest_model.get_degree() or 1.0
@@ -96,6 +138,25 @@ class Arbiter(object):
             yield weights, model.get_degree() or 1.0
             index += 1
 
+    def _get_models_with_staleness(self, suffix=tuple()):
+        fresh, stale, absent = self._staleness.collect_models(suffix=suffix)
+        self._present_parties = [party for party, _ in fresh]
+        for _, model in fresh:
+            yield model.weights, model.get_degree() or 1.0
+
+        if self._enable_secure_aggregate:
+            # corrections remove self masks of present clients and pads they share with absent ones, no degree
+            party_uuid = self._random_padding_cipher.party_uuid
+            corrections = self._staleness.recover_masks(absent_uuids=[party_uuid[party] for party in absent],
+                                                        present_parties=self._present_parties,
+                                                        suffix=suffix)
+            for correction in corrections:
+                yield correction.weights, 0.0
+        else:
+            for _, model, staleness in stale:
+                weight = self._staleness.staleness_weight(staleness)
+                yield model.weights * weight, (model.get_degree() or 1.0) * weight
+
     def send_aggregated_model(self, model: Weights,
                               ciphers_dict: typing.Union[None, typing.Mapping[int, typing.Any]] = None,
                               suffix=tuple()):
@@ -117,6 +178,9 @@ class Arbiter(object):
             parties = []
             parties.extend(self._guest_parties)
             parties.extend([self._host_parties[i] for i in idx])
+        if self._present_parties is not None:
+            # in bounded-staleness mode, absent clients' losses are not waited for
+            parties = [party for party in (parties or self._client_parties) if party in self._present_parties]
         losses = self._loss_sync.get_losses(parties=parties, suffix=suffix)
         total_loss = 0.0
         total_degree = 0.0
@@ -141,12 +205,21 @@ class Client(object):
         self._model_scatter = model_scatter.Client(trans_var.model_scatter)
         self._model_broadcaster = model_broadcaster.Client(trans_var.model_broadcaster)
         self._random_padding_cipher = random_padding_cipher.Client(trans_var.random_padding_cipher)
+        self._model_relay_trans_var = trans_var.model_relay
+        self._model_relay = None
+        self._staleness_trans_var = trans_var.staleness
+        self._staleness = None
 
     # noinspection PyAttributeOutsideInit,PyUnusedLocal,PyProtectedMember
-    def register_aggregator(self, transfer_variables: BaseTransferVariables, enable_secure_aggregate=True):
+    def register_aggregator(self, transfer_variables: BaseTransferVariables, enable_secure_aggregate=True,
+                            aggregate_fan_in=None, staleness_conf: StalenessConf = None):
         self._enable_secure_aggregate = enable_secure_aggregate
         if enable_secure_aggregate:
             self._cipher = self._random_padding_cipher.create_cipher()
+        if aggregate_fan_in:
+            self._model_relay = model_relay.Client(trans_var=self._model_relay_trans_var, fan_in=aggregate_fan_in)
+        if staleness_conf is not None and enable_secure_aggregate:
+            self._staleness = bounded_staleness.Client(trans_var=self._staleness_trans_var)
         return self
 
     def secure_aggregate(self, send_func, weights: Weights, degree: float = None, enable_secure_aggregate=True):
@@ -163,12 +236,29 @@ class Client(object):
 
     def send_model(self, weights: Weights, degree: float = None, suffix=tuple()):
         def _func(_weights: TransferableWeights):
+            if self._model_relay is not None:
+                _weights = self._model_relay.merge_children_models(_weights, suffix=suffix)
+                if self._model_relay.relay_to_parent(_weights, suffix=suffix):
+                    return
             self._model_scatter.send_model(model=_weights, suffix=suffix)
 
-        return self.secure_aggregate(send_func=_func,
-                                     weights=weights,
-                                     degree=degree,
-                                     enable_secure_aggregate=self._enable_secure_aggregate)
+        if self._staleness is None:
+            return self.secure_aggregate(send_func=_func,
+                                         weights=weights,
+                                         degree=degree,
+                                         enable_secure_aggregate=self._enable_secure_aggregate)
+
+        # pads derived from round counter, plus a private self mask, could be regenerated from a zero template
+        # once absent clients are known, see `secure_aggregator.Client`
+        self._cipher.set_rand_counter(bounded_staleness.round_counter(suffix), self_mask=True)
+        template = weights * 0.0
+
+        def _correction(absent_uuids):
+            pads = template.encrypted(self._cipher.pads_with(absent_uuids, with_self_mask=True), inplace=True)
+            return (pads * -1.0).for_remote()
+
+        self.secure_aggregate(send_func=_func, weights=weights, degree=degree, enable_secure_aggregate=True)
+        self._staleness.send_mask_correction(uuid=self._cipher.uuid, correction_func=_correction, suffix=suffix)
 
     def get_aggregated_model(self, suffix=tuple()):
         return self._model_broadcaster.get_model(suffix=suffix)
@@ -192,6 +282,12 @@ Guest = Client
 Host = Client
 
 
+@relay_model_add.register(TransferableWeights)
+def _(model, other):
+    # masked weights are summed, and so are degrees, arbiter divides total weights by total degree
+    return (model.weights + other.weights).for_remote().with_degree(model.get_degree(1.0) + other.get_degree(1.0))
+
+
 def with_role(role, transfer_variable, enable_secure_aggregate=True):
     if role == consts.GUEST:
         return Client().register_aggregator(transfer_variable, enable_secure_aggregate)
@@ -0,0 +1,264 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from federatedml.framework.homo.blocks import bounded_staleness
+from federatedml.framework.homo.blocks.bounded_staleness import StalenessConf, round_counter, staleness_weight
+from federatedml.framework.homo.procedure import aggregator
+from federatedml.secureprotol.encrypt import PadsCipher
+
+SERVER = "arbiter"
+
+
+class _Channel(object):
+    """
+    in-memory client-server variable, messages are keyed by client party and suffix, `get_parties` blocks until sent
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def _slot(self, party, suffix):
+        with self._lock:
+            return self._slots.setdefault((party, suffix), [threading.Event(), None])
+
+    def put(self, party, obj, suffix):
+        slot = self._slot(party, suffix)
+        slot[1] = obj
+        slot[0].set()
+
+    def sent(self, party, suffix):
+        return self._slot(party, suffix)[0].is_set()
+
+    def remote_parties(self, obj, parties, suffix=tuple()):
+        for party in parties:
+            self.put(party, obj, suffix)
+
+    def get_parties(self, parties, suffix=tuple()):
+        results = []
+        for party in parties:
+            slot = self._slot(party, suffix)
+            slot[0].wait()
+            results.append(slot[1])
+        return results
+
+    def client_view(self, party):
+        return SimpleNamespace(remote_parties=lambda obj, parties, suffix=tuple(): self.put(party, obj, suffix),
+                               get_parties=lambda parties, suffix=tuple(): self.get_parties([party], suffix))
+
+
+class BoundedStalenessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parties = ["a", "b", "c"]
+        self.uuids = {"a": 1, "b": 2, "c": 3}
+        self.scatter = _Channel()
+        self.absent_clients = _Channel()
+        self.mask_correction = _Channel()
+
+    def create_server(self, conf, merge_late_models=True):
+        trans_var = SimpleNamespace(absent_clients=self.absent_clients, mask_correction=self.mask_correction,
+                                    client_parties=self.parties)
+        return bounded_staleness.Server(trans_var=trans_var,
+                                        scatter_trans_var=SimpleNamespace(client_model=self.scatter),
+                                        conf=conf,
+                                        merge_late_models=merge_late_models)
+
+    def create_client(self, party):
+        trans_var = SimpleNamespace(absent_clients=self.absent_clients.client_view(party),
+                                    mask_correction=self.mask_correction.client_view(party),
+                                    server_parties=[SERVER])
+        return bounded_staleness.Client(trans_var=trans_var)
+
+    @staticmethod
+    def create_ciphers(uuids, counter, self_mask=False):
+        ciphers = {}
+        for uid in uuids:
+            cipher = PadsCipher()
+            cipher.set_self_uuid(uid)
+            cipher.set_amplify_factor(1e6)
+            cipher.set_exchanged_keys({other: min(uid, other) * 1000 + max(uid, other) for other in uuids})
+            cipher.set_rand_counter(counter, self_mask=self_mask)
+            ciphers[uid] = cipher
+        return ciphers
+
+    def test_mask_recovery(self):
+        uuids = list(range(1, 7))
+        ciphers = self.create_ciphers(uuids, round_counter(("epoch", 3)))
+        models = {uid: np.random.rand(4, 5) for uid in uuids}
+        present, absent = [1, 2, 4, 6], [3, 5]
+
+        total = sum(ciphers[uid].encrypt(models[uid]) for uid in present)
+        self.assertFalse(np.allclose(total, sum(models[uid] for uid in present)))
+
+        for uid in present:
+            total -= ciphers[uid].pads_with(absent).encrypt(np.zeros((4, 5)))
+        self.assertTrue(np.allclose(total, sum(models[uid] for uid in present)))
+
+    def test_self_mask(self):
+        uuids = list(range(1, 5))
+        ciphers = self.create_ciphers(uuids, round_counter(("epoch", 3)), self_mask=True)
+        models = {uid: np.random.rand(4, 5) for uid in uuids}
+        present, absent = [1, 2, 4], [3]
+
+        total = sum(ciphers[uid].encrypt(models[uid]) for uid in present)
+        for uid in present:
+            total -= ciphers[uid].pads_with(absent, with_self_mask=True).encrypt(np.zeros((4, 5)))
+        self.assertTrue(np.allclose(total, sum(models[uid] for uid in present)))
+
+        # even with every pad shared with peers, absent client's model is still hidden by its self mask
+        late = ciphers[3].encrypt(models[3]) - ciphers[3].pads_with(present).encrypt(np.zeros((4, 5)))
+        self.assertFalse(np.allclose(late, models[3]))
+        self.assertTrue(np.allclose(late - ciphers[3].pads_with([], with_self_mask=True).encrypt(np.zeros((4, 5))),
+                                    models[3]))
+
+    def test_quorum(self):
+        server = self.create_server(StalenessConf(quorum=2))
+        self.scatter.put("a", 1.0, ("r", 1))
+        self.scatter.put("c", 3.0, ("r", 1))
+        fresh, stale, absent = server.collect_models(suffix=("r", 1))
+        self.assertEqual(sorted(fresh), [("a", 1.0), ("c", 3.0)])
+        self.assertEqual(stale, [])
+        self.assertEqual(absent, ["b"])
+
+    def test_deadline(self):
+        server = self.create_server(StalenessConf(quorum=1, deadline=2.0))
+        self.scatter.put("a", 1.0, ("r", 1))
+        timer = threading.Timer(0.1, self.scatter.put, args=("b", 2.0, ("r", 1)))
+        timer.start()
+        fresh, stale, absent = server.collect_models(suffix=("r", 1))
+        timer.join()
+        self.assertEqual(sorted(fresh), [("a", 1.0), ("b", 2.0)])
+        self.assertEqual(absent, ["c"])
+
+    def test_stale_models(self):
+        server = self.create_server(StalenessConf(quorum=2, deadline=0.2, max_staleness=1, staleness_decay=0.5))
+        for party, model in [("a", 1.0), ("b", 2.0)]:
+            self.scatter.put(party, model, ("r", 1))
+        fresh, stale, absent = server.collect_models(suffix=("r", 1))
+        self.assertEqual(absent, ["c"])
+
+        # model of round 1 arrives late, merged in round 2 with staleness 1
+        self.scatter.put("c", 3.0, ("r", 1))
+        for party, model in [("a", 1.5), ("b", 2.5)]:
+            self.scatter.put(party, model, ("r", 2))
+        fresh, stale, absent = server.collect_models(suffix=("r", 2))
+        self.assertEqual(sorted(fresh), [("a", 1.5), ("b", 2.5)])
+        self.assertEqual(stale, [("c", 3.0, 1)])
+        self.assertEqual(absent, ["c"])
+        self.assertAlmostEqual(server.staleness_weight(1), 2 ** -0.5)
+
+        # model of round 2 never arrives in time, it's dropped once staleness exceeds max_staleness
+        for party, model in [("a", 1.7), ("b", 2.7)]:
+            self.scatter.put(party, model, ("r", 3))
+        fresh, stale, absent = server.collect_models(suffix=("r", 3))
+        self.scatter.put("c", 3.2, ("r", 2))
+        self.scatter.put("c", 3.3, ("r", 3))
+        for party, model in [("a", 1.9), ("b", 2.9)]:
+            self.scatter.put(party, model, ("r", 4))
+        fresh, stale, absent = server.collect_models(suffix=("r", 4))
+        self.assertEqual(stale, [("c", 3.3, 1)])
+
+    def test_late_masked_model_rejected(self):
+        suffix = ("r", 1)
+        server = self.create_server(StalenessConf(quorum=2), merge_late_models=False)
+        ciphers = self.create_ciphers(list(self.uuids.values()), round_counter(suffix), self_mask=True)
+        models = {party: np.random.rand(3, 4) for party in self.parties}
+        for party in ["a", "b"]:
+            self.scatter.put(party, ciphers[self.uuids[party]].encrypt(models[party]), suffix)
+
+        fresh, stale, absent = server.collect_models(suffix=suffix)
+        self.assertEqual(absent, ["c"])
+
+        def _send_correction(party):
+            cipher = ciphers[self.uuids[party]]
+            self.create_client(party).send_mask_correction(
+                uuid=cipher.uuid,
+                correction_func=lambda absent_uuids: -cipher.pads_with(absent_uuids, with_self_mask=True).encrypt(
+                    np.zeros((3, 4))),
+                suffix=suffix)
+
+        clients = [threading.Thread(target=_send_correction, args=(party,)) for party in self.parties]
+        for client in clients:
+            client.start()
+        corrections = server.recover_masks(absent_uuids=[self.uuids["c"]], present_parties=["a", "b"], suffix=suffix)
+        for client in clients:
+            client.join()
+        total = sum(model for _, model in fresh) + sum(corrections)
+        self.assertTrue(np.allclose(total, models["a"] + models["b"]))
+        # absent client never reveals its self mask
+        self.assertFalse(self.mask_correction.sent("c", suffix))
+
+        # late upload is rejected, never handed out in later rounds
+        self.scatter.put("c", ciphers[self.uuids["c"]].encrypt(models["c"]), suffix)
+        for party in self.parties:
+            self.scatter.put(party, np.zeros((3, 4)), ("r", 2))
+        fresh, stale, absent = server.collect_models(suffix=("r", 2))
+        self.assertEqual(stale, [])
+        self.assertTrue(all(np.allclose(model, 0.0) for _, model in fresh))
+
+    def test_arbiter_merges_late_models_without_secure_aggregate(self):
+        arbiter = aggregator.Arbiter(trans_var=mock.MagicMock())
+        arbiter.register_aggregator(None, enable_secure_aggregate=False,
+                                    staleness_conf=StalenessConf(quorum=2, max_staleness=1))
+        self.assertTrue(arbiter._staleness._merge_late_models)
+        arbiter._staleness = self.create_server(StalenessConf(quorum=2, deadline=0.2, max_staleness=1),
+                                                merge_late_models=True)
+
+        def _model(value):
+            return SimpleNamespace(weights=np.full(2, value), get_degree=lambda: 2.0)
+
+        for party, value in [("a", 1.0), ("b", 2.0)]:
+            self.scatter.put(party, _model(value), ("r", 1))
+        models = list(arbiter._get_models_with_staleness(suffix=("r", 1)))
+        self.assertEqual(len(models), 2)
+
+        # late model of round 1 is merged with discounted weight and degree in round 2
+        self.scatter.put("c", _model(3.0), ("r", 1))
+        for party, value in [("a", 1.5), ("b", 2.5)]:
+            self.scatter.put(party, _model(value), ("r", 2))
+        models = list(arbiter._get_models_with_staleness(suffix=("r", 2)))
+        self.assertEqual(len(models), 3)
+        weights, degree = models[-1]
+        self.assertTrue(np.allclose(weights, 3.0 * staleness_weight(1, 0.5)))
+        self.assertAlmostEqual(degree, 2.0 * staleness_weight(1, 0.5))
+
+        secure_arbiter = aggregator.Arbiter(trans_var=mock.MagicMock())
+        secure_arbiter.register_aggregator(None, enable_secure_aggregate=True, staleness_conf=StalenessConf(quorum=2))
+        self.assertFalse(secure_arbiter._staleness._merge_late_models)
+
+    def test_receivers_not_blocking_exit(self):
+        server = self.create_server(StalenessConf(quorum=1))
+        self.scatter.put("a", 1.0, ("r", 1))
+        server.collect_models(suffix=("r", 1))
+        receivers = [thread for thread in threading.enumerate() if thread.name.startswith("staleness-receiver")]
+        self.assertTrue(receivers)
+        self.assertTrue(all(thread.daemon for thread in receivers))
+
+    def test_staleness_weight(self):
+        self.assertEqual(staleness_weight(0, 0.5), 1.0)
+        self.assertAlmostEqual(staleness_weight(3, 0.5), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
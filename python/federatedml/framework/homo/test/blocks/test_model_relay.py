@@ -0,0 +1,70 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+
+import numpy as np
+
+from federatedml.framework.homo.blocks import secure_sum_aggregator
+from federatedml.framework.homo.blocks.model_relay import AggregationTree
+from federatedml.framework.homo.test.blocks.test_utils import TestBlocks
+from federatedml.util import consts
+
+
+def tree_sum_call(job_id, role, ind, *args):
+    fan_in = args[0]
+    models = args[1]
+    if role == consts.ARBITER:
+        agg = secure_sum_aggregator.Server(aggregate_fan_in=fan_in)
+        partial_models = agg.get_models()
+        agg.send_aggregated_model(sum(partial_models))
+        return len(partial_models)
+    else:
+        agg = secure_sum_aggregator.Client(aggregate_fan_in=fan_in)
+        agg.send_model(models[0] if role == consts.GUEST else models[ind + 1])
+        return agg.get_aggregated_model()
+
+
+class AggregationTreeTest(unittest.TestCase):
+
+    def test_topology(self):
+        tree = AggregationTree(parties=list(range(10)), fan_in=3)
+        self.assertEqual(tree.roots(), [0, 1, 2])
+        self.assertEqual(tree.children(0), [3, 4, 5])
+        self.assertEqual(tree.children(2), [9])
+        self.assertEqual(tree.children(3), [])
+        self.assertIsNone(tree.parent(1))
+        self.assertEqual(tree.parent(9), 2)
+        covered = set(tree.roots())
+        for party in range(10):
+            covered.update(tree.children(party))
+        self.assertEqual(covered, set(range(10)))
+
+
+class TreeAggregatorTest(TestBlocks):
+
+    def run_with_num_hosts(self, num_hosts, fan_in):
+        models = [np.random.rand(3, 4) for _ in range(num_hosts + 1)]
+        num_partial, *clients = self.run_test(tree_sum_call, self.job_id, num_hosts, fan_in, models)
+        self.assertEqual(num_partial, min(fan_in, num_hosts + 1))
+        for model in clients:
+            self.assertTrue(np.allclose(model, sum(models)))
+
+    def test_host_1(self):
+        self.run_with_num_hosts(1, fan_in=2)
+
+    def test_host_10(self):
+        self.run_with_num_hosts(10, fan_in=3)
@@ -257,7 +257,7 @@ class NumpyWeights(Weights):
         if inplace:
             size = self._weights.size
             view = self._weights.view().reshape(size)
-            view_other = other._weights.view().reshpae(size)
+            view_other = other._weights.view().reshape(size)
             for i in range(size):
                 view[i] = func(view[i], view_other[i])
             return self
@@ -269,7 +269,6 @@ class NumpyWeights(Weights):
     def axpy(self, a, y: 'NumpyWeights'):
         size = self._weights.size
         view = self._weights.view().reshape(size)
-        view_other = y._weights.view().reshpae(size)
-        for i in range(size):
-            view[i] += a * view_other[i]
+        view_other = y._weights.view().reshape(size)
+        view += a * view_other
         return self
@@ -17,15 +17,26 @@
 #  limitations under the License.
 
 
+import operator
+
 import numpy as np
 
 from federatedml.framework.weights import ListWeights, TransferableWeights
+from federatedml.secureprotol.encrypt import Encrypt, PadsCipher
 from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
 
+# element-wise operators with numpy ufunc equivalents, applied on the whole array at once
+_UFUNCS = {
+    operator.add: np.add,
+    operator.sub: np.subtract,
+    operator.mul: np.multiply,
+    operator.truediv: np.true_divide,
+}
+
 
 class LinearModelWeights(ListWeights):
-    def __init__(self, l, fit_intercept):
-        l = np.array(l)
+    def __init__(self, l, fit_intercept, copy=True):
+        l = np.array(l) if copy else np.asarray(l)
         if not isinstance(l[0], PaillierEncryptedNumber):
             if np.max(np.abs(l)) > 1e8:
                 raise RuntimeError("The model weights are overflow, please check if the "
@@ -42,13 +53,36 @@ class LinearModelWeights(ListWeights):
             return np.array(self._weights[:-1])
         return np.array(self._weights)
 
+    @property
+    def coef_view(self):
+        """
+        coef part of weights without copy, modification on it updates weights.
+        """
+        if self.fit_intercept:
+            return self._weights[:-1]
+        return self._weights
+
     @property
     def intercept_(self):
         if self.fit_intercept:
             return self._weights[-1]
         return 0.0
 
+    def _apply(self, ufunc, other, inplace):
+        if inplace and np.can_cast(np.result_type(self._weights, other), self._weights.dtype, casting="same_kind"):
+            ufunc(self._weights, other, out=self._weights)
+            return self
+        result = ufunc(self._weights, other)
+        if inplace:
+            self._weights = result
+            return self
+        return LinearModelWeights(result, self.fit_intercept, copy=False)
+
     def binary_op(self, other: 'LinearModelWeights', func, inplace):
+        ufunc = _UFUNCS.get(func)
+        if ufunc is not None:
+            return self._apply(ufunc, other._weights, inplace)
+
         if inplace:
             for k, v in enumerate(self._weights):
                 self._weights[k] = func(self._weights[k], other._weights[k])
@@ -58,3 +92,31 @@ class LinearModelWeights(ListWeights):
             for k, v in enumerate(self._weights):
                 _w.append(func(self._weights[k], other._weights[k]))
             return LinearModelWeights(_w, self.fit_intercept)
+
+    def axpy(self, a, y: 'LinearModelWeights'):
+        return self._apply(np.add, a * y._weights, inplace=True)
+
+    def __imul__(self, other):
+        return self._apply(np.multiply, other, inplace=True)
+
+    def __mul__(self, other):
+        return self._apply(np.multiply, other, inplace=False)
+
+    def __truediv__(self, other):
+        return self._apply(np.true_divide, other, inplace=False)
+
+    def __itruediv__(self, other):
+        return self._apply(np.true_divide, other, inplace=True)
+
+    def encrypted(self, cipher: Encrypt, inplace=True):
+        # pads are drawn for the whole array at once, same pads sequence as element-wise encryption
+        if isinstance(cipher, PadsCipher) and self._weights.dtype == np.float64:
+            if inplace and self._weights.flags.c_contiguous and self._weights.flags.writeable:
+                cipher.encrypt_inplace(self._weights)
+                return self
+            weights = cipher.encrypt(self._weights)
+            if inplace:
+                self._weights = weights
+                return self
+            return LinearModelWeights(weights, self.fit_intercept, copy=False)
+        return super().encrypted(cipher, inplace=inplace)
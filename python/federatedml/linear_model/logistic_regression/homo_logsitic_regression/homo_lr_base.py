@@ -18,6 +18,7 @@
 
 import functools
 
+from federatedml.framework.homo.blocks.bounded_staleness import StalenessConf
 from federatedml.linear_model.linear_model_weight import LinearModelWeights
 from federatedml.linear_model.logistic_regression.base_logistic_regression import BaseLogisticRegression
 from federatedml.optim import activation
@@ -54,7 +55,10 @@ class HomoLRBase(BaseLogisticRegression):
             self.cipher_operator = FakeEncrypt()
 
         self.transfer_variable = HomoLRTransferVariable()
-        self.aggregator.register_aggregator(self.transfer_variable)
+        self.aggregator.register_aggregator(self.transfer_variable,
+                                            enable_secure_aggregate=params.secure_aggregate,
+                                            aggregate_fan_in=params.aggregate_fan_in,
+                                            staleness_conf=StalenessConf.from_param(params.staleness_param))
         self.optimizer = optimizer_factory(params)
         self.aggregate_iters = params.aggregate_iters
         self.use_proximal = params.use_proximal
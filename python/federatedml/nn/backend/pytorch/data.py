@@ -12,7 +12,14 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import itertools
 import os
+import pickle
+import queue
+import shutil
+import tempfile
+import threading
+import weakref
 
 import numpy as np
 import torch
@@ -28,6 +35,10 @@ from fate_arch.abc import CTableABC
 from federatedml.util import LOGGER
 from federatedml.util.homo_label_encoder import HomoLabelEncoderClient
 
+# rows per chunk written to disk, and chunks buffered ahead of the writer when exporting table to mmap
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_PREFETCH = 4
+
 
 class DatasetMixIn(Dataset):
     def get_num_features(self):
@@ -40,7 +51,79 @@ class DatasetMixIn(Dataset):
         return None
 
 
+def _partition_stats(kv_iterator):
+    size, labels, x_shape = 0, set(), None
+    for _, instance in kv_iterator:
+        if x_shape is None:
+            x_shape = instance.features.shape
+        labels.add(instance.label)
+        size += 1
+    return size, labels, x_shape
+
+
+def _merge_stats(stats1, stats2):
+    size1, labels1, x_shape1 = stats1
+    size2, labels2, x_shape2 = stats2
+    return size1 + size2, labels1 | labels2, x_shape1 if x_shape1 is not None else x_shape2
+
+
+def _load_pickled_chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class _ChunkWriter(threading.Thread):
+    """
+    append chunks of (keys, features, labels) to files in background,
+    so that collecting from table overlaps with converting and writing
+    """
+
+    def __init__(self, x_path, keys_path, labels_path, prefetch):
+        super(_ChunkWriter, self).__init__(daemon=True)
+        self.chunks = queue.Queue(maxsize=prefetch)
+        self.error = None
+        self._paths = x_path, keys_path, labels_path
+
+    def run(self):
+        try:
+            self._write()
+        except Exception as e:
+            self.error = e
+            # keep draining on error, including failures opening files, so that producer never blocks on a full queue
+            while self.chunks.get() is not None:
+                pass
+
+    def _write(self):
+        x_path, keys_path, labels_path = self._paths
+        with open(x_path, "wb") as x_file, open(keys_path, "wb") as keys_file, open(labels_path, "wb") as labels_file:
+            while True:
+                chunk = self.chunks.get()
+                if chunk is None:
+                    return
+                keys, features, labels = chunk
+                np.asarray(features, dtype=np.float32).tofile(x_file)
+                pickle.dump(keys, keys_file)
+                pickle.dump(labels, labels_file)
+
+
 class TableDataSet(DatasetMixIn):
+    """
+    Dataset of a table. Features and labels are loaded into driver memory by default. If `mmap_dir` is set,
+    they are exported into memory-mapped arrays under it in a single pass over the table instead, and batches
+    are served from disk, for tables which do not fit in memory.
+
+    Export keeps at most `prefetch` chunks of `chunk_size` rows in memory, while disk usage is about
+    size * num_features * 4 bytes of features, plus labels and pickled keys, until the dataset is released.
+    Batches are not streamed from partitions: a disk copy is read by later epochs and predicting through the
+    page cache, instead of collecting the table again for each pass, and serves any order of indices.
+
+    Index could be an int or a list of ints, so a batch could be fetched with one read by a BatchSampler.
+    """
+
     def get_num_features(self):
         return self._num_features
 
@@ -51,35 +134,49 @@ class TableDataSet(DatasetMixIn):
         return self._label_align_mapping
 
     def get_keys(self):
-        return self._keys
+        if self._keys is not None:
+            return self._keys
+        return itertools.chain.from_iterable(_load_pickled_chunks(self._keys_path))
 
     def __init__(
         self,
         data_instances: CTableABC,
         expected_label_type=np.float32,
         label_align_mapping=None,
+        mmap_dir=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        prefetch=DEFAULT_PREFETCH,
         **kwargs,
     ):
 
         # partition
         self.partitions = data_instances.partitions
+        self._keys = None
+        self._keys_path = None
 
-        # size
-        self.size = data_instances.count()
-        if self.size <= 0:
-            raise ValueError("num of instances is 0")
+        if mmap_dir is None:
+            self._load(data_instances, expected_label_type, label_align_mapping)
+        else:
+            self._export(data_instances, expected_label_type, label_align_mapping, mmap_dir, chunk_size, prefetch)
 
-        # alignment labels
+        self._num_labels = len(self._label_align_mapping)
+        self._num_features = self.x_shape[0]
+
+    @staticmethod
+    def _align_labels(labels, label_align_mapping):
         if label_align_mapping is None:
-            labels = data_instances.applyPartitions(
-                lambda it: {item[1].label for item in it}
-            ).reduce(lambda x, y: set.union(x, y))
             _, label_align_mapping = HomoLabelEncoderClient().label_alignment(labels)
             LOGGER.debug(f"label mapping: {label_align_mapping}")
-        self._label_align_mapping = label_align_mapping
+        return label_align_mapping
+
+    def _load(self, data_instances, expected_label_type, label_align_mapping):
+        # size, labels and shape in one job
+        self.size, labels, self.x_shape = data_instances.applyPartitions(_partition_stats).reduce(_merge_stats)
+        if self.size <= 0:
+            raise ValueError("num of instances is 0")
+
+        self._label_align_mapping = self._align_labels(labels, label_align_mapping)
 
-        # shape
-        self.x_shape = data_instances.first()[1].features.shape
         self.x = np.zeros((self.size, *self.x_shape), dtype=np.float32)
         self.y = np.zeros((self.size,), dtype=expected_label_type)
         self._keys = []
@@ -88,11 +185,62 @@ class TableDataSet(DatasetMixIn):
         for key, instance in data_instances.collect():
             self._keys.append(key)
             self.x[index] = instance.features
-            self.y[index] = label_align_mapping[instance.label]
+            self.y[index] = self._label_align_mapping[instance.label]
             index += 1
 
-        self._num_labels = len(label_align_mapping)
-        self._num_features = self.x_shape[0]
+    def _export(self, data_instances, expected_label_type, label_align_mapping, mmap_dir, chunk_size, prefetch):
+        os.makedirs(mmap_dir, exist_ok=True)
+        export_dir = tempfile.mkdtemp(prefix="table_dataset_", dir=mmap_dir)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, export_dir, True)
+
+        x_path = os.path.join(export_dir, "x")
+        y_path = os.path.join(export_dir, "y")
+        labels_path = os.path.join(export_dir, "labels")
+        self._keys_path = os.path.join(export_dir, "keys")
+
+        writer = _ChunkWriter(x_path, self._keys_path, labels_path, prefetch)
+        writer.start()
+
+        # size, labels and shape are computed in the same pass as exporting
+        self.size, labels, self.x_shape = 0, set(), None
+        keys, features, raw_labels = [], [], []
+        try:
+            for key, instance in data_instances.collect():
+                # stop collecting once writer failed
+                if writer.error is not None:
+                    break
+                if self.x_shape is None:
+                    self.x_shape = instance.features.shape
+                keys.append(key)
+                features.append(instance.features)
+                raw_labels.append(instance.label)
+                labels.add(instance.label)
+                if len(keys) >= chunk_size:
+                    writer.chunks.put((keys, features, raw_labels))
+                    self.size += len(keys)
+                    keys, features, raw_labels = [], [], []
+            if keys:
+                writer.chunks.put((keys, features, raw_labels))
+                self.size += len(keys)
+        finally:
+            writer.chunks.put(None)
+            writer.join()
+
+        if writer.error is not None:
+            raise writer.error
+        if self.size <= 0:
+            raise ValueError("num of instances is 0")
+
+        self._label_align_mapping = self._align_labels(labels, label_align_mapping)
+
+        self.x = np.memmap(x_path, dtype=np.float32, mode="r", shape=(self.size, *self.x_shape))
+        self.y = np.memmap(y_path, dtype=expected_label_type, mode="w+", shape=(self.size,))
+        offset = 0
+        for chunk_labels in _load_pickled_chunks(labels_path):
+            self.y[offset: offset + len(chunk_labels)] = [self._label_align_mapping[label] for label in chunk_labels]
+            offset += len(chunk_labels)
+        self.y.flush()
+        os.remove(labels_path)
 
     def __getitem__(self, index):
         return torch.tensor(self.x[index]), self.y[index]
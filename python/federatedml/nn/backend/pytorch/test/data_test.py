@@ -0,0 +1,90 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.nn.backend.pytorch import data
+from federatedml.nn.backend.pytorch.data import TableDataSet
+
+
+class TestTableDataSet(unittest.TestCase):
+    def setUp(self):
+        session.init("test_table_dataset" + str(random.random()), 0)
+        self.mmap_dir = tempfile.mkdtemp()
+        self.label_align_mapping = {"a": 0, "b": 1}
+        self.instances = [(str(i), Instance(features=np.arange(i, i + 3, dtype=np.float64), label="ab"[i % 2]))
+                          for i in range(11)]
+        self.table = session.parallelize(self.instances, include_key=True, partition=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.mmap_dir, ignore_errors=True)
+
+    def _mmap_dataset(self, table, **kwargs):
+        return TableDataSet(table, label_align_mapping=self.label_align_mapping, mmap_dir=self.mmap_dir, **kwargs)
+
+    def test_load(self):
+        dataset = TableDataSet(self.table, label_align_mapping=self.label_align_mapping)
+        self.assertEqual(len(dataset), len(self.instances))
+        self.assertEqual(dataset.get_num_features(), 3)
+        self.assertEqual(dataset.get_num_labels(), 2)
+        instances = dict(self.instances)
+        for i, key in enumerate(dataset.get_keys()):
+            self.assertTrue(np.array_equal(dataset.x[i], instances[key].features))
+            self.assertEqual(dataset.y[i], self.label_align_mapping[instances[key].label])
+
+    def test_mmap_export(self):
+        loaded = TableDataSet(self.table, label_align_mapping=self.label_align_mapping)
+        dataset = self._mmap_dataset(self.table, chunk_size=2, prefetch=1)
+        self.assertIsInstance(dataset.x, np.memmap)
+        self.assertIsInstance(dataset.y, np.memmap)
+        self.assertEqual(len(dataset), len(loaded))
+        self.assertEqual(dataset.get_num_features(), loaded.get_num_features())
+        self.assertListEqual(list(dataset.get_keys()), list(loaded.get_keys()))
+        self.assertTrue(np.array_equal(dataset.x, loaded.x))
+        self.assertTrue(np.array_equal(dataset.y, loaded.y))
+
+        x, y = dataset[[1, 3]]
+        self.assertTrue(np.array_equal(x.numpy(), loaded.x[[1, 3]]))
+        self.assertTrue(np.array_equal(y, loaded.y[[1, 3]]))
+
+    def test_mmap_export_removed(self):
+        dataset = self._mmap_dataset(self.table)
+        self.assertEqual(len(os.listdir(self.mmap_dir)), 1)
+        dataset._finalizer()
+        self.assertListEqual(os.listdir(self.mmap_dir), [])
+
+    def _assert_export_fails(self, table, error_type):
+        errors = []
+
+        def _export():
+            try:
+                self._mmap_dataset(table, chunk_size=1, prefetch=1)
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=_export, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "export hangs after writer failed")
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], error_type)
+
+    def test_mmap_open_failure(self):
+        with mock.patch.object(data, "open", side_effect=PermissionError("read only"), create=True):
+            self._assert_export_fails(self.table, PermissionError)
+
+    def test_mmap_write_failure(self):
+        instances = self.instances + [("bad", Instance(features=np.array(["x", "y", "z"]), label="a"))]
+        table = session.parallelize(instances, include_key=True, partition=3)
+        self._assert_export_fails(table, ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
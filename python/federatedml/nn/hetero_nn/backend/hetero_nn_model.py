@@ -52,6 +52,7 @@ class HeteroNNKerasGuestModel(HeteroNNGuestModel):
         self.top_model_input_shape = None
 
         self.batch_size = None
+        self.batch_num = None
 
         self.is_empty = False
 
@@ -223,6 +224,11 @@ class HeteroNNKerasGuestModel(HeteroNNGuestModel):
         if self.interactive_model is not None:
             self.interactive_model.set_partition(self.partition)
 
+    def set_batch_num(self, batch_num):
+        self.batch_num = batch_num
+        if self.interactive_model is not None:
+            self.interactive_model.set_batch_num(self.batch_num)
+
     def _build_bottom_model(self):
         self.bottom_model = HeteroNNBottomModel(input_shape=self.bottom_model_input_shape,
                                                 optimizer=self.optimizer,
@@ -263,6 +269,7 @@ class HeteroNNKerasGuestModel(HeteroNNGuestModel):
 
         self.interactive_model.set_transfer_variable(self.transfer_variable)
         self.interactive_model.set_partition(self.partition)
+        self.interactive_model.set_batch_num(self.batch_num)
         if self.selector:
             self.interactive_model.set_backward_select_strategy()
 
@@ -387,7 +394,11 @@ class HeteroNNKerasHostModel(HeteroNNHostModel):
 
         return model_param
 
-    def train(self, x, epoch, batch_idx):
+    def prefetch_forward(self, x, epoch, batch_idx):
+        """
+        run bottom model forward and send encrypted output of a batch, ahead of exchanges of previous batches
+        if pipelined, do nothing if it is already sent
+        """
         if self.bottom_model is None:
             self.bottom_model_input_shape = x.shape[1]
             self._build_bottom_model()
@@ -400,9 +411,16 @@ class HeteroNNKerasHostModel(HeteroNNHostModel):
                 self.bottom_model.set_batch(self.batch_size)
                 self.interactive_model.set_backward_select_strategy()
 
+        if self.interactive_model.has_sent_forward(epoch, batch_idx):
+            return
+
         host_bottom_output = self.bottom_model.forward(x)
+        self.interactive_model.encrypt_forward(host_bottom_output, epoch, batch_idx)
+
+    def train(self, x, epoch, batch_idx):
+        self.prefetch_forward(x, epoch, batch_idx)
 
-        self.interactive_model.forward(host_bottom_output, epoch, batch_idx, train=True)
+        self.interactive_model.exchange_forward(epoch, batch_idx, train=True)
 
         host_gradient, selective_ids = self.interactive_model.backward(epoch, batch_idx)
 
@@ -16,6 +16,8 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import functools
+
 import numpy as np
 from federatedml.util import LOGGER
 from fate_arch.session import computing_session
@@ -234,3 +236,274 @@ class PaillierTensor(object):
     def select_columns(self, select_table):
         return PaillierTensor(tb_obj=self._obj.join(select_table, lambda v1, v2: v1[v2]))
 
+
+def block_matmul(block, mat, bias=None):
+    """
+    batch matmul kernel of a row-block: one matmul for all rows of the block, rather than one per row
+    """
+    ret = np.matmul(block, mat)
+    if bias is not None:
+        ret = ret + bias
+
+    return ret
+
+
+def block_transpose_matmul(block, other_block):
+    return np.matmul(np.transpose(block), other_block)
+
+
+def select_block(block, mask):
+    return block[mask]
+
+
+def expand_block(values, mask):
+    ret = np.zeros(mask.shape, dtype=values.dtype)
+    ret[mask] = values
+    return ret
+
+
+def select_block_rows(block_idx, block, positions):
+    """
+    rows of a block selected by positions: list of (position, local row index), keyed by position
+    """
+    return [(pos, block[row]) for pos, row in positions.get(block_idx, [])]
+
+
+def gather_rows(rows, start, block_size):
+    return [((pos - start) // block_size, [(pos, row)]) for pos, row in rows]
+
+
+def stack_rows(rows):
+    return np.stack([row for _, row in sorted(rows, key=lambda pos_row: pos_row[0])])
+
+
+def block_weighted_sum(block, weights):
+    """
+    sum of rows of a block, each row is weighted by the value of weights in the same row
+    """
+    weights = np.reshape(weights, [len(weights)] + [1] * (np.ndim(block) - 1))
+    return np.sum(block * weights, axis=0)
+
+
+class BlockPaillierTensor(object):
+    """
+    Tensor whose rows are grouped into row-blocks, the table is keyed by block index and each value is an ndarray
+    holding consecutive rows, so every operation runs once per block instead of once per row.
+
+    Two tensors could be joined only if they share the same block layout, i.e. one is derived from the other, or
+    one is split with from_ndarray by block_rows of the other.
+    """
+
+    def __init__(self, tb_obj, block_rows=None, shape=None):
+        self._obj = tb_obj
+        self._partitions = tb_obj.partitions
+        self._block_rows = block_rows
+        self._shape = shape
+
+    @classmethod
+    def from_ndarray(cls, arr, partitions=1, block_rows=None):
+        """
+        split arr into row-blocks, one block per partition by default
+        """
+        if block_rows is None:
+            block_size = max(-(-len(arr) // partitions), 1)
+            block_rows = [min(block_size, len(arr) - start) for start in range(0, len(arr), block_size)]
+
+        if sum(block_rows) != len(arr):
+            raise ValueError("block rows {} mismatch length of array {}".format(sum(block_rows), len(arr)))
+
+        offsets = np.cumsum([0] + list(block_rows))
+        blocks = [arr[offsets[i]: offsets[i + 1]] for i in range(len(block_rows))]
+        tb_obj = computing_session.parallelize(blocks, include_key=False, partition=partitions)
+
+        return cls(tb_obj, block_rows=list(block_rows), shape=np.shape(arr))
+
+    @classmethod
+    def from_row_table(cls, rows, start, num_rows, partitions=1):
+        """
+        inverse of select_rows: rows of table(position, row) with position in [start, start + num_rows) are
+        split into row-blocks in order of position, layout of blocks is the same as from_ndarray
+        """
+        block_size = max(-(-num_rows // partitions), 1)
+        block_rows = [min(block_size, num_rows - offset) for offset in range(0, num_rows, block_size)]
+        end = start + num_rows
+
+        tb_obj = rows.filter(lambda pos, row: start <= pos < end) \
+            .mapReducePartitions(functools.partial(gather_rows, start=start, block_size=block_size),
+                                 lambda rows1, rows2: rows1 + rows2) \
+            .mapValues(stack_rows)
+
+        return cls(tb_obj, block_rows=block_rows)
+
+    def _derive(self, tb_obj, keep_shape=True):
+        return BlockPaillierTensor(tb_obj, block_rows=self._block_rows, shape=self._shape if keep_shape else None)
+
+    @property
+    def partitions(self):
+        return self._partitions
+
+    def get_obj(self):
+        return self._obj
+
+    @property
+    def block_rows(self):
+        if self._block_rows is None:
+            rows = dict(self._obj.mapValues(len).collect())
+            self._block_rows = [rows[idx] for idx in range(len(rows))]
+
+        return self._block_rows
+
+    @property
+    def shape(self):
+        if self._shape is None:
+            first_block = self._obj.first()[1]
+            self._shape = tuple([sum(self.block_rows)] + list(np.shape(first_block)[1:]))
+
+        return self._shape
+
+    def __add__(self, other):
+        if isinstance(other, BlockPaillierTensor):
+            return self._derive(self._obj.join(other.get_obj(), lambda v1, v2: v1 + v2))
+        else:
+            return self._derive(self._obj.mapValues(lambda v: v + other))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if isinstance(other, BlockPaillierTensor):
+            return self._derive(self._obj.join(other.get_obj(), lambda v1, v2: v1 - v2))
+        else:
+            return self._derive(self._obj.mapValues(lambda v: v - other))
+
+    def __rsub__(self, other):
+        return self._derive(self._obj.mapValues(lambda v: other - v))
+
+    def __mul__(self, other):
+        if not isinstance(other, (int, float)):
+            raise ValueError("only support multiply by scalar, use dot for matrix multiplication")
+
+        return self._derive(self._obj.mapValues(lambda v: v * other))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def dot(self, mat, bias=None):
+        """
+        self @ mat + bias, mat and bias are broadcast to each block without being parallelized
+        """
+        func = functools.partial(block_matmul, mat=mat, bias=bias)
+        ret = self._derive(self._obj.mapValues(func), keep_shape=False)
+        if self._shape is not None:
+            ret._shape = tuple([self._shape[0]] + list(np.shape(mat)[1:]))
+
+        return ret
+
+    def transpose_dot(self, other):
+        """
+        self.T @ other, other should be a BlockPaillierTensor of the same block layout or an ndarray,
+        result is a ndarray of shape (self.shape[1], other.shape[1])
+        """
+        if isinstance(other, np.ndarray):
+            other = BlockPaillierTensor.from_ndarray(other, self.partitions, self.block_rows)
+
+        return self._obj.join(other.get_obj(), block_transpose_matmul).reduce(lambda mat1, mat2: mat1 + mat2)
+
+    def select_columns(self, mask_tensor):
+        """
+        keep values of each block where mask is true, results of a block is flattened in row-major order
+        """
+        return self._derive(self._obj.join(mask_tensor.get_obj(), select_block), keep_shape=False)
+
+    def select_rows(self, row_ids, offset=0):
+        """
+        rows of row_ids are picked on the blocks holding them, returns table(position, row) where position is
+        offset + index in row_ids, so that selections could be unioned and split into blocks by from_row_table
+        """
+        offsets = np.cumsum([0] + list(self.block_rows))
+        block_ids = np.searchsorted(offsets, row_ids, side="right") - 1
+        positions = {}
+        for pos, (row_id, block_idx) in enumerate(zip(row_ids, block_ids)):
+            positions.setdefault(int(block_idx), []).append((offset + pos, int(row_id - offsets[block_idx])))
+
+        return self._obj.flatMap(functools.partial(select_block_rows, positions=positions))
+
+    def expand_columns(self, mask_tensor):
+        """
+        inverse of select_columns, positions not kept are filled with zeros
+        """
+        return self._derive(self._obj.join(mask_tensor.get_obj(), expand_block), keep_shape=False)
+
+    def _align(self, other):
+        if isinstance(other, BlockPaillierTensor):
+            return other
+        elif isinstance(other, np.ndarray):
+            return BlockPaillierTensor.from_ndarray(other, self.partitions, self.block_rows)
+        else:
+            raise ValueError('only support numpy array and BlockPaillierTensor')
+
+    def element_wise_product(self, other):
+        """
+        row-wise element-wise product, other should be row-aligned with self
+        """
+        return self._derive(self._obj.join(self._align(other).get_obj(), lambda v1, v2: v1 * v2), keep_shape=False)
+
+    def map_ndarray_product(self, other):
+        """
+        element-wise product of every row and other, other is broadcast to each block
+        """
+        if not isinstance(other, np.ndarray):
+            raise ValueError('only support numpy array')
+
+        return self._derive(self._obj.mapValues(lambda val: val * other), keep_shape=False)
+
+    def matmul_3d(self, other, multiply='left'):
+        """
+        row-wise matrix multiplication, self[i] @ other[i] if multiply is left else other[i] @ self[i],
+        computed as one batched matmul per block
+        """
+        assert multiply in ['left', 'right']
+        mat = self._align(other)
+        if multiply == 'left':
+            tb_obj = self._obj.join(mat.get_obj(), np.matmul)
+        else:
+            tb_obj = mat.get_obj().join(self._obj, np.matmul)
+
+        return self._derive(tb_obj, keep_shape=False)
+
+    def squeeze(self, axis):
+        if axis == 0:
+            raise ValueError("axis 0 of BlockPaillierTensor is the row axis which could not be squeezed")
+
+        return self._derive(self._obj.mapValues(lambda val: np.squeeze(val, axis=axis)), keep_shape=False)
+
+    def reduce_sum(self):
+        """
+        sum of all rows, each block is summed locally before the blocks are reduced
+        """
+        return self._obj.mapValues(lambda val: np.sum(val, axis=0)).reduce(lambda t1, t2: t1 + t2)
+
+    def weighted_sum(self, weights):
+        """
+        sum of rows weighted by weights of shape (rows, ) or (rows, 1), i.e. self.T @ weights for 2d tensors
+        """
+        return self._obj.join(self._align(weights).get_obj(), block_weighted_sum).reduce(lambda t1, t2: t1 + t2)
+
+    def encrypt(self, encrypt_tool):
+        return self._derive(encrypt_tool.encrypt_row_blocks(self._obj))
+
+    def decrypt(self, decrypt_tool):
+        return self._derive(self._obj.mapValues(lambda val: decrypt_tool.recursive_decrypt(val)))
+
+    def encode(self, encoder):
+        return self._derive(self._obj.mapValues(lambda val: encoder.encode(val)))
+
+    def decode(self, decoder):
+        return self._derive(self._obj.mapValues(lambda val: decoder.decode(val)))
+
+    def numpy(self):
+        blocks = dict(self._obj.collect())
+        if not blocks:
+            return np.array([])
+
+        return np.concatenate([blocks[idx] for idx in range(len(blocks))], axis=0)
@@ -25,8 +25,7 @@ import tensorflow as tf
 from tensorflow.python.keras.backend import gradients
 from tensorflow.python.keras.backend import set_session
 
-from fate_arch.session import computing_session as session
-from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.util import LOGGER
 
 
@@ -258,78 +257,72 @@ class HostDenseModel(DenseModel):
         super(HostDenseModel, self).__init__()
         self.role = "host"
 
+        # encrypted input is cached as table(position, row) without being collected, rows of positions in
+        # [cached_start, cached_end) are not consumed by backward yet
+        self.input_cached = None
+        self.cached_start = 0
+        self.cached_end = 0
+
     def select_backward_sample(self, selective_ids):
-        cached_shape = self.input_cached.shape[0]
-        offsets = [i + cached_shape for i in range(len(selective_ids))]
-        id_map = dict(zip(selective_ids, offsets))
-        if cached_shape == 0:
-            self.input_cached = (
-                self.input.get_obj()
-                .filter(lambda k, v: k in id_map)
-                .map(lambda k, v: (id_map[k], v))
-            )
-            self.input_cached = PaillierTensor(tb_obj=self.input_cached)
-            # selective_ids_tb = session.parallelize(zip(selective_ids, range(len(selective_ids))), include_key=True,
-            #                                        partition=self.input.partitions)
-            # self.input_cached = self.input.get_obj().join(selective_ids_tb, lambda v1, v2: (v1, v2))
-            # self.input_cached = PaillierTensor(tb_obj=self.input_cached.map(lambda k, v: (v[1], v[0])))
+        # selected rows are cached in order of selection and split into row-blocks again when backward
+        selective_input = self.input.select_rows(selective_ids, offset=self.cached_end)
+        self.cached_end += len(selective_ids)
+        if self.input_cached is None:
+            self.input_cached = selective_input
+        else:
+            self.input_cached = self.input_cached.union(selective_input)
+
+        if self.activation_cached.shape[0] == 0:
             self.activation_cached = self.activation_input[selective_ids]
         else:
-            # selective_ids_tb = session.parallelize(zip(selective_ids, range(len(selective_ids))), include_key=True,
-            #                                        partition=self.input.partitions)
-            # selective_input = self.input.get_obj().join(selective_ids_tb, lambda v1, v2: (v1, v2))
-            # pre_count = self.input_cached.shape[0]
-            # selective_input = selective_input.map(lambda k, v: (v[1] + pre_count, v[0]))
-            selective_input = (
-                self.input.get_obj()
-                .filter(lambda k, v: k in id_map)
-                .map(lambda k, v: (id_map[k], v))
-            )
-            self.input_cached = PaillierTensor(
-                tb_obj=self.input_cached.get_obj().union(selective_input)
-            )
             self.activation_cached = np.vstack(
                 (self.activation_cached, self.activation_input[selective_ids])
             )
 
-    def forward_dense(self, x, encoder=None):
-        self.input = x
-
+    def compute_dense(self, x, encoder=None):
         if encoder is not None:
-            output = x * encoder.encode(self.model_weight)
+            weight = encoder.encode(self.model_weight)
+            bias = encoder.encode(self.bias) if self.bias is not None else None
         else:
-            output = x * self.model_weight
+            weight = self.model_weight
+            bias = self.bias
 
-        if self.bias is not None:
-            if encoder is not None:
-                output += encoder.encode(self.bias)
-            else:
-                output += self.bias
+        return x.dot(weight, bias)
 
-        return output
+    def forward_dense(self, x, encoder=None, dense_output=None):
+        """
+        dense_output: output of x computed ahead by compute_dense, if pipelined
+        """
+        self.input = x
 
-    def get_input_gradient(self, delta, acc_noise, encoder=None):
-        if not encoder:
-            error = delta * self.model_weight.T + delta * acc_noise.T
-        else:
-            error = delta.encode(encoder) * (self.model_weight + acc_noise).T
+        if dense_output is None:
+            dense_output = self.compute_dense(x, encoder)
 
-        return error
+        return dense_output
 
-    def get_weight_gradient(self, delta, encoder=None):
-        # delta_w = self.input.fast_matmul_2d(delta) / self.input.shape[0]
+    def prepare_backward(self, delta, encoder=None):
+        """
+        select input of this backward and split delta into the same row-blocks as it,
+        the returned tensor is shared by weight gradient and input gradient
+        """
         if self.do_backward_selective_strategy:
-            self.input = self.input_cached.filter(lambda k, v: k < self.batch_size)
-            self.input_cached = self.input_cached.filter(
-                lambda k, v: k >= self.batch_size
-            ).map(lambda kv: (kv[0] - self.batch_size, kv[1]))
-            # self.input_cached = self.input_cached.subtractByKey(self.input).map(lambda kv: (kv[0] - self.batch_size, kv[1]))
-
-        if encoder:
-            delta_w = self.input.fast_matmul_2d(encoder.encode(delta))
-        else:
-            delta_w = self.input.fast_matmul_2d(delta)
+            partitions = self.input.partitions
+            start = self.cached_start
+            end = min(start + self.batch_size, self.cached_end)
+            self.input = BlockPaillierTensor.from_row_table(self.input_cached, start, end - start, partitions)
+            self.input_cached = self.input_cached.filter(lambda pos, row: pos >= end)
+            self.cached_start = end
 
+        if encoder is not None:
+            delta = encoder.encode(delta)
+
+        return BlockPaillierTensor.from_ndarray(delta, self.input.partitions, self.input.block_rows)
+
+    def get_input_gradient(self, delta, acc_noise):
+        return delta.dot((self.model_weight + acc_noise).T)
+
+    def get_weight_gradient(self, delta):
+        delta_w = self.input.transpose_dot(delta)
         delta_w /= self.input.shape[0]
 
         return delta_w
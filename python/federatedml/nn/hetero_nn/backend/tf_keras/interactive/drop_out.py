@@ -17,7 +17,8 @@
 #  limitations under the License.
 #
 import numpy as np
-from fate_arch.session import computing_session as session
+
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 
 
 class DropOut(object):
@@ -45,8 +46,12 @@ class DropOut(object):
     def generate_mask(self):
         self._mask = np.random.uniform(low=0, high=1, size=self._noise_shape) < self._keep_rate
 
-    def generate_mask_table(self):
-        _mask_table = session.parallelize(self._mask, include_key=False, partition=self._partition)
+    def generate_mask_table(self, block_rows=None):
+        """
+        parallelize mask in row-blocks of block_rows, so that it could be joined with the dense output
+        """
+        _mask_table = BlockPaillierTensor.from_ndarray(self._mask, partitions=self._partition,
+                                                       block_rows=block_rows).get_obj()
 
         self._mask_table = _mask_table
         return _mask_table
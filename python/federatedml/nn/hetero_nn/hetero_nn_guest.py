@@ -80,6 +80,7 @@ class HeteroNNGuest(HeteroNNBase):
         self.validation_strategy = self.init_validation_strategy(data_inst, validate_data)
         self._build_model()
         self.prepare_batch_data(self.batch_generator, data_inst)
+        self.model.set_batch_num(len(self.data_x))
         if not self.input_shape:
             self.model.set_empty()
 
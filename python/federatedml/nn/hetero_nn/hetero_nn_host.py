@@ -78,9 +78,14 @@ class HeteroNNHost(HeteroNNBase):
         self.prepare_batch_data(self.batch_generator, data_inst)
 
         cur_epoch = 0
+        pipeline_depth = self.hetero_nn_param.pipeline_depth
 
         while cur_epoch < self.epochs:
             for batch_idx in range(len(self.data_x)):
+                # keep pipeline_depth batches in flight, pipeline is drained at the end of each epoch
+                for next_batch_idx in range(batch_idx, min(batch_idx + pipeline_depth, len(self.data_x))):
+                    self.model.prefetch_forward(self.data_x[next_batch_idx], cur_epoch, next_batch_idx)
+
                 self.model.train(self.data_x[batch_idx], cur_epoch, batch_idx)
 
             if self.validation_strategy:
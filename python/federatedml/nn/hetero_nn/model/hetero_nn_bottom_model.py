@@ -57,9 +57,9 @@ class HeteroNNBottomModel(object):
         if self.do_backward_select_strategy:
             if selective_ids:
                 if len(self.x_cached) == 0:
-                    self.x_cached = self.x[selective_ids]
+                    self.x_cached = x[selective_ids]
                 else:
-                    self.x_cached = np.vstack((self.x_cached, self.x[selective_ids]))
+                    self.x_cached = np.vstack((self.x_cached, x[selective_ids]))
 
         if len(y) == 0:
             return
@@ -23,7 +23,7 @@ import numpy as np
 from federatedml.nn.hetero_nn.backend.tf_keras.interactive.drop_out import DropOut
 from federatedml.util.fixpoint_solver import FixedPointEncoder
 
-from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.nn.hetero_nn.backend.tf_keras.interactive.dense_model import GuestDenseModel
 from federatedml.nn.hetero_nn.backend.tf_keras.interactive.dense_model import HostDenseModel
 from federatedml.nn.hetero_nn.util import random_number_generator
@@ -69,6 +69,10 @@ class InterActiveGuestDenseLayer(object):
 
         self.sync_output_unit = False
 
+        self.pipeline_depth = params.pipeline_depth
+        self.batch_num = None
+        self.prefetched_dense_forward = {}
+
     def set_transfer_variable(self, transfer_variable):
         self.transfer_variable = transfer_variable
 
@@ -78,6 +82,9 @@ class InterActiveGuestDenseLayer(object):
     def set_partition(self, partition):
         self.partitions = partition
 
+    def set_batch_num(self, batch_num):
+        self.batch_num = batch_num
+
     def __build_model(self, restore_stage=False):
         self.host_model = HostDenseModel()
         self.host_model.build(self.host_input_shape, self.layer_config, self.model_builder, restore_stage)
@@ -89,7 +96,11 @@ class InterActiveGuestDenseLayer(object):
 
     def forward(self, guest_input, epoch=0, batch=0, train=True):
         LOGGER.info("interactive layer start forward propagation of epoch {} batch {}".format(epoch, batch))
-        encrypted_host_input = PaillierTensor(tb_obj=self.get_host_encrypted_forward_from_host(epoch, batch))
+        encrypted_host_input, dense_output = None, None
+        if train:
+            encrypted_host_input, dense_output = self.prefetched_dense_forward.pop((epoch, batch), (None, None))
+        if encrypted_host_input is None:
+            encrypted_host_input = BlockPaillierTensor(tb_obj=self.get_host_encrypted_forward_from_host(epoch, batch))
 
         if not self.partitions:
             self.partitions = encrypted_host_input.partitions
@@ -107,12 +118,12 @@ class InterActiveGuestDenseLayer(object):
             self.sync_output_unit = True
             self.sync_interactive_layer_output_unit(self.host_model.output_shape[0])
 
-        host_output = self.forward_interactive(encrypted_host_input, epoch, batch, train)
+        host_output = self.forward_interactive(encrypted_host_input, epoch, batch, train, dense_output)
 
         guest_output = self.guest_model.forward_dense(guest_input)
 
         if not self.guest_model.empty:
-            dense_output_data = host_output + PaillierTensor(ori_data=guest_output, partitions=self.partitions)
+            dense_output_data = host_output + guest_output
         else:
             dense_output_data = host_output
 
@@ -122,7 +133,7 @@ class InterActiveGuestDenseLayer(object):
         self.host_output = host_output
 
         LOGGER.info("start to get interactive layer's activation output of epoch {} batch {}".format(epoch, batch))
-        activation_out = self.host_model.forward_activation(self.dense_output_data.numpy())
+        activation_out = self.host_model.forward_activation(self.dense_output_data)
         LOGGER.info("end to get interactive layer's activation output of epoch {} batch {}".format(epoch, batch))
 
         if train and self.drop_out:
@@ -151,9 +162,10 @@ class InterActiveGuestDenseLayer(object):
             LOGGER.debug("interactive layer update guest weight of epoch {} batch {}".format(epoch, batch))
             guest_input_gradient = self.update_guest(activation_gradient)
 
-            host_weight_gradient, acc_noise = self.backward_interactive(activation_gradient, epoch, batch)
+            host_delta = self.host_model.prepare_backward(activation_gradient, encoder=self.fixed_point_encoder)
+            host_weight_gradient, acc_noise = self.backward_interactive(host_delta, epoch, batch)
 
-            host_input_gradient = self.update_host(activation_gradient, host_weight_gradient, acc_noise)
+            host_input_gradient = self.update_host(activation_gradient, host_delta, host_weight_gradient, acc_noise)
 
             self.send_host_backward_to_host(host_input_gradient.get_obj(), epoch, batch)
 
@@ -195,35 +207,31 @@ class InterActiveGuestDenseLayer(object):
 
         return input_gradient
 
-    def update_host(self, activation_gradient, weight_gradient, acc_noise):
-        activation_gradient_tensor = PaillierTensor(ori_data=activation_gradient, partitions=self.partitions)
-        input_gradient = self.host_model.get_input_gradient(activation_gradient_tensor, acc_noise,
-                                                            encoder=self.fixed_point_encoder)
-        # input_gradient = self.host_model.get_input_gradient(activation_gradient, acc_noise)
+    def update_host(self, activation_gradient, host_delta, weight_gradient, acc_noise):
+        input_gradient = self.host_model.get_input_gradient(host_delta, acc_noise)
 
         self.host_model.update_weight(weight_gradient)
         self.host_model.update_bias(activation_gradient)
 
         return input_gradient
 
-    def forward_interactive(self, encrypted_host_input, epoch, batch, train=True):
+    def forward_interactive(self, encrypted_host_input, epoch, batch, train=True, dense_output=None):
         LOGGER.info("get encrypted dense output of host model of epoch {} batch {}".format(epoch, batch))
         mask_table = None
 
-        encrypted_dense_output = self.host_model.forward_dense(encrypted_host_input, self.fixed_point_encoder)
+        encrypted_dense_output = self.host_model.forward_dense(encrypted_host_input, self.fixed_point_encoder,
+                                                               dense_output=dense_output)
         if train:
             self._create_drop_out(encrypted_dense_output.shape)
             if self.drop_out:
-                mask_table = self.drop_out.generate_mask_table()
+                mask_table = self.drop_out.generate_mask_table(encrypted_dense_output.block_rows)
 
         self.encrypted_host_dense_output = encrypted_dense_output
 
         if mask_table:
-            encrypted_dense_output = encrypted_dense_output.select_columns(mask_table)
+            encrypted_dense_output = encrypted_dense_output.select_columns(BlockPaillierTensor(tb_obj=mask_table))
 
-        guest_forward_noise = self.rng_generator.fast_generate_random_number(encrypted_dense_output.shape,
-                                                                             encrypted_dense_output.partitions,
-                                                                             keep_table=mask_table)
+        guest_forward_noise = self.rng_generator.fast_generate_block_random_number(encrypted_dense_output)
 
         if self.fixed_point_encoder:
             encrypted_dense_output += guest_forward_noise.encode(self.fixed_point_encoder)
@@ -234,20 +242,39 @@ class InterActiveGuestDenseLayer(object):
         if mask_table:
             self.send_interactive_layer_drop_out_table(mask_table, epoch, batch)
 
+        if train:
+            self.prefetch_dense_forward(epoch, batch)
+
         LOGGER.info("get decrypted dense output of host model of epoch {} batch {}".format(epoch, batch))
         decrypted_dense_output = self.get_guest_decrypted_forward_from_host(epoch, batch)
 
+        out = BlockPaillierTensor(tb_obj=decrypted_dense_output) - guest_forward_noise
         if mask_table:
-            out = PaillierTensor(tb_obj=decrypted_dense_output) - guest_forward_noise
-            out = out.get_obj().join(mask_table, self.expand_columns)
-            return PaillierTensor(tb_obj=out)
-        else:
-            return PaillierTensor(tb_obj=decrypted_dense_output) - guest_forward_noise
+            out = out.expand_columns(BlockPaillierTensor(tb_obj=mask_table))
 
-    def backward_interactive(self, activation_gradient, epoch, batch):
+        return out.numpy()
+
+    def prefetch_dense_forward(self, epoch, batch):
+        """
+        compute encrypted dense output of next batches while host is decrypting the current one,
+        weights used are those before backward of current batch, which host tracks by acc_noise snapshots
+        """
+        if self.batch_num is None:
+            return
+
+        for next_batch in range(batch + 1, min(batch + self.pipeline_depth, self.batch_num)):
+            if (epoch, next_batch) in self.prefetched_dense_forward:
+                continue
+
+            LOGGER.info("prefetch encrypted dense output of epoch {} batch {}".format(epoch, next_batch))
+            encrypted_host_input = BlockPaillierTensor(tb_obj=self.get_host_encrypted_forward_from_host(epoch,
+                                                                                                         next_batch))
+            dense_output = self.host_model.compute_dense(encrypted_host_input, self.fixed_point_encoder)
+            self.prefetched_dense_forward[(epoch, next_batch)] = (encrypted_host_input, dense_output)
+
+    def backward_interactive(self, host_delta, epoch, batch):
         LOGGER.info("get encrypted weight gradient of epoch {} batch {}".format(epoch, batch))
-        encrypted_weight_gradient = self.host_model.get_weight_gradient(activation_gradient,
-                                                                        encoder=self.fixed_point_encoder)
+        encrypted_weight_gradient = self.host_model.get_weight_gradient(host_delta)
         if self.fixed_point_encoder:
             encrypted_weight_gradient = self.fixed_point_encoder.decode(encrypted_weight_gradient)
 
@@ -294,22 +321,6 @@ class InterActiveGuestDenseLayer(object):
     def get_output_shape(self):
         return self.host_model.output_shape
 
-    @staticmethod
-    def expand_columns(tensor, keep_array):
-        shape = keep_array.shape
-        tensor = np.reshape(tensor, (tensor.size, ))
-        keep = np.reshape(keep_array, (keep_array.size, ))
-        ret_tensor = []
-        idx = 0
-        for x in keep:
-            if x == 0:
-                ret_tensor.append(0)
-            else:
-                ret_tensor.append(tensor[idx])
-                idx += 1
-
-        return np.reshape(np.array(ret_tensor), shape)
-
     def export_model(self):
         interactive_layer_param = InteractiveLayerParam()
         interactive_layer_param.interactive_guest_saved_model_bytes = self.guest_model.export_model()
@@ -348,6 +359,10 @@ class InteractiveHostDenseLayer(object):
             2**params.floating_point_precision)
         self.mask_table = None
 
+        self.pipeline_depth = params.pipeline_depth
+        self.sent_host_inputs = {}
+        self.acc_noise_snapshots = {}
+
     def set_transfer_variable(self, transfer_variable):
         self.transfer_variable = transfer_variable
 
@@ -364,17 +379,53 @@ class InteractiveHostDenseLayer(object):
     def set_backward_select_strategy(self):
         self.do_backward_select_strategy = True
 
-    def forward(self, host_input, epoch=0, batch=0, train=True):
-        if batch >= len(self.train_encrypted_calculator):
+    def has_sent_forward(self, epoch, batch):
+        return (epoch, batch) in self.sent_host_inputs
+
+    def encrypt_forward(self, host_input, epoch=0, batch=0):
+        """
+        encrypt host_bottom_output and send it to guest, could run ahead of exchanges of previous batches
+        """
+        while batch >= len(self.train_encrypted_calculator):
             self.train_encrypted_calculator.append(self.generated_encrypted_calculator())
 
         LOGGER.info("forward propagation: encrypt host_bottom_output of epoch {} batch {}".format(epoch, batch))
-        host_input = PaillierTensor(ori_data=host_input, partitions=self.partitions)
+        host_input = BlockPaillierTensor.from_ndarray(host_input, partitions=self.partitions)
 
         encrypted_host_input = host_input.encrypt(self.train_encrypted_calculator[batch])
         self.send_host_encrypted_forward_to_guest(encrypted_host_input.get_obj(), epoch, batch)
 
-        encrypted_guest_forward = PaillierTensor(tb_obj=self.get_guest_encrypted_forwrad_from_guest(epoch, batch))
+        self.sent_host_inputs[(epoch, batch)] = host_input
+
+    def forward(self, host_input, epoch=0, batch=0, train=True):
+        if not self.has_sent_forward(epoch, batch):
+            self.encrypt_forward(host_input, epoch, batch)
+
+        self.exchange_forward(epoch, batch, train)
+
+    def _get_forward_acc_noise(self, batch, train):
+        """
+        acc_noise matching interactive layer weights guest used in forward of batch: guest computes forward of batch
+        during exchange of batch - pipeline_depth + 1, before its backward
+        """
+        if not train:
+            return self.acc_noise
+
+        if batch == 0:
+            self.acc_noise_snapshots.clear()
+        self.acc_noise_snapshots[batch] = None if self.acc_noise is None else self.acc_noise.copy()
+
+        snapshot_batch = max(0, batch - self.pipeline_depth + 1)
+        for expired_batch in [b for b in self.acc_noise_snapshots if b < snapshot_batch]:
+            del self.acc_noise_snapshots[expired_batch]
+
+        return self.acc_noise_snapshots[snapshot_batch]
+
+    def exchange_forward(self, epoch, batch, train=True):
+        host_input = self.sent_host_inputs.pop((epoch, batch))
+        forward_acc_noise = self._get_forward_acc_noise(batch, train)
+
+        encrypted_guest_forward = BlockPaillierTensor(tb_obj=self.get_guest_encrypted_forwrad_from_guest(epoch, batch))
 
         decrypted_guest_forward = encrypted_guest_forward.decrypt(self.encrypter)
         if self.fixed_point_encoder:
@@ -384,16 +435,20 @@ class InteractiveHostDenseLayer(object):
             self.input_shape = host_input.shape[1]
             self.output_unit = self.get_interactive_layer_output_unit()
             self.acc_noise = np.zeros((self.input_shape, self.output_unit))
+        if forward_acc_noise is None:
+            forward_acc_noise = np.zeros((self.input_shape, self.output_unit))
 
         mask_table = None
         if train and self.drop_out_keep_rate and self.drop_out_keep_rate < 1:
             mask_table = self.get_interactive_layer_drop_out_table(epoch, batch)
 
         if mask_table:
-            decrypted_guest_forward_with_noise = decrypted_guest_forward + (host_input * self.acc_noise).select_columns(mask_table)
+            mask_tensor = BlockPaillierTensor(tb_obj=mask_table)
+            decrypted_guest_forward_with_noise = decrypted_guest_forward + host_input.dot(
+                forward_acc_noise).select_columns(mask_tensor)
             self.mask_table = mask_table
         else:
-            decrypted_guest_forward_with_noise = decrypted_guest_forward + (host_input * self.acc_noise)
+            decrypted_guest_forward_with_noise = decrypted_guest_forward + host_input.dot(forward_acc_noise)
 
         self.send_decrypted_guest_forward_with_noise_to_guest(decrypted_guest_forward_with_noise.get_obj(), epoch,
                                                               batch)
@@ -423,7 +478,7 @@ class InteractiveHostDenseLayer(object):
         self.send_encrypted_acc_noise_to_guest(encrypted_acc_noise, epoch, batch)
 
         self.acc_noise += noise_weight_gradient
-        host_input_gradient = PaillierTensor(tb_obj=self.get_host_backward_from_guest(epoch, batch))
+        host_input_gradient = BlockPaillierTensor(tb_obj=self.get_host_backward_from_guest(epoch, batch))
 
         host_input_gradient = host_input_gradient.decrypt(self.encrypter)
 
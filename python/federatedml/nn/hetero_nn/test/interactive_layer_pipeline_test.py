@@ -0,0 +1,184 @@
+import queue
+import random
+import threading
+import unittest
+
+import numpy as np
+from fate_arch.session import computing_session as session
+from federatedml.nn.hetero_nn.backend.tf_keras.interactive.dense_model import GuestDenseModel
+from federatedml.nn.hetero_nn.backend.tf_keras.interactive.dense_model import HostDenseModel
+from federatedml.nn.hetero_nn.model.interactive_layer import InterActiveGuestDenseLayer
+from federatedml.nn.hetero_nn.model.interactive_layer import InteractiveHostDenseLayer
+from federatedml.param.hetero_nn_param import HeteroNNParam
+
+
+class _Variable(object):
+    def __init__(self):
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, suffix):
+        with self._lock:
+            return self._queues.setdefault(suffix, queue.Queue())
+
+    def remote(self, obj, role=None, idx=-1, suffix=tuple()):
+        self._queue(suffix).put(obj)
+
+    def get(self, idx=-1, suffix=tuple()):
+        return self._queue(suffix).get(timeout=60)
+
+
+class _TransferVariable(object):
+    def __init__(self):
+        self._variables = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        with self._lock:
+            return self._variables.setdefault(name, _Variable())
+
+
+class _LinearHostDenseModel(HostDenseModel):
+    """
+    host dense model of interactive layer with fixed initial weights and linear activation, without keras session
+    """
+
+    def __init__(self, weight, bias, lr):
+        self.input = None
+        self.model_weight = weight.copy()
+        self.bias = bias.copy()
+        self.lr = lr
+        self.is_empty_model = False
+        self.activation_input = None
+        self.do_backward_selective_strategy = False
+
+    def forward_activation(self, input_data):
+        self.activation_input = input_data
+        return input_data
+
+    def backward_activation(self):
+        return [np.ones_like(self.activation_input)]
+
+
+class _GuestDenseModel(GuestDenseModel):
+    def __init__(self, weight, lr):
+        self.input = None
+        self.model_weight = weight.copy()
+        self.lr = lr
+        self.is_empty_model = False
+        self.do_backward_selective_strategy = False
+
+
+class TestInteractiveLayerPipeline(unittest.TestCase):
+    def setUp(self):
+        session.init("test_interactive_layer_pipeline" + str(random.random()), 0)
+        self.lr = 0.1
+        self.batch_num = 5
+        rng = np.random.RandomState(0)
+        self.host_x = [rng.uniform(-1, 1, (8, 3)) for _ in range(self.batch_num)]
+        self.guest_x = [rng.uniform(-1, 1, (8, 2)) for _ in range(self.batch_num)]
+        self.y = [rng.uniform(-1, 1, (8, 2)) for _ in range(self.batch_num)]
+        self.host_weight = rng.uniform(-1, 1, (3, 2))
+        self.host_bias = rng.uniform(-1, 1, 2)
+        self.guest_weight = rng.uniform(-1, 1, (2, 2))
+
+    def _reference(self, pipeline_depth):
+        """
+        plain computation of interactive layer, forward of batch b uses host dense weights updated by batches
+        before b - pipeline_depth + 1, 1 is the serial path
+        """
+        host_weights = [(self.host_weight.copy(), self.host_bias.copy())]
+        guest_weight = self.guest_weight.copy()
+        outputs, host_input_gradients = [], []
+        for batch in range(self.batch_num):
+            weight, bias = host_weights[max(0, batch - pipeline_depth + 1)]
+            output = self.host_x[batch].dot(weight) + bias + self.guest_x[batch].dot(guest_weight)
+            gradient = output - self.y[batch]
+
+            weight, bias = host_weights[-1]
+            host_input_gradients.append(gradient.dot(weight.T))
+            guest_weight = guest_weight - self.lr * self.guest_x[batch].T.dot(gradient) / len(gradient)
+            host_weights.append((weight - self.lr * self.host_x[batch].T.dot(gradient) / len(gradient),
+                                 bias - self.lr * gradient.mean(axis=0)))
+            outputs.append(output)
+
+        return outputs, host_input_gradients
+
+    def _train(self, pipeline_depth):
+        param = HeteroNNParam(interactive_layer_lr=self.lr, pipeline_depth=pipeline_depth)
+        transfer_variable = _TransferVariable()
+
+        guest_layer = InterActiveGuestDenseLayer(param)
+        guest_layer.set_transfer_variable(transfer_variable)
+        guest_layer.set_partition(2)
+        guest_layer.set_batch_num(self.batch_num)
+        guest_layer.host_model = _LinearHostDenseModel(self.host_weight, self.host_bias, self.lr)
+        guest_layer.guest_model = _GuestDenseModel(self.guest_weight, self.lr)
+
+        host_layer = InteractiveHostDenseLayer(param)
+        host_layer.set_transfer_variable(transfer_variable)
+        host_layer.set_partition(2)
+
+        outputs, host_input_gradients, errors = [], [], []
+
+        def _guest():
+            for batch in range(self.batch_num):
+                output = guest_layer.forward(self.guest_x[batch], 0, batch, train=True)
+                guest_layer.backward(output - self.y[batch], [], 0, batch)
+                outputs.append(output)
+
+        def _host():
+            for batch in range(self.batch_num):
+                for next_batch in range(batch, min(batch + pipeline_depth, self.batch_num)):
+                    if not host_layer.has_sent_forward(0, next_batch):
+                        host_layer.encrypt_forward(self.host_x[next_batch], 0, next_batch)
+                host_layer.exchange_forward(0, batch, train=True)
+                host_input_gradient, _ = host_layer.backward(0, batch)
+                host_input_gradients.append(host_input_gradient)
+
+        def _run(func):
+            try:
+                func()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_run, args=(func,), daemon=True) for func in (_guest, _host)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=300)
+            self.assertFalse(thread.is_alive(), "interactive layer training hangs")
+        if errors:
+            raise errors[0]
+
+        return outputs, host_input_gradients
+
+    def _assert_match(self, actual, expect):
+        self.assertEqual(len(actual), len(expect))
+        for a, e in zip(actual, expect):
+            self.assertTrue(np.allclose(a, e, atol=1e-4), "{} != {}".format(a, e))
+
+    def test_serial(self):
+        outputs, host_input_gradients = self._train(pipeline_depth=1)
+        expect_outputs, expect_host_input_gradients = self._reference(pipeline_depth=1)
+        self._assert_match(outputs, expect_outputs)
+        self._assert_match(host_input_gradients, expect_host_input_gradients)
+
+    def test_pipelined(self):
+        serial_outputs, _ = self._reference(pipeline_depth=1)
+        for pipeline_depth in (2, 3):
+            outputs, host_input_gradients = self._train(pipeline_depth)
+            expect_outputs, expect_host_input_gradients = self._reference(pipeline_depth)
+            self._assert_match(outputs, expect_outputs)
+            self._assert_match(host_input_gradients, expect_host_input_gradients)
+            # first batch runs with initial weights, as in serial path
+            self._assert_match(outputs[:1], serial_outputs[:1])
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
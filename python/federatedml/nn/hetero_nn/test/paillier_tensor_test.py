@@ -1,5 +1,6 @@
 import numpy as np
 import unittest
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
 from federatedml.util import consts
 from fate_arch.session import computing_session as session
@@ -83,5 +84,74 @@ class TestPaillierTensor(unittest.TestCase):
         session.stop()
 
 
+class TestBlockPaillierTensor(unittest.TestCase):
+    def setUp(self):
+        session.init("test_block_paillier_tensor" + str(random.random()), 0)
+        self.data = np.random.uniform(-1, 1, (100, 10))
+        self.weight = np.random.uniform(-1, 1, (10, 3))
+        self.bias = np.random.uniform(-1, 1, 3)
+        self.tensor = BlockPaillierTensor.from_ndarray(self.data, partitions=4)
+
+        from federatedml.secureprotol import PaillierEncrypt
+        self.encrypter = PaillierEncrypt()
+        self.encrypter.generate_key(1024)
+
+    def test_block_layout(self):
+        self.assertEqual(self.tensor.block_rows, [25, 25, 25, 25])
+        self.assertEqual(self.tensor.shape, (100, 10))
+        self.assertTrue(np.array_equal(self.tensor.numpy(), self.data))
+
+        tensor = BlockPaillierTensor(tb_obj=self.tensor.get_obj())
+        self.assertEqual(tensor.block_rows, [25, 25, 25, 25])
+        self.assertEqual(tensor.shape, (100, 10))
+
+    def test_tensor_add_and_sub(self):
+        other = BlockPaillierTensor.from_ndarray(self.data, partitions=4, block_rows=self.tensor.block_rows)
+        self.assertTrue(np.allclose((self.tensor + other).numpy(), self.data * 2))
+        self.assertTrue(np.allclose((self.tensor - np.ones(10)).numpy(), self.data - 1))
+        self.assertTrue(np.allclose((1 - self.tensor).numpy(), 1 - self.data))
+
+    def test_encrypted_dot(self):
+        from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
+        for mode in ["strict", "fast"]:
+            encrypted_tensor = self.tensor.encrypt(EncryptModeCalculator(self.encrypter, mode))
+            output = encrypted_tensor.dot(self.weight, self.bias)
+            self.assertEqual(output.shape, (100, 3))
+            self.assertTrue(np.allclose(output.decrypt(self.encrypter).numpy(),
+                                        np.matmul(self.data, self.weight) + self.bias))
+
+    def test_encrypted_transpose_dot(self):
+        from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
+        delta = np.random.uniform(-1, 1, (100, 3))
+        encrypted_tensor = self.tensor.encrypt(EncryptModeCalculator(self.encrypter, "fast"))
+        delta_w = self.encrypter.recursive_decrypt(encrypted_tensor.transpose_dot(delta))
+        self.assertTrue(np.allclose(delta_w, np.matmul(self.data.T, delta)))
+
+    def test_select_and_expand_columns(self):
+        mask = np.random.uniform(0, 1, self.data.shape) < 0.5
+        mask_tensor = BlockPaillierTensor.from_ndarray(mask, partitions=4, block_rows=self.tensor.block_rows)
+        selected = self.tensor.select_columns(mask_tensor)
+        self.assertEqual(selected.numpy().size, mask.sum())
+        self.assertTrue(np.allclose(selected.expand_columns(mask_tensor).numpy(), self.data * mask))
+
+    def test_select_rows(self):
+        row_ids = [3, 97, 25, 24, 50, 3, 60]
+        rows = self.tensor.select_rows(row_ids[:4])
+        rows = rows.union(self.tensor.select_rows(row_ids[4:], offset=4))
+        self.assertListEqual(sorted(pos for pos, _ in rows.collect()), list(range(len(row_ids))))
+
+        # rows are split into blocks in order of selection
+        selected = BlockPaillierTensor.from_row_table(rows, 0, len(row_ids), partitions=4)
+        self.assertEqual(selected.block_rows, [2, 2, 2, 1])
+        self.assertTrue(np.array_equal(selected.numpy(), self.data[row_ids]))
+
+        selected = BlockPaillierTensor.from_row_table(rows, 5, 2, partitions=4)
+        self.assertEqual(selected.block_rows, [1, 1])
+        self.assertTrue(np.array_equal(selected.numpy(), self.data[row_ids[5:]]))
+
+    def tearDown(self):
+        session.stop()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,5 @@
 from federatedml.nn.hetero_nn.util.random_number_generator import RandomNumberGenerator
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
 import numpy as np
 from fate_arch.session import computing_session as session
@@ -24,6 +25,15 @@ class TestRandomNumberGenerator(unittest.TestCase):
         self.assertTrue(isinstance(random_data, PaillierTensor))
         self.assertTrue(tuple(random_data.shape) == tuple(data.shape))
 
+    def test_fast_generate_block_random_number(self):
+        data = np.ones((1000, 100))
+        block_tensor = BlockPaillierTensor.from_ndarray(data, partitions=4)
+
+        random_data = self.rng_gen.fast_generate_block_random_number(block_tensor)
+        self.assertTrue(isinstance(random_data, BlockPaillierTensor))
+        self.assertTrue(random_data.block_rows == block_tensor.block_rows)
+        self.assertTrue(tuple(random_data.shape) == tuple(data.shape))
+
     def tearDown(self):
         session.stop()
 
@@ -22,6 +22,7 @@ import random
 import numpy as np
 from fate_arch.session import computing_session
 
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
 
 BITS = 10
@@ -76,3 +77,11 @@ class RandomNumberGenerator(object):
             tb = tb.mapValues(lambda val: self.generate_random_number(shape[1:], mixed_rate=mixed_rate))
 
             return PaillierTensor(tb_obj=tb)
+
+    def fast_generate_block_random_number(self, block_tensor, mixed_rate=MIXED_RATE):
+        """
+        generate random numbers of the same block layout as block_tensor, each block is generated where it locates
+        """
+        tb = block_tensor.get_obj().mapValues(lambda block: self.generate_random_number(np.shape(block),
+                                                                                      mixed_rate=mixed_rate))
+        return BlockPaillierTensor(tb_obj=tb)
@@ -76,12 +76,25 @@ class _PyTorchSAContext(object):
 
 
 class PyTorchSAClientContext(_PyTorchSAContext):
-    def __init__(self, max_num_aggregation, aggregate_every_n_epoch, name="default"):
+    def __init__(
+        self,
+        max_num_aggregation,
+        aggregate_every_n_epoch,
+        name="default",
+        aggregate_fan_in=None,
+    ):
         super(PyTorchSAClientContext, self).__init__(
             max_num_aggregation=max_num_aggregation, name=name
         )
         self.transfer_variable = SecureAggregatorTransVar()
-        self.aggregator = aggregator.Client(self.transfer_variable.aggregator_trans_var)
+        self.aggregator = aggregator.Client(
+            self.transfer_variable.aggregator_trans_var,
+            aggregate_fan_in=aggregate_fan_in,
+        )
+        # losses are reduced as `sum(loss * weight)` on server, never relayed through aggregation tree
+        self.loss_aggregator = aggregator.Client(
+            self.transfer_variable.aggregator_trans_var
+        )
         self.random_padding_cipher = random_padding_cipher.Client(
             self.transfer_variable.random_padding_cipher_trans_var
         )
@@ -95,7 +108,7 @@ class PyTorchSAClientContext(_PyTorchSAContext):
         self.random_padding_cipher.create_cipher()
 
     def encrypt(self, tensor: torch.Tensor, weight):
-        return self.random_padding_cipher.encrypt(
+        return self.random_padding_cipher.encrypt_inplace(
             torch.clone(tensor).detach().mul_(weight)
         ).numpy()
 
@@ -112,10 +125,12 @@ class PyTorchSAClientContext(_PyTorchSAContext):
         ]
 
     def send_loss(self, loss, weight):
-        self.aggregator.send_model((loss, weight), suffix=self._suffix(group="loss"))
+        self.loss_aggregator.send_model(
+            (loss, weight), suffix=self._suffix(group="loss")
+        )
 
     def recv_loss(self):
-        return self.aggregator.get_aggregated_model(
+        return self.loss_aggregator.get_aggregated_model(
             suffix=self._suffix(group="convergence")
         )
 
@@ -171,12 +186,20 @@ class PyTorchSAClientContext(_PyTorchSAContext):
 
 
 class PyTorchSAServerContext(_PyTorchSAContext):
-    def __init__(self, max_num_aggregation, eps=0.0, name="default"):
+    def __init__(
+        self, max_num_aggregation, eps=0.0, name="default", aggregate_fan_in=None
+    ):
         super(PyTorchSAServerContext, self).__init__(
             max_num_aggregation=max_num_aggregation, name=name
         )
         self.transfer_variable = SecureAggregatorTransVar()
-        self.aggregator = aggregator.Server(self.transfer_variable.aggregator_trans_var)
+        self.aggregator = aggregator.Server(
+            self.transfer_variable.aggregator_trans_var,
+            aggregate_fan_in=aggregate_fan_in,
+        )
+        self.loss_aggregator = aggregator.Server(
+            self.transfer_variable.aggregator_trans_var
+        )
         self.random_padding_cipher = random_padding_cipher.Server(
             self.transfer_variable.random_padding_cipher_trans_var
         )
@@ -196,12 +219,12 @@ class PyTorchSAServerContext(_PyTorchSAContext):
         return self.aggregator.get_models(suffix=self._suffix())
 
     def send_convergence_status(self, status):
-        self.aggregator.send_aggregated_model(
+        self.loss_aggregator.send_aggregated_model(
             status, suffix=self._suffix(group="convergence")
         )
 
     def recv_losses(self):
-        return self.aggregator.get_models(suffix=self._suffix(group="loss"))
+        return self.loss_aggregator.get_models(suffix=self._suffix(group="loss"))
 
     def do_convergence_check(self):
         # recieve losses and weights of parties
@@ -370,11 +393,7 @@ class PyTorchFederatedTrainer(object):
         }
 
     def predict(self, dataset, batch_size):
-        if batch_size < 0:
-            batch_size = len(dataset)
-        dataloader = torch.utils.data.DataLoader(
-            dataset=dataset, batch_size=batch_size, num_workers=1
-        )
+        dataloader = make_dataloader(dataset, batch_size)
         results = []
         for x, y in dataloader:
             results.append(self.pl_model(x).detach().numpy())
@@ -491,12 +510,29 @@ def make_dataset(data, **kwargs):
     return dataset
 
 
-def make_predict_dataset(data, trainer: PyTorchFederatedTrainer):
+def make_predict_dataset(data, trainer: PyTorchFederatedTrainer, **kwargs):
     return make_dataset(
         data,
         is_train=False,
         label_align_mapping=trainer.get_label_mapping(),
         expected_label_type=trainer.pl_model.expected_label_type,
+        **kwargs,
+    )
+
+
+def make_dataloader(dataset, batch_size):
+    if batch_size < 0:
+        batch_size = len(dataset)
+    if isinstance(dataset, TableDataSet):
+        # fetch a batch with one read of the underlying arrays, rather than one read per row
+        sampler = torch.utils.data.BatchSampler(
+            torch.utils.data.SequentialSampler(dataset), batch_size=batch_size, drop_last=False
+        )
+        return torch.utils.data.DataLoader(
+            dataset=dataset, batch_size=None, sampler=sampler, num_workers=1
+        )
+    return torch.utils.data.DataLoader(
+        dataset=dataset, batch_size=batch_size, num_workers=1
     )
 
 
@@ -508,6 +544,7 @@ def build_trainer(
     context = PyTorchSAClientContext(
         max_num_aggregation=param.max_iter,
         aggregate_every_n_epoch=param.aggregate_every_n_epoch,
+        aggregate_fan_in=param.aggregate_fan_in,
     )
     pl_trainer = pl.Trainer(
         max_epochs=total_epoch,
@@ -523,14 +560,12 @@ def build_trainer(
         optimizer_config=param.optimizer,
         loss_config={"loss": param.loss},
     )
-    dataset = make_dataset(data=data, expected_label_type=pl_model.expected_label_type)
-
-    batch_size = param.batch_size
-    if batch_size < 0:
-        batch_size = len(dataset)
-    dataloader = torch.utils.data.DataLoader(
-        dataset=dataset, batch_size=batch_size, num_workers=1
+    dataset = make_dataset(
+        data=data,
+        expected_label_type=pl_model.expected_label_type,
+        mmap_dir=param.dataset_mmap_dir,
     )
+    dataloader = make_dataloader(dataset, param.batch_size)
     trainer = PyTorchFederatedTrainer(
         pl_trainer=pl_trainer,
         header=header,
@@ -577,7 +612,9 @@ class PytorchFederatedAggregator(object):
 
 def build_aggregator(param: HomoNNParam):
     context = PyTorchSAServerContext(
-        max_num_aggregation=param.max_iter, eps=param.early_stop.eps
+        max_num_aggregation=param.max_iter,
+        eps=param.early_stop.eps,
+        aggregate_fan_in=param.aggregate_fan_in,
     )
     context.init()
     fed_aggregator = PytorchFederatedAggregator(context)
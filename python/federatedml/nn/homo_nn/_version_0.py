@@ -7,6 +7,7 @@ from federatedml.framework.homo.blocks import (
     loss_scatter,
     has_converged,
 )
+from federatedml.framework.homo.blocks.bounded_staleness import StalenessConf
 from federatedml.nn.homo_nn import nn_model
 from federatedml.nn.homo_nn._consts import _build_model_dict
 from federatedml.nn.homo_nn.nn_model import restore_nn_model
@@ -25,7 +26,10 @@ def _suffix(self):
 def server_init_model(self, param):
     self.aggregate_iteration_num = 0
     self.aggregator = secure_mean_aggregator.Server(
-        self.transfer_variable.secure_aggregator_trans_var
+        self.transfer_variable.secure_aggregator_trans_var,
+        enable_secure_aggregate=param.secure_aggregate,
+        aggregate_fan_in=param.aggregate_fan_in,
+        staleness_conf=StalenessConf.from_param(param.staleness_param),
     )
     self.loss_scatter = loss_scatter.Server(
         self.transfer_variable.loss_scatter_trans_var
@@ -63,7 +67,10 @@ def server_fit(self, data_inst):
 
 
 def server_is_converged(self):
-    loss = self.loss_scatter.weighted_loss_mean(suffix=_suffix(self))
+    # in bounded-staleness mode, losses of clients missing this round are not waited for
+    loss = self.loss_scatter.weighted_loss_mean(
+        suffix=_suffix(self), parties=self.aggregator.present_parties
+    )
     LOGGER.info(f"loss at iter {self.aggregate_iteration_num}: {loss}")
     server_callback_loss(self, self.aggregate_iteration_num, loss)
     if self.loss_consumed:
@@ -124,7 +131,10 @@ def client_set_params(self, param):
 def client_init_model(self, param):
     self.aggregate_iteration_num = 0
     self.aggregator = secure_mean_aggregator.Client(
-        self.transfer_variable.secure_aggregator_trans_var
+        self.transfer_variable.secure_aggregator_trans_var,
+        enable_secure_aggregate=param.secure_aggregate,
+        aggregate_fan_in=param.aggregate_fan_in,
+        staleness_conf=StalenessConf.from_param(param.staleness_param),
     )
     self.loss_scatter = loss_scatter.Client(
         self.transfer_variable.loss_scatter_trans_var
@@ -128,7 +128,7 @@ class HomoNNClient(HomoNNBase):
         else:
             from federatedml.nn.homo_nn._torch import make_predict_dataset
 
-            dataset = make_predict_dataset(data=data, trainer=self._trainer)
+            dataset = make_predict_dataset(data=data, trainer=self._trainer, mmap_dir=self.param.dataset_mmap_dir)
             predict_tbl, classes = self._trainer.predict(
                 dataset=dataset,
                 batch_size=self.param.batch_size,
@@ -17,9 +17,9 @@
 #  limitations under the License.
 
 import functools
+import weakref
 
 import numpy as np
-import scipy.sparse as sp
 
 from federatedml.feature.sparse_vector import SparseVector
 from federatedml.statistic import data_overview
@@ -34,6 +34,8 @@ class HeteroGradientBase(object):
         self.use_async = False
         self.use_sample_weight = False
         self.fixed_point_encoder = None
+        # batch table -> its compact sparse rows, entries are released along with batch tables
+        self._sparse_rows_cache = weakref.WeakKeyDictionary()
 
     def compute_gradient_procedure(self, *args):
         raise NotImplementedError("Should not call here")
@@ -73,29 +75,16 @@ class HeteroGradientBase(object):
         fore_gradient = []
 
         if is_sparse:
-            row_indice = []
-            col_indice = []
-            data_value = []
-
-            row = 0
-            feature_shape = None
             for key, (sparse_features, d) in data:
-                fore_gradient.append(d)
                 assert isinstance(sparse_features, SparseVector)
-                if feature_shape is None:
-                    feature_shape = sparse_features.get_shape()
-                for idx, v in sparse_features.get_all_data():
-                    col_indice.append(idx)
-                    row_indice.append(row)
-                    data_value.append(v)
-                row += 1
-            if feature_shape is None or feature_shape == 0:
+                feature.append(sparse_features)
+                fore_gradient.append(d)
+            if not feature or feature[0].get_shape() == 0:
                 return 0
-            sparse_matrix = sp.csr_matrix((data_value, (row_indice, col_indice)), shape=(row, feature_shape))
+            sparse_matrix = fate_operator.sparse_vectors_to_csr(feature)
             fore_gradient = np.array(fore_gradient)
 
-            # gradient = sparse_matrix.transpose().dot(fore_gradient).tolist()
-            gradient = fate_operator.dot(sparse_matrix.transpose(), fore_gradient).tolist()
+            gradient = fate_operator.sparse_transpose_dot(sparse_matrix, fore_gradient).tolist()
             if fit_intercept:
                 bias_grad = np.sum(fore_gradient)
                 gradient.append(bias_grad)
@@ -119,14 +108,32 @@ class HeteroGradientBase(object):
             return np.array(gradient)
 
     @staticmethod
-    def __apply_cal_gradient(data, fixed_point_encoder, is_sparse):
+    def __apply_cal_sparse_gradient(data, fixed_point_encoder, feature_num):
+        """
+        X^T * d of a partition, X is kept as a csr block stacked from cached compact rows,
+        only non-zero columns of X are computed
+        """
+        rows = []
+        fore_gradient = []
+        for key, (row, d) in data:
+            rows.append(row)
+            fore_gradient.append(d)
+        if not rows:
+            return None
+        sparse_matrix = fate_operator.sparse_rows_to_csr(rows, feature_num)
+        if fixed_point_encoder:
+            sparse_matrix.data = fixed_point_encoder.encode(sparse_matrix.data)
+        all_g = fate_operator.sparse_transpose_dot(sparse_matrix, np.array(fore_gradient))
+        if fixed_point_encoder:
+            all_g = fixed_point_encoder.decode(all_g)
+        return all_g
+
+    @staticmethod
+    def __apply_cal_gradient(data, fixed_point_encoder, is_sparse, feature_num=None):
+        if is_sparse:
+            return HeteroGradientBase.__apply_cal_sparse_gradient(data, fixed_point_encoder, feature_num)
         all_g = None
         for key, (feature, d) in data:
-            if is_sparse:
-                x = np.zeros(feature.get_shape())
-                for idx, v in feature.get_all_data():
-                    x[idx] = v
-                feature = x
             if fixed_point_encoder:
                 # g = (feature * 2 ** floating_point_precision).astype("int") * d
                 g = fixed_point_encoder.encode(feature) * d
@@ -142,6 +149,17 @@ class HeteroGradientBase(object):
             all_g = fixed_point_encoder.decode(all_g)
         return all_g
 
+    def _sparse_feature_rows(self, data_instances):
+        """
+        compact sparse rows of a batch table, built once per batch table and reused in later iterations,
+        since batch tables are kept by mini-batch generator through the whole training.
+        """
+        rows = self._sparse_rows_cache.get(data_instances)
+        if rows is None:
+            rows = data_instances.mapValues(lambda inst: fate_operator.sparse_vector_to_row(inst.features))
+            self._sparse_rows_cache[data_instances] = rows
+        return rows
+
     def compute_gradient(self, data_instances, fore_gradient, fit_intercept):
         """
         Compute hetero-regression gradient
@@ -163,13 +181,18 @@ class HeteroGradientBase(object):
 
         if data_count * feature_num > 100:
             LOGGER.debug("Use apply partitions")
-            feat_join_grad = data_instances.join(fore_gradient,
-                                                 lambda d, g: (d.features, g))
+            if is_sparse:
+                feat_join_grad = self._sparse_feature_rows(data_instances).join(fore_gradient,
+                                                                                lambda row, g: (row, g))
+            else:
+                feat_join_grad = data_instances.join(fore_gradient,
+                                                     lambda d, g: (d.features, g))
             f = functools.partial(self.__apply_cal_gradient,
                                   fixed_point_encoder=self.fixed_point_encoder,
-                                  is_sparse=is_sparse)
+                                  is_sparse=is_sparse,
+                                  feature_num=feature_num)
             gradient_sum = feat_join_grad.applyPartitions(f)
-            gradient_sum = gradient_sum.reduce(lambda x, y: x + y)
+            gradient_sum = gradient_sum.reduce(fate_operator.reduce_add)
             if fit_intercept:
                 # bias_grad = np.sum(fore_gradient)
                 bias_grad = fore_gradient.reduce(lambda x, y: x + y)
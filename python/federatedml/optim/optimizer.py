@@ -51,20 +51,27 @@ class _Optimizer(object):
     def apply_gradients(self, grad):
         raise NotImplementedError("Should not call here")
 
+    @staticmethod
+    def _coef_part(arr, fit_intercept):
+        """
+        view of coef part in flat weights or gradient array
+        """
+        if fit_intercept:
+            return arr[: -1]
+        return arr
+
     def _l1_updator(self, model_weights: LinearModelWeights, gradient):
-        coef_ = model_weights.coef_
-        if model_weights.fit_intercept:
-            gradient_without_intercept = gradient[: -1]
-        else:
-            gradient_without_intercept = gradient
+        # single buffer: w - g, then soft threshold coef part in place, intercept is kept as w[-1] - g[-1]
+        new_weights = model_weights.unboxed - gradient
+        coef_ = self._coef_part(new_weights, model_weights.fit_intercept)
 
-        new_weights = np.sign(coef_ - gradient_without_intercept) * np.maximum(0, np.abs(
-            coef_ - gradient_without_intercept) - self.shrinkage_val)
+        magnitude = np.abs(coef_)
+        magnitude -= self.shrinkage_val
+        np.maximum(magnitude, 0, out=magnitude)
+        np.sign(coef_, out=coef_)
+        coef_ *= magnitude
 
-        if model_weights.fit_intercept:
-            new_weights = np.append(new_weights, model_weights.intercept_)
-            new_weights[-1] -= gradient[-1]
-        new_param = LinearModelWeights(new_weights, model_weights.fit_intercept)
+        new_param = LinearModelWeights(new_weights, model_weights.fit_intercept, copy=False)
         # LOGGER.debug("In _l1_updator, original weight: {}, new_weights: {}".format(
         #     model_weights.unboxed, new_weights
         # ))
@@ -76,19 +83,17 @@ class _Optimizer(object):
         """
 
         new_weights = lr_weights.unboxed - gradient
-        new_param = LinearModelWeights(new_weights, lr_weights.fit_intercept)
+        new_param = LinearModelWeights(new_weights, lr_weights.fit_intercept, copy=False)
 
         return new_param
 
     def add_regular_to_grad(self, grad, lr_weights):
 
         if self.penalty == consts.L2_PENALTY:
-            if lr_weights.fit_intercept:
-                gradient_without_intercept = grad[: -1]
-                gradient_without_intercept += self.alpha * lr_weights.coef_
-                new_grad = np.append(gradient_without_intercept, grad[-1])
-            else:
-                new_grad = grad + self.alpha * lr_weights.coef_
+            coef_ = lr_weights.coef_view
+            new_grad = np.array(grad, dtype=np.result_type(grad, coef_))
+            gradient_without_intercept = self._coef_part(new_grad, lr_weights.fit_intercept)
+            gradient_without_intercept += self.alpha * coef_
         else:
             new_grad = grad
 
@@ -104,40 +109,28 @@ class _Optimizer(object):
             model_weights = self._l2_updator(model_weights, grad)
         else:
             new_vars = model_weights.unboxed - grad
-            model_weights = LinearModelWeights(new_vars, model_weights.fit_intercept)
+            model_weights = LinearModelWeights(new_vars, model_weights.fit_intercept, copy=False)
 
         if prev_round_weights is not None:  # additional proximal term
-            coef_ = model_weights.unboxed
-
-            if model_weights.fit_intercept:
-                coef_without_intercept = coef_[: -1]
-            else:
-                coef_without_intercept = coef_
-
-            coef_without_intercept -= self.mu * (model_weights.coef_ - prev_round_weights.coef_)
-
-            if model_weights.fit_intercept:
-                new_coef_ = np.append(coef_without_intercept, coef_[-1])
-            else:
-                new_coef_ = coef_without_intercept
-
-            model_weights = LinearModelWeights(new_coef_, model_weights.fit_intercept)
+            # model_weights holds a fresh array here, coef part is updated in place
+            coef_without_intercept = model_weights.coef_view
+            proximal = coef_without_intercept - prev_round_weights.coef_view
+            proximal *= self.mu
+            coef_without_intercept -= proximal
         return model_weights
 
     def __l1_loss_norm(self, model_weights: LinearModelWeights):
-        coef_ = model_weights.coef_
-        loss_norm = np.sum(self.alpha * np.abs(coef_))
+        coef_ = model_weights.coef_view
+        loss_norm = self.alpha * np.sum(np.abs(coef_))
         return loss_norm
 
     def __l2_loss_norm(self, model_weights: LinearModelWeights):
-        coef_ = model_weights.coef_
+        coef_ = model_weights.coef_view
         loss_norm = 0.5 * self.alpha * np.dot(coef_, coef_)
         return loss_norm
 
     def __add_proximal(self, model_weights, prev_round_weights):
-        prev_round_coef_ = prev_round_weights.coef_
-        coef_ = model_weights.coef_
-        diff = coef_ - prev_round_coef_
+        diff = model_weights.coef_view - prev_round_weights.coef_view
         loss_norm = self.mu * 0.5 * np.dot(diff, diff)
         return loss_norm
 
@@ -201,11 +194,15 @@ class _RMSPropOptimizer(_Optimizer):
         learning_rate = self.decay_learning_rate()
 
         if self.opt_m is None:
-            self.opt_m = np.zeros_like(grad)
+            self.opt_m = np.zeros_like(grad, dtype=np.float64)
 
-        self.opt_m = self.rho * self.opt_m + (1 - self.rho) * np.square(grad)
-        self.opt_m = np.array(self.opt_m, dtype=np.float64)
-        delta_grad = learning_rate * grad / np.sqrt(self.opt_m + 1e-6)
+        # optimizer state is updated in place, delta_grad is the only new array
+        self.opt_m *= self.rho
+        self.opt_m += (1 - self.rho) * np.square(grad)
+        denominator = self.opt_m + 1e-6
+        np.sqrt(denominator, out=denominator)
+        delta_grad = learning_rate * grad
+        delta_grad /= denominator
         return delta_grad
 
 
@@ -218,10 +215,12 @@ class _AdaGradOptimizer(_Optimizer):
         learning_rate = self.decay_learning_rate()
 
         if self.opt_m is None:
-            self.opt_m = np.zeros_like(grad)
-        self.opt_m = self.opt_m + np.square(grad)
-        self.opt_m = np.array(self.opt_m, dtype=np.float64)
-        delta_grad = learning_rate * grad / (np.sqrt(self.opt_m) + 1e-7)
+            self.opt_m = np.zeros_like(grad, dtype=np.float64)
+        self.opt_m += np.square(grad)
+        denominator = np.sqrt(self.opt_m)
+        denominator += 1e-7
+        delta_grad = learning_rate * grad
+        delta_grad /= denominator
         return delta_grad
 
 
@@ -236,9 +235,11 @@ class _NesterovMomentumSGDOpimizer(_Optimizer):
 
         if self.opt_m is None:
             self.opt_m = np.zeros_like(grad)
-        v = self.nesterov_momentum_coeff * self.opt_m - learning_rate * grad
-        delta_grad = self.nesterov_momentum_coeff * self.opt_m - (1 + self.nesterov_momentum_coeff) * v
-        self.opt_m = v
+        delta_grad = self.nesterov_momentum_coeff * self.opt_m
+        # v = momentum * opt_m - learning_rate * grad, kept in opt_m
+        self.opt_m *= self.nesterov_momentum_coeff
+        self.opt_m -= learning_rate * grad
+        delta_grad -= (1 + self.nesterov_momentum_coeff) * self.opt_m
         # LOGGER.debug('In nesterov_momentum, opt_m: {}, v: {}, delta_grad: {}'.format(
         #     self.opt_m, v, delta_grad
         # ))
@@ -260,19 +261,23 @@ class _AdamOptimizer(_Optimizer):
         learning_rate = self.decay_learning_rate()
 
         if self.opt_m is None:
-            self.opt_m = np.zeros_like(grad)
+            self.opt_m = np.zeros_like(grad, dtype=np.float64)
 
         if self.opt_v is None:
-            self.opt_v = np.zeros_like(grad)
+            self.opt_v = np.zeros_like(grad, dtype=np.float64)
 
         self.opt_beta1_decay = self.opt_beta1_decay * self.opt_beta1
         self.opt_beta2_decay = self.opt_beta2_decay * self.opt_beta2
-        self.opt_m = self.opt_beta1 * self.opt_m + (1 - self.opt_beta1) * grad
-        self.opt_v = self.opt_beta2 * self.opt_v + (1 - self.opt_beta2) * np.square(grad)
-        opt_m_hat = self.opt_m / (1 - self.opt_beta1_decay)
+        self.opt_m *= self.opt_beta1
+        self.opt_m += (1 - self.opt_beta1) * grad
+        self.opt_v *= self.opt_beta2
+        self.opt_v += (1 - self.opt_beta2) * np.square(grad)
         opt_v_hat = self.opt_v / (1 - self.opt_beta2_decay)
-        opt_v_hat = np.array(opt_v_hat, dtype=np.float64)
-        delta_grad = learning_rate * opt_m_hat / (np.sqrt(opt_v_hat) + 1e-8)
+        np.sqrt(opt_v_hat, out=opt_v_hat)
+        opt_v_hat += 1e-8
+        delta_grad = self.opt_m / (1 - self.opt_beta1_decay)
+        delta_grad *= learning_rate
+        delta_grad /= opt_v_hat
         return delta_grad
 
 
@@ -4,7 +4,7 @@ import unittest
 import numpy as np
 
 from federatedml.linear_model.linear_model_weight import LinearModelWeights
-from federatedml.optim.optimizer import _SgdOptimizer
+from federatedml.optim.optimizer import _SgdOptimizer, _AdamOptimizer
 
 
 class TestInitialize(unittest.TestCase):
@@ -53,6 +53,33 @@ class TestInitialize(unittest.TestCase):
         print("loss_norm = {}".format(loss_norm))
         self.assertTrue(math.fabs(loss_norm - 0.47661583737200075) <= eps)
 
+    def test_l1_update_with_proximal(self):
+        weights = np.array([0.5, -0.2, 0.01, 1.0])
+        grad = np.array([0.1, -0.1, 0.0, 0.5])
+        prev = np.array([0.4, -0.1, 0.0, 0.9])
+        optimizer = _SgdOptimizer(0.1, 0.5, "L1", 0, False, 0.1)
+        optimizer.set_iters(1)
+        new_weights = optimizer.regularization_update(LinearModelWeights(weights, True), grad,
+                                                      LinearModelWeights(prev, True))
+
+        coef = weights[:-1] - grad[:-1]
+        coef = np.sign(coef) * np.maximum(0, np.abs(coef) - optimizer.shrinkage_val)
+        coef -= 0.1 * (coef - prev[:-1])
+        expected = np.append(coef, weights[-1] - grad[-1])
+        self.assertTrue(np.allclose(new_weights.unboxed, expected))
+        self.assertTrue(np.allclose(weights, [0.5, -0.2, 0.01, 1.0]))
+
+    def test_adam_state_in_place(self):
+        optimizer = _AdamOptimizer(0.1, 0.0, "L2", 0, False, 0)
+        grads = [np.array([0.2, -0.4, 0.1]), np.array([0.1, 0.3, -0.2])]
+        m, v = np.zeros(3), np.zeros(3)
+        for i, grad in enumerate(grads, 1):
+            delta = optimizer.apply_gradients(grad)
+            m = 0.9 * m + 0.1 * grad
+            v = 0.999 * v + 0.001 * np.square(grad)
+            expected = 0.1 * (m / (1 - 0.9 ** i)) / (np.sqrt(v / (1 - 0.999 ** i)) + 1e-8)
+            self.assertTrue(np.allclose(delta, expected))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -30,15 +30,20 @@ class KmeansParam(BaseParam):
         Maximum number of iterations of the hetero-k-means algorithm to run.
     tol : float, default 0.001.
     random_stat : random seed
+    mini_batch_fraction : None or float in (0, 1], default None.
+        If set, every iteration updates centroids with a fraction of data blocks sampled randomly, as mini-batch
+        k-means does, which is suggested for very large inputs. Cluster results of the final round are still
+        computed on the whole data.
 
     """
 
-    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None):
+    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None, mini_batch_fraction=None):
         super(KmeansParam, self).__init__()
         self.k = k
         self.max_iter = max_iter
         self.tol = tol
         self.random_stat = random_stat
+        self.mini_batch_fraction = mini_batch_fraction
 
     def check(self):
         descr = "Kmeans_param's"
@@ -73,3 +78,13 @@ class KmeansParam(BaseParam):
             elif self.random_stat < 0:
                 raise ValueError(
                     descr + "random_stat not supported, should be larger than/equal to 0".format(self.random_stat))
+
+        if self.mini_batch_fraction is not None:
+            if not isinstance(self.mini_batch_fraction, (float, int)) or isinstance(self.mini_batch_fraction, bool):
+                raise ValueError(
+                    descr + "mini_batch_fraction {} not supported, should be float type".format(
+                        self.mini_batch_fraction))
+            elif not 0 < self.mini_batch_fraction <= 1:
+                raise ValueError(
+                    descr + "mini_batch_fraction {} not supported, should be in (0, 1]".format(
+                        self.mini_batch_fraction))
@@ -107,6 +107,11 @@ class HeteroNNParam(BaseParam):
                                    e.g.: convert an x to round(x * 2**floating_point_precision) during Paillier operation, divide
                                           the result by 2**floating_point_precision in the end.
         drop_out_keep_rate: float, should betweend 0 and 1, if not equals to 1.0, will enabled drop out
+        pipeline_depth: int, number of batches in flight in training, should be positive, default: 1.
+                        If larger than 1, host runs bottom model forward and encryption of next batches, and guest
+                        computes encrypted interactive layer forward of next batches while the exchange of current
+                        batch is pending, then forward of a batch uses weights stale by at most pipeline_depth - 1 updates.
+                        1 means run batches strictly in sequence.
     """
 
     def __init__(self,
@@ -132,7 +137,8 @@ class HeteroNNParam(BaseParam):
                  use_first_metric_only=True,
                  selector_param=SelectorParam(),
                  floating_point_precision=23,
-                 drop_out_keep_rate=1.0):
+                 drop_out_keep_rate=1.0,
+                 pipeline_depth=1):
         super(HeteroNNParam, self).__init__()
 
         self.task_type = task_type
@@ -161,6 +167,7 @@ class HeteroNNParam(BaseParam):
         self.floating_point_precision = floating_point_precision
 
         self.drop_out_keep_rate = drop_out_keep_rate
+        self.pipeline_depth = pipeline_depth
 
     def check(self):
         self.optimizer = self._parse_optimizer(self.optimizer)
@@ -228,6 +235,9 @@ class HeteroNNParam(BaseParam):
                 self.drop_out_keep_rate > 1.0:
             raise ValueError("drop_out_keep_rate should be in range [0.0, 1.0]")
 
+        if not isinstance(self.pipeline_depth, int) or self.pipeline_depth < 1:
+            raise ValueError("pipeline_depth should be a positive integer")
+
         self.encrypt_param.check()
         self.encrypted_model_calculator_param.check()
         self.predict_param.check()
@@ -23,6 +23,7 @@ from types import SimpleNamespace
 from federatedml.param.base_param import BaseParam
 from federatedml.param.cross_validation_param import CrossValidationParam
 from federatedml.param.predict_param import PredictParam
+from federatedml.param.staleness_param import StalenessParam
 import json
 
 
@@ -54,6 +55,14 @@ class HomoNNParam(BaseParam):
                 b)  weight_diff: Use difference between weights of two consecutive iterations
                 c)	abs: Use the absolute value of loss to judge whether converge. i.e. if loss < eps, it is converged.
         encode_label : encode label to one_hot.
+        dataset_mmap_dir: str or None, directory to export table data into memory-mapped arrays for pytorch backend,
+            so that tables larger than memory could be trained batch by batch, it needs about
+            rows * features * 4 bytes of disk. None means loading data into memory.
+            defaults to None.
+        aggregate_fan_in: int or None, if set, clients sum their models through an aggregation tree with this fan-in,
+            and arbiter receives one pre-aggregated model per subtree. Should be no less than 2. defaults to None.
+        staleness_param: StalenessParam object, bounded-staleness aggregation setting, in which arbiter aggregates
+            once a quorum of models arrived. Can't be enabled together with aggregation tree.
     """
 
     def __init__(self,
@@ -69,6 +78,9 @@ class HomoNNParam(BaseParam):
                  batch_size: int = -1,
                  early_stop: typing.Union[str, dict, SimpleNamespace] = "diff",
                  encode_label: bool = False,
+                 dataset_mmap_dir: str = None,
+                 aggregate_fan_in: int = None,
+                 staleness_param=StalenessParam(),
                  predict_param=PredictParam(),
                  cv_param=CrossValidationParam()):
         super(HomoNNParam, self).__init__()
@@ -88,6 +100,9 @@ class HomoNNParam(BaseParam):
         self.metrics = metrics
         self.optimizer = optimizer
         self.loss = loss
+        self.dataset_mmap_dir = dataset_mmap_dir
+        self.aggregate_fan_in = aggregate_fan_in
+        self.staleness_param = copy.deepcopy(staleness_param)
 
         self.predict_param = copy.deepcopy(predict_param)
         self.cv_param = copy.deepcopy(cv_param)
@@ -99,6 +114,16 @@ class HomoNNParam(BaseParam):
         self.early_stop = _parse_early_stop(self.early_stop)
         self.metrics = _parse_metrics(self.metrics)
         self.optimizer = _parse_optimizer(self.optimizer)
+        if self.dataset_mmap_dir is not None and not isinstance(self.dataset_mmap_dir, str):
+            raise ValueError(f"dataset_mmap_dir should be None or str, got {type(self.dataset_mmap_dir)}")
+        if self.aggregate_fan_in is not None and \
+                (type(self.aggregate_fan_in).__name__ != "int" or self.aggregate_fan_in < 2):
+            raise ValueError(f"aggregate_fan_in should be None or int no less than 2, got {self.aggregate_fan_in}")
+        self.staleness_param.check()
+        if self.staleness_param.enable and self.aggregate_fan_in is not None:
+            raise ValueError("bounded-staleness aggregation and aggregation tree can't be enabled together")
+        if self.staleness_param.enable and self.api_version != 0:
+            raise ValueError("bounded-staleness aggregation is supported with api_version 0 only")
 
     def generate_pb(self):
         from federatedml.protobuf.generated import nn_model_meta_pb2
@@ -130,6 +130,21 @@ class RSAParam(BaseParam):
 
 
 class IntersectCache(BaseParam):
+    """
+    Define the cache of host id library for RSA intersect method
+
+    Parameters
+    ----------
+    use_cache: bool, if True, host caches its private key processed ids together with rsa key, and later jobs
+        only process ids added since cached version; guest caches the received ids of same version. Effective for
+        rsa method without split_calculation only. Default False
+
+    id_type: str, type of id library, it support phone, imei, default phone
+
+    encrypt_type: str, encrypt type of id library, it support md5, sha256, default sha256
+
+    """
+
     def __init__(self, use_cache=False, id_type=consts.PHONE, encrypt_type=consts.SHA256):
         super().__init__()
         self.use_cache = use_cache
@@ -143,12 +158,46 @@ class IntersectCache(BaseParam):
                     self.use_cache))
 
         descr = "intersect cache param's "
-        self.check_and_change_lower(self.id_type,
-                                    [consts.PHONE, consts.IMEI],
-                                    descr)
-        self.check_and_change_lower(self.encrypt_type,
-                                    [consts.MD5, consts.SHA256],
-                                    descr)
+        self.id_type = self.check_and_change_lower(self.id_type,
+                                                   [consts.PHONE, consts.IMEI],
+                                                   descr)
+        self.encrypt_type = self.check_and_change_lower(self.encrypt_type,
+                                                        [consts.MD5, consts.SHA256],
+                                                        descr)
+
+
+class IntersectFilterParam(BaseParam):
+    """
+    Define the bloom filter exchange for intersect method
+
+    Parameters
+    ----------
+    use_filter: bool, if True, the party sending its full id table (host in rsa, the other role of join_role in raw)
+        sends a bloom filter of ids instead; the receiving party tests its ids locally and only candidate ids are
+        exchanged for exact verification. Effective for raw method and rsa method without split_calculation, default False.
+        Filter owner learns candidate ids, namely the intersection plus about false_positive_rate of the other party's
+        non-intersecting ids, so it requires sync_intersect_ids to be True. In rsa method, filter is always owned
+        by host, since only host could compute signatures of its ids; in raw method, by the other role of join_role.
+
+    false_positive_rate: float in (0, 1), false positive rate of bloom filter, lower rate needs larger filter
+        but less candidate ids to verify, default 0.001
+
+    """
+
+    def __init__(self, use_filter=False, false_positive_rate=0.001):
+        super().__init__()
+        self.use_filter = use_filter
+        self.false_positive_rate = false_positive_rate
+
+    def check(self):
+        descr = "intersect filter param's "
+        self.check_boolean(self.use_filter, descr + "use_filter")
+        if type(self.false_positive_rate).__name__ not in ["float", "int"] or \
+                not 0 < self.false_positive_rate < 1:
+            raise ValueError(descr + "false_positive_rate {} not supported, should be float in (0, 1)".format(
+                self.false_positive_rate))
+        LOGGER.debug("Finish IntersectFilterParam check!")
+        return True
 
 
 class IntersectParam(BaseParam):
@@ -174,6 +223,10 @@ class IntersectParam(BaseParam):
 
     rsa_params: RSAParam, effective for rsa method only
 
+    filter_params: IntersectFilterParam, bloom filter exchange of ids
+
+    intersect_cache_param: IntersectCache, effective for rsa method only
+
     only_output_key: bool, if false, the results of intersection will include key and value which from input data; if true, it will just include key from input
                      data and the value will be empty or some useless character like "intersect_id"
 
@@ -189,7 +242,7 @@ class IntersectParam(BaseParam):
                  with_encode=False, only_output_key=False, encode_params=EncodeParam(),
                  rsa_params=RSAParam(),
                  intersect_cache_param=IntersectCache(), repeated_id_process=False, repeated_id_owner=consts.GUEST,
-                 with_sample_id=False,
+                 with_sample_id=False, filter_params=IntersectFilterParam(),
                  allow_info_share: bool = False, info_owner=consts.GUEST):
         super().__init__()
         self.intersect_method = intersect_method
@@ -206,6 +259,7 @@ class IntersectParam(BaseParam):
         self.allow_info_share = allow_info_share
         self.info_owner = info_owner
         self.with_sample_id = with_sample_id
+        self.filter_params = copy.deepcopy(filter_params)
 
     def check(self):
         descr = "intersect param's "
@@ -260,5 +314,14 @@ class IntersectParam(BaseParam):
 
         self.encode_params.check()
         self.rsa_params.check()
+        self.filter_params.check()
+        if self.filter_params.use_filter and self.intersect_method == consts.RSA and self.rsa_params.split_calculation:
+            raise ValueError("intersect filter is not supported with split_calculation")
+        if self.filter_params.use_filter and not self.sync_intersect_ids:
+            raise ValueError("intersect filter reveals intersect ids to filter owner, "
+                             "it's supported only when sync_intersect_ids is True")
+        self.intersect_cache_param.check()
+        if self.intersect_cache_param.use_cache and self.rsa_params.split_calculation:
+            raise ValueError("intersect cache is not supported with split_calculation")
         LOGGER.debug("Finish intersect parameter check!")
         return True
@@ -29,6 +29,7 @@ class PearsonParam(BaseParam):
         need_run=True,
         use_mix_rand=False,
         calc_local_vif=True,
+        cross_tile_size=512,
     ):
         super().__init__()
         self.column_names = column_names
@@ -41,12 +42,17 @@ class PearsonParam(BaseParam):
         if column_indexes is None:
             self.column_indexes = []
         self.calc_local_vif = calc_local_vif
+        self.cross_tile_size = cross_tile_size
 
     def check(self):
         if not isinstance(self.use_mix_rand, bool):
             raise ValueError(
                 f"use_mix_rand accept bool type only, {type(self.use_mix_rand)} got"
             )
+        if not isinstance(self.cross_tile_size, int) or self.cross_tile_size <= 0:
+            raise ValueError(
+                f"cross_tile_size accept positive int only, {self.cross_tile_size} got"
+            )
         if self.cross_parties and (not self.need_run):
             raise ValueError(
                 f"need_run should be True(which is default) when cross_parties is True."
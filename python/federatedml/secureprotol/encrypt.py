@@ -16,6 +16,7 @@
 
 import functools
 import hashlib
+import secrets
 from collections import Iterable
 
 import numpy as np
@@ -26,7 +27,7 @@ from federatedml.secureprotol import gmpy_math
 from federatedml.secureprotol.affine import AffineCipher
 from federatedml.secureprotol.fate_paillier import PaillierKeypair
 from federatedml.secureprotol.iterative_affine import IterativeAffineCipher
-from federatedml.secureprotol.random import RandomPads
+from federatedml.secureprotol.random import RandomPads, CounterRandomPads, add_rand_pads_inplace, rand_pads_sum
 
 _TORCH_VALID = False
 try:
@@ -108,6 +109,7 @@ class RsaEncrypt(Encrypt):
         self.e = None
         self.d = None
         self.n = None
+        self.crt_key = None
 
     def generate_key(self, rsa_bit=1024):
         random_generator = Random.new().read
@@ -115,10 +117,14 @@ class RsaEncrypt(Encrypt):
         self.e = rsa.e
         self.d = rsa.d
         self.n = rsa.n
+        self.crt_key = gmpy_math.crt_key(rsa.d, rsa.p, rsa.q)
 
     def get_key_pair(self):
         return self.e, self.d, self.n
 
+    def get_crt_key(self):
+        return self.crt_key
+
     def set_public_key(self, public_key):
         self.e = public_key["e"]
         self.n = public_key["n"]
@@ -129,6 +135,7 @@ class RsaEncrypt(Encrypt):
     def set_privacy_key(self, privacy_key):
         self.d = privacy_key["d"]
         self.n = privacy_key["n"]
+        self.crt_key = None
 
     def get_privacy_key(self):
         return self.d, self.n
@@ -140,6 +147,8 @@ class RsaEncrypt(Encrypt):
             return None
 
     def decrypt(self, value):
+        if self.crt_key is not None:
+            return gmpy_math.powmod_crt(value, self.crt_key)
         if self.d is not None and self.n is not None:
             return gmpy_math.powmod(value, self.d, self.n)
         else:
@@ -224,6 +233,8 @@ class PadsCipher(Encrypt):
         super().__init__()
         self._uuid = None
         self._rands = None
+        self._counter = None
+        self._self_seed = None
         self._amplify_factor = 1
 
     def set_self_uuid(self, uuid):
@@ -242,69 +253,98 @@ class PadsCipher(Encrypt):
             if uid != self._uuid
         }
 
+    @property
+    def uuid(self):
+        return self._uuid
+
+    def set_rand_counter(self, counter, self_mask=False):
+        """
+        derive pads from counter-based generators keyed by exchanged seeds,
+        so that pads of a given counter can be regenerated later, for example to cancel masks of absent peers.
+
+        if `self_mask`, also add a pad drawn from a fresh private seed which is never exchanged,
+        so that a masked value stays hidden even if all pads shared with peers are revealed,
+        it's removed by `pads_with(..., with_self_mask=True)` only when the value is to be summed.
+        """
+        self._counter = counter
+        self._self_seed = secrets.randbits(128) if self_mask else None
+        self._rands = self._counter_rands()
+
+    def _counter_rands(self):
+        rands = {uid: CounterRandomPads(key=seed, counter=self._counter) for uid, seed in self._seeds.items()}
+        if self._self_seed is not None:
+            rands[self._uuid] = CounterRandomPads(key=self._self_seed, counter=self._counter)
+        return rands
+
+    def pads_with(self, uids, with_self_mask=False):
+        """
+        cipher adding only pads shared with peers in `uids`, and self mask if `with_self_mask`,
+        regenerated from counter set by `set_rand_counter`
+        """
+        cipher = PadsCipher()
+        cipher.set_self_uuid(self._uuid)
+        cipher.set_amplify_factor(self._amplify_factor)
+        cipher._seeds = {uid: seed for uid, seed in self._seeds.items() if uid in uids}
+        cipher._counter = self._counter
+        cipher._self_seed = self._self_seed if with_self_mask else None
+        cipher._rands = cipher._counter_rands()
+        return cipher
+
+    def _signs(self, uids):
+        return [1.0 if uid > self._uuid else -1.0 for uid in uids]
+
+    def _pads_inplace(self, arr, rands):
+        return add_rand_pads_inplace(arr, list(rands.values()), self._signs(rands.keys()), self._amplify_factor)
+
     def encrypt(self, value):
         if isinstance(value, np.ndarray):
-            ret = value
-            for uid, rand in self._rands.items():
-                if uid > self._uuid:
-                    ret = rand.add_rand_pads(ret, 1.0 * self._amplify_factor)
-                else:
-                    ret = rand.add_rand_pads(ret, -1.0 * self._amplify_factor)
-            return ret
+            return self._pads_inplace(np.array(value, dtype=np.float64, order="C"), self._rands)
 
         if _TORCH_VALID and isinstance(value, torch.Tensor):
-            ret = value.numpy()
-            for uid, rand in self._rands.items():
-                if uid > self._uuid:
-                    ret = rand.add_rand_pads(ret, 1.0 * self._amplify_factor)
-                else:
-                    ret = rand.add_rand_pads(ret, -1.0 * self._amplify_factor)
-            return torch.Tensor(ret)
-
-        ret = value
-        for uid, rand in self._rands.items():
-            if uid > self._uuid:
-                ret += rand.rand(1)[0] * self._amplify_factor
-            else:
-                ret -= rand.rand(1)[0] * self._amplify_factor
-        return ret
+            ret = value.detach().clone()
+            if not ret.is_contiguous():
+                ret = ret.contiguous()
+            self._pads_inplace(ret.numpy(), self._rands)
+            return ret
+
+        return value + rand_pads_sum(self._rands.values(), self._signs(self._rands.keys()), self._amplify_factor)
+
+    def encrypt_inplace(self, value):
+        """
+        add pads to float ndarray or cpu torch.Tensor in place, no intermediate copy is made.
+        falls back to `encrypt` for values can't be modified in place, such as python scalars.
+        """
+        if isinstance(value, np.ndarray) and value.flags.c_contiguous:
+            return self._pads_inplace(value, self._rands)
+
+        if _TORCH_VALID and isinstance(value, torch.Tensor) and value.is_contiguous():
+            self._pads_inplace(value.detach().numpy(), self._rands)
+            return value
+
+        return self.encrypt(value)
 
     def encrypt_table(self, table):
-        def _pad(key, value, seeds, amplify_factor):
+        def _pad(key, value, seeds, signs, amplify_factor):
             has_key = int(hashlib.md5(f"{key}".encode("ascii")).hexdigest(), 16)
-            # LOGGER.debug(f"hash_key: {has_key}")
-            cur_seeds = {uid: has_key + seed for uid, seed in seeds.items()}
-            # LOGGER.debug(f"cur_seeds: {cur_seeds}")
-            rands = {uid: RandomPads(v & 0xFFFFFFFF) for uid, v in cur_seeds.items()}
+            # per row pads: counter-based generators keyed by exchanged seeds, row hash as counter
+            rands = [CounterRandomPads(key=seed, counter=has_key) for seed in seeds]
 
             if isinstance(value, np.ndarray):
-                ret = value
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret = rand.add_rand_pads(ret, 1.0 * amplify_factor)
-                    else:
-                        ret = rand.add_rand_pads(ret, -1.0 * amplify_factor)
-                return key, ret
+                ret = np.array(value, dtype=np.float64, order="C")
+                return key, add_rand_pads_inplace(ret, rands, signs, amplify_factor)
             elif isinstance(value, Instance):
-                ret = value.features
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret = rand.add_rand_pads(ret, 1.0 * amplify_factor)
-                    else:
-                        ret = rand.add_rand_pads(ret, -1.0 * amplify_factor)
-                value.features = ret
+                ret = np.array(value.features, dtype=np.float64, order="C")
+                value.features = add_rand_pads_inplace(ret, rands, signs, amplify_factor)
                 return key, value
             else:
-                ret = value
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret += rand.rand(1)[0] * self._amplify_factor
-                    else:
-                        ret -= rand.rand(1)[0] * self._amplify_factor
-                return key, ret
+                return key, value + rand_pads_sum(rands, signs, amplify_factor)
 
+        uids = list(self._seeds.keys())
         f = functools.partial(
-            _pad, seeds=self._seeds, amplify_factor=self._amplify_factor
+            _pad,
+            seeds=[self._seeds[uid] for uid in uids],
+            signs=self._signs(uids),
+            amplify_factor=self._amplify_factor,
         )
         return table.map(f)
 
@@ -102,4 +102,37 @@ class EncryptModeCalculator(object):
             new_data = input_data.join(self.enc_zeros, self.add_enc_zero)
             return new_data
 
+    def encrypt_row_blocks(self, input_data):
+        """
+        Encrypt DTable whose values are blocks of rows, confusion of non-strict modes is shared
+        among elements of one row only, the same as encrypting the rows one by one
+
+        Parameters
+        ----------
+        input_data: DTable, values are ndarray of shape (rows, ...)
+
+        Returns
+        -------
+        new_data: DTable, encrypted result of input_data
+
+        """
+        if self.mode == "strict":
+            return input_data.mapValues(self.encrypter.recursive_encrypt)
+
+        encrypter = self.encrypter
+
+        def _gen_row_enc_zeros(block):
+            return np.array([encrypter.encrypt(0) for _ in range(len(block))]).reshape(
+                [len(block)] + [1] * (np.ndim(block) - 1))
+
+        def _add_row_enc_zeros(block, enc_zeros):
+            if len(enc_zeros) != len(block):
+                enc_zeros = _gen_row_enc_zeros(block)
+            return block + enc_zeros
+
+        if self.enc_zeros is None or (
+                self.mode == "balance" and self.should_re_encrypted()) \
+                or self.enc_zeros.count() != input_data.count():
+            self.enc_zeros = input_data.mapValues(_gen_row_enc_zeros)
 
+        return input_data.join(self.enc_zeros, _add_row_enc_zeros)
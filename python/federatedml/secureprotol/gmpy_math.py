@@ -35,6 +35,25 @@ def powmod(a, b, c):
         return int(gmpy2.powmod(a, b, c))
 
 
+def powmod_crt(a, crt_key):
+    """
+    return int: (a ** d) % (p * q), computed with two half size powmods by chinese remainder theorem,
+    crt_key is (d % (p - 1), d % (q - 1), p, q, q ** -1 % p)
+    """
+    d_p, d_q, p, q, q_inv = crt_key
+    m_p = powmod(a % p, d_p, p)
+    m_q = powmod(a % q, d_q, q)
+    h = q_inv * (m_p - m_q) % p
+    return m_q + h * q
+
+
+def crt_key(d, p, q):
+    """
+    return tuple: private key parameters used by `powmod_crt`
+    """
+    return d % (p - 1), d % (q - 1), p, q, invert(q, p)
+
+
 def invert(a, b):
     """return int: x, where a * x == 1 mod b
     """    
@@ -14,7 +14,10 @@
 #  limitations under the License.
 #
 
-from numpy.random import RandomState
+import numpy as np
+from numpy.random import Generator, Philox, RandomState
+
+DEFAULT_PADS_CHUNK_SIZE = 1 << 16
 
 
 class RandomPads(object):
@@ -25,6 +28,13 @@ class RandomPads(object):
 
     def __init__(self, init_seed=None):
         self._rand = RandomState(init_seed)
+        # shares bit generator with self._rand, uniform doubles drawn by either one follow the same stream
+        self._generator = Generator(self._rand._bit_generator)
+
+    def fill_rand(self, out):
+        """fill float64 array `out` with uniform U[0,1) samples, without allocating"""
+        self._generator.random(out=out)
+        return out
 
     def rand(self, d0, *more, **kwargs):
         return self._rand.rand(d0, *more, **kwargs)
@@ -43,3 +53,72 @@ class RandomPads(object):
         where r is random array with uniform distribution U[0,1) and r.shape == a.shape
         """
         return a + self._rand.rand(*a.shape) * w
+
+
+class CounterRandomPads(object):
+    """random pads backed by counter-based bit generator Philox,
+    cheap to construct, suitable for deriving independent pads per row from (seed, counter) pairs
+    """
+
+    def __init__(self, key, counter=0):
+        self._generator = Generator(Philox(key=key, counter=counter))
+
+    def fill_rand(self, out):
+        self._generator.random(out=out)
+        return out
+
+    def rand(self, d0, *more, **kwargs):
+        return self._generator.random((d0, *more), **kwargs)
+
+    def randn(self, d0, *more, **kwargs):
+        return self._generator.standard_normal((d0, *more), **kwargs)
+
+    def add_randn_pads(self, a, w):
+        return a + self._generator.standard_normal(a.shape) * w
+
+    def add_rand_pads(self, a, w):
+        return a + self._generator.random(a.shape) * w
+
+
+def add_rand_pads_inplace(a, rands, signs, amplify_factor=1.0, chunk_size=DEFAULT_PADS_CHUNK_SIZE):
+    """a += amplify_factor * sum_i(signs[i] * r_i), in place and chunk-wise,
+    where r_i is the uniform U[0,1) stream of rands[i].
+
+    pads of all peers are accumulated into one preallocated buffer of at most `chunk_size` elements,
+    so memory overhead is independent of both size of `a` and number of peers.
+    `a` should be a writeable c-contiguous numpy array, float32 arrays are supported.
+
+    Returns:
+        a
+    """
+    if not a.flags.c_contiguous or not a.flags.writeable:
+        raise ValueError("in-place padding requires a writeable c-contiguous array")
+    flat = a.reshape(-1)
+    size = flat.size
+    if size == 0 or len(rands) == 0:
+        return a
+    chunk_size = min(chunk_size, size)
+    acc = np.empty(chunk_size, dtype=np.float64)
+    buf = np.empty(chunk_size, dtype=np.float64)
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size)
+        acc_view, buf_view = acc[:end - start], buf[:end - start]
+        acc_view.fill(0.0)
+        for rand, sign in zip(rands, signs):
+            rand.fill_rand(buf_view)
+            if sign > 0:
+                acc_view += buf_view
+            else:
+                acc_view -= buf_view
+        if amplify_factor != 1:
+            acc_view *= amplify_factor
+        flat[start:end] += acc_view
+    return a
+
+
+def rand_pads_sum(rands, signs, amplify_factor=1.0):
+    """scalar version of `add_rand_pads_inplace`, amplify_factor * sum_i(signs[i] * r_i)"""
+    ret = 0.0
+    for rand, sign in zip(rands, signs):
+        ret += sign * rand.rand(1)[0]
+    return ret * amplify_factor
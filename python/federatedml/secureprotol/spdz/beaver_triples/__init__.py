@@ -15,3 +15,4 @@
 #
 
 from federatedml.secureprotol.spdz.beaver_triples.he import beaver_triplets
+from federatedml.secureprotol.spdz.beaver_triples.triple_store import BeaverTripleStore
@@ -16,16 +16,28 @@
 import numpy as np
 
 from fate_arch.session import is_table
+from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
 from federatedml.secureprotol.spdz.communicator import Communicator
+from federatedml.secureprotol.spdz.utils.modular_utils import to_field
 from federatedml.secureprotol.spdz.utils.random_utils import rand_tensor, urand_tensor
 
 
+def _encrypt_array(arr, public_key, encrypted_zero):
+    if arr.dtype.kind not in "iu" or (arr < 0).any():
+        return np.vectorize(lambda e: encrypted_zero + e)(arr)
+
+    # E(0) + e == E(0) * (1 + n * e) mod n^2, computed for whole array at once
+    zero_ciphertext = encrypted_zero.ciphertext(be_secure=False)
+    ciphertexts = (arr.astype(object) * public_key.n + 1) * zero_ciphertext % public_key.nsquare
+    return np.vectorize(lambda c: PaillierEncryptedNumber(public_key, int(c), 0), otypes=[object])(ciphertexts)
+
+
 def encrypt_tensor(tensor, public_key):
     encrypted_zero = public_key.encrypt(0)
     if isinstance(tensor, np.ndarray):
-        return np.vectorize(lambda e: encrypted_zero + e)(tensor)
+        return _encrypt_array(tensor, public_key, encrypted_zero)
     elif is_table(tensor):
-        return tensor.mapValues(lambda x: np.vectorize(lambda e: encrypted_zero + e)(x))
+        return tensor.mapValues(lambda x: _encrypt_array(x, public_key, encrypted_zero))
     else:
         raise NotImplementedError(f"type={type(tensor)}")
 
@@ -58,10 +70,10 @@ def beaver_triplets(a_tensor, b_tensor, dot, q_field, he_key_pair, communicator:
                                                    tag=f"{name}_cross_a_{other_index}_b_{self_index}")
         crosses = communicator.get_encrypted_cross_tensors(tag=f"{name}_cross_a_{self_index}_b_{other_index}")
         for eab in crosses:
-            _c += decrypt_tensor(eab, private_key, [object])
+            _c = _c + decrypt_tensor(eab, private_key, [object])
 
         return _c
 
     c = _cross(communicator.party_idx, 1 - communicator.party_idx)
 
-    return a, b, c % q_field
+    return a, b, to_field(c, q_field)
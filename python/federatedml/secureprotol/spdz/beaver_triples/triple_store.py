@@ -0,0 +1,76 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import threading
+from concurrent import futures
+
+from federatedml.util import LOGGER
+
+
+class BeaverTripleStore(object):
+    """
+    local store of precomputed beaver triples, keyed by name of the multiplication they are generated for.
+
+    a triple is either stored directly or as a future of an offline generation, and is consumed exactly once:
+    reusing a triple for two multiplications reveals the difference of their operands.
+    """
+
+    def __init__(self):
+        self._triples = {}
+        self._lock = threading.Lock()
+        self._num_generated = 0
+        self._num_consumed = 0
+
+    def put(self, name, triple):
+        with self._lock:
+            if name in self._triples:
+                raise ValueError(f"beaver triple of {name} already exists")
+            self._triples[name] = triple
+            self._num_generated += 1
+
+    def take(self, name):
+        """
+        pop triple of name, wait for its generation if pending, return None if never precomputed
+        """
+        with self._lock:
+            triple = self._triples.pop(name, None)
+            if triple is None:
+                return None
+            self._num_consumed += 1
+        if isinstance(triple, futures.Future):
+            triple = triple.result()
+        LOGGER.debug(f"consume precomputed beaver triple of {name}")
+        return triple
+
+    def __contains__(self, name):
+        return name in self._triples
+
+    def __len__(self):
+        return len(self._triples)
+
+    @property
+    def num_generated(self):
+        return self._num_generated
+
+    @property
+    def num_consumed(self):
+        return self._num_consumed
+
+    def clean(self):
+        with self._lock:
+            pending = list(self._triples.keys())
+            self._triples.clear()
+        if pending:
+            LOGGER.warning(f"drop unconsumed beaver triples: {pending}")
@@ -15,6 +15,7 @@
 #
 
 from federatedml.secureprotol.fate_paillier import PaillierKeypair
+from federatedml.secureprotol.spdz.beaver_triples import BeaverTripleStore
 from federatedml.secureprotol.spdz.communicator import Communicator
 from federatedml.secureprotol.spdz.utils import NamingService
 from federatedml.secureprotol.spdz.utils import naming
@@ -52,12 +53,15 @@ class SPDZ(object):
         self.q_field = q_field
         self.use_mix_rand = use_mix_rand
 
+        self.triple_store = BeaverTripleStore()
+
     def __enter__(self):
         self._prev_name_service = NamingService.set_instance(self.name_service)
         self._pre_instance = self.set_instance(self)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.triple_store.clean()
         NamingService.set_instance(self._pre_instance)
         # self.communicator.clean()
 
@@ -71,3 +75,17 @@ class SPDZ(object):
     @classmethod
     def dot(cls, left, right, target_name=None):
         return left.dot(right, target_name)
+
+    def precompute_triples(self, left, right, target_name, einsum_expr=None):
+        """
+        offline phase of multiplication named target_name: beaver triple of left.dot(right, target_name)
+        (or left.einsum(right, einsum_expr, target_name)) is generated now and stored,
+        so that the multiplication only opens masked operands.
+
+        generation communicates through the same transfer variables as online multiplications, so it runs on
+        caller's thread: all parties should precompute triples of same names in same order, at the same point of
+        the protocol. Local work could be overlapped by running it on another thread meanwhile.
+        """
+        triple = left.generate_triple(right, target_name, einsum_expr)
+        self.triple_store.put(target_name, triple)
+        return triple
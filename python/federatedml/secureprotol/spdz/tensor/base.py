@@ -33,3 +33,16 @@ class TensorBase(object):
     @abc.abstractmethod
     def dot(self, other, target_name=None):
         pass
+
+    @abc.abstractmethod
+    def generate_triple(self, other, target_name, einsum_expr=None):
+        pass
+
+    def get_triple(self, other, target_name, einsum_expr=None):
+        """
+        beaver triple for multiplication target_name, precomputed one if exists, otherwise generated inline
+        """
+        triple = self.get_spdz().triple_store.take(target_name)
+        if triple is None:
+            triple = self.generate_triple(other, target_name, einsum_expr)
+        return triple
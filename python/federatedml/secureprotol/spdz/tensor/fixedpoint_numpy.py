@@ -19,6 +19,7 @@ from fate_arch.common import Party
 from fate_arch.session import is_table
 from federatedml.secureprotol.spdz.beaver_triples import beaver_triplets
 from federatedml.secureprotol.spdz.tensor.base import TensorBase
+from federatedml.secureprotol.spdz.utils.modular_utils import mod_einsum, mod_mul
 from federatedml.secureprotol.spdz.utils.random_utils import urand_tensor
 
 
@@ -123,16 +124,29 @@ class FixedPointTensor(TensorBase):
             raise ValueError(f"type={type(source)}")
         return FixedPointTensor(share, spdz.q_field, encoder, tensor_name)
 
+    def _einsum_func(self, einsum_expr):
+        def _dot_func(_x, _y):
+            if _x.dtype == object or _y.dtype == object:
+                return np.einsum(einsum_expr, _x, _y, optimize=True)
+            return mod_einsum(einsum_expr, _x, _y, self.q_field)
+
+        return _dot_func
+
+    def generate_triple(self, other, target_name, einsum_expr=None):
+        spdz = self.get_spdz()
+        return beaver_triplets(a_tensor=self.value, b_tensor=other.value,
+                               dot=self._einsum_func(einsum_expr or "ij,ik->jk"),
+                               q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
+                               communicator=spdz.communicator, name=target_name)
+
     def einsum(self, other: 'FixedPointTensor', einsum_expr, target_name=None):
         spdz = self.get_spdz()
         target_name = target_name or spdz.name_service.next()
+        _dot_func = self._einsum_func(einsum_expr)
 
-        def _dot_func(_x, _y):
-            return np.einsum(einsum_expr, _x, _y, optimize=True)
-
-        a, b, c = beaver_triplets(a_tensor=self.value, b_tensor=other.value, dot=_dot_func,
-                                  q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
-                                  communicator=spdz.communicator, name=target_name)
+        a, b, c = self.get_triple(other, target_name, einsum_expr)
+        if a.shape != self.value.shape or b.shape != other.value.shape:
+            raise ValueError(f"precomputed beaver triple of {target_name} doesn't match shapes of operands")
 
         x_add_a = self._raw_add(a).rescontruct(f"{target_name}_confuse_x")
         y_add_b = other._raw_add(b).rescontruct(f"{target_name}_confuse_y")
@@ -208,12 +222,12 @@ class FixedPointTensor(TensorBase):
     def __mul__(self, other):
         if not isinstance(other, (int, np.integer)):
             raise NotImplementedError("__mul__ support integer only")
-        return self._boxed(self.value * other)
+        return self._boxed(mod_mul(self.value, other, self.q_field))
 
     def __rmul__(self, other):
         if not isinstance(other, (int, np.integer)):
             raise NotImplementedError("__rmul__ support integer only")
-        return self._boxed(self.value * other)
+        return self._boxed(mod_mul(self.value, other, self.q_field))
 
     def __matmul__(self, other):
         return self.einsum(other, "ij,jk->ik")
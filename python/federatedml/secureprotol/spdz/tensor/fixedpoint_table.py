@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import functools
 import operator
 
 import numpy as np
@@ -23,6 +24,7 @@ from federatedml.secureprotol.spdz.beaver_triples import beaver_triplets
 from federatedml.secureprotol.spdz.tensor.base import TensorBase
 from federatedml.secureprotol.spdz.tensor import fixedpoint_numpy
 from federatedml.secureprotol.spdz.utils import NamingService
+from federatedml.secureprotol.spdz.utils.modular_utils import mod_einsum, mod_mul
 from federatedml.secureprotol.spdz.utils.random_utils import urand_tensor
 
 
@@ -34,36 +36,48 @@ def _table_scalar_op(x, d, op):
     return x.mapValues(lambda a: op(a, d))
 
 
-def _table_dot_mod_func(it, q_field):
-    ret = None
-    for _, (x, y) in it:
-        if ret is None:
-            ret = np.tensordot(x, y, [[], []]) % q_field
-        else:
-            ret = (ret + np.tensordot(x, y, [[], []])) % q_field
-    return ret
+def _is_fixed_width(arr):
+    return arr.dtype.kind in "iu"
 
 
-def _table_dot_func(it):
-    ret = None
+def _table_dot_func(it, q_field=None):
+    """
+    rows of a partition are stacked into matrices, so that partition's contribution to x^T y
+    is one matrix product instead of one outer product per row
+    """
+    xs, ys = [], []
     for _, (x, y) in it:
-        if ret is None:
-            ret = np.tensordot(x, y, [[], []])
-        else:
-            ret += np.tensordot(x, y, [[], []])
-    return ret
-
-
-def table_dot(a_table, b_table):
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return None
+    x_block, y_block = np.stack(xs), np.stack(ys)
+    if q_field is not None and _is_fixed_width(x_block) and _is_fixed_width(y_block):
+        return mod_einsum("ij,ik->jk", x_block, y_block, q_field)
+    return np.dot(x_block.T, y_block)
+
+
+def _reduce_dot(x, y, q_field=None):
+    if x is None:
+        return y
+    if y is None:
+        return x
+    if q_field is not None and _is_fixed_width(x) and _is_fixed_width(y):
+        return (x + y) % q_field
+    return x + y
+
+
+def table_dot(a_table, b_table, q_field=None):
+    """
+    x^T y of row-keyed tables, fixed-width integer blocks are reduced modulo q_field if given
+    """
     return a_table.join(b_table, lambda x, y: [x, y]) \
-        .applyPartitions(lambda it: _table_dot_func(it)) \
-        .reduce(lambda x, y: x + y)
+        .applyPartitions(functools.partial(_table_dot_func, q_field=q_field)) \
+        .reduce(functools.partial(_reduce_dot, q_field=q_field))
 
 
 def table_dot_mod(a_table, b_table, q_field):
-    return a_table.join(b_table, lambda x, y: [x, y]) \
-        .applyPartitions(lambda it: _table_dot_mod_func(it, q_field)) \
-        .reduce(lambda x, y: x if y is None else y if x is None else x + y)
+    return table_dot(a_table, b_table, q_field) % q_field
 
 
 class FixedPointTensor(TensorBase):
@@ -78,14 +92,19 @@ class FixedPointTensor(TensorBase):
         self.endec = endec
         self.tensor_name = NamingService.get_instance().next() if tensor_name is None else tensor_name
 
+    def generate_triple(self, other, target_name, einsum_expr=None):
+        spdz = self.get_spdz()
+        return beaver_triplets(a_tensor=self.value, b_tensor=other.value,
+                               dot=functools.partial(table_dot, q_field=self.q_field),
+                               q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
+                               communicator=spdz.communicator, name=target_name)
+
     def dot(self, other: 'FixedPointTensor', target_name=None):
         spdz = self.get_spdz()
         if target_name is None:
             target_name = NamingService.get_instance().next()
 
-        a, b, c = beaver_triplets(a_tensor=self.value, b_tensor=other.value, dot=table_dot,
-                                  q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
-                                  communicator=spdz.communicator, name=target_name)
+        a, b, c = self.get_triple(other, target_name)
 
         x_add_a = (self + a).rescontruct(f"{target_name}_confuse_x")
         y_add_b = (other + b).rescontruct(f"{target_name}_confuse_y")
@@ -165,7 +184,7 @@ class FixedPointTensor(TensorBase):
     def __mul__(self, other):
         if not isinstance(other, (int, np.integer)):
             raise NotImplementedError("__mul__ support integer only")
-        return self._boxed(_table_scalar_op(self.value, other, operator.mul))
+        return self._boxed(_table_scalar_op(self.value, other, functools.partial(mod_mul, q_field=self.q_field)))
 
     def __mod__(self, other):
         if not isinstance(other, (int, np.integer)):
@@ -0,0 +1,75 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from federatedml.secureprotol.spdz.utils import random_utils
+from federatedml.secureprotol.spdz.utils.modular_utils import field_dtype, mod_einsum, mod_mul
+
+Q_FIELDS = [2 << 60, (1 << 61) - 1, 1 << 62, 1000003]
+
+
+class TestModularUtils(unittest.TestCase):
+
+    @staticmethod
+    def _rand(q_field, shape):
+        return np.random.randint(0, q_field, shape, dtype=np.int64)
+
+    def test_field_dtype(self):
+        self.assertEqual(field_dtype(2 << 60), np.int64)
+        self.assertEqual(field_dtype(1 << 100), object)
+
+    def test_mod_einsum(self):
+        for q_field in Q_FIELDS:
+            for shapes, expr in [(((50, 7), (50, 9)), "ij,ik->jk"),
+                                 (((5, 7), (7, 9)), "ij,jk->ik"),
+                                 (((50, 7), (50, 7)), "ij,ij->j")]:
+                x, y = self._rand(q_field, shapes[0]), self._rand(q_field, shapes[1])
+                expect = np.einsum(expr, x.astype(object), y.astype(object)) % q_field
+                ret = mod_einsum(expr, x, y, q_field)
+                self.assertEqual(ret.dtype, np.int64)
+                self.assertTrue((ret.astype(object) == expect).all())
+
+    def test_mod_mul(self):
+        for q_field in Q_FIELDS:
+            x, y = self._rand(q_field, (10, 15)), self._rand(q_field, (10, 15))
+            self.assertTrue((mod_mul(x, y, q_field).astype(object) ==
+                             x.astype(object) * y.astype(object) % q_field).all())
+            self.assertTrue((mod_mul(x, 123456789123, q_field).astype(object) ==
+                             x.astype(object) * 123456789123 % q_field).all())
+
+    def test_object_field(self):
+        q_field = 1 << 100
+        x = np.array([[1 << 90, 3], [5, 7]], dtype=object)
+        self.assertTrue((mod_einsum("ij,jk->ik", x, x, q_field) == np.dot(x, x) % q_field).all())
+
+    def test_urand_array(self):
+        for q_field in Q_FIELDS:
+            arr = random_utils._urand_array(q_field, (100, 3))
+            self.assertEqual(arr.shape, (100, 3))
+            self.assertTrue(((arr >= 1) & (arr < q_field)).all())
+
+    def test_urand_rejection(self):
+        # 2^64 mod 3 = 1, so the largest word 2^64 - 1 is rejected and drawn again
+        words = [np.array([(1 << 64) - 1, 4], dtype=np.uint64), np.array([5], dtype=np.uint64)]
+        with mock.patch.object(random_utils.os, "urandom", side_effect=[w.tobytes() for w in words]):
+            self.assertListEqual(random_utils._urand_uint64(3, 2).tolist(), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
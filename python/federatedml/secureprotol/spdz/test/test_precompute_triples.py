@@ -0,0 +1,175 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import copy
+import queue
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from fate_arch.common import Party
+from federatedml.secureprotol.spdz import SPDZ
+from federatedml.secureprotol.spdz.tensor.fixedpoint_numpy import FixedPointTensor
+from federatedml.secureprotol.spdz.utils import NamingService
+
+EPS = 0.001
+PARTIES = [Party("guest", 9999), Party("host", 10000)]
+
+
+class _Network(object):
+    """
+    in-memory channels between two parties, keyed by sender, receiver, kind and tag,
+    objects are copied as if serialized, since receivers update shares in place
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}
+        self.senders = []
+
+    def _queue(self, key):
+        with self._lock:
+            return self._queues.setdefault(key, queue.Queue())
+
+    def send(self, src, dst, kind, tag, obj):
+        self.senders.append((src, threading.current_thread().name))
+        self._queue((src, dst, kind, tag)).put(copy.deepcopy(obj))
+
+    def recv(self, src, dst, kind, tag):
+        return self._queue((src, dst, kind, tag)).get(timeout=60)
+
+
+class _Communicator(object):
+    def __init__(self, network, party_idx):
+        self._network = network
+        self.party = PARTIES[party_idx]
+        self.parties = PARTIES
+        self.party_idx = party_idx
+        self.other_parties = [PARTIES[1 - party_idx]]
+
+    def _send(self, kind, tag, obj, parties=None):
+        for party in parties or self.other_parties:
+            self._network.send(self.party_idx, PARTIES.index(party), kind, tag, obj)
+
+    def _recv(self, kind, tag):
+        return [self._network.recv(PARTIES.index(party), self.party_idx, kind, tag) for party in self.other_parties]
+
+    def remote_share(self, share, tensor_name, party):
+        self._send("share", tensor_name, share, [party])
+
+    def get_share(self, tensor_name, party):
+        return [self._network.recv(PARTIES.index(party), self.party_idx, "share", tensor_name)]
+
+    def broadcast_rescontruct_share(self, share, tensor_name):
+        self._send("rescontruct", tensor_name, share)
+
+    def get_rescontruct_shares(self, tensor_name):
+        return self._recv("rescontruct", tensor_name)
+
+    def remote_encrypted_tensor(self, encrypted, tag):
+        self._send("encrypted", tag, encrypted)
+
+    def get_encrypted_tensors(self, tag):
+        return self.other_parties, self._recv("encrypted", tag)
+
+    def remote_encrypted_cross_tensor(self, encrypted, parties, tag):
+        self._send("cross", tag, encrypted, parties)
+
+    def get_encrypted_cross_tensors(self, tag):
+        return self._recv("cross", tag)
+
+
+class TestPrecomputeTriples(unittest.TestCase):
+
+    def setUp(self):
+        self.network = _Network()
+        self.local = threading.local()
+        # each party thread holds its own spdz context, instead of the process-wide instance
+        self.patches = [mock.patch.object(SPDZ, "get_instance", side_effect=lambda: self.local.spdz),
+                        mock.patch.object(NamingService, "get_instance", return_value=NamingService("test"))]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def _create_spdz(self, idx):
+        with mock.patch("federatedml.secureprotol.spdz.spdz.Communicator",
+                        return_value=_Communicator(self.network, idx)):
+            return SPDZ()
+
+    def _run(self, func, data_list):
+        results, errors = [None, None], []
+
+        def _party(idx):
+            try:
+                self.local.spdz = self._create_spdz(idx)
+                with self.local.spdz as spdz:
+                    if idx == 0:
+                        x = FixedPointTensor.from_source("x", data_list[0])
+                        y = FixedPointTensor.from_source("y", PARTIES[1])
+                    else:
+                        x = FixedPointTensor.from_source("x", PARTIES[0])
+                        y = FixedPointTensor.from_source("y", data_list[1])
+                    results[idx] = func(spdz, x, y)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_party, args=(idx,), name=f"party_{idx}") for idx in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=300)
+            self.assertFalse(thread.is_alive(), "spdz parties hang")
+        if errors:
+            raise errors[0]
+        return results
+
+    def test_precomputed_einsum(self):
+        x = np.random.rand(10, 15)
+        y = np.random.rand(10, 20)
+        einsum_expr = "ij,ik->jk"
+
+        def _func(spdz, x_tensor, y_tensor):
+            spdz.precompute_triples(x_tensor, y_tensor, "z", einsum_expr)
+            self.assertIn("z", spdz.triple_store)
+            z = x_tensor.einsum(y_tensor, einsum_expr, "z").get("z_result")
+            return z, spdz.triple_store.num_consumed
+
+        for z, num_consumed in self._run(_func, [x, y]):
+            self.assertEqual(num_consumed, 1)
+            self.assertAlmostEqual(np.linalg.norm(np.einsum(einsum_expr, x, y) - z), 0, delta=10 * EPS)
+
+        # triples are generated on parties' own threads, which own their communicators
+        self.assertTrue(all(thread == f"party_{party}" for party, thread in self.network.senders))
+
+    def test_inline_triple(self):
+        x = np.random.rand(10, 15)
+        y = np.random.rand(10, 20)
+
+        def _func(spdz, x_tensor, y_tensor):
+            z = x_tensor.dot(y_tensor, "z").get("z_result")
+            return z, spdz.triple_store.num_consumed
+
+        for z, num_consumed in self._run(_func, [x, y]):
+            self.assertEqual(num_consumed, 0)
+            self.assertAlmostEqual(np.linalg.norm(x.T.dot(y) - z), 0, delta=10 * EPS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import unittest
+from concurrent import futures
+
+from federatedml.secureprotol.spdz.beaver_triples import BeaverTripleStore
+
+
+class TestBeaverTripleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = BeaverTripleStore()
+
+    def test_consume_once(self):
+        self.store.put("x", (1, 2, 3))
+        self.assertIn("x", self.store)
+        self.assertEqual(self.store.take("x"), (1, 2, 3))
+        self.assertIsNone(self.store.take("x"))
+        self.assertEqual(self.store.num_generated, 1)
+        self.assertEqual(self.store.num_consumed, 1)
+
+    def test_duplicated_name(self):
+        self.store.put("x", (1, 2, 3))
+        with self.assertRaises(ValueError):
+            self.store.put("x", (4, 5, 6))
+
+    def test_pending_generation(self):
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            self.store.put("x", executor.submit(lambda: (1, 2, 3)))
+            self.assertEqual(self.store.take("x"), (1, 2, 3))
+
+    def test_clean(self):
+        self.store.put("x", (1, 2, 3))
+        self.store.clean()
+        self.assertEqual(len(self.store), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
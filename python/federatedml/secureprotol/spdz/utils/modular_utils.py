@@ -0,0 +1,112 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import numpy as np
+
+# sum or difference of two field elements must not overflow int64
+_MAX_INT64_FIELD = 1 << 62
+
+# float64 represents integers below 2 ** 53 exactly
+_FLOAT_EXACT_BITS = 53
+
+
+def fits_int64(q_field):
+    return q_field <= _MAX_INT64_FIELD
+
+
+def field_dtype(q_field):
+    """
+    int64 if elements of field can be stored and added in int64, else object(python int)
+    """
+    return np.int64 if fits_int64(q_field) else object
+
+
+def to_field(arr, q_field):
+    """
+    reduce arr modulo q_field and cast to storage dtype of field
+    """
+    return (np.asarray(arr) % q_field).astype(field_dtype(q_field))
+
+
+def _is_fixed_width(arr):
+    return isinstance(arr, np.ndarray) and arr.dtype.kind in "iu"
+
+
+def _is_power_of_two(q_field):
+    return q_field & (q_field - 1) == 0
+
+
+def _contraction_size(einsum_expr, x, y):
+    """
+    number of products summed into each element of einsum result, bounded by operand size if unknown
+    """
+    if "->" not in einsum_expr or "." in einsum_expr:
+        return max(min(x.size, y.size), 1)
+    inputs, output = einsum_expr.replace(" ", "").split("->")
+    dims = {}
+    for subscripts, operand in zip(inputs.split(","), (x, y)):
+        dims.update(zip(subscripts, operand.shape))
+    size = 1
+    for label, dim in dims.items():
+        if label not in output:
+            size *= dim
+    return max(size, 1)
+
+
+def _limbs(arr, limb_bits, num_limbs):
+    mask = (1 << limb_bits) - 1
+    return [((arr >> (limb_bits * i)) & mask).astype(np.float64) for i in range(num_limbs)]
+
+
+def mod_mul(x, y, q_field):
+    """
+    element-wise x * y % q_field, y could be a scalar
+    """
+    if not _is_fixed_width(x) or not fits_int64(q_field):
+        return x * y % q_field
+    if isinstance(y, (int, np.integer)):
+        y = y % q_field
+    if _is_power_of_two(q_field):
+        # unsigned products wrap around modulo 2 ** 64, which is a multiple of q_field
+        prod = np.multiply(x.astype(np.uint64), np.asarray(y).astype(np.uint64))
+        return (prod & np.uint64(q_field - 1)).astype(np.int64)
+    return to_field(x.astype(object) * y, q_field)
+
+
+def mod_einsum(einsum_expr, x, y, q_field):
+    """
+    np.einsum(einsum_expr, x, y) % q_field without int64 overflow
+
+    operands are split into limbs small enough that every limb contraction is exact in float64,
+    so contractions run as BLAS matrix products, and only the contracted results are combined
+    with python ints.
+    """
+    if not (_is_fixed_width(x) and _is_fixed_width(y)) or not fits_int64(q_field):
+        return np.einsum(einsum_expr, x, y, optimize=True) % q_field
+
+    contraction_bits = int(np.ceil(np.log2(_contraction_size(einsum_expr, x, y))))
+    limb_bits = (_FLOAT_EXACT_BITS - contraction_bits) // 2
+    if limb_bits < 1:
+        return to_field(np.einsum(einsum_expr, x.astype(object), y.astype(object), optimize=True), q_field)
+    num_limbs = -(-(q_field - 1).bit_length() // limb_bits)
+
+    ret = 0
+    x_limbs = _limbs(x % q_field, limb_bits, num_limbs)
+    y_limbs = _limbs(y % q_field, limb_bits, num_limbs)
+    for i, x_limb in enumerate(x_limbs):
+        for j, y_limb in enumerate(y_limbs):
+            partial = np.einsum(einsum_expr, x_limb, y_limb, optimize=True).astype(np.int64)
+            ret = ret + partial.astype(object) * (1 << (limb_bits * (i + j)))
+    return to_field(ret, q_field)
@@ -15,22 +15,56 @@
 #
 import array
 import functools
+import os
 import random
 
 import numpy as np
 from fate_arch.session import is_table
+from federatedml.secureprotol.spdz.utils.modular_utils import field_dtype, fits_int64
 
 
 def rand_tensor(q_field, tensor):
+    dtype = field_dtype(q_field)
     if is_table(tensor):
         return tensor.mapValues(
-            lambda x: np.random.randint(1, q_field, len(x)).astype(object))
+            lambda x: np.random.randint(1, q_field, len(x)).astype(dtype))
     if isinstance(tensor, np.ndarray):
-        arr = np.random.randint(1, q_field, tensor.shape).astype(object)
+        arr = np.random.randint(1, q_field, tensor.shape).astype(dtype)
         return arr
     raise NotImplementedError(f"type={type(tensor)}")
 
 
+def _urand_uint64(n, size):
+    """
+    uniform random integers in [0, n) from system random source, by rejection sampling
+
+    random 64-bit words not less than the largest multiple of n below 2^64 are rejected and drawn again,
+    so that reducing modulo n is unbiased. A word is rejected with probability (2^64 mod n) / 2^64 < n / 2^64,
+    which is less than 1/4 for fields fitting int64, and 2^-61 for the default field 2^61, where n = 2^61 - 1.
+    """
+    n = np.uint64(n)
+    limit = np.uint64((1 << 64) - (1 << 64) % int(n))
+    result = np.empty(size, dtype=np.uint64)
+    filled = 0
+    while filled < size:
+        raw = np.frombuffer(os.urandom(8 * (size - filled)), dtype=np.uint64)
+        raw = raw[raw < limit]
+        result[filled: filled + len(raw)] = raw % n
+        filled += len(raw)
+    return result
+
+
+def _urand_array(q_field, shape):
+    """
+    uniform random field elements in [1, q_field) from system random source
+    """
+    size = int(np.prod(shape))
+    if fits_int64(q_field):
+        return (_urand_uint64(q_field - 1, size) + np.uint64(1)).astype(np.int64).reshape(shape)
+    arr = np.array([random.SystemRandom().randint(1, q_field - 1) for _ in range(size)], dtype=object)
+    return arr.reshape(shape)
+
+
 class _MixRand(object):
     def __init__(self, lower, upper, base_size=1000, inc_velocity=0.1, inc_velocity_deceleration=0.01):
         self._lower = lower
@@ -65,9 +99,10 @@ class _MixRand(object):
 
 def _mix_rand_func(it, q_field):
     _mix = _MixRand(1, q_field)
+    dtype = field_dtype(q_field)
     result = []
     for k, v in it:
-        result.append((k, np.array([next(_mix) for _ in v], dtype=object)))
+        result.append((k, np.array([next(_mix) for _ in v], dtype=dtype)))
     return result
 
 
@@ -77,12 +112,7 @@ def urand_tensor(q_field, tensor, use_mix=False):
             return tensor.mapPartitions(functools.partial(_mix_rand_func, q_field=q_field),
                                         use_previous_behavior=False,
                                         preserves_partitioning=True)
-        return tensor.mapValues(
-            lambda x: np.array([random.SystemRandom().randint(1, q_field) for _ in x], dtype=object))
+        return tensor.mapValues(lambda x: _urand_array(q_field, len(x)))
     if isinstance(tensor, np.ndarray):
-        arr = np.zeros(shape=tensor.shape, dtype=object)
-        view = arr.view().reshape(-1)
-        for i in range(arr.size):
-            view[i] = random.SystemRandom().randint(1, q_field)
-        return arr
+        return _urand_array(q_field, tensor.shape)
     raise NotImplementedError(f"type={type(tensor)}")
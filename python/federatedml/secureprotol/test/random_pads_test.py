@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from federatedml.secureprotol.random import RandomPads, CounterRandomPads, add_rand_pads_inplace
+
+
+class TestRandomPads(unittest.TestCase):
+    def test_inplace_pads_same_stream(self):
+        a = np.random.rand(1000, 3)
+        expect = RandomPads(1234).add_rand_pads(a, 2.0)
+        expect = RandomPads(5678).add_rand_pads(expect, -2.0)
+
+        b = a.copy()
+        add_rand_pads_inplace(b, [RandomPads(1234), RandomPads(5678)], [1.0, -1.0],
+                              amplify_factor=2.0, chunk_size=77)
+        self.assertTrue(np.allclose(expect, b))
+
+    def test_inplace_pads_float32(self):
+        a = np.zeros(100, dtype=np.float32)
+        add_rand_pads_inplace(a, [RandomPads(1), RandomPads(1)], [1.0, -1.0])
+        self.assertTrue(np.allclose(a, 0.0))
+
+    def test_counter_pads_cancel(self):
+        a = np.zeros(10)
+        add_rand_pads_inplace(a, [CounterRandomPads(key=7, counter=123)], [1.0])
+        add_rand_pads_inplace(a, [CounterRandomPads(key=7, counter=123)], [-1.0])
+        self.assertTrue(np.allclose(a, 0.0))
+
+    def test_non_contiguous(self):
+        a = np.zeros((10, 10))[:, 1]
+        with self.assertRaises(ValueError):
+            add_rand_pads_inplace(a, [RandomPads(1)], [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
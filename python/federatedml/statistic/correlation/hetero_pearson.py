@@ -13,18 +13,23 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import json
 import math
+import os
+import shutil
+from concurrent import futures
 
 import numpy as np
+from scipy.linalg.blas import dsyrk
 
 from fate_arch import session
 from fate_flow.entity.metric import MetricMeta
 from federatedml.model_base import ModelBase
 from federatedml.param.pearson_param import PearsonParam
 from federatedml.secureprotol.spdz import SPDZ
-from federatedml.secureprotol.spdz.tensor.fixedpoint_table import (
-    FixedPointTensor,
-    table_dot,
+from federatedml.secureprotol.spdz.tensor.fixedpoint_table import FixedPointTensor
+from federatedml.transfer_variable.transfer_class.hetero_pearson_transfer_variable import (
+    HeteroPearsonTransferVariable,
 )
 from federatedml.util import LOGGER
 from federatedml.util.anonymous_generator import generate_anonymous
@@ -33,6 +38,81 @@ MODEL_META_NAME = "HeteroPearsonModelMeta"
 MODEL_PARAM_NAME = "HeteroPearsonModelParam"
 
 
+def _stack_partition(kv_iterator):
+    return np.array([x for _, x in kv_iterator], dtype=np.float64)
+
+
+def _block_moments(block):
+    """
+    count, sum and square sum of rows of a block
+    """
+    return len(block), np.sum(block, axis=0), np.sum(block ** 2, axis=0)
+
+
+def _block_syrk(block):
+    """
+    upper triangle of x^T x of a block, computed by BLAS syrk
+    """
+    return dsyrk(1.0, block, trans=1)
+
+
+def _merge_partition_results(result1, result2):
+    if result1 is None:
+        return result2
+    if result2 is None:
+        return result1
+    if isinstance(result1, tuple):
+        return tuple(v1 + v2 for v1, v2 in zip(result1, result2))
+    return result1 + result2
+
+
+def _get_job_directory(job_id):
+    # imported lazily, fate_flow db layer is only needed when checkpointing in a job
+    from fate_flow.utils import job_utils
+    return job_utils.get_job_directory(job_id)
+
+
+class _TileCheckpoint(object):
+    """
+    tiles of cross-party product saved in local file system once reconstructed, so that a retried task
+    of the same job restarts from the last completed tile. tiles are ignored if fingerprint changes.
+    """
+
+    def __init__(self, path, fingerprint):
+        self._path = path
+        self._fingerprint = fingerprint
+
+    def _meta_path(self):
+        return os.path.join(self._path, "meta.json")
+
+    def _tile_path(self, idx):
+        return os.path.join(self._path, f"tile_{idx}.npy")
+
+    def load(self):
+        if self._path is None or not os.path.exists(self._meta_path()):
+            return []
+        with open(self._meta_path()) as f:
+            meta = json.load(f)
+        if meta["fingerprint"] != self._fingerprint:
+            return []
+        return [np.load(self._tile_path(idx)) for idx in range(meta["num_tiles"])]
+
+    def save(self, idx, tile):
+        if self._path is None:
+            return
+        os.makedirs(self._path, exist_ok=True)
+        np.save(self._tile_path(idx), tile)
+        # meta is replaced after tile is written, a crash in between leaves the previous meta valid
+        tmp_path = f"{self._meta_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": self._fingerprint, "num_tiles": idx + 1}, f)
+        os.replace(tmp_path, self._meta_path())
+
+    def clean(self):
+        if self._path is not None:
+            shutil.rmtree(self._path, ignore_errors=True)
+
+
 class HeteroPearson(ModelBase):
     def __init__(self):
         super().__init__()
@@ -49,6 +129,7 @@ class HeteroPearson(ModelBase):
         self._set_parties()
 
         self.local_vif = None  # vif from local features
+        self.transfer_variable = HeteroPearsonTransferVariable()
 
         self._summary = {}
 
@@ -108,15 +189,19 @@ class HeteroPearson(ModelBase):
 
     @staticmethod
     def _standardized(data):
-        n = data.count()
-        sum_x, sum_square_x = data.mapValues(lambda x: (x, x ** 2)).reduce(
-            lambda pair1, pair2: (pair1[0] + pair2[0], pair1[1] + pair2[1])
+        """
+        returns count, standardized rows for cross-party product and standardized row-blocks of partitions,
+        rows are stacked into blocks only once, blocks are reused by moments and local correlation
+        """
+        blocks = data.applyPartitions(_stack_partition).filter(lambda k, block: len(block) > 0)
+        n, sum_x, sum_square_x = blocks.mapValues(_block_moments).reduce(
+            _merge_partition_results
         )
         mu = sum_x / n
         sigma = np.sqrt(sum_square_x / n - mu ** 2)
         if (sigma <= 0).any():
             raise ValueError(f"zero standard deviation detected, sigma={sigma}")
-        return n, data.mapValues(lambda x: (x - mu) / sigma)
+        return n, data.mapValues(lambda x: (x - mu) / sigma), blocks.mapValues(lambda block: (block - mu) / sigma)
 
     @staticmethod
     def _vif_from_pearson_matrix(mat: np.ndarray):
@@ -141,17 +226,91 @@ class HeteroPearson(ModelBase):
         d = np.linalg.det(a)
         return a / d ** (1 / n)
 
-    def fit(self, data_instance):
-        # local
-        data = self._select_columns(data_instance)
-        n, normed = self._standardized(data)
-        self.local_corr = table_dot(normed, normed)
+    def _fit_local(self, n, normed_blocks):
+        local_corr = normed_blocks.mapValues(_block_syrk).reduce(
+            _merge_partition_results
+        )
+        # syrk fills upper triangle only
+        self.local_corr = np.triu(local_corr) + np.triu(local_corr, 1).T
         self.local_corr /= n
         if self.model_param.calc_local_vif:
             self.local_vif = self._vif_from_pearson_matrix(self.local_corr)
         self._summary["local_corr"] = self.local_corr.tolist()
         self._summary["num_local_features"] = n
 
+    def _checkpoint_path(self):
+        # task_version_id is {job_id}_{component_name}_{task_version}, checkpoint is shared by task versions
+        if not self.task_version_id:
+            return None
+        job_id, component_name = self.task_version_id.rsplit("_", 1)[0].split("_", 1)
+        return os.path.join(
+            _get_job_directory(job_id),
+            self.local_party.role,
+            str(self.local_party.party_id),
+            component_name,
+            "pearson_checkpoint",
+        )
+
+    def _sync_resume_tile(self, num_completed):
+        """
+        parties restart from the smaller number of completed tiles, so that they stay in same multiplication
+        """
+        self.transfer_variable.resume_tile.remote_parties(
+            num_completed, parties=self.other_party
+        )
+        other_completed = self.transfer_variable.resume_tile.get_parties(
+            parties=self.other_party
+        )[0]
+        return min(num_completed, other_completed)
+
+    @staticmethod
+    def _slice_columns(tensor: FixedPointTensor, start, end, tensor_name):
+        value = tensor.value.mapValues(lambda x: x[start:end])
+        return FixedPointTensor(value, tensor.q_field, tensor.endec, tensor_name)
+
+    def _fit_cross(self, spdz, n, normed_blocks, x, y):
+        """
+        x^T y in column tiles of y: memory of products and beaver triples is bounded by tile size,
+        and triple of first tile is generated while local correlation is computed
+        """
+        m1 = len(x.value.first()[1])
+        m2 = len(y.value.first()[1])
+        tile_size = self.model_param.cross_tile_size
+        tiles = [(start, min(start + tile_size, m2)) for start in range(0, m2, tile_size)]
+
+        checkpoint = _TileCheckpoint(
+            self._checkpoint_path(), fingerprint=[n, m1, m2, tile_size, self.names]
+        )
+        corr_tiles = checkpoint.load()
+        resume_idx = self._sync_resume_tile(len(corr_tiles))
+        corr_tiles = corr_tiles[:resume_idx]
+        if resume_idx > 0:
+            LOGGER.info(f"resume cross correlation from tile {resume_idx}/{len(tiles)}")
+
+        def _tile(idx):
+            return self._slice_columns(y, *tiles[idx], tensor_name=f"y_tile_{idx}")
+
+        # offline phase: beaver triple of first tile is generated on this thread, which owns federation of spdz,
+        # while local corr, needing no federation, is computed in background
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            local_future = executor.submit(self._fit_local, n, normed_blocks)
+            if resume_idx < len(tiles):
+                spdz.precompute_triples(x, _tile(resume_idx), f"corr_{resume_idx}")
+            local_future.result()
+
+        for idx in range(resume_idx, len(tiles)):
+            corr_tile = spdz.dot(x, _tile(idx), f"corr_{idx}").get()
+            checkpoint.save(idx, corr_tile)
+            corr_tiles.append(corr_tile)
+
+        self.corr = np.concatenate(corr_tiles, axis=1) / n
+        checkpoint.clean()
+        return m1, m2
+
+    def fit(self, data_instance):
+        data = self._select_columns(data_instance)
+        n, normed, normed_blocks = self._standardized(data)
+
         if self.model_param.cross_parties:
             with SPDZ(
                 "pearson",
@@ -170,18 +329,17 @@ class HeteroPearson(ModelBase):
                         FixedPointTensor.from_source("y", source[0]),
                         FixedPointTensor.from_source("x", source[1]),
                     )
-                m1 = len(x.value.first()[1])
-                m2 = len(y.value.first()[1])
+                m1, m2 = self._fit_cross(spdz, n, normed_blocks, x, y)
                 self.shapes.append(m1)
                 self.shapes.append(m2)
 
-                self.corr = spdz.dot(x, y, "corr").get() / n
                 self._summary["corr"] = self.corr.tolist()
                 self._summary["num_remote_features"] = (
                     m2 if self.local_party.role == "guest" else m1
                 )
 
         else:
+            self._fit_local(n, normed_blocks)
             self.shapes.append(self.local_corr.shape[0])
             self.parties = [self.local_party]
 
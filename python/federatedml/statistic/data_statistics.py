@@ -128,7 +128,8 @@ class DataStatistics(ModelBase):
                                                             abnormal_list=self.model_param.abnormal_list,
                                                             error=self.model_param.quantile_error,
                                                             stat_order=stat_order,
-                                                            bias=self.model_param.bias)
+                                                            bias=self.model_param.bias,
+                                                            with_quantile=len(self._quantile_statics) > 0)
         results = None
         for stat_name in self._numeric_statics:
             stat_res = self.statistic_obj.get_statics(stat_name)
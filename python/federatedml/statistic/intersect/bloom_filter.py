@@ -0,0 +1,114 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import hashlib
+import math
+
+import numpy as np
+
+from federatedml.util import LOGGER
+
+
+class BloomFilter(object):
+    """
+    Bloom filter over bit array, indices of a key are derived by double hashing of its blake2b digest:
+    h1 + i * h2 mod m, i in [0, k)
+    """
+
+    def __init__(self, num_bits, num_hashes):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = np.zeros((num_bits + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def create(cls, capacity, false_positive_rate):
+        """
+        create filter with optimal bit count and hash count for `capacity` keys at given false positive rate
+        """
+        capacity = max(capacity, 1)
+        num_bits = max(int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))), 8)
+        num_hashes = max(int(round(num_bits / capacity * math.log(2))), 1)
+        return cls(num_bits, num_hashes)
+
+    def empty_like(self):
+        return BloomFilter(self.num_bits, self.num_hashes)
+
+    @staticmethod
+    def _digest(key):
+        if not isinstance(key, bytes):
+            key = str(key).encode("utf-8")
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _indices(self, keys):
+        digests = np.frombuffer(b"".join(self._digest(key) for key in keys), dtype=np.uint64).reshape(-1, 2)
+        h1 = digests[:, :1] % self.num_bits
+        h2 = digests[:, 1:] % self.num_bits
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1 + steps * h2) % self.num_bits
+
+    def add_all(self, keys):
+        keys = list(keys)
+        if not keys:
+            return self
+        indices = self._indices(keys).ravel()
+        np.bitwise_or.at(self.bits, indices >> np.uint64(3), np.left_shift(1, indices & np.uint64(7)).astype(np.uint8))
+        return self
+
+    def contains_all(self, keys):
+        """
+        return bool array, True for keys probably in filter, False for keys definitely not in filter
+        """
+        keys = list(keys)
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        indices = self._indices(keys)
+        bit_set = self.bits[indices >> np.uint64(3)] & np.left_shift(1, indices & np.uint64(7)).astype(np.uint8)
+        return np.all(bit_set != 0, axis=1)
+
+    def __contains__(self, key):
+        return bool(self.contains_all([key])[0])
+
+    def merge(self, other: 'BloomFilter'):
+        if self.num_bits != other.num_bits or self.num_hashes != other.num_hashes:
+            raise ValueError("can not merge bloom filters of different shapes")
+        np.bitwise_or(self.bits, other.bits, out=self.bits)
+        return self
+
+
+def build_filter(table, false_positive_rate):
+    """
+    build bloom filter of table keys, one filter per partition then OR-merged
+    """
+    bloom = BloomFilter.create(table.count(), false_positive_rate)
+    LOGGER.info(f"Build bloom filter with {bloom.num_bits} bits and {bloom.num_hashes} hashes")
+
+    def _partition_filter(kv_iterator):
+        return bloom.empty_like().add_all(k for k, _ in kv_iterator)
+
+    return table.applyPartitions(_partition_filter).reduce(lambda f1, f2: f1.merge(f2))
+
+
+def filter_candidates(table, bloom: BloomFilter):
+    """
+    return table of pairs whose keys pass the filter
+    """
+
+    def _partition_candidates(kv_iterator):
+        pairs = list(kv_iterator)
+        hits = bloom.contains_all(k for k, _ in pairs)
+        return [pair for pair, hit in zip(pairs, hits) if hit]
+
+    return table.mapPartitions(_partition_candidates, use_previous_behavior=False, preserves_partitioning=True)
@@ -15,11 +15,13 @@
 #
 
 import random
+from concurrent import futures
 
 from federatedml.param.intersect_param import IntersectParam
 from federatedml.secureprotol import gmpy_math
 from federatedml.secureprotol.encrypt import RsaEncrypt
 from federatedml.secureprotol.hash.hash_factory import Hash
+from federatedml.statistic.intersect.bloom_filter import build_filter, filter_candidates
 from federatedml.util import consts
 from federatedml.util import LOGGER
 from federatedml.transfer_variable.transfer_class.raw_intersect_transfer_variable import RawIntersectTransferVariable
@@ -87,18 +89,31 @@ class Intersect(object):
 
     @staticmethod
     def get_common_intersection(intersect_ids_list: list):
+        """
+        intersect tables keyed by the same ids; tables are joined from the smallest one,
+        so that every intermediate result is no larger than it
+        """
         if len(intersect_ids_list) == 1:
             return intersect_ids_list[0]
 
-        intersect_ids = None
-        for i, value in enumerate(intersect_ids_list):
-            if intersect_ids is None:
-                intersect_ids = value
-                continue
+        intersect_ids_list = sorted(intersect_ids_list, key=lambda ids: ids.count())
+        intersect_ids = intersect_ids_list[0]
+        for value in intersect_ids_list[1:]:
             intersect_ids = intersect_ids.join(value, lambda id, v: "id")
 
         return intersect_ids
 
+    def run_host_pipelines(self, host_pipeline):
+        """
+        run host_pipeline(idx) for every host concurrently, results are in order of host_party_id_list
+        """
+        host_num = len(self.host_party_id_list)
+        if host_num == 1:
+            return [host_pipeline(0)]
+
+        with futures.ThreadPoolExecutor(max_workers=host_num) as executor:
+            return list(executor.map(host_pipeline, range(host_num)))
+
     @staticmethod
     def hash(value, hash_operator, salt=''):
         h_value = hash_operator.compute(value, postfit_salt=salt)
@@ -114,9 +129,11 @@ class RsaIntersect(Intersect):
         self.e = None
         self.d = None
         self.n = None
+        self.crt_key = None
         # self.r = None
         self.transfer_variable = RsaIntersectTransferVariable()
         self.role = None
+        self.tracker = None
 
     def load_params(self, param):
         self.only_output_key = param.only_output_key
@@ -128,6 +145,24 @@ class RsaIntersect(Intersect):
         self.first_hash_operator = Hash(self.rsa_params.hash_method, False)
         self.final_hash_operator = Hash(self.rsa_params.final_hash_method, False)
         self.salt = self.rsa_params.salt
+        self.intersect_cache_param = param.intersect_cache_param
+        self.filter_params = param.filter_params
+
+    def get_cache_tag(self):
+        # imported here since cache module requires database of fate_flow, which is needless if cache not used
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        return cache_utils.gen_cache_tag(consts.INTERSECT_CACHE_TAG,
+                                         self.rsa_params.hash_method,
+                                         self.rsa_params.final_hash_method,
+                                         self.salt)
+
+    def get_cache_namespace(self, host_party_id, guest_party_id=None):
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        return cache_utils.gen_cache_namespace(self.intersect_cache_param.id_type,
+                                               self.intersect_cache_param.encrypt_type,
+                                               self.get_cache_tag(),
+                                               host_party_id,
+                                               guest_party_id=guest_party_id)
 
     @staticmethod
     def extend_pair(v1, v2):
@@ -153,9 +188,11 @@ class RsaIntersect(Intersect):
             def pubkey_id_generate(k, pair):
                 r = random.SystemRandom().getrandbits(random_bit)
                 r_e = gmpy_math.powmod(r, rsa_e, rsa_n)
+                # blinding factor is shared by the group, so is its inverse used for unblinding
+                r_inv = gmpy_math.invert(r, rsa_n)
                 for hash_sid, v in pair:
                     processed_id = r_e * hash_sid % rsa_n
-                    yield processed_id, (v[0], r)
+                    yield processed_id, (v[0], r_inv)
 
             return reduced_pair_group.flatMap(pubkey_id_generate)
         else:
@@ -170,55 +207,100 @@ class RsaIntersect(Intersect):
         encrypt_operator.generate_key(rsa_bit)
         return encrypt_operator.get_key_pair()
 
+    @staticmethod
+    def generate_rsa_crt_key(rsa_bit=1024):
+        """
+        generate rsa key, with crt parameters of private key appended to (e, d, n)
+        """
+        LOGGER.info(f"Generated {rsa_bit}-bit RSA key.")
+        encrypt_operator = RsaEncrypt()
+        encrypt_operator.generate_key(rsa_bit)
+        return (*encrypt_operator.get_key_pair(), encrypt_operator.get_crt_key())
+
     def generate_protocol_key(self):
         if self.role == consts.HOST:
-            e, d, n = self.generate_rsa_key(self.rsa_params.key_length)
+            e, d, n, self.crt_key = self.generate_rsa_crt_key(self.rsa_params.key_length)
         else:
-            e, d, n = [], [], []
+            e, d, n, self.crt_key = [], [], [], []
             for i in range(len(self.host_party_id_list)):
-                e_i, d_i, n_i = self.generate_rsa_key(self.rsa_params.key_length)
+                e_i, d_i, n_i, crt_key_i = self.generate_rsa_crt_key(self.rsa_params.key_length)
                 e.append(e_i)
                 d.append(d_i)
                 n.append(n_i)
+                self.crt_key.append(crt_key_i)
         return e, d, n
 
     @staticmethod
     def pubkey_id_process_per(hash_sid, v, random_bit, rsa_e, rsa_n, hash_operator=None, salt=''):
         r = random.SystemRandom().getrandbits(random_bit)
+        r_inv = gmpy_math.invert(r, rsa_n)
         if hash_operator:
             processed_id = gmpy_math.powmod(r, rsa_e, rsa_n) * int(Intersect.hash(hash_sid, hash_operator, salt), 16) % rsa_n
-            return processed_id, (hash_sid, r)
+            return processed_id, (hash_sid, r_inv)
         else:
             processed_id = gmpy_math.powmod(r, rsa_e, rsa_n) * hash_sid % rsa_n
-            return processed_id, (v[0], r)
+            return processed_id, (v[0], r_inv)
+
+    @staticmethod
+    def final_hash(value, final_hash_operator, salt=''):
+        """
+        final hash of signed id as fixed-width digest bytes, half the size of hex string
+        """
+        return bytes.fromhex(Intersect.hash(value, final_hash_operator, salt))
+
+    @staticmethod
+    def unblind_hash(signed_id, r_inv, rsa_n, final_hash_operator, salt=''):
+        """
+        remove blinding factor from signed id: (r^e * H(id))^d / r = H(id)^d, then take final hash
+        """
+        return RsaIntersect.final_hash(int(signed_id) * int(r_inv) % rsa_n, final_hash_operator, salt)
 
     @staticmethod
-    def prvkey_id_process(hash_sid, v, rsa_d, rsa_n, final_hash_operator, salt, first_hash_operator=None):
+    def prvkey_id_process(hash_sid, v, rsa_d, rsa_n, final_hash_operator, salt, first_hash_operator=None,
+                          crt_key=None):
         if first_hash_operator:
-            processed_id = Intersect.hash(gmpy_math.powmod(int(Intersect.hash(hash_sid, first_hash_operator, salt), 16),
-                                                           rsa_d,
-                                                           rsa_n),
-                                          final_hash_operator,
-                                          salt)
+            processed_id = RsaIntersect.final_hash(
+                RsaIntersect.sign_id(int(Intersect.hash(hash_sid, first_hash_operator, salt), 16),
+                                     rsa_d,
+                                     rsa_n,
+                                     crt_key),
+                final_hash_operator,
+                salt)
             return processed_id, hash_sid
         else:
-            processed_id = Intersect.hash(gmpy_math.powmod(hash_sid, rsa_d, rsa_n),
-                                          final_hash_operator,
-                                          salt)
+            processed_id = RsaIntersect.final_hash(RsaIntersect.sign_id(hash_sid, rsa_d, rsa_n, crt_key),
+                                                   final_hash_operator,
+                                                   salt)
             return processed_id, v[0]
 
-    def cal_prvkey_ids_process_pair(self, data_instances, d, n, first_hash_operator=None):
-        return data_instances.map(
-            lambda k, v: self.prvkey_id_process(k, v, d, n,
-                                                self.final_hash_operator,
-                                                self.rsa_params.salt,
-                                                first_hash_operator)
-        )
+    def cal_prvkey_ids_process_pair(self, data_instances, d, n, first_hash_operator=None, crt_key=None):
+        final_hash_operator = self.final_hash_operator
+        salt = self.rsa_params.salt
+
+        def _prvkey_id_process_partition(kv_iterator):
+            return [RsaIntersect.prvkey_id_process(k, v, d, n, final_hash_operator, salt, first_hash_operator,
+                                                   crt_key)
+                    for k, v in kv_iterator]
+
+        return data_instances.mapPartitions(_prvkey_id_process_partition, use_previous_behavior=False)
 
     @staticmethod
-    def sign_id(hash_sid, rsa_d, rsa_n):
+    def sign_id(hash_sid, rsa_d, rsa_n, crt_key=None):
+        if crt_key is not None:
+            return gmpy_math.powmod_crt(hash_sid, crt_key)
         return gmpy_math.powmod(hash_sid, rsa_d, rsa_n)
 
+    @staticmethod
+    def sign_ids(pubkey_ids, rsa_d, rsa_n, crt_key=None):
+        """
+        sign keys of table partition by partition, keys are kept and values are replaced by signatures
+        """
+
+        def _sign_partition(kv_iterator):
+            return [(k, RsaIntersect.sign_id(k, rsa_d, rsa_n, crt_key)) for k, _ in kv_iterator]
+
+        return pubkey_ids.mapPartitions(_sign_partition, use_previous_behavior=False, preserves_partitioning=True)
+
     @staticmethod
     def map_raw_id_to_encrypt_id(raw_id_data, encrypt_id_data):
         encrypt_id_data_exchange_kv = encrypt_id_data.map(lambda k, v: (v, k))
@@ -277,6 +359,7 @@ class RawIntersect(Intersect):
         self.join_role = param.join_role
         self.hash_operator = Hash(param.encode_params.encode_method, param.encode_params.base64)
         self.salt = self.encode_params.salt
+        self.filter_params = param.filter_params
 
     def intersect_send_id(self, data_instances):
         sid_hash_pair = None
@@ -302,11 +385,14 @@ class RawIntersect(Intersect):
         else:
             raise ValueError("Unknown intersect role, please check the code")
 
-        send_ids_federation.remote(data_sid,
-                                   role=recv_role,
-                                   idx=-1)
+        if self.filter_params.use_filter:
+            self.send_filter_and_verify(data_sid, recv_role)
+        else:
+            send_ids_federation.remote(data_sid,
+                                       role=recv_role,
+                                       idx=-1)
 
-        LOGGER.info("Remote data_sid to role-join")
+            LOGGER.info("Remote data_sid to role-join")
         intersect_ids = None
         if self.sync_intersect_ids:
             if self.role == consts.HOST:
@@ -345,6 +431,61 @@ class RawIntersect(Intersect):
 
         return intersect_ids
 
+    def send_filter_and_verify(self, data_sid, recv_role):
+        """
+        remote bloom filter of data_sid to role-join instead of data_sid, then return
+        the candidates from role-join which are really in data_sid
+        """
+        if self.role == consts.GUEST:
+            send_filter_federation = self.transfer_variable.send_filter_guest
+            filter_candidates_federation = self.transfer_variable.filter_candidates_host
+            filter_verified_federation = self.transfer_variable.filter_verified_guest
+        else:
+            send_filter_federation = self.transfer_variable.send_filter_host
+            filter_candidates_federation = self.transfer_variable.filter_candidates_guest
+            filter_verified_federation = self.transfer_variable.filter_verified_host
+
+        data_filter = build_filter(data_sid, self.filter_params.false_positive_rate)
+        send_filter_federation.remote(data_filter,
+                                      role=recv_role,
+                                      idx=-1)
+        LOGGER.info("Remote data_sid filter to role-join")
+
+        candidates_list = filter_candidates_federation.get(idx=-1)
+        for i, candidates in enumerate(candidates_list):
+            verified_ids = candidates.join(data_sid, lambda c, d: 1)
+            filter_verified_federation.remote(verified_ids,
+                                              role=recv_role,
+                                              idx=i)
+        LOGGER.info("Remote verified filter candidates to role-join")
+
+    def get_verified_ids_by_filter(self, data_sid):
+        """
+        receive bloom filters from role-send, remote ids passing the filter as candidates
+        and return verified candidates
+        """
+        if self.role == consts.HOST:
+            send_filter_federation = self.transfer_variable.send_filter_guest
+            filter_candidates_federation = self.transfer_variable.filter_candidates_host
+            filter_verified_federation = self.transfer_variable.filter_verified_guest
+            send_role = consts.GUEST
+        else:
+            send_filter_federation = self.transfer_variable.send_filter_host
+            filter_candidates_federation = self.transfer_variable.filter_candidates_guest
+            filter_verified_federation = self.transfer_variable.filter_verified_host
+            send_role = consts.HOST
+
+        data_filter_list = send_filter_federation.get(idx=-1)
+        LOGGER.info("Get data_sid filter from role-send")
+        for i, data_filter in enumerate(data_filter_list):
+            candidates = filter_candidates(data_sid, data_filter)
+            filter_candidates_federation.remote(candidates,
+                                                role=send_role,
+                                                idx=i)
+        LOGGER.info("Remote filter candidates to role-send")
+
+        return filter_verified_federation.get(idx=-1)
+
     def intersect_join_id(self, data_instances):
         LOGGER.info("Join id role is {}".format(self.role))
 
@@ -367,7 +508,10 @@ class RawIntersect(Intersect):
         else:
             raise ValueError("Unknown intersect role, please check the code")
 
-        recv_ids_list = send_ids_federation.get(idx=-1)
+        if self.filter_params.use_filter:
+            recv_ids_list = self.get_verified_ids_by_filter(data_sid)
+        else:
+            recv_ids_list = send_ids_federation.get(idx=-1)
 
         ids_list_size = len(recv_ids_list)
         LOGGER.info("Get ids_list from role-send, ids_list size is {}".format(len(recv_ids_list)))
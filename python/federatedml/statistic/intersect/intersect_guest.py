@@ -14,9 +14,10 @@
 #  limitations under the License.
 #
 
-import gmpy2
+import functools
 
-from federatedml.statistic.intersect import RawIntersect, RsaIntersect
+from federatedml.statistic.intersect import Intersect, RawIntersect, RsaIntersect
+from federatedml.statistic.intersect.bloom_filter import BloomFilter, filter_candidates
 from federatedml.util import consts, LOGGER
 
 
@@ -25,26 +26,93 @@ class RsaIntersectionGuest(RsaIntersect):
         super().__init__()
         self.role = consts.GUEST
 
-    def get_host_prvkey_ids(self):
-        host_prvkey_ids_list = self.transfer_variable.host_prvkey_ids.get(idx=-1)
-        LOGGER.info("Get host_prvkey_ids from all host")
+    def get_host_prvkey_ids(self, idx=-1):
+        host_prvkey_ids = self.transfer_variable.host_prvkey_ids.get(idx=idx)
+        LOGGER.info(f"Get host_prvkey_ids from host {idx}")
 
-        return host_prvkey_ids_list
+        return host_prvkey_ids
 
-    def get_host_pubkey_ids(self):
-        host_pubkey_ids_list = self.transfer_variable.host_pubkey_ids.get(idx=-1)
-        LOGGER.info("Get host_pubkey_ids from all host")
+    def get_host_filter(self, idx=-1):
+        host_filter = self.transfer_variable.host_filter.get(idx=idx)
+        LOGGER.info(f"Get host_prvkey_ids filter from host {idx}")
 
-        return host_pubkey_ids_list
+        return host_filter
 
-    def sign_host_ids(self, host_pubkey_ids_list):
-        # Process(signs) hosts' ids
-        guest_sign_host_ids_list = [host_pubkey_ids.map(lambda k, v:
-                                                        (k, self.sign_id(k, self.d[i], self.n[i])))
-                                    for i, host_pubkey_ids in enumerate(host_pubkey_ids_list)]
-        LOGGER.info("Sign host_pubkey_ids with guest prv_keys")
+    def verify_filter_candidates(self, sid_host_sign_guest_ids, host_filter, idx):
+        """
+        remote guest ids passing host's bloom filter as candidates, and get candidates verified by host
+        """
+        candidates = filter_candidates(sid_host_sign_guest_ids, host_filter)
+        self.transfer_variable.guest_filter_candidates.remote(candidates.mapValues(lambda v: 1),
+                                                              role=consts.HOST,
+                                                              idx=idx)
+        LOGGER.info(f"Remote guest_filter_candidates to Host {idx}")
+        host_filter_verified = self.transfer_variable.host_filter_verified.get(idx=idx)
+        LOGGER.info(f"Get host_filter_verified from Host {idx}")
+
+        return host_filter_verified
 
-        return guest_sign_host_ids_list
+    def send_cache_version_info(self):
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        for i, host_party_id in enumerate(self.host_party_id_list):
+            namespace = self.get_cache_namespace(host_party_id, self.guest_party_id)
+            current_version = {"version": cache_utils.get_current_version(namespace)}
+            self.transfer_variable.cache_version_info.remote(current_version,
+                                                             role=consts.HOST,
+                                                             idx=i)
+            LOGGER.info(f"Remote current cache version: {current_version} to Host {host_party_id}")
+
+    def get_cached_host_prvkey_ids(self, idx):
+        """
+        read host_prvkey_ids of host idx from local cache if cache version matches,
+        otherwise receive it from host and store as new version
+        """
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        cache_version_match_info = self.transfer_variable.cache_version_match_info.get(idx=idx)
+        LOGGER.info(f"Get cache version match info: {cache_version_match_info}")
+
+        host_party_id = self.host_party_id_list[idx]
+        namespace = self.get_cache_namespace(host_party_id, self.guest_party_id)
+        version = cache_version_match_info.get("version")
+        if cache_version_match_info.get("version_match"):
+            host_prvkey_ids = cache_utils.load_cache(namespace, version)
+            LOGGER.info(f"Read host {host_party_id}'s host_prvkey_ids from cache")
+        elif self.filter_params.use_filter:
+            # filter is only valid for this run, not cached
+            host_prvkey_ids = self.get_host_filter(idx=idx)
+        else:
+            host_prvkey_ids = self.get_host_prvkey_ids(idx=idx)
+            prev_version = cache_utils.get_current_version(namespace)
+            cache_utils.store_cache(host_prvkey_ids, self.tracker, namespace, version)
+            if prev_version is not None:
+                cache_utils.clean_cache(namespace, prev_version)
+
+        return host_prvkey_ids
+
+    def unblind_host_sign_guest_ids(self, pubkey_ids_process, idx):
+        """
+        receive guest ids signed by host idx and unblind them
+
+        Returns
+        -------
+        table(hash(guest_ids_process/r), sid)
+        """
+        recv_host_sign_guest_ids = self.transfer_variable.host_sign_guest_ids.get(idx=idx)
+        LOGGER.info(f"Get host_sign_guest_ids from Host {idx}")
+
+        rsa_n = self.rcv_n[idx]
+        final_hash_operator = self.final_hash_operator
+        salt = self.rsa_params.salt
+        # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
+        # g[0]=(r^e % n *hash(sid), sid), g[1]=inverse of random bits r
+        host_sign_guest_ids = pubkey_ids_process.join(recv_host_sign_guest_ids,
+                                                      lambda g, r: (g[0],
+                                                                    RsaIntersectionGuest.unblind_hash(r,
+                                                                                                      g[1],
+                                                                                                      rsa_n,
+                                                                                                      final_hash_operator,
+                                                                                                      salt)))
+        return host_sign_guest_ids.map(lambda k, v: (v[1], v[0]))
 
     def send_intersect_ids(self, encrypt_intersect_ids_list, intersect_ids):
         if len(self.host_party_id_list) > 1:
@@ -61,14 +129,58 @@ class RsaIntersectionGuest(RsaIntersect):
                                                         idx=0)
             LOGGER.info(f"Remote intersect ids to Host!")
 
-    def get_host_intersect_ids(self, guest_prvkey_ids_list):
-        encrypt_intersect_ids_list = self.transfer_variable.host_intersect_ids.get(idx=-1)
-        LOGGER.info("Get intersect ids from Host")
-        intersect_ids_pair_list = [self.extract_intersect_ids(ids,
-                                                              guest_prvkey_ids_list[i]) for i, ids in
-                                   enumerate(encrypt_intersect_ids_list)]
-        intersect_ids = self.filter_intersect_ids(intersect_ids_pair_list)
-        return intersect_ids
+    def split_host_pipeline(self, sid_hash_odd, sid_hash_even, idx):
+        """
+        id exchange with host idx of split calculation, independent of other hosts
+
+        Returns
+        -------
+        encrypt intersect odd ids table(hash(guest_ids_process/r), sid),
+        intersect even ids pair table(encrypt id, sid)
+        """
+        host_party_id = self.host_party_id_list[idx]
+        # encrypt own odd ids with pub key from host
+        pubkey_ids_process = self.pubkey_id_process(sid_hash_odd,
+                                                    fraction=self.random_base_fraction,
+                                                    random_bit=self.random_bit,
+                                                    rsa_e=self.rcv_e[idx],
+                                                    rsa_n=self.rcv_n[idx])
+        mask_guest_id = pubkey_ids_process.mapValues(lambda v: 1)
+        self.transfer_variable.guest_pubkey_ids.remote(mask_guest_id,
+                                                       role=consts.HOST,
+                                                       idx=idx)
+        LOGGER.info(f"Remote guest_pubkey_ids to Host {host_party_id}")
+
+        # encrypt & send prvkey encrypted guest even ids to host
+        prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(sid_hash_even, self.d[idx], self.n[idx],
+                                                                   crt_key=self.crt_key[idx])
+        prvkey_ids_process = prvkey_ids_process_pair.mapValues(lambda v: 1)
+        self.transfer_variable.guest_prvkey_ids.remote(prvkey_ids_process,
+                                                       role=consts.HOST,
+                                                       idx=idx)
+        LOGGER.info(f"Remote guest_prvkey_ids to host {host_party_id}")
+
+        # get & sign host pub key encrypted even ids, then send back
+        host_pubkey_ids = self.transfer_variable.host_pubkey_ids.get(idx=idx)
+        LOGGER.info(f"Get host_pubkey_ids from host {host_party_id}")
+        guest_sign_host_ids = self.sign_ids(host_pubkey_ids, self.d[idx], self.n[idx], self.crt_key[idx])
+        self.transfer_variable.guest_sign_host_ids.remote(guest_sign_host_ids,
+                                                          role=consts.HOST,
+                                                          idx=idx)
+        LOGGER.info(f"Remote guest_sign_host_ids to Host {host_party_id}.")
+
+        # get prvkey encrypted odd ids from host
+        host_prvkey_ids = self.get_host_prvkey_ids(idx=idx)
+        sid_host_sign_guest_ids = self.unblind_host_sign_guest_ids(pubkey_ids_process, idx)
+
+        # intersect table(hash(guest_ids_process/r), sid)
+        encrypt_intersect_odd_ids = sid_host_sign_guest_ids.join(host_prvkey_ids, lambda sid, h: sid)
+
+        host_intersect_ids = self.transfer_variable.host_intersect_ids.get(idx=idx)
+        LOGGER.info(f"Get intersect ids from Host {host_party_id}")
+        intersect_even_ids_pair = self.extract_intersect_ids(host_intersect_ids, prvkey_ids_process_pair)
+
+        return encrypt_intersect_odd_ids, intersect_even_ids_pair
 
     def split_calculation_process(self, data_instances):
         LOGGER.info("RSA intersect using split calculation.")
@@ -97,67 +209,12 @@ class RsaIntersectionGuest(RsaIntersect):
         self.rcv_e = [int(public_key["e"]) for public_key in host_public_keys]
         self.rcv_n = [int(public_key["n"]) for public_key in host_public_keys]
 
-        # encrypt own odd ids with pub keys from host
-        pubkey_ids_process_list = [self.pubkey_id_process(sid_hash_odd,
-                                                          fraction=self.random_base_fraction,
-                                                          random_bit=self.random_bit,
-                                                          rsa_e=self.rcv_e[i],
-                                                          rsa_n=self.rcv_n[i]) for i in range(len(self.rcv_e))]
-        LOGGER.info(f"Perform pubkey_ids_process")
-        for i, guest_id in enumerate(pubkey_ids_process_list):
-            mask_guest_id = guest_id.mapValues(lambda v: 1)
-            self.transfer_variable.guest_pubkey_ids.remote(mask_guest_id,
-                                                           role=consts.HOST,
-                                                           idx=i)
-            LOGGER.info(f"Remote guest_pubkey_ids to Host {i}")
+        pipeline_results = self.run_host_pipelines(
+            functools.partial(self.split_host_pipeline, sid_hash_odd, sid_hash_even))
+        encrypt_intersect_odd_ids_list = [odd_ids for odd_ids, _ in pipeline_results]
 
-        # encrypt & send prvkey encrypted guest even ids to host
-        prvkey_ids_process_pair_list = []
-        for i, host_party_id in enumerate(self.host_party_id_list):
-            prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(sid_hash_even, self.d[i], self.n[i])
-            prvkey_ids_process = prvkey_ids_process_pair.mapValues(lambda v: 1)
-            self.transfer_variable.guest_prvkey_ids.remote(prvkey_ids_process,
-                                                           role=consts.HOST,
-                                                           idx=i)
-            prvkey_ids_process_pair_list.append(prvkey_ids_process_pair)
-            LOGGER.info(f"Remote guest_prvkey_ids to host {host_party_id}")
-
-        # get & sign host pub key encrypted even ids
-        host_pubkey_ids_list = self.get_host_pubkey_ids()
-        guest_sign_host_ids_list = self.sign_host_ids(host_pubkey_ids_list)
-        # send signed host even ids
-        for i, host_party_id in enumerate(self.host_party_id_list):
-            self.transfer_variable.guest_sign_host_ids.remote(guest_sign_host_ids_list[i],
-                                                              role=consts.HOST,
-                                                              idx=i)
-            LOGGER.info(f"Remote guest_sign_host_ids to Host {host_party_id}.")
-
-        # get prvkey encrypted odd ids from host
-        host_prvkey_ids_list = self.get_host_prvkey_ids()
-
-        # Recv host signed odd ids
-        # table(guest_pubkey_id, host signed odd ids)
-        recv_host_sign_guest_ids_list = self.transfer_variable.host_sign_guest_ids.get(idx=-1)
-        LOGGER.info("Get host_sign_guest_ids from Host")
-
-        # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
-        # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
-                                    for i, v in enumerate(pubkey_ids_process_list)]
-        # table(hash(guest_ids_process/r), sid))
-        sid_host_sign_guest_ids_list = [g.map(lambda k, v: (v[1], v[0])) for g in host_sign_guest_ids_list]
-
-        # get intersect odd ids
-        # intersect table(hash(guest_ids_process/r), sid)
-        encrypt_intersect_odd_ids_list = [v.join(host_prvkey_ids_list[i], lambda sid, h: sid) for i, v in
-                                          enumerate(sid_host_sign_guest_ids_list)]
         intersect_odd_ids = self.filter_intersect_ids(encrypt_intersect_odd_ids_list)
-        intersect_even_ids = self.get_host_intersect_ids(prvkey_ids_process_pair_list)
+        intersect_even_ids = self.filter_intersect_ids([even_ids_pair for _, even_ids_pair in pipeline_results])
         intersect_ids = intersect_odd_ids.union(intersect_even_ids)
         if self.sync_intersect_ids:
             self.send_intersect_ids(encrypt_intersect_odd_ids_list, intersect_odd_ids)
@@ -166,6 +223,39 @@ class RsaIntersectionGuest(RsaIntersect):
 
         return intersect_ids
 
+    def unified_host_pipeline(self, hash_data_instances, idx):
+        """
+        id exchange with host idx of unified calculation, independent of other hosts
+
+        Returns
+        -------
+        encrypt intersect ids table(hash(guest_ids_process/r), sid)
+        """
+        pubkey_ids_process = self.pubkey_id_process(hash_data_instances,
+                                                    fraction=self.random_base_fraction,
+                                                    random_bit=self.random_bit,
+                                                    rsa_e=self.rcv_e[idx],
+                                                    rsa_n=self.rcv_n[idx])
+        mask_guest_id = pubkey_ids_process.mapValues(lambda v: 1)
+        self.transfer_variable.guest_pubkey_ids.remote(mask_guest_id,
+                                                       role=consts.HOST,
+                                                       idx=idx)
+        LOGGER.info(f"Remote guest_pubkey_ids to Host {idx}")
+
+        if self.intersect_cache_param.use_cache:
+            host_prvkey_ids = self.get_cached_host_prvkey_ids(idx)
+        elif self.filter_params.use_filter:
+            host_prvkey_ids = self.get_host_filter(idx=idx)
+        else:
+            host_prvkey_ids = self.get_host_prvkey_ids(idx=idx)
+
+        sid_host_sign_guest_ids = self.unblind_host_sign_guest_ids(pubkey_ids_process, idx)
+        if isinstance(host_prvkey_ids, BloomFilter):
+            host_prvkey_ids = self.verify_filter_candidates(sid_host_sign_guest_ids, host_prvkey_ids, idx)
+
+        # intersect table(hash(guest_ids_process/r), sid)
+        return sid_host_sign_guest_ids.join(host_prvkey_ids, lambda sid, h: sid)
+
     def unified_calculation_process(self, data_instances):
         LOGGER.info("RSA intersect using unified calculation.")
         # generate r
@@ -180,46 +270,18 @@ class RsaIntersectionGuest(RsaIntersect):
         self.rcv_e = [int(public_key["e"]) for public_key in public_keys]
         self.rcv_n = [int(public_key["n"]) for public_key in public_keys]
 
-        pubkey_ids_process_list = [self.pubkey_id_process(data_instances,
-                                                          fraction=self.random_base_fraction,
-                                                          random_bit=self.random_bit,
-                                                          rsa_e=self.rcv_e[i],
-                                                          rsa_n=self.rcv_n[i],
-                                                          hash_operator=self.first_hash_operator,
-                                                          salt=self.salt) for i in range(len(self.rcv_e))]
-        LOGGER.info(f"Finish pubkey_ids_process")
-
-        for i, guest_id in enumerate(pubkey_ids_process_list):
-            mask_guest_id = guest_id.mapValues(lambda v: 1)
-            self.transfer_variable.guest_pubkey_ids.remote(mask_guest_id,
-                                                           role=consts.HOST,
-                                                           idx=i)
-            LOGGER.info("Remote guest_pubkey_ids to Host {}".format(i))
-
-        host_prvkey_ids_list = self.get_host_prvkey_ids()
-        LOGGER.info("Get host_prvkey_ids")
-
-        # Recv signed guest ids
-        # table(r^e % n *hash(sid), guest_id_process)
-        recv_host_sign_guest_ids_list = self.transfer_variable.host_sign_guest_ids.get(idx=-1)
-        LOGGER.info("Get host_sign_guest_ids from Host")
+        if self.intersect_cache_param.use_cache:
+            self.send_cache_version_info()
 
-        # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
-        # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
-                                    for i, v in enumerate(pubkey_ids_process_list)]
-
-        # table(hash(guest_ids_process/r), sid))
-        sid_host_sign_guest_ids_list = [g.map(lambda k, v: (v[1], v[0])) for g in host_sign_guest_ids_list]
+        # H(k), (k, None), hashed once and shared by all hosts
+        first_hash_operator = self.first_hash_operator
+        salt = self.salt
+        hash_data_instances = data_instances.map(
+            lambda k, v: (int(Intersect.hash(k, first_hash_operator, salt), 16), (k, None)))
 
-        # intersect table(hash(guest_ids_process/r), sid)
-        encrypt_intersect_ids_list = [v.join(host_prvkey_ids_list[i], lambda sid, h: sid) for i, v in
-                                      enumerate(sid_host_sign_guest_ids_list)]
+        encrypt_intersect_ids_list = self.run_host_pipelines(
+            functools.partial(self.unified_host_pipeline, hash_data_instances))
+        LOGGER.info("Finish id exchange with all hosts")
 
         intersect_ids = self.filter_intersect_ids(encrypt_intersect_ids_list)
         if self.sync_intersect_ids:
@@ -14,9 +14,9 @@
 #  limitations under the License.
 #
 
-import gmpy2
-
+from federatedml.secureprotol import gmpy_math
 from federatedml.statistic.intersect import RawIntersect, RsaIntersect
+from federatedml.statistic.intersect.bloom_filter import build_filter
 from federatedml.util import consts, LOGGER
 
 
@@ -25,6 +25,102 @@ class RsaIntersectionHost(RsaIntersect):
         super().__init__()
         self.role = consts.HOST
 
+        # parameter for intersection cache
+        self.cache_namespace = None
+        self.cache_version = None
+
+    def get_cached_protocol_key(self):
+        """
+        reuse rsa key of current cache version, new key is generated if no cache exists
+        """
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        self.cache_namespace = self.get_cache_namespace(self.host_party_id)
+        self.cache_version = cache_utils.get_current_version(self.cache_namespace)
+        rsa_key = None
+        if self.cache_version is not None:
+            rsa_key = cache_utils.get_rsa(host_party_id=self.host_party_id,
+                                          id_type=self.intersect_cache_param.id_type,
+                                          encrypt_type=self.intersect_cache_param.encrypt_type,
+                                          tag=self.get_cache_tag(),
+                                          namespace=self.cache_namespace,
+                                          version=self.cache_version)
+        if rsa_key is None:
+            LOGGER.info("Use cache but can not find any version in cache, generate protocol key.")
+            self.cache_version = None
+            return self.generate_protocol_key()
+
+        LOGGER.info(f"Reuse protocol key of cache version {self.cache_version}.")
+        if rsa_key.get("rsa_p") and rsa_key.get("rsa_q"):
+            self.crt_key = gmpy_math.crt_key(rsa_key["rsa_d"], rsa_key["rsa_p"], rsa_key["rsa_q"])
+        return rsa_key["rsa_e"], rsa_key["rsa_d"], rsa_key["rsa_n"]
+
+    def store_cache(self, id_library):
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        prev_version = self.cache_version
+        self.cache_version = cache_utils.gen_cache_version()
+        cache_utils.store_cache(id_library, self.tracker, self.cache_namespace, self.cache_version)
+
+        rsa_key = {"rsa_e": self.e, "rsa_d": self.d, "rsa_n": self.n}
+        if self.crt_key is not None:
+            rsa_key["rsa_p"], rsa_key["rsa_q"] = self.crt_key[2], self.crt_key[3]
+        cache_utils.store_rsa(host_party_id=self.host_party_id,
+                              id_type=self.intersect_cache_param.id_type,
+                              encrypt_type=self.intersect_cache_param.encrypt_type,
+                              tag=self.get_cache_tag(),
+                              namespace=self.cache_namespace,
+                              version=self.cache_version,
+                              rsa=rsa_key)
+        LOGGER.info(f"Store id library of cache version {self.cache_version}.")
+
+        if prev_version is not None:
+            cache_utils.clean_cache(self.cache_namespace, prev_version)
+            cache_utils.clean_rsa(self.cache_namespace, prev_version)
+
+    def cal_cached_prvkey_ids_process_pair(self, data_instances):
+        """
+        id library table(sid, prvkey processed id) is cached by version, only ids not in cache are processed;
+        a new version is stored if any id is added or removed.
+        returns table(prvkey processed id, sid) and whether guest holds the same version
+        """
+        from federatedml.statistic.intersect.rsa_cache import cache_utils
+        cache = None
+        if self.cache_version is not None:
+            cache = cache_utils.load_cache(self.cache_namespace, self.cache_version)
+
+        if cache is None:
+            id_library = self.cal_prvkey_ids_process_pair(data_instances,
+                                                          self.d,
+                                                          self.n,
+                                                          self.first_hash_operator,
+                                                          self.crt_key).map(lambda h, sid: (sid, h))
+            self.store_cache(id_library)
+        else:
+            added_ids = data_instances.subtractByKey(cache)
+            added_count = added_ids.count()
+            removed_count = cache.subtractByKey(data_instances).count()
+            LOGGER.info(f"Compare with cache version {self.cache_version}, "
+                        f"{added_count} ids added, {removed_count} ids removed.")
+            if added_count or removed_count:
+                added_library = self.cal_prvkey_ids_process_pair(added_ids,
+                                                                 self.d,
+                                                                 self.n,
+                                                                 self.first_hash_operator,
+                                                                 self.crt_key).map(lambda h, sid: (sid, h))
+                id_library = cache.join(data_instances, lambda h, v: h).union(added_library)
+                self.store_cache(id_library)
+            else:
+                id_library = cache
+
+        guest_cache_version = self.transfer_variable.cache_version_info.get(idx=0)
+        is_version_match = guest_cache_version.get("version") == self.cache_version
+        version_match_info = {"version_match": is_version_match, "version": self.cache_version}
+        self.transfer_variable.cache_version_match_info.remote(version_match_info,
+                                                               role=consts.GUEST,
+                                                               idx=0)
+        LOGGER.info(f"Remote cache version match info: {version_match_info} to Guest.")
+
+        return id_library.map(lambda sid, h: (h, sid)), is_version_match
+
     def split_calculation_process(self, data_instances):
         LOGGER.info("RSA intersect using split calculation.")
         # split data
@@ -71,7 +167,8 @@ class RsaIntersectionHost(RsaIntersect):
         LOGGER.info("Remote host_pubkey_ids to Guest")
 
         # encrypt & send prvkey-encrypted host odd ids to guest
-        prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(sid_hash_odd, self.d, self.n)
+        prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(sid_hash_odd, self.d, self.n,
+                                                                   crt_key=self.crt_key)
         prvkey_ids_process = prvkey_ids_process_pair.mapValues(lambda v: 1)
 
         self.transfer_variable.host_prvkey_ids.remote(prvkey_ids_process,
@@ -82,7 +179,7 @@ class RsaIntersectionHost(RsaIntersect):
         # get & sign guest pubkey-encrypted odd ids
         guest_pubkey_ids = self.transfer_variable.guest_pubkey_ids.get(idx=0)
         LOGGER.info(f"Get guest_pubkey_ids from guest")
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k, self.d, self.n)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.crt_key)
         LOGGER.debug(f"host sign guest_pubkey_ids")
         # send signed guest odd ids
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
@@ -99,11 +196,11 @@ class RsaIntersectionHost(RsaIntersect):
         LOGGER.info(f"Get guest_sign_host_ids from Guest.")
         guest_sign_host_ids = pubkey_ids_process.join(recv_guest_sign_host_ids,
                                                       lambda g, r: (g[0],
-                                                                    RsaIntersectionHost.hash(gmpy2.divm(int(r),
-                                                                                                        int(g[1]),
-                                                                                                        self.rcv_n),
-                                                                                             self.final_hash_operator,
-                                                                                             self.rsa_params.salt)))
+                                                                    RsaIntersectionHost.unblind_hash(r,
+                                                                                                     g[1],
+                                                                                                     self.rcv_n,
+                                                                                                     self.final_hash_operator,
+                                                                                                     self.rsa_params.salt)))
         sid_guest_sign_host_ids = guest_sign_host_ids.map(lambda k, v: (v[1], v[0]))
 
         encrypt_intersect_even_ids = sid_guest_sign_host_ids.join(guest_prvkey_ids, lambda sid, h: sid)
@@ -127,8 +224,12 @@ class RsaIntersectionHost(RsaIntersect):
 
     def unified_calculation_process(self, data_instances):
         LOGGER.info("RSA intersect using unified calculation.")
+        use_cache = self.intersect_cache_param.use_cache
         # generate rsa keys
-        self.e, self.d, self.n = self.generate_protocol_key()
+        if use_cache:
+            self.e, self.d, self.n = self.get_cached_protocol_key()
+        else:
+            self.e, self.d, self.n = self.generate_protocol_key()
         LOGGER.info("Generate protocol key!")
         public_key = {"e": self.e, "n": self.n}
 
@@ -138,28 +239,52 @@ class RsaIntersectionHost(RsaIntersect):
                                                   idx=0)
         LOGGER.info("Remote public key to Guest.")
         # hash host ids
-        prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(data_instances,
-                                                                   self.d,
-                                                                   self.n,
-                                                                   self.first_hash_operator)
-
-        prvkey_ids_process = prvkey_ids_process_pair.mapValues(lambda v: 1)
-        self.transfer_variable.host_prvkey_ids.remote(prvkey_ids_process,
+        is_version_match = False
+        if use_cache:
+            prvkey_ids_process_pair, is_version_match = self.cal_cached_prvkey_ids_process_pair(data_instances)
+        else:
+            prvkey_ids_process_pair = self.cal_prvkey_ids_process_pair(data_instances,
+                                                                       self.d,
+                                                                       self.n,
+                                                                       self.first_hash_operator,
+                                                                       self.crt_key)
+
+        use_filter = self.filter_params.use_filter and not is_version_match
+        if is_version_match:
+            LOGGER.info("Guest holds host_ids_process of same cache version, skip remote.")
+        elif use_filter:
+            host_filter = build_filter(prvkey_ids_process_pair, self.filter_params.false_positive_rate)
+            self.transfer_variable.host_filter.remote(host_filter,
                                                       role=consts.GUEST,
                                                       idx=0)
-        LOGGER.info("Remote host_ids_process to Guest.")
+            LOGGER.info("Remote host_ids_process filter to Guest.")
+        else:
+            prvkey_ids_process = prvkey_ids_process_pair.mapValues(lambda v: 1)
+            self.transfer_variable.host_prvkey_ids.remote(prvkey_ids_process,
+                                                          role=consts.GUEST,
+                                                          idx=0)
+            LOGGER.info("Remote host_ids_process to Guest.")
 
         # Recv guest ids
         guest_pubkey_ids = self.transfer_variable.guest_pubkey_ids.get(idx=0)
         LOGGER.info("Get guest_pubkey_ids from guest")
 
         # Process(signs) guest ids and return to guest
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k, self.d, self.n)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.crt_key)
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
                                                           role=consts.GUEST,
                                                           idx=0)
         LOGGER.info("Remote host_sign_guest_ids_process to Guest.")
 
+        if use_filter:
+            # keep only filter candidates that are really host ids
+            guest_filter_candidates = self.transfer_variable.guest_filter_candidates.get(idx=0)
+            host_filter_verified = guest_filter_candidates.join(prvkey_ids_process_pair, lambda c, h: 1)
+            self.transfer_variable.host_filter_verified.remote(host_filter_verified,
+                                                               role=consts.GUEST,
+                                                               idx=0)
+            LOGGER.info("Remote verified filter candidates to Guest.")
+
         # recv intersect ids
         intersect_ids = None
         if self.sync_intersect_ids:
@@ -170,6 +170,7 @@ class IntersectHost(IntersectModelBase):
 
         if self.model_param.intersect_method == "rsa":
             self.intersection_obj = RsaIntersectionHost()
+            self.intersection_obj.tracker = self.tracker
 
         elif self.model_param.intersect_method == "raw":
             self.intersection_obj = RawIntersectionHost()
@@ -195,6 +196,7 @@ class IntersectGuest(IntersectModelBase):
         if self.model_param.intersect_method == "rsa":
             self.intersection_obj = RsaIntersectionGuest()
             self.intersection_obj.guest_party_id = self.guest_party_id
+            self.intersection_obj.tracker = self.tracker
 
         elif self.model_param.intersect_method == "raw":
             self.intersection_obj = RawIntersectionGuest()
@@ -13,15 +13,13 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
-import datetime
-import time
+import hashlib
+import json
 
-from fate_arch.session import computing_session as session
-from arch.api.utils.core_utils import current_timestamp
-from arch.api.utils import version_control
-from arch.api.utils.dtable_utils import get_table_info, gen_party_version
+from fate_arch import storage
+from fate_arch.common.base_utils import current_timestamp, fate_uuid
+from fate_arch.session import get_latest_opened
 from federatedml.statistic.intersect.rsa_cache.db_models import DB, IdLibraryCacheInfo, init_database_tables
-from federatedml.statistic.intersect.rsa_cache.redis_adaptor import RedisAdaptor
 from federatedml.util import LOGGER
 
 '''
@@ -31,34 +29,40 @@ from federatedml.util import LOGGER
 '''
 
 '''
-return: a dictionary contains table_name and namespace, 
+return: name of the latest cache table in namespace, None if no cache exists
 '''
-def host_get_current_verison(host_party_id, id_type, encrypt_type, tag, timeout=600):
-    return get_current_version(id_type, encrypt_type, tag, host_party_id, timeout=timeout)
+def get_current_version(namespace):
+    metas = storage.StorageTableMeta.query_table_meta(filter_fields=dict(namespace=namespace))
+    if not metas:
+        LOGGER.info('no cache exists, namespace={}.'.format(namespace))
+        return None
+    version = max(metas, key=lambda meta: meta.f_create_time).f_name
+    LOGGER.info('cache exists, namespace={}, version={}.'.format(namespace, version))
+    return version
 
 
 '''
-return: a dictionary contains table_name and namespace, 
+return: computing table of cache, None if cache of version not exists
 '''
-def guest_get_current_version(host_party_id, guest_party_id, id_type, encrypt_type, tag, timeout=600):
-    return get_current_version(id_type, encrypt_type, tag, host_party_id, guest_party_id=guest_party_id, timeout=timeout)
+def load_cache(namespace, version):
+    meta = storage.StorageTableMeta(name=version, namespace=namespace)
+    if meta is None:
+        LOGGER.info('cache table not exists, namespace={}, version={}.'.format(namespace, version))
+        return None
+    return get_latest_opened().computing.load(meta.get_address(),
+                                              schema=meta.get_schema(),
+                                              partitions=meta.get_partitions())
+
+
+def store_cache(table, tracker, namespace, version):
+    LOGGER.info('store cache table, namespace={}, version={}.'.format(namespace, version))
+    tracker.job_tracker.save_as_table(table, version, namespace)
 
 
 '''
-return: a dictionary contains rsa_n, rsa_e, and rsa_d
+return: a dictionary contains rsa_n, rsa_e, rsa_d, and rsa_p, rsa_q if stored
 '''
-def get_rsa_of_current_version(host_party_id, id_type, encrypt_type, tag, timeout=60):
-    table_info = host_get_current_verison(host_party_id, id_type, encrypt_type, tag, timeout=timeout)
-    if table_info is None:
-        LOGGER.info('no cache exists.')
-        return None
-    namespace = table_info.get('namespace')
-    version = table_info.get('table_name')
-    if namespace is None or version is None:
-        LOGGER.info('host_get_current_verison return None, partyid={}, id_type={}, encrypt_type={}, tag={}.'.format(host_party_id, \
-            id_type, encrypt_type, tag))
-        return None
-
+def get_rsa(host_party_id, id_type, encrypt_type, tag, namespace, version):
     init_database_tables()
     with DB.connection_context():
         LOGGER.info('query cache info, partyid={}, id_type={}, encrypt_type={}, namespace={}, version={}, tag={}'.format(host_party_id, \
@@ -68,8 +72,8 @@ def get_rsa_of_current_version(host_party_id, id_type, encrypt_type, tag, timeou
             IdLibraryCacheInfo.f_tag == tag, IdLibraryCacheInfo.f_namespcae == namespace, IdLibraryCacheInfo.f_version == version)
         if infos:
             info = infos[0]
-            rsa_key = {'rsa_n': info.f_rsa_key_n, 'rsa_e': info.f_rsa_key_e, 'rsa_d': info.f_rsa_key_d}
-            LOGGER.debug(rsa_key)
+            rsa_key = {'rsa_n': int(info.f_rsa_key_n), 'rsa_e': int(info.f_rsa_key_e), 'rsa_d': int(info.f_rsa_key_d)}
+            rsa_key.update(_load_rsa_crt_primes(info.f_description))
             return rsa_key
         else:
             LOGGER.info('query cache info return nil, partyid={}, id_type={}, encrypt_type={}, namespace={}, version={}, tag={}'.format( \
@@ -77,18 +81,6 @@ def get_rsa_of_current_version(host_party_id, id_type, encrypt_type, tag, timeou
             return None
 
 
-def store_cache(dtable, guest_party_id, host_party_id, version, id_type, encrypt_type, tag='Za', namespace=None):
-    if namespace is None:
-        namespace = gen_cache_namespace(id_type, encrypt_type, tag, host_party_id, guest_party_id=guest_party_id)
-    table_config = {}
-    table_config['gen_table_info'] = True
-    table_config['namespace'] = namespace
-    table_config['table_name'] = version
-    LOGGER.info(table_config)
-    version, namespace = get_table_info(config=table_config, create=True)
-    return save_data(dtable, namespace, version)
-    
-
 def store_rsa(host_party_id, id_type, encrypt_type, tag, namespace, version, rsa):
     init_database_tables()
     with DB.connection_context():
@@ -113,6 +105,7 @@ def store_rsa(host_party_id, id_type, encrypt_type, tag, namespace, version, rsa
         info.f_rsa_key_n = str(rsa.get('rsa_n'))
         info.f_rsa_key_d = str(rsa.get('rsa_d'))
         info.f_rsa_key_e = str(rsa.get('rsa_e'))
+        info.f_description = _dump_rsa_crt_primes(rsa)
         info.f_create_time = current_timestamp()
         if is_insert:
             info.save(force_insert=True)
@@ -120,16 +113,12 @@ def store_rsa(host_party_id, id_type, encrypt_type, tag, namespace, version, rsa
             info.save()
 
 
-def clean_all_cache(host_party_id, id_type, encrypt_type, tag='Za', guest_party_id=None):
-    namespace = gen_cache_namespace(id_type, encrypt_type, tag, host_party_id, guest_party_id=guest_party_id)
-    session.cleanup(name='*', namespace=namespace, persistent=True)
-    version_table = version_control.get_version_table(data_table_namespace=namespace)
-    version_table.destroy()
-
-
 def clean_cache(namespace, version):
-    session.cleanup(name=version, namespace=namespace, persistent=True)
-    version_control.delete_version(version, namespace)
+    LOGGER.info('clean cache table, namespace={}, version={}.'.format(namespace, version))
+    with storage.Session.build(name=version, namespace=namespace) as storage_session:
+        table = storage_session.get_table()
+        if table is not None:
+            table.destroy()
 
 
 def clean_all_rsa(host_party_id, id_type, encrypt_type, tag='Za'):
@@ -162,69 +151,33 @@ def gen_cache_namespace(id_type, encrypt_type, tag, host_party_id, guest_party_i
     return '#'.join([data_type, str(host_party_id), str(guest_party_id), id_type, encrypt_type, tag])
 
 
-def get_current_version(id_type, encrypt_type, tag, host_party_id, guest_party_id=None, timeout=600):
-    config = {}
-    config['gen_table_info'] = True
-    config['namespace'] = gen_cache_namespace(id_type, encrypt_type, tag, host_party_id, guest_party_id=guest_party_id)
-
-    LOGGER.info(config)
-    table_info = get_table_info_without_create(table_config=config)
-    LOGGER.info(table_info)
-    
-    if table_info.get('table_name'):
-        LOGGER.info('table exists, namepsace={}, version={}.'.format(table_info.get('namespace'), table_info.get('table_name')))
-        return table_info
-    
-    redis_adapter = RedisAdaptor()
-    cache_job = redis_adapter.get(config['namespace'])
-    if cache_job is None:
-        LOGGER.info('neighter table, nor cache job exists, namepsace={}.'.format(config['namespace']))
-        if guest_party_id:
-            redis_adapter.setex(config['namespace'], 'guest_get_current_version')
-        return None
-    
-    for i in range(timeout):
-        cache_job = redis_adapter.get(config['namespace'])
-        if cache_job is None:
-            table_info = get_table_info_without_create(table_config=config)
-            if table_info.get('table_name'):
-                LOGGER.info('after cache job finish, get table info, namepsace={}, version={}.'.format(table_info.get('namespace'), table_info.get('table_name')))
-                return table_info
-            else:
-                LOGGER.info('after cache job finish, table not exist, namepsace={}.'.format(config['namespace']))
-                return None
-        time.sleep(1)
-    LOGGER.info('wait cache job timeout, get version fail, namepsace={}.'.format(config['namespace']))
-    return None
-
-
-def save_data(data_inst, namespace, version):
-    redis_adapter = RedisAdaptor()
-    redis_adapter.setex(namespace, version)
-
-    persistent_table = data_inst.save_as(namespace=namespace, name=version)
-    LOGGER.info("save data to namespace={}, name={}".format(persistent_table._namespace, persistent_table._name))
-
-    session.save_data_table_meta(
-        {'schema': data_inst.schema, 'header': data_inst.schema.get('header', [])},
-        data_table_namespace=persistent_table._namespace, data_table_name=persistent_table._name)
-
-    version_log = "[AUTO] save data at %s." % datetime.datetime.now()
-    version_control.save_version(name=persistent_table._name, namespace=persistent_table._namespace, version_log=version_log)
-
-    redis_adapter.delete(namespace)
-
-    LOGGER.info('save table done, namepsace={}, version={}.'.format(persistent_table._namespace, persistent_table._name))
-    return {'table_name': persistent_table._name, 'namespace': persistent_table._namespace}
-
-
-def get_table_info_without_create(table_config):
-    table_name, namespace = get_table_info(config=table_config, create=False)
-    return {'table_name': table_name, 'namespace': namespace}
-
-def gen_cache_version(namespace, create=False):
-    return gen_party_version(namespace=namespace, create=create)
+'''
+cached ids are valid only for the same hash methods and salt, a digest of them is appended to tag
+'''
+def gen_cache_tag(tag, hash_method, final_hash_method, salt):
+    digest = hashlib.md5('#'.join([hash_method, final_hash_method, salt]).encode('utf-8')).hexdigest()
+    return '_'.join([tag, digest[:8]])
 
 
+def gen_cache_version():
+    return fate_uuid()
 
 
+'''
+p and q of rsa key are kept as json in f_description of existing cache info table, so no schema change is needed;
+rows without them, e.g. stored by earlier versions, sign without crt
+'''
+def _dump_rsa_crt_primes(rsa):
+    if rsa.get('rsa_p') and rsa.get('rsa_q'):
+        return json.dumps({'rsa_p': str(rsa.get('rsa_p')), 'rsa_q': str(rsa.get('rsa_q'))})
+    return ''
+
+
+def _load_rsa_crt_primes(description):
+    try:
+        primes = json.loads(description) if description else {}
+    except ValueError:
+        return {}
+    if not isinstance(primes, dict) or not primes.get('rsa_p') or not primes.get('rsa_q'):
+        return {}
+    return {'rsa_p': int(primes['rsa_p']), 'rsa_q': int(primes['rsa_q'])}
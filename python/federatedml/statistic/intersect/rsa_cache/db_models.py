@@ -23,8 +23,8 @@ from playhouse.pool import PooledMySQLDatabase
 from playhouse.apsw_ext import APSWDatabase
 
 from federatedml.util import LOGGER
-from arch.api.utils.core_utils import current_timestamp
 from fate_arch.common import WorkMode
+from fate_arch.common.base_utils import current_timestamp
 from fate_flow.settings import DATABASE, WORK_MODE, stat_logger
 
 
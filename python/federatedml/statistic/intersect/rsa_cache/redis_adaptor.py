@@ -14,8 +14,9 @@
 #  limitations under the License.
 #
 import os
-from arch.api.utils import conf_utils
 import redis
+
+from fate_arch.common import conf_utils
 from federatedml.util import LOGGER
 
 
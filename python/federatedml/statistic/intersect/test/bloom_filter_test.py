@@ -0,0 +1,62 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+import uuid
+
+from fate_arch.session import computing_session as session
+
+from federatedml.statistic.intersect.bloom_filter import BloomFilter, build_filter, filter_candidates
+
+
+class TestBloomFilter(unittest.TestCase):
+    def setUp(self):
+        self.jobid = str(uuid.uuid1())
+        session.init(self.jobid)
+
+    def test_no_false_negative(self):
+        keys = [str(i) for i in range(1000)]
+        bloom = BloomFilter.create(len(keys), 0.01).add_all(keys)
+        self.assertTrue(bloom.contains_all(keys).all())
+        self.assertIn("1", bloom)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter.create(1000, 0.01).add_all(str(i) for i in range(1000))
+        hits = bloom.contains_all(str(i) for i in range(1000, 11000))
+        self.assertLess(hits.mean(), 0.03)
+
+    def test_merge(self):
+        bloom = BloomFilter.create(100, 0.01)
+        other = bloom.empty_like().add_all(["a", "b"])
+        bloom.add_all(["c"]).merge(other)
+        self.assertTrue(bloom.contains_all(["a", "b", "c"]).all())
+        with self.assertRaises(ValueError):
+            bloom.merge(BloomFilter(8, 1))
+
+    def test_filter_candidates(self):
+        table = session.parallelize([(str(i), 1) for i in range(100)], include_key=True, partition=2)
+        other = session.parallelize([(str(i), i) for i in range(50, 150)], include_key=True, partition=2)
+        bloom = build_filter(table, 0.001)
+        candidates = dict(filter_candidates(other, bloom).collect())
+        for i in range(50, 100):
+            self.assertEqual(candidates[str(i)], i)
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
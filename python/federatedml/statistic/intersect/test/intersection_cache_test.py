@@ -0,0 +1,181 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+from fate_arch.session import computing_session as session
+
+from federatedml.param.intersect_param import IntersectCache, IntersectParam
+from federatedml.secureprotol import gmpy_math
+
+CACHE_UTILS = "federatedml.statistic.intersect.rsa_cache.cache_utils"
+
+
+class TestRsaIntersectCache(unittest.TestCase):
+    def setUp(self):
+        self.jobid = str(uuid.uuid1())
+        session.init(self.jobid)
+
+        # cache_utils requires database of fate_flow, replaced by a mock in these tests
+        self.cache_utils = mock.MagicMock()
+        self.cache_utils.gen_cache_namespace.return_value = "ns"
+        import federatedml.statistic.intersect.rsa_cache as rsa_cache
+        self.patches = [mock.patch.dict(sys.modules, {CACHE_UTILS: self.cache_utils}),
+                        mock.patch.object(rsa_cache, "cache_utils", self.cache_utils, create=True)]
+        for patch in self.patches:
+            patch.start()
+
+        self.intersect_param = IntersectParam(intersect_cache_param=IntersectCache(use_cache=True))
+
+    def _host(self):
+        from federatedml.statistic.intersect.intersect_host import RsaIntersectionHost
+        host = RsaIntersectionHost()
+        host.load_params(self.intersect_param)
+        host.host_party_id = 10000
+        host.transfer_variable = mock.MagicMock()
+        host.tracker = mock.MagicMock()
+        return host
+
+    def _guest(self):
+        from federatedml.statistic.intersect.intersect_guest import RsaIntersectionGuest
+        guest = RsaIntersectionGuest()
+        guest.load_params(self.intersect_param)
+        guest.guest_party_id = 9999
+        guest.host_party_id_list = [10000]
+        guest.transfer_variable = mock.MagicMock()
+        guest.tracker = mock.MagicMock()
+        return guest
+
+    def data_to_table(self, ids):
+        return session.parallelize([(sid, 1) for sid in ids], include_key=True, partition=2)
+
+    def _id_library(self, host, ids):
+        # table(sid, prvkey processed id) as cached by host
+        return host.cal_prvkey_ids_process_pair(self.data_to_table(ids),
+                                                host.d,
+                                                host.n,
+                                                host.first_hash_operator,
+                                                host.crt_key).map(lambda h, sid: (sid, h))
+
+    def test_reuse_cached_key(self):
+        host = self._host()
+        e, d, n, crt_key = host.generate_rsa_crt_key(1024)
+        self.cache_utils.get_current_version.return_value = "v1"
+        self.cache_utils.get_rsa.return_value = {"rsa_e": e, "rsa_d": d, "rsa_n": n,
+                                                 "rsa_p": crt_key[2], "rsa_q": crt_key[3]}
+
+        with mock.patch.object(host, "generate_protocol_key") as generate_protocol_key:
+            self.assertTupleEqual(host.get_cached_protocol_key(), (e, d, n))
+            generate_protocol_key.assert_not_called()
+        self.assertEqual(host.cache_version, "v1")
+        self.assertTupleEqual(tuple(host.crt_key), tuple(gmpy_math.crt_key(d, crt_key[2], crt_key[3])))
+
+    def test_generate_key_without_cache(self):
+        host = self._host()
+        self.cache_utils.get_current_version.return_value = None
+
+        with mock.patch.object(host, "generate_protocol_key", return_value=(1, 2, 3)) as generate_protocol_key:
+            self.assertTupleEqual(host.get_cached_protocol_key(), (1, 2, 3))
+            generate_protocol_key.assert_called_once()
+        self.assertIsNone(host.cache_version)
+        self.cache_utils.get_rsa.assert_not_called()
+
+    def test_sign_added_ids_only(self):
+        host = self._host()
+        host.e, host.d, host.n, host.crt_key = host.generate_rsa_crt_key(1024)
+        host.cache_namespace, host.cache_version = "ns", "v1"
+        self.cache_utils.load_cache.return_value = self._id_library(host, ["a", "b", "c"])
+        self.cache_utils.gen_cache_version.return_value = "v2"
+        host.transfer_variable.cache_version_info.get.return_value = {"version": "v1"}
+
+        data_instances = self.data_to_table(["b", "c", "d", "e"])
+        with mock.patch.object(host, "cal_prvkey_ids_process_pair",
+                               wraps=host.cal_prvkey_ids_process_pair) as cal_prvkey_ids_process_pair:
+            prvkey_ids_process_pair, is_version_match = host.cal_cached_prvkey_ids_process_pair(data_instances)
+            cal_prvkey_ids_process_pair.assert_called_once()
+            signed_ids = cal_prvkey_ids_process_pair.call_args[0][0]
+            self.assertListEqual(sorted(k for k, _ in signed_ids.collect()), ["d", "e"])
+
+        # removed id is dropped, processed ids equal to processing all ids
+        expect = self._id_library(host, ["b", "c", "d", "e"]).map(lambda sid, h: (h, sid))
+        self.assertListEqual(sorted(prvkey_ids_process_pair.collect()), sorted(expect.collect()))
+
+        # library is stored as new version, previous one is cleaned
+        self.assertEqual(host.cache_version, "v2")
+        self.assertEqual(self.cache_utils.store_cache.call_args[0][2:], ("ns", "v2"))
+        self.assertEqual(self.cache_utils.store_rsa.call_args[1]["version"], "v2")
+        self.cache_utils.clean_cache.assert_called_once_with("ns", "v1")
+        self.cache_utils.clean_rsa.assert_called_once_with("ns", "v1")
+
+        # guest holds previous version, so ids are sent again
+        self.assertFalse(is_version_match)
+        host.transfer_variable.cache_version_match_info.remote.assert_called_once_with(
+            {"version_match": False, "version": "v2"}, role="guest", idx=0)
+
+    def test_unchanged_ids_match_version(self):
+        host = self._host()
+        host.e, host.d, host.n, host.crt_key = host.generate_rsa_crt_key(1024)
+        host.cache_namespace, host.cache_version = "ns", "v1"
+        cache = self._id_library(host, ["a", "b"])
+        self.cache_utils.load_cache.return_value = cache
+        host.transfer_variable.cache_version_info.get.return_value = {"version": "v1"}
+
+        with mock.patch.object(host, "cal_prvkey_ids_process_pair") as cal_prvkey_ids_process_pair:
+            prvkey_ids_process_pair, is_version_match = host.cal_cached_prvkey_ids_process_pair(
+                self.data_to_table(["a", "b"]))
+            cal_prvkey_ids_process_pair.assert_not_called()
+
+        self.assertTrue(is_version_match)
+        self.assertEqual(host.cache_version, "v1")
+        self.cache_utils.store_cache.assert_not_called()
+        self.assertListEqual(sorted(prvkey_ids_process_pair.collect()),
+                             sorted((h, sid) for sid, h in cache.collect()))
+
+    def test_guest_reject_mismatched_version(self):
+        guest = self._guest()
+        self.cache_utils.get_current_version.return_value = "v1"
+        guest.transfer_variable.cache_version_match_info.get.return_value = {"version_match": False, "version": "v2"}
+        host_prvkey_ids = self.data_to_table(["h1", "h2"])
+        guest.transfer_variable.host_prvkey_ids.get.return_value = host_prvkey_ids
+
+        self.assertIs(guest.get_cached_host_prvkey_ids(0), host_prvkey_ids)
+        self.cache_utils.load_cache.assert_not_called()
+        guest.transfer_variable.host_prvkey_ids.get.assert_called_once_with(idx=0)
+        self.cache_utils.store_cache.assert_called_once_with(host_prvkey_ids, guest.tracker, "ns", "v2")
+        self.cache_utils.clean_cache.assert_called_once_with("ns", "v1")
+
+    def test_guest_read_matched_version(self):
+        guest = self._guest()
+        guest.transfer_variable.cache_version_match_info.get.return_value = {"version_match": True, "version": "v1"}
+        cache = self.data_to_table(["h1", "h2"])
+        self.cache_utils.load_cache.return_value = cache
+
+        self.assertIs(guest.get_cached_host_prvkey_ids(0), cache)
+        self.cache_utils.load_cache.assert_called_once_with("ns", "v1")
+        guest.transfer_variable.host_prvkey_ids.get.assert_not_called()
+        self.cache_utils.store_cache.assert_not_called()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        session.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
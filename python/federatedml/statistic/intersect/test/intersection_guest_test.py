@@ -49,6 +49,15 @@ class TestRsaIntersectGuest(unittest.TestCase):
         gt = [(4, "id"), (5, "id"), (6, "id")]
         self.assertListEqual(list(res.collect()), gt)
 
+    def test_get_common_intersection(self):
+        D1 = self.data_to_table([(str(i), 1) for i in range(10)])
+        D2 = self.data_to_table([(str(i), 1) for i in range(5, 8)])
+        D3 = self.data_to_table([(str(i), 1) for i in range(6, 20)])
+
+        res = self.rsa_operator.get_common_intersection([D1, D2, D3])
+
+        self.assertListEqual(sorted(res.collect()), [("6", "id"), ("7", "id")])
+
     def test_hash(self):
         hash_operator = Hash("sha256")
         res = str(self.rsa_op2.hash("1", hash_operator))
@@ -42,6 +42,21 @@ class TestRsaIntersectHost(unittest.TestCase):
         res = self.rsa_operator.generate_rsa_key(1024)
         self.assertEqual(65537, res[0])
 
+    def test_func_sign_id_crt(self):
+        e, d, n, crt_key = self.rsa_operator.generate_rsa_crt_key(1024)
+        for hash_sid in [0, 1, crt_key[2], n - 1, 1234567890123456789]:
+            self.assertEqual(self.rsa_operator.sign_id(hash_sid, d, n),
+                             self.rsa_operator.sign_id(hash_sid, d, n, crt_key))
+
+    def test_func_unblind_hash(self):
+        e, d, n = self.rsa_operator.generate_rsa_key(1024)
+        hash_sid = 1234567890123456789
+        processed_id, (_, r_inv) = self.rsa_operator.pubkey_id_process_per(hash_sid, (hash_sid, 1), 128, e, n)
+        signed_id = self.rsa_operator.sign_id(processed_id, d, n)
+        self.assertEqual(self.rsa_operator.unblind_hash(signed_id, r_inv, n, self.rsa_operator.final_hash_operator),
+                         self.rsa_operator.final_hash(self.rsa_operator.sign_id(hash_sid, d, n),
+                                                      self.rsa_operator.final_hash_operator))
+
     def test_get_common_intersection(self):
         d1 = [(1, "a"), (2, "b"), (4, "c")]
         d2 = [(4, "a"), (5, "b"), (6, "c")]
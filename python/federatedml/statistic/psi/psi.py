@@ -1,6 +1,7 @@
 import functools
 import copy
 import numpy as np
+from federatedml.feature.binning.base_binning import BaseBinning
 from federatedml.feature.binning.quantile_binning import QuantileBinning
 from federatedml.param.feature_binning_param import FeatureBinningParam
 from federatedml.util import consts
@@ -17,77 +18,65 @@ from federatedml.util import abnormal_detection
 ROUND_NUM = 6
 
 
-def map_partition_handle(iterable, feat_num=10, max_bin_num=20, is_sparse=False, missing_val=NoneType()):
-
-    count_bin = np.zeros((feat_num, max_bin_num))
-    row_idx = np.array([i for i in range(feat_num)])
-
-    for k, v in iterable:
-        # last bin is for missing value
-        if is_sparse:
-            feature_dict = v.features.sparse_vec
-            arr = np.zeros(feat_num, dtype=np.int64) + max_bin_num - 1  # max_bin_num - 1 is the missing bin val
-            arr[list(feature_dict.keys())] = list(feature_dict.values())
-        else:
-            arr = v.features
-            arr[arr == missing_val] = max_bin_num - 1
-
-        count_bin[row_idx, arr.astype(np.int64)] += 1
-
-    return count_bin
-
-
-def map_partition_reduce(arr1, arr2):
-    return arr1 + arr2
-
-
-def psi_computer(expect_counter_list, actual_counter_list, expect_sample_count, actual_sample_count):
-
-    psi_rs = []
-    for exp_counter, acu_counter in zip(expect_counter_list, actual_counter_list):
-        feat_psi = {}
-        for key in exp_counter:
-            feat_psi[key] = psi_val(exp_counter[key]/expect_sample_count, acu_counter[key]/actual_sample_count)
-
-        total_psi = 0
-        for k in feat_psi:
-            total_psi += feat_psi[k]
-        feat_psi['total_psi'] = total_psi
-        psi_rs.append(feat_psi)
-
-    return psi_rs
-
-
-def psi_val(expected_perc, actual_perc):
-
-    if expected_perc == 0:
-        expected_perc = 1e-6
-    if actual_perc == 0:
-        actual_perc = 1e-6
-
-    return (actual_perc - expected_perc) * np.log(actual_perc / expected_perc)
-
-
-def psi_val_arr(expected_arr, actual_arr, sample_num):
-
-    expected_arr = expected_arr / sample_num
-    actual_arr = actual_arr / sample_num
+def map_partition_handle(iterable, sp_matrix=None, cols_idx=None, missing_bin_idx=20, is_sparse=False,
+                         missing_val=NoneType()):
+    """
+    count samples of a partition in bins of every feature. instances are stacked into a block and binned
+    column by column with np.searchsorted against stacked split points, then counted by a single np.bincount.
+    bin missing_bin_idx is for missing value, absent values of sparse instances are missing too
+    """
+    features = [v.features for k, v in iterable]
+    feat_num, bin_num = len(cols_idx), missing_bin_idx + 1
+    bin_matrix = np.full((len(features), feat_num), missing_bin_idx, dtype=np.int64)
+
+    if features and is_sparse:
+        col_pos = {col_idx: pos for pos, col_idx in enumerate(cols_idx)}
+        row_ids, positions, values = [], [], []
+        for row_id, sparse_vec in enumerate(features):
+            for col_idx, col_value in sparse_vec.get_all_data():
+                pos = col_pos.get(col_idx)
+                if pos is not None:
+                    row_ids.append(row_id)
+                    positions.append(pos)
+                    values.append(col_value)
+        row_ids, positions = np.array(row_ids, dtype=np.int64), np.array(positions, dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        is_normal = ~np.isnan(values)
+        bin_matrix[row_ids[is_normal], positions[is_normal]] = \
+            BaseBinning.get_bin_nums(values[is_normal], sp_matrix[positions[is_normal]])
+
+    elif features:
+        block = np.array(features)[:, cols_idx]
+        is_missing = BaseBinning.abnormal_mask(block.ravel(), [NoneType(), missing_val]).reshape(block.shape)
+        if block.dtype.kind not in 'biuf':
+            block = np.where(is_missing, np.nan, block)
+        block = block.astype(np.float64)
+        is_missing |= np.isnan(block)
+        for pos in range(feat_num):
+            bin_matrix[:, pos] = np.searchsorted(sp_matrix[pos], block[:, pos], side='left')
+        bin_matrix[is_missing] = missing_bin_idx
+
+    # offset bins of each feature so that all features are counted at once
+    flat_bins = (bin_matrix + np.arange(feat_num) * bin_num).ravel()
+    count_bin = np.bincount(flat_bins, minlength=feat_num * bin_num).reshape((feat_num, bin_num))
+
+    return count_bin, len(features)
+
+
+def map_partition_reduce(rs1, rs2):
+    return rs1[0] + rs2[0], rs1[1] + rs2[1]
+
+
+def psi_val_arr(expected_arr, actual_arr, expected_sample_num, actual_sample_num):
+
+    expected_arr = expected_arr / expected_sample_num
+    actual_arr = actual_arr / actual_sample_num
     expected_arr[expected_arr == 0] = 1e-6
     actual_arr[actual_arr == 0] = 1e-6
     psi_rs = (actual_arr - expected_arr) * np.log(actual_arr/expected_arr)
     return psi_rs
 
 
-def count_rs_to_dict(arrs):
-    dicts = []
-    for i in arrs:
-        rs_dict = {}
-        for k, v in enumerate(i):
-            rs_dict[k] = v
-        dicts.append(rs_dict)
-    return dicts
-
-
 def np_nan_to_nonetype(inst):
 
     arr = inst.features
@@ -110,9 +99,9 @@ class PSI(ModelBase):
         self.id_tag_mapping = {}
         self.count1, self.count2 = None, None
         self.actual_table, self.expect_table = None, None
-        self.data_bin1, self.data_bin2 = None, None
         self.bin_split_points = None
-        self.bin_sparse_points = None
+        self.model_split_points = None
+        self.missing_bin_idx = None
         self.psi_rs = None
         self.total_scores = None
         self.all_feature_list = None
@@ -202,20 +191,67 @@ class PSI(ModelBase):
 
         return rs_val_list, interval_list
 
-    @staticmethod
-    def count_dict_to_percentage(count_rs, sample_num):
-
-        for c in count_rs:
-            for k in c:
-                c[k] = c[k] / sample_num
-        return count_rs
-
     @staticmethod
     def convert_missing_val(table):
         new_table = table.mapValues(np_nan_to_nonetype)
         new_table.schema = table.schema
         return new_table
 
+    def load_model(self, model_dict):
+
+        if 'isometric_model' not in model_dict:
+            return
+
+        # reuse split points of a binning model instead of refitting quantiles on expect table
+        for cpn_name, model in model_dict['isometric_model'].items():
+            for name, model_pb in model.items():
+                if not name.endswith('Param'):
+                    continue
+                if model_pb.model_name != consts.BINNING_MODEL:
+                    raise ValueError('isometric model of psi should be a binning model, got {}'.format(
+                        model_pb.model_name))
+                binning_result = dict(model_pb.binning_result.binning_result)
+                self.model_split_points = {col_name: np.array(col_result.split_points)
+                                           for col_name, col_result in binning_result.items()}
+                LOGGER.info('load split points of {} features from binning model {}'.format(
+                    len(self.model_split_points), cpn_name))
+
+    def fit_split_points(self, expect_table):
+
+        if self.model_split_points is not None:
+            missing_cols = [col_name for col_name in self.all_feature_list
+                            if col_name not in self.model_split_points]
+            if missing_cols:
+                raise ValueError('features {} are not found in binning model'.format(missing_cols))
+            return self.model_split_points
+
+        if not self.is_sparse(expect_table):  # convert missing value: nan to NoneType
+            expect_table = self.convert_missing_val(expect_table)
+
+        abnormal_list = [NoneType()]
+        if not isinstance(self.dense_missing_val, NoneType):
+            abnormal_list.append(self.dense_missing_val)
+
+        param = FeatureBinningParam(method=consts.QUANTILE, bin_num=self.max_bin_num, local_only=True,
+                                    error=self.binning_error)
+        binning_obj = QuantileBinning(params=param, abnormal_list=abnormal_list, allow_duplicate=False)
+        split_points = binning_obj.fit_split_points(expect_table)
+        self.binning_obj = binning_obj
+
+        return split_points
+
+    def count_bins(self, table, sp_matrix):
+
+        header = table.schema['header']
+        count_func = functools.partial(map_partition_handle,
+                                       sp_matrix=sp_matrix,
+                                       cols_idx=[header.index(col_name) for col_name in self.all_feature_list],
+                                       missing_bin_idx=self.missing_bin_idx,
+                                       missing_val=self.dense_missing_val,
+                                       is_sparse=self.is_sparse(table))
+
+        return table.applyPartitions(count_func).reduce(map_partition_reduce)
+
     def fit(self, expect_table, actual_table):
 
         LOGGER.info('start psi computing')
@@ -238,72 +274,37 @@ class PSI(ModelBase):
         self.tag_id_mapping = {v: k for k, v in enumerate(self.all_feature_list)}
         self.id_tag_mapping = {k: v for k, v in enumerate(self.all_feature_list)}
 
-        if not self.is_sparse(expect_table):  # convert missing value: nan to NoneType
-            expect_table = self.convert_missing_val(expect_table)
-
-        if not self.is_sparse(actual_table):  # convert missing value: nan to NoneType
-            actual_table = self.convert_missing_val(actual_table)
-
         if not(self.check_table_content(expect_table) and self.check_table_content(actual_table)):
             raise ValueError('contents of input table must be instances of class "Instance"')
 
-        param = FeatureBinningParam(method=consts.QUANTILE, bin_num=self.max_bin_num, local_only=True,
-                                    error=self.binning_error)
-        binning_obj = QuantileBinning(params=param, abnormal_list=[NoneType()], allow_duplicate=False)
-        binning_obj.fit_split_points(expect_table)
-
-        data_bin, bin_split_points, bin_sparse_points = binning_obj.convert_feature_to_bin(expect_table)
-        LOGGER.debug('bin split points is {}, shape is {}'.format(bin_split_points, bin_split_points.shape))
-        self.binning_obj = binning_obj
-
-        self.data_bin1 = data_bin
-        self.bin_split_points = bin_split_points
-        self.bin_sparse_points = bin_sparse_points
-        LOGGER.debug('expect table binning done')
-
-        count_func1 = functools.partial(map_partition_handle,
-                                        feat_num=len(self.all_feature_list),
-                                        max_bin_num=self.max_bin_num + 1,  # an additional bin for missing value
-                                        missing_val=self.dense_missing_val,
-                                        is_sparse=self.is_sparse(self.data_bin1))
-
-        map_rs1 = self.data_bin1.applyPartitions(count_func1)
-        count1 = count_rs_to_dict(map_rs1.reduce(map_partition_reduce))
-
-        data_bin2, bin_split_points2, bin_sparse_points2 = binning_obj.convert_feature_to_bin(actual_table)
-        self.data_bin2 = data_bin2
-        LOGGER.debug('actual table binning done')
-
-        count_func2 = functools.partial(map_partition_handle,
-                                        feat_num=len(self.all_feature_list),
-                                        max_bin_num=self.max_bin_num + 1,  # an additional bin for missing value
-                                        missing_val=self.dense_missing_val,
-                                        is_sparse=self.is_sparse(self.data_bin2))
+        split_points = self.fit_split_points(expect_table)
+        self.bin_split_points = [split_points[col_name] for col_name in self.all_feature_list]
+        LOGGER.debug('bin split points is {}'.format(self.bin_split_points))
 
-        map_rs2 = self.data_bin2.applyPartitions(count_func2)
-        count2 = count_rs_to_dict(map_rs2.reduce(map_partition_reduce))
+        # an additional bin for missing value, after bins of all features
+        self.missing_bin_idx = max([self.max_bin_num] + [len(sp) for sp in self.bin_split_points])
+        sp_matrix = BaseBinning.split_points_matrix(self.bin_split_points)
 
+        # tables are binned and counted by partition blocks without materializing binned tables
+        (count1, expect_num), (count2, actual_num) = [self.count_bins(table, sp_matrix)
+                                                      for table in (expect_table, actual_table)]
         self.count1, self.count2 = count1, count2
 
         LOGGER.info('psi counting done')
 
         # compute psi from counting result
-        psi_result = psi_computer(count1, count2, expect_table.count(), actual_table.count())
-        self.psi_rs = psi_result
+        self.psi_rs = psi_val_arr(count1, count2, expect_num, actual_num)
 
         # get total psi score of features
-        total_scores = {}
-        for idx, rs in enumerate(self.psi_rs):
-            feat_name = self.id_tag_mapping[idx]
-            total_scores[feat_name] = rs['total_psi']
-        self.total_scores = total_scores
+        total_psi = self.psi_rs.sum(axis=1)
+        self.total_scores = {self.id_tag_mapping[idx]: total_psi[idx] for idx in self.id_tag_mapping}
 
         # id-feature mapping convert, str interval computation
-        self.str_intervals = self.get_string_interval(bin_split_points, self.id_tag_mapping,
-                                                      missing_bin_idx=self.max_bin_num)
+        self.str_intervals = self.get_string_interval(self.bin_split_points, self.id_tag_mapping,
+                                                      missing_bin_idx=self.missing_bin_idx)
 
-        self.interval_perc1 = self.count_dict_to_percentage(copy.deepcopy(count1), expect_table.count())
-        self.interval_perc2 = self.count_dict_to_percentage(copy.deepcopy(count2), actual_table.count())
+        self.interval_perc1 = count1 / expect_num
+        self.interval_perc2 = count2 / actual_num
 
         self.set_summary(self.generate_summary())
         LOGGER.info('psi computation done')
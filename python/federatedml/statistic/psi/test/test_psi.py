@@ -8,6 +8,8 @@ from federatedml.feature.instance import Instance
 from federatedml.feature.sparse_vector import SparseVector
 from federatedml.statistic.psi.psi import PSI
 from federatedml.param.psi_param import PSIParam
+from federatedml.protobuf.generated import feature_binning_param_pb2
+from federatedml.util import consts
 
 class TestPSI(unittest.TestCase):
 
@@ -64,6 +66,29 @@ class TestPSI(unittest.TestCase):
         psi.fit(self.sp_table1, self.sp_table2)
         print('dense testing done')
 
+    def test_binning_model_split_points(self):
+
+        split_points = [0.25, 0.5, 0.75, 1.0]
+        binning_result = {col: feature_binning_param_pb2.IVParam(split_points=split_points)
+                          for col in self.dense_table1.schema['header']}
+        model_param = feature_binning_param_pb2.FeatureBinningParam(
+            binning_result=feature_binning_param_pb2.FeatureBinningResult(binning_result=binning_result),
+            model_name=consts.BINNING_MODEL)
+
+        param = PSIParam()
+        psi = PSI()
+        psi._init_model(param)
+        psi.load_model({'isometric_model': {'binning_0': {'FeatureBinningParam': model_param}}})
+        psi.fit(self.dense_table1, self.dense_table2)
+
+        for table, count in [(self.dense_table1, psi.count1), (self.dense_table2, psi.count2)]:
+            features = np.array([inst.features for _, inst in table.collect()])
+            for idx in range(features.shape[1]):
+                expect_count = np.bincount(np.searchsorted(split_points[:-1], features[:, idx], side='left'),
+                                           minlength=psi.missing_bin_idx + 1)
+                self.assertTrue(np.array_equal(count[idx], expect_count))
+        print('binning model testing done')
+
 
 if __name__ == "__main__":
     unittest.main()
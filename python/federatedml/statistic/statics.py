@@ -14,17 +14,19 @@
 #  limitations under the License.
 #
 
+import collections
 import copy
 import functools
 import math
+import numbers
+import weakref
 
 import numpy as np
 
 from federatedml.feature.binning.quantile_binning import QuantileBinning
-from federatedml.feature.binning.quantile_summaries import QuantileSummaries
+from federatedml.feature.binning.quantile_summaries import QuantileSummaries, quantile_summary_factory
 from federatedml.feature.instance import Instance
 from federatedml.feature.sparse_vector import SparseVector
-from federatedml.param.feature_binning_param import FeatureBinningParam
 from federatedml.statistic import data_overview
 # from federatedml.statistic.feature_statistic import feature_statistic
 from federatedml.util import LOGGER
@@ -39,6 +41,9 @@ class SummaryStatistics(object):
         self.max_value = -np.inf * np.ones(length)
         self.min_value = np.inf * np.ones(length)
         self.count = np.zeros(length)
+        self.missing_count = np.zeros(length, dtype=np.int64)
+        self.zero_count = np.zeros(length, dtype=np.int64)
+        self.row_count = 0
         self.length = length
         self.stat_order = stat_order
         self.bias = bias
@@ -57,48 +62,100 @@ class SummaryStatistics(object):
 
         where i is the current count, and S_i is the current expectation of x
         """
-        if self.abnormal_list is None:
-            rows = np.array(rows, dtype=float)
-            self.count += 1
-            self.sum += rows
-            self.sum_square += rows ** 2
-            self.max_value = np.max([self.max_value, rows], axis=0)
-            self.min_value = np.min([self.min_value, rows], axis=0)
+        self.add_block([rows])
+
+    def add_block(self, block, missing_mask=None):
+        """
+        Add a block of rows at once, column by column in a vectorized way. Statistics are the same as
+        adding rows one by one, E(x^n) are updated as:
+        .. math::
+
+            (i-k)/i * S_{i-k} + 1/i * (x_1 + ... + x_k)
+
+        where k is the count of the block.
+
+        Values listed in abnormal_list are skipped. Missing values are nan values and positions marked in
+        missing_mask, such as absent values of sparse rows which are added as 0, the same as MissingStatistic,
+        so abnormal values are not counted as missing unless they are nan.
+        """
+        if not len(block):
+            return
+        values, valid = self._valid_block(block)
+
+        missing = np.isnan(values)
+        if missing_mask is not None:
+            missing |= np.asarray(missing_mask, dtype=bool)
+        self.missing_count += missing.sum(axis=0)
+        self.zero_count += ((values == 0) & valid & ~missing).sum(axis=0)
+        self.row_count += len(values)
+
+        count = valid.sum(axis=0)
+        last_count = self.count
+        self.count = self.count + count
+        self.max_value = np.maximum(self.max_value, np.where(valid, values, -np.inf).max(axis=0))
+        self.min_value = np.minimum(self.min_value, np.where(valid, values, np.inf).min(axis=0))
+
+        values = np.where(valid, values, 0)
+        self.sum += values.sum(axis=0)
+        self.sum_square += (values ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
             for m in range(3, self.stat_order + 1):
                 exp_sum_m = getattr(self, f"exp_sum_{m}")
-                exp_sum_m = (self.count - 1) / self.count * exp_sum_m + rows ** m / self.count
+                exp_sum_m = np.where(self.count > 0,
+                                     (exp_sum_m * last_count + (values ** m).sum(axis=0)) / self.count,
+                                     exp_sum_m)
                 setattr(self, f"exp_sum_{m}", exp_sum_m)
-        else:
-            for idx, value in enumerate(rows):
-                if value in self.abnormal_list:
-                    continue
-                try:
-                    value = float(value)
-                except ValueError as e:
-                    raise ValueError(f"In add func, value should be either a numeric input or be listed in "
-                                     f"abnormal list. Error info: {e}")
-                self.count[idx] += 1
-                self.sum[idx] += value
-                self.sum_square[idx] += value ** 2
-                self.max_value[idx] = np.max([self.max_value[idx], value])
-                self.min_value[idx] = np.min([self.min_value[idx], value])
-                for m in range(3, self.stat_order + 1):
-                    exp_sum_m = getattr(self, f"exp_sum_{m}")
-                    exp_sum_m[idx] = (self.count[idx] - 1) / self.count[idx] * \
-                                     exp_sum_m[idx] + rows[idx] ** m / self.count[idx]
-                    setattr(self, f"exp_sum_{m}", exp_sum_m)
+
+    def _valid_block(self, block):
+        """
+        convert block to a float matrix, along with a mask of values that are not in abnormal list
+        """
+        values = np.asarray(block)
+        if values.dtype.kind in "US":
+            values = np.array(block, dtype=object)
+        values = values.reshape(len(values), -1)
+
+        if values.dtype.kind in "biuf":
+            numeric_abnormal = [v for v in self.abnormal_list if isinstance(v, numbers.Number)] \
+                if self.abnormal_list is not None else []
+            if numeric_abnormal:
+                valid = ~np.isin(values, numeric_abnormal)
+            else:
+                valid = np.ones(values.shape, dtype=bool)
+            return values.astype(np.float64), valid
+
+        valid = np.ones(values.shape, dtype=bool)
+        float_values = np.zeros(values.shape)
+        for idx, value in np.ndenumerate(values):
+            if self.abnormal_list is not None and value in self.abnormal_list:
+                valid[idx] = False
+                if isinstance(value, float) and math.isnan(value):
+                    float_values[idx] = np.nan
+                continue
+            try:
+                float_values[idx] = float(value)
+            except ValueError as e:
+                raise ValueError(f"In add func, value should be either a numeric input or be listed in "
+                                 f"abnormal list. Error info: {e}")
+        return float_values, valid
 
     def merge(self, other):
         if self.stat_order != other.stat_order:
             raise AssertionError("Two merging summary should have same order.")
         self.sum += other.sum
         self.sum_square += other.sum_square
+        self.missing_count += other.missing_count
+        self.zero_count += other.zero_count
+        self.row_count += other.row_count
         self.max_value = np.max([self.max_value, other.max_value], axis=0)
         self.min_value = np.min([self.min_value, other.min_value], axis=0)
         for m in range(3, self.stat_order + 1):
             sum_m_1 = getattr(self, f"exp_sum_{m}")
             sum_m_2 = getattr(other, f"exp_sum_{m}")
-            exp_sum = (sum_m_1 * self.count + sum_m_2 * other.count) / (self.count + other.count)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                exp_sum = np.where(self.count + other.count > 0,
+                                   (sum_m_1 * self.count + sum_m_2 * other.count) / (self.count + other.count),
+                                   sum_m_1)
             setattr(self, f"exp_sum_{m}", exp_sum)
         self.count += other.count
         return self
@@ -111,6 +168,10 @@ class SummaryStatistics(object):
     def max(self):
         return self.max_value
 
+    @property
+    def missing_ratio(self):
+        return self.missing_count / self.row_count
+
     @property
     def min(self):
         return self.min_value
@@ -319,19 +380,34 @@ class MissingStatistic(object):
         return arr1 + arr2
 
 
+# statistics computed in current process, weakly keyed by table, so that summaries of the same table reuse them
+_STATICS_CACHE = weakref.WeakKeyDictionary()
+
+
+def _statics_cache_key(header, cols_index, abnormal_list):
+    try:
+        key = (tuple(header), tuple(cols_index), tuple(abnormal_list))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 class MultivariateStatisticalSummary(object):
     """
-
+    Statistics of columns of a table. Sums, moments, max and min value, missing and zero counts, label
+    histogram and, if with_quantile, quantile summaries are computed together through one traversal over
+    partition blocks. Results are cached with the table, so that other summaries of the same table created
+    later, by other components for example, reuse them instead of traversing again.
     """
 
     def __init__(self, data_instances, cols_index=-1, abnormal_list=None,
-                 error=consts.DEFAULT_RELATIVE_ERROR, stat_order=2, bias=True):
+                 error=consts.DEFAULT_RELATIVE_ERROR, stat_order=2, bias=True, with_quantile=False):
         self.finish_fit_statics = False  # Use for static data
-        # self.finish_fit_summaries = False   # Use for quantile data
-        self.binning_obj: QuantileBinning = None
         self.summary_statistics = None
+        self.quantile_summary_dict = None
+        self.label_histogram = None
         self.header = None
-        # self.quantile_summary_dict = {}
         self.cols_dict = {}
         # self.medians = None
         self.data_instances = data_instances
@@ -340,6 +416,9 @@ class MultivariateStatisticalSummary(object):
             abnormal_list = [abnormal_list]
 
         self.abnormal_list = abnormal_list
+        self.stat_order = stat_order
+        self.bias = bias
+        self.with_quantile = with_quantile
         self.__init_cols(data_instances, cols_index, stat_order, bias)
         self.label_summary = None
         self.error = error
@@ -360,31 +439,84 @@ class MultivariateStatisticalSummary(object):
 
     def _static_sums(self):
         """
-        Statics sum, sum_square, max_value, min_value,
-        so that variance is available.
+        Statics sum, sum_square, higher moments, max_value, min_value, missing and zero counts, label histogram
+        and quantile summaries if with_quantile, through one traversal.
         """
+        if self._load_cached_statics():
+            return
+
         is_sparse = data_overview.is_sparse_data(self.data_instances)
+        quantile_summary_dict = None
+        if self.with_quantile:
+            summary_param = {'compress_thres': consts.DEFAULT_COMPRESS_THRESHOLD,
+                             'head_size': consts.DEFAULT_HEAD_SIZE,
+                             'error': self.error,
+                             'abnormal_list': self.abnormal_list}
+            quantile_summary_dict = {col_name: quantile_summary_factory(is_sparse=is_sparse, param_dict=summary_param)
+                                     for col_name in self.cols_dict}
+
+        summary_statistics = SummaryStatistics(length=len(self.cols_index),
+                                               abnormal_list=self.abnormal_list,
+                                               stat_order=self.stat_order,
+                                               bias=self.bias)
         partition_cal = functools.partial(self.static_in_partition,
                                           cols_index=self.cols_index,
-                                          summary_statistics=copy.deepcopy(self.summary_statistics),
-                                          is_sparse=is_sparse)
-        self.summary_statistics = self.data_instances.applyPartitions(partition_cal). \
-            reduce(lambda x, y: self.copy_merge(x, y))
-        # self.summary_statistics = summary_statistic_dict.reduce(self.aggregate_statics)
+                                          summary_statistics=summary_statistics,
+                                          is_sparse=is_sparse,
+                                          quantile_summary_dict=quantile_summary_dict,
+                                          cols_dict=self.cols_dict,
+                                          header=self.header)
+        self.summary_statistics, self.label_histogram, self.quantile_summary_dict = \
+            self.data_instances.applyPartitions(partition_cal).reduce(self.merge_partition_statics)
+
+        if is_sparse and self.quantile_summary_dict is not None:
+            for summary in self.quantile_summary_dict.values():
+                summary.set_total_count(self.summary_statistics.row_count)
         self.finish_fit_statics = True
+        self._save_cached_statics()
 
     def _static_quantile_summaries(self):
         """
         Static summaries so that can query a specific quantile point
         """
-        if self.binning_obj is not None:
-            return self.binning_obj
-        bin_param = FeatureBinningParam(bin_num=2, bin_indexes=self.cols_index,
-                                        error=self.error)
-        self.binning_obj = QuantileBinning(bin_param, abnormal_list=self.abnormal_list)
-        self.binning_obj.fit_split_points(self.data_instances)
-
-        return self.binning_obj
+        if self.quantile_summary_dict is None:
+            self.with_quantile = True
+            self._static_sums()
+        return self.quantile_summary_dict
+
+    def _load_cached_statics(self):
+        key = _statics_cache_key(self.header, self.cols_index, self.abnormal_list)
+        try:
+            cached = _STATICS_CACHE.get(self.data_instances, {}).get(key)
+        except TypeError:
+            return False
+        if cached is None:
+            return False
+
+        summary_statistics, label_histogram, quantile_summary_dict, error = cached
+        if summary_statistics.stat_order < self.stat_order:
+            return False
+        if self.with_quantile and (quantile_summary_dict is None or error > self.error):
+            return False
+
+        LOGGER.debug("reuse cached statistics of table")
+        self.summary_statistics = copy.copy(summary_statistics)
+        self.summary_statistics.bias = self.bias
+        self.label_histogram = label_histogram
+        self.quantile_summary_dict = quantile_summary_dict
+        self.finish_fit_statics = True
+        return True
+
+    def _save_cached_statics(self):
+        key = _statics_cache_key(self.header, self.cols_index, self.abnormal_list)
+        if key is None:
+            return
+        try:
+            table_statics = _STATICS_CACHE.setdefault(self.data_instances, {})
+        except TypeError:
+            return
+        table_statics[key] = (self.summary_statistics, self.label_histogram, self.quantile_summary_dict,
+                              self.error)
 
     @staticmethod
     def copy_merge(s1, s2):
@@ -392,9 +524,25 @@ class MultivariateStatisticalSummary(object):
         return new_s1.merge(s2)
 
     @staticmethod
-    def static_in_partition(data_instances, cols_index, summary_statistics, is_sparse):
+    def merge_partition_statics(statics_1, statics_2):
+        summary_1, label_histogram_1, quantile_summary_dict_1 = statics_1
+        summary_2, label_histogram_2, quantile_summary_dict_2 = statics_2
+        summary_statistics = MultivariateStatisticalSummary.copy_merge(summary_1, summary_2)
+        label_histogram = MultivariateStatisticalSummary.merge_result_dict(dict(label_histogram_1),
+                                                                           label_histogram_2)
+        quantile_summary_dict = None
+        if quantile_summary_dict_1 is not None:
+            quantile_summary_dict = {col_name: summary.merge(quantile_summary_dict_2[col_name])
+                                     for col_name, summary in quantile_summary_dict_1.items()}
+        return summary_statistics, label_histogram, quantile_summary_dict
+
+    @staticmethod
+    def static_in_partition(data_instances, cols_index, summary_statistics, is_sparse, quantile_summary_dict=None,
+                            cols_dict=None, header=None, block_size=consts.DEFAULT_HEAD_SIZE):
         """
-        Statics sums, sum_square, max and min value through one traversal
+        Statics sums, sum_square, higher moments, max and min value, missing and zero counts, label histogram
+        and quantile summaries through one traversal. Instances are gathered into blocks of block_size, every
+        block is added to all statistics at once.
 
         Parameters
         ----------
@@ -406,30 +554,60 @@ class MultivariateStatisticalSummary(object):
 
         summary_statistics: SummaryStatistics
 
+        quantile_summary_dict: dict or None
+            Quantile summaries of columns in cols_dict, None if quantile is not needed.
+
         Returns
         -------
-        Dict of SummaryStatistics object
+        Tuple of SummaryStatistics object, label histogram and dict of quantile summaries
 
         """
+        summary_statistics = copy.deepcopy(summary_statistics)
+        quantile_summary_dict = copy.deepcopy(quantile_summary_dict)
+        label_histogram = collections.Counter()
+        block = []
+        for _, instances in data_instances:
+            block.append(instances)
+            if len(block) >= block_size:
+                MultivariateStatisticalSummary._static_block(block, cols_index, summary_statistics, is_sparse,
+                                                             label_histogram, quantile_summary_dict,
+                                                             cols_dict, header)
+                block = []
+        if block:
+            MultivariateStatisticalSummary._static_block(block, cols_index, summary_statistics, is_sparse,
+                                                         label_histogram, quantile_summary_dict,
+                                                         cols_dict, header)
+
+        if quantile_summary_dict is not None:
+            for summary in quantile_summary_dict.values():
+                summary.compress()
+        return summary_statistics, dict(label_histogram), quantile_summary_dict
 
-        for k, instances in data_instances:
-            if not is_sparse:
-                if isinstance(instances, Instance):
-                    features = instances.features
-                else:
-                    features = instances
-                    # try:
-                    #     features = np.array(instances, dtype=float)
-                    # except ValueError as e:
-                    #     raise ValueError(f"Static Module accept numeric input only. Error info: {e}")
-                # LOGGER.debug(f"In statics, features: {features}")
-                row_values = [x for idx, x in enumerate(features) if idx in cols_index]
-                # row_values = features[cols_index]
-            else:
-                sparse_data = instances.features.get_sparse_vector()
-                row_values = np.array([sparse_data.get(x, 0) for x in cols_index])
-            summary_statistics.add_rows(row_values)
-        return summary_statistics
+    @staticmethod
+    def _static_block(block, cols_index, summary_statistics, is_sparse, label_histogram, quantile_summary_dict,
+                      cols_dict, header):
+        label_histogram.update(instances.label for instances in block if isinstance(instances, Instance))
+
+        if not is_sparse:
+            rows = [instances.features if isinstance(instances, Instance) else instances for instances in block]
+            features = np.asarray(rows)
+            if features.dtype.kind in "US":
+                features = np.array(rows, dtype=object)
+            summary_statistics.add_block(features[:, cols_index])
+        else:
+            col_positions = {col_idx: pos for pos, col_idx in enumerate(cols_index)}
+            features = np.zeros((len(block), len(cols_index)))
+            missing_mask = np.ones(features.shape, dtype=bool)
+            for row, instances in enumerate(block):
+                for col_idx, value in instances.features.get_all_data():
+                    pos = col_positions.get(col_idx)
+                    if pos is not None:
+                        features[row, pos] = value
+                        missing_mask[row, pos] = False
+            summary_statistics.add_block(features, missing_mask=missing_mask)
+
+        if quantile_summary_dict is not None:
+            QuantileBinning._insert_block(block, quantile_summary_dict, cols_dict, header, is_sparse)
 
     @staticmethod
     def static_summaries_in_partition(data_instances, cols_dict, abnormal_list, error):
@@ -485,11 +663,7 @@ class MultivariateStatisticalSummary(object):
         return new_dict
 
     def get_median(self):
-        if self.binning_obj is None:
-            self._static_quantile_summaries()
-
-        medians = self.binning_obj.query_quantile_point(query_points=0.5)
-        return medians
+        return self.get_quantile_point(0.5)
 
     @property
     def median(self):
@@ -512,9 +686,9 @@ class MultivariateStatisticalSummary(object):
         quantile_point = {"x1": 3, "x2": 5... }
         """
 
-        if self.binning_obj is None:
-            self._static_quantile_summaries()
-        quantile_points = self.binning_obj.query_quantile_point(quantile)
+        quantile_summary_dict = self._static_quantile_summaries()
+        quantile_points = {col_name: summary.query(quantile)
+                           for col_name, summary in quantile_summary_dict.items()}
         return quantile_points
 
     def get_mean(self):
@@ -578,15 +752,15 @@ class MultivariateStatisticalSummary(object):
 
     @property
     def missing_ratio(self):
-        missing_static_obj = MissingStatistic()
-        all_missing_ratio = missing_static_obj.fit(self.data_instances)
-        return np.array([all_missing_ratio[self.header[idx]] for idx in self.cols_index])
+        if not self.finish_fit_statics:
+            self._static_sums()
+        return self.summary_statistics.missing_ratio
 
     @property
     def missing_count(self):
-        missing_ratio = self.missing_ratio
-        missing_count = missing_ratio * self.data_instances.count()
-        return missing_count.astype(int)
+        if not self.finish_fit_statics:
+            self._static_sums()
+        return self.summary_statistics.missing_count
 
     @staticmethod
     def get_label_static_dict(data_instances):
@@ -609,5 +783,6 @@ class MultivariateStatisticalSummary(object):
         return dict_a
 
     def get_label_histogram(self):
-        label_histogram = self.data_instances.applyPartitions(self.get_label_static_dict).reduce(self.merge_result_dict)
-        return label_histogram
+        if not self.finish_fit_statics:
+            self._static_sums()
+        return dict(self.label_histogram)
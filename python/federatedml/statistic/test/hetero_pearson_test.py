@@ -13,8 +13,13 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import os
+import shutil
+import tempfile
 import unittest
 import uuid
+from types import SimpleNamespace
+from unittest import mock
 
 from fate_arch.session import computing_session as session
 import numpy as np
@@ -23,18 +28,105 @@ import numpy as np
 class TestStatistics(unittest.TestCase):
     def setUp(self):
         session.init((str(uuid.uuid1())))
+        self.checkpoint_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    @staticmethod
+    def _pearson():
+        from federatedml.statistic.correlation import hetero_pearson
+        # parties are not used by local computations
+        with mock.patch.object(hetero_pearson.HeteroPearson, "_set_parties"):
+            pearson = hetero_pearson.HeteroPearson()
+        pearson.local_party = SimpleNamespace(role="guest", party_id=9999)
+        return pearson
 
     def test_standardized(self):
         from federatedml.statistic.correlation import hetero_pearson
         raw_data = np.random.rand(200, 100)
         expect = (raw_data - np.mean(raw_data, axis=0)) / np.std(raw_data, axis=0)
         data_table = session.parallelize([row for row in raw_data], partition=10, include_key=False)
-        n, standardized = hetero_pearson.HeteroPearson._standardized(data_table)
+        n, standardized, standardized_blocks = hetero_pearson.HeteroPearson._standardized(data_table)
         standardized_data = np.array([row[1] for row in standardized.collect()])
         self.assertEqual(n, standardized_data.shape[0])
         self.assertEqual(raw_data.shape, standardized_data.shape)
         self.assertAlmostEqual(np.linalg.norm(standardized_data - expect), 0.0)
 
+        # blocks hold the same standardized rows
+        blocks = [block for _, block in standardized_blocks.collect()]
+        self.assertEqual(sum(len(block) for block in blocks), n)
+        self.assertAlmostEqual(np.linalg.norm(np.sort(np.vstack(blocks), axis=0) - np.sort(expect, axis=0)), 0.0)
+
+    def test_block_syrk(self):
+        from federatedml.statistic.correlation import hetero_pearson
+        block = np.random.rand(30, 8)
+        upper = hetero_pearson._block_syrk(block)
+        self.assertTrue(np.allclose(np.triu(upper), np.triu(block.T.dot(block))))
+
+        # a single row block
+        upper = hetero_pearson._block_syrk(block[:1])
+        self.assertTrue(np.allclose(np.triu(upper), np.triu(np.outer(block[0], block[0]))))
+
+    def test_fit_local(self):
+        pearson = self._pearson()
+        raw_data = np.random.rand(101, 20)
+        data_table = session.parallelize([row for row in raw_data], partition=10, include_key=False)
+        n, _, standardized_blocks = pearson._standardized(data_table)
+        pearson._fit_local(n, standardized_blocks)
+
+        # upper triangle from syrk is mirrored to the lower one
+        self.assertTrue(np.allclose(pearson.local_corr, pearson.local_corr.T))
+        self.assertTrue(np.allclose(pearson.local_corr, np.corrcoef(raw_data, rowvar=False)))
+
+    def test_checkpoint_path(self):
+        from federatedml.statistic.correlation import hetero_pearson
+        pearson = self._pearson()
+        self.assertIsNone(pearson._checkpoint_path())
+
+        pearson.set_task_version_id("202110190000000000_hetero_pearson_0_1")
+        with mock.patch.object(hetero_pearson, "_get_job_directory",
+                               side_effect=lambda job_id: os.path.join(self.checkpoint_dir, job_id)):
+            self.assertEqual(pearson._checkpoint_path(),
+                             os.path.join(self.checkpoint_dir, "202110190000000000", "guest", "9999",
+                                          "hetero_pearson_0", "pearson_checkpoint"))
+
+    def test_tile_checkpoint(self):
+        from federatedml.statistic.correlation import hetero_pearson
+        path = os.path.join(self.checkpoint_dir, "pearson_checkpoint")
+        fingerprint = [100, 3, 5, 2, ["a", "b"]]
+        tiles = [np.random.rand(3, 2), np.random.rand(3, 2), np.random.rand(3, 1)]
+
+        checkpoint = hetero_pearson._TileCheckpoint(path, fingerprint)
+        self.assertListEqual(checkpoint.load(), [])
+        for idx, tile in enumerate(tiles[:2]):
+            checkpoint.save(idx, tile)
+
+        # a retried task loads completed tiles
+        loaded = hetero_pearson._TileCheckpoint(path, fingerprint).load()
+        self.assertEqual(len(loaded), 2)
+        for tile, expect in zip(loaded, tiles):
+            self.assertTrue(np.array_equal(tile, expect))
+
+        # tiles of different data or params are ignored
+        self.assertListEqual(hetero_pearson._TileCheckpoint(path, [100, 3, 5, 4, ["a", "b"]]).load(), [])
+
+        checkpoint.clean()
+        self.assertFalse(os.path.exists(path))
+
+        no_path = hetero_pearson._TileCheckpoint(None, fingerprint)
+        no_path.save(0, tiles[0])
+        self.assertListEqual(no_path.load(), [])
+
+    def test_sync_resume_tile(self):
+        pearson = self._pearson()
+        pearson.other_party = SimpleNamespace(role="host", party_id=10000)
+        pearson.transfer_variable = mock.MagicMock()
+        pearson.transfer_variable.resume_tile.get_parties.return_value = [1]
+
+        self.assertEqual(pearson._sync_resume_tile(2), 1)
+        pearson.transfer_variable.resume_tile.remote_parties.assert_called_once_with(2, parties=pearson.other_party)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,7 +11,7 @@ from federatedml.util import consts
 session.init("123")
 
 from federatedml.feature.instance import Instance
-from federatedml.statistic.statics import MultivariateStatisticalSummary
+from federatedml.statistic.statics import MultivariateStatisticalSummary, SummaryStatistics
 
 
 class TestStatistics(unittest.TestCase):
@@ -148,6 +148,36 @@ class TestStatistics(unittest.TestCase):
     #         self.assertEqual(missing_ratio, 0.5, msg="missing ratio should be 0.5")
     #     print("calculate missing ratio, total time: {}".format(time.time() - t0))
 
+    def test_single_pass_statics(self):
+        dense_table, _, original_data = self._gen_missing_table()
+        header = dense_table.schema['header']
+        summary_obj = MultivariateStatisticalSummary(dense_table, error=0, with_quantile=True)
+
+        missing_ratio = summary_obj.get_missing_ratio()
+        missing_count = summary_obj.get_statics("missing_count")
+        zero_count = summary_obj.get_statics("zero_count")
+        label_histogram = summary_obj.get_label_histogram()
+        for col_name in header:
+            self.assertEqual(missing_ratio[col_name], 0.5)
+            self.assertEqual(missing_count[col_name], self.count // 2)
+            self.assertEqual(zero_count[col_name], 0)
+        self.assertEqual(label_histogram, {None: self.count})
+
+        reused_obj = MultivariateStatisticalSummary(dense_table, error=0)
+        self.assertTrue(reused_obj._load_cached_statics())
+        self.assertIs(reused_obj._static_quantile_summaries(), summary_obj._static_quantile_summaries())
+        self.assertFalse(MultivariateStatisticalSummary(dense_table, stat_order=3)._load_cached_statics())
+
+    def test_abnormal_not_missing(self):
+        summary_statistics = SummaryStatistics(length=3, abnormal_list=[-1, "NA"])
+        summary_statistics.add_block(np.array([[-1, np.nan, 2], [0, 1, -1]]))
+        summary_statistics.add_block([["NA", 0, 3]])
+
+        # abnormal values are skipped by statistics, but only nan values are missing
+        self.assertListEqual(summary_statistics.count[[0, 2]].tolist(), [1, 2])
+        self.assertListEqual(summary_statistics.missing_count.tolist(), [0, 1, 0])
+        self.assertListEqual(summary_statistics.zero_count.tolist(), [1, 1, 0])
+
     def test_moment(self):
         dense_table, dense_not_inst_table, original_data = self._gen_table_data()
         summary_obj = MultivariateStatisticalSummary(dense_table, error=0, stat_order=4, bias=False)
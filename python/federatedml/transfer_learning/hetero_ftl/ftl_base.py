@@ -16,7 +16,7 @@ from federatedml.nn.hetero_nn.util import random_number_generator
 from federatedml.secureprotol import PaillierEncrypt
 from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
 from federatedml.util import consts
-from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.protobuf.generated.ftl_model_param_pb2 import FTLModelParam
 from federatedml.protobuf.generated.ftl_model_meta_pb2 import FTLModelMeta, FTLPredictParam, FTLOptimizerParam
 from federatedml.util.validation_strategy import ValidationStrategy
@@ -59,6 +59,7 @@ class FTL(ModelBase):
         self.encrypt_calculators = []
         self.encrypter = None
         self.partitions = 16
+        self.remote_block_rows = None  # block layout of encrypted tensors of the other party
         self.batch_size = None
         self.epochs = None
         self.store_header = None  # header of input data table
@@ -150,14 +151,14 @@ class FTL(ModelBase):
     def encrypt_tensor(self, components, return_dtable=True):
 
         """
-        transform numpy array into Paillier tensor and encrypt
+        split numpy array into row-blocks and encrypt block by block, a table of one value per block is sent
         """
 
         if len(self.encrypt_calculators) == 0:
             self.encrypt_calculators = [self.generated_encrypted_calculator() for i in range(3)]
         encrypted_tensors = []
         for comp, calculator in zip(components, self.encrypt_calculators):
-            encrypted_tensor = PaillierTensor(ori_data=comp, partitions=self.partitions)
+            encrypted_tensor = BlockPaillierTensor.from_ndarray(comp, partitions=self.partitions)
             if return_dtable:
                 encrypted_tensors.append(encrypted_tensor.encrypt(calculator).get_obj())
             else:
@@ -165,6 +166,17 @@ class FTL(ModelBase):
 
         return encrypted_tensors
 
+    def wrap_block_tensors(self, tables):
+
+        """
+        wrap received tables as BlockPaillierTensor, block layout of the other party does not change across epochs
+        so it is fetched only once
+        """
+
+        if self.remote_block_rows is None:
+            self.remote_block_rows = BlockPaillierTensor(tb_obj=tables[0]).block_rows
+        return [BlockPaillierTensor(tb_obj=tb, block_rows=self.remote_block_rows) for tb in tables]
+
     def init_validation_strategy(self, train_data=None, validate_data=None):
         validation_strategy = ValidationStrategy(self.role, consts.HETERO, self.validation_freqs,
                                                  self.early_stopping_rounds, self.use_first_metric_only,
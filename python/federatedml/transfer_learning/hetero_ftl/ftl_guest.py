@@ -8,7 +8,7 @@ from federatedml.transfer_learning.hetero_ftl.ftl_dataloder import FTLDataLoader
 from fate_flow.entity.metric import Metric
 from fate_flow.entity.metric import MetricMeta
 from federatedml.optim.convergence import converge_func_factory
-from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.optim.activation import sigmoid
 from federatedml.statistic import data_overview
 
@@ -27,7 +27,10 @@ class FTLGuest(FTL):
         self.send_components = None  # components to send
         self.convergence = None
 
-        self.overlap_y_pt = None  # paillier tensor
+        self.overlap_y_pt = None  # block tensor of y_i ∈ N_c, aligned with host blocks
+        self.overlap_y_2_pt = None  # block tensor of (y_i ∈ N_c )^2, aligned with host blocks
+        self.non_overlap_y = None  # y_i ∉ N_c
+        self.host_comp_sums = None  # sums of host components over overlap samples, shared in an epoch
 
         self.history_loss = []  # list to record history loss
 
@@ -120,11 +123,34 @@ class FTLGuest(FTL):
         host_components = [overlap_ub, overlap_ub_2, mapping_comp_b]
 
         if self.mode == 'encrypted':
-            host_paillier_tensors = [PaillierTensor(tb_obj=tb, partitions=self.partitions) for tb in host_components]
+            host_paillier_tensors = self.wrap_block_tensors(host_components)
+            self.host_comp_sums = self.reduce_host_components(host_paillier_tensors)
             return host_paillier_tensors
         else:
             return host_components
 
+    def reduce_host_components(self, host_components):
+
+        """
+        sum encrypted host components over overlap samples, block by block. these sums only depend on
+        host components and labels, so they are computed once per epoch and shared by local rounds and loss
+        """
+
+        overlap_ub, overlap_ub_2 = host_components[0], host_components[1]
+
+        # labels do not change across epochs
+        if self.overlap_y_pt is None:
+            self.overlap_y_pt = BlockPaillierTensor.from_ndarray(self.overlap_y, self.partitions,
+                                                                 self.remote_block_rows)
+            self.overlap_y_2_pt = BlockPaillierTensor.from_ndarray(self.overlap_y_2, self.partitions,
+                                                                   self.remote_block_rows)
+
+        ub_y = overlap_ub.weighted_sum(self.overlap_y_pt)  # Σ y_i * u_i [feat_dim]
+        ub_2_y_2 = overlap_ub_2.weighted_sum(self.overlap_y_2_pt)  # Σ y_i^2 * u_i'u_i [feat_dim, feat_dim]
+        ub_2 = overlap_ub_2.reduce_sum()  # Σ u_i'u_i [feat_dim, feat_dim]
+
+        return ub_y, ub_2_y_2, ub_2
+
     def decrypt_inter_result(self, encrypted_const, grad_a_overlap, epoch_idx, local_round=-1):
 
         """
@@ -133,7 +159,7 @@ class FTLGuest(FTL):
 
         rand_0 = self.rng_generator.generate_random_number(encrypted_const.shape)
         encrypted_const = encrypted_const + rand_0
-        rand_1 = PaillierTensor(ori_data=self.rng_generator.generate_random_number(grad_a_overlap.shape), partitions=self.partitions)
+        rand_1 = self.rng_generator.fast_generate_block_random_number(grad_a_overlap)
         grad_a_overlap = grad_a_overlap + rand_1
 
         self.transfer_variable.guest_side_const.remote(encrypted_const, suffix=(epoch_idx,
@@ -143,7 +169,7 @@ class FTLGuest(FTL):
         const = self.transfer_variable.decrypted_guest_const.get(suffix=(epoch_idx, local_round, ), idx=0)
         grad = self.transfer_variable.decrypted_guest_gradients.get(suffix=(epoch_idx, local_round, ), idx=0)
         const = const - rand_0
-        grad_a_overlap = PaillierTensor(tb_obj=grad, partitions=self.partitions) - rand_1
+        grad_a_overlap = BlockPaillierTensor(tb_obj=grad) - rand_1
 
         return const, grad_a_overlap
 
@@ -152,7 +178,7 @@ class FTLGuest(FTL):
         inter_grad = self.transfer_variable.host_side_gradients.get(suffix=(epoch_idx,
                                                                             local_round,
                                                                             'host_de_send'), idx=0)
-        inter_grad_pt = PaillierTensor(tb_obj=inter_grad, partitions=self.partitions)
+        inter_grad_pt = BlockPaillierTensor(tb_obj=inter_grad)
         self.transfer_variable.decrypted_host_gradients.remote(inter_grad_pt.decrypt(self.encrypter).get_obj(),
                                                                suffix=(epoch_idx,
                                                                        local_round,
@@ -173,31 +199,31 @@ class FTLGuest(FTL):
         # they are Paillier tensors or np array
         overlap_ub, overlap_ub_2, mapping_comp_b = host_components[0], host_components[1], host_components[2]
 
-        y_overlap_2_phi = np.expand_dims(self.overlap_y_2 * self.phi, axis=1)
+        if self.non_overlap_y is None:
+            self.non_overlap_y = data_loader.y[data_loader.get_non_overlap_indexes()]
 
         if self.mode == 'plain':
 
+            y_overlap_2_phi = np.expand_dims(self.overlap_y_2 * self.phi, axis=1)
+
             loss_grads_const_part1 = 0.25 * np.squeeze(np.matmul(y_overlap_2_phi, overlap_ub_2), axis=1)
             loss_grads_const_part2 = self.overlap_y * overlap_ub
 
             const = np.sum(loss_grads_const_part1, axis=0) - 0.5 * np.sum(loss_grads_const_part2, axis=0)
 
-            grad_a_nonoverlap = self.alpha * const * data_loader.y[data_loader.get_non_overlap_indexes()] / self.data_num
+            grad_a_nonoverlap = self.alpha * const * self.non_overlap_y / self.data_num
             grad_a_overlap = self.alpha * const * self.overlap_y / self.data_num + mapping_comp_b
 
             return np.concatenate([grad_a_overlap, grad_a_nonoverlap], axis=0)
 
         elif self.mode == 'encrypted':
 
-            loss_grads_const_part1 = overlap_ub_2.matmul_3d(0.25 * y_overlap_2_phi, multiply='right')
-            loss_grads_const_part1 = loss_grads_const_part1.squeeze(axis=1)
+            # Σ 0.25 * y_i^2 * Φ u_i'u_i = 0.25 * Φ (Σ y_i^2 * u_i'u_i)
+            ub_y, ub_2_y_2 = self.host_comp_sums[0], self.host_comp_sums[1]
+            loss_grads_const_part1 = 0.25 * np.matmul(self.phi, ub_2_y_2)[0]
+            loss_grads_const_part2 = ub_y
 
-            if self.overlap_y_pt is None:
-                self.overlap_y_pt = PaillierTensor(self.overlap_y, partitions=self.partitions)
-
-            loss_grads_const_part2 = overlap_ub * self.overlap_y_pt
-
-            encrypted_const = loss_grads_const_part1.reduce_sum() - 0.5 * loss_grads_const_part2.reduce_sum()
+            encrypted_const = loss_grads_const_part1 - 0.5 * loss_grads_const_part2
 
             grad_a_overlap = self.overlap_y_pt.map_ndarray_product((self.alpha/self.data_num * encrypted_const)) + mapping_comp_b
 
@@ -206,7 +232,7 @@ class FTLGuest(FTL):
 
             self.decrypt_host_data(epoch_idx, local_round=local_round)
 
-            grad_a_nonoverlap = self.alpha * const * data_loader.y[data_loader.get_non_overlap_indexes()]/self.data_num
+            grad_a_nonoverlap = self.alpha * const * self.non_overlap_y / self.data_num
 
             return np.concatenate([grad_a_overlap.numpy(), grad_a_nonoverlap], axis=0)
 
@@ -231,12 +257,13 @@ class FTLGuest(FTL):
 
         elif self.mode == 'encrypted':
 
+            ub_y, ub_2 = self.host_comp_sums[0], self.host_comp_sums[2]
+
             loss_overlap = overlap_ub.element_wise_product((-self.overlap_ua*self.constant_k))
             sum = np.sum(loss_overlap.reduce_sum())
-            ub_phi = overlap_ub.T.fast_matmul_2d(self.phi.transpose())
 
-            part1 = -0.5 * np.sum((self.overlap_y * ub_phi))
-            ub_2 = overlap_ub_2.reduce_sum()
+            # Σ y_i * u_i Φ' = (Σ y_i * u_i) Φ'
+            part1 = -0.5 * np.sum(np.matmul(ub_y, self.phi.transpose()))
             enc_phi_uB_2_phi = np.matmul(np.matmul(self.phi, ub_2), self.phi.transpose())
             part2 = 1/8 * np.sum(enc_phi_uB_2_phi)
             part3 = len(self.overlap_y)*np.log(2)
@@ -4,7 +4,7 @@ from federatedml.statistic.intersect import intersect_host
 from federatedml.util import LOGGER
 from federatedml.transfer_learning.hetero_ftl.ftl_dataloder import FTLDataLoader
 from federatedml.util import consts
-from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.util.io_check import assert_io_num_rows_equal
 from federatedml.statistic import data_overview
 
@@ -72,7 +72,7 @@ class FTLHost(FTL):
         self.transfer_variable.mapping_comp_b.remote(comp_to_send[2], suffix=(epoch_idx, ))
 
         if self.mode == 'encrypted':
-            guest_paillier_tensors = [PaillierTensor(tb_obj=tb, partitions=self.partitions) for tb in guest_components]
+            guest_paillier_tensors = self.wrap_block_tensors(guest_components)
             return guest_paillier_tensors
         else:
             return guest_components
@@ -84,7 +84,7 @@ class FTLHost(FTL):
         grad_table = self.transfer_variable.guest_side_gradients.get(suffix=(epoch_idx, local_round, ),
                                                                      idx=0)
 
-        inter_grad = PaillierTensor(tb_obj=grad_table, partitions=self.partitions)
+        inter_grad = BlockPaillierTensor(tb_obj=grad_table)
         decrpyted_grad = inter_grad.decrypt(self.encrypter)
         decrypted_const = self.encrypter.recursive_decrypt(encrypted_consts)
 
@@ -95,13 +95,13 @@ class FTLHost(FTL):
 
     def decrypt_inter_result(self, loss_grad_b, epoch_idx, local_round=-1):
 
-        rand_0 = PaillierTensor(ori_data=self.rng_generator.generate_random_number(loss_grad_b.shape), partitions=self.partitions)
+        rand_0 = self.rng_generator.fast_generate_block_random_number(loss_grad_b)
         grad_a_overlap = loss_grad_b + rand_0
         self.transfer_variable.host_side_gradients.remote(grad_a_overlap.get_obj(),
                                                           suffix=(epoch_idx, local_round, 'host_de_send'))
         de_loss_grad_b = self.transfer_variable.decrypted_host_gradients\
                                                .get(suffix=(epoch_idx, local_round, 'host_de_get'), idx=0)
-        de_loss_grad_b = PaillierTensor(tb_obj=de_loss_grad_b, partitions=self.partitions) - rand_0
+        de_loss_grad_b = BlockPaillierTensor(tb_obj=de_loss_grad_b) - rand_0
 
         return de_loss_grad_b
 
@@ -125,7 +125,8 @@ class FTLHost(FTL):
 
         if self.mode == 'encrypted':
 
-            ub_overlap_ex = np.expand_dims(self.overlap_ub, axis=1)
+            # split u_b by blocks of guest components, one batched matmul per block
+            ub_overlap_ex = BlockPaillierTensor.from_ndarray(ub_overlap_ex, self.partitions, self.remote_block_rows)
             ub_overlap_y_overlap_2_phi_2 = y_overlap_2_phi_2.matmul_3d(ub_overlap_ex, multiply='right')
             ub_overlap_y_overlap_2_phi_2 = ub_overlap_y_overlap_2_phi_2.squeeze(axis=1)
 
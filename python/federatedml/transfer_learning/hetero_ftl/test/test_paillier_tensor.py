@@ -15,6 +15,7 @@
 #
 
 import numpy as np
+from federatedml.nn.hetero_nn.backend.paillier_tensor import BlockPaillierTensor
 from federatedml.nn.hetero_nn.backend.paillier_tensor import PaillierTensor
 from federatedml.secureprotol import PaillierEncrypt
 from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
@@ -64,6 +65,34 @@ class TestPaillierTensor(unittest.TestCase):
         enpt2 = pt4.encrypt(encrypted_calculator)
         random_num = rng_generator.generate_random_number(enpt2.shape)
 
+    def test_block_tensor_op(self):
+
+        ub = np.random.random((10, 3))
+        ub_2 = np.matmul(np.expand_dims(ub, axis=2), np.expand_dims(ub, axis=1))
+        y = np.random.random((10, 1))
+
+        encrypter = PaillierEncrypt()
+        encrypter.generate_key(EncryptParam().key_length)
+        encrypted_calculator = EncryptModeCalculator(encrypter,
+                                                     EncryptedModeCalculatorParam().mode,
+                                                     EncryptedModeCalculatorParam().re_encrypted_rate)
+
+        enpt = BlockPaillierTensor.from_ndarray(ub, partitions=3).encrypt(encrypted_calculator)
+        enpt2 = BlockPaillierTensor.from_ndarray(ub_2, partitions=3).encrypt(encrypted_calculator)
+
+        # guest and host may split tensors into different blocks
+        aligned_y = BlockPaillierTensor.from_ndarray(y, partitions=4, block_rows=enpt.block_rows)
+        self.assertTrue(np.allclose(encrypter.recursive_decrypt(enpt.weighted_sum(aligned_y)),
+                                    np.sum(ub * y, axis=0)))
+        self.assertTrue(np.allclose(encrypter.recursive_decrypt(enpt2.reduce_sum()), np.sum(ub_2, axis=0)))
+
+        rs = enpt2.matmul_3d(np.expand_dims(ub, axis=1), multiply='right').squeeze(axis=1)
+        self.assertTrue(np.allclose(rs.decrypt(encrypter).numpy(),
+                                    np.squeeze(np.matmul(np.expand_dims(ub, axis=1), ub_2), axis=1)))
+
+        rs = enpt.element_wise_product(ub).map_ndarray_product(np.array([2.0]))
+        self.assertTrue(np.allclose(rs.decrypt(encrypter).numpy(), ub * ub * 2))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -35,3 +35,9 @@ class RawIntersectTransferVariable(BaseTransferVariables):
         self.send_ids_guest = self._create_variable(name='send_ids_guest', src=['guest'], dst=['host'])
         self.send_ids_host = self._create_variable(name='send_ids_host', src=['host'], dst=['guest'])
         self.sync_intersect_ids_multi_hosts = self._create_variable(name='sync_intersect_ids_multi_hosts', src=['guest'], dst=['host'])
+        self.send_filter_guest = self._create_variable(name='send_filter_guest', src=['guest'], dst=['host'])
+        self.send_filter_host = self._create_variable(name='send_filter_host', src=['host'], dst=['guest'])
+        self.filter_candidates_guest = self._create_variable(name='filter_candidates_guest', src=['guest'], dst=['host'])
+        self.filter_candidates_host = self._create_variable(name='filter_candidates_host', src=['host'], dst=['guest'])
+        self.filter_verified_guest = self._create_variable(name='filter_verified_guest', src=['guest'], dst=['host'])
+        self.filter_verified_host = self._create_variable(name='filter_verified_host', src=['host'], dst=['guest'])
@@ -38,6 +38,9 @@ class RsaIntersectTransferVariable(BaseTransferVariables):
 
         self.host_sign_guest_ids = self._create_variable(name='host_sign_guest_ids', src=['host'], dst=['guest'])
         self.guest_sign_host_ids = self._create_variable(name='guest_sign_host_ids', src=['guest'], dst=['host'])
+        self.host_filter = self._create_variable(name='host_filter', src=['host'], dst=['guest'])
+        self.guest_filter_candidates = self._create_variable(name='guest_filter_candidates', src=['guest'], dst=['host'])
+        self.host_filter_verified = self._create_variable(name='host_filter_verified', src=['host'], dst=['guest'])
 
         self.intersect_ids = self._create_variable(name='intersect_ids', src=['guest'], dst=['host'])
         self.host_intersect_ids = self._create_variable(name='host_intersect_ids', src=['host'], dst=['guest'])
@@ -49,20 +49,37 @@ class HeteroKmeansArbiter(BaseKmeansModel):
                              metric_namespace='train',
                              metric_data=[Metric(iter_num, dbi)])
 
+    @staticmethod
+    def cluster_index(dist):
+        """
+        index of nearest centroid, of a row of distances or every row of a block of distances
+        """
+        return np.argmin(dist, axis=-1).astype(np.int32) if np.ndim(dist) == 2 else np.argmin(dist)
+
     def sum_in_cluster(self, iterator):
         sum_result = dict()
         for k, v in iterator:
-            if v[1] not in sum_result:
-                sum_result[v[1]] = np.sqrt(v[0][v[1]])
-            else:
-                sum_result[v[1]] += np.sqrt(v[0][v[1]])
+            dist, cluster_index = np.atleast_2d(v[0]), np.atleast_1d(v[1])
+            cluster_dist = np.sqrt(np.maximum(dist[np.arange(len(cluster_index)), cluster_index], 0))
+            dist_sum = np.bincount(cluster_index, weights=cluster_dist)
+            for cluster in np.unique(cluster_index).tolist():
+                sum_result[cluster] = sum_result.get(cluster, 0) + dist_sum[cluster]
         return sum_result
 
+    @staticmethod
+    def count_in_cluster(iterator):
+        count_result = dict()
+        for k, v in iterator:
+            clusters, counts = np.unique(np.atleast_1d(v), return_counts=True)
+            for cluster, count in zip(clusters.tolist(), counts.tolist()):
+                count_result[cluster] = count_result.get(cluster, 0) + count
+        return count_result
+
     def cal_ave_dist(self, dist_cluster_table, cluster_result):
         dist_centroid_dist_table = dist_cluster_table.applyPartitions(self.sum_in_cluster).reduce(self.sum_dict)
-        cluster_count = cluster_result.applyPartitions(self.count).reduce(self.sum_dict)
+        cluster_count = cluster_result.applyPartitions(self.count_in_cluster).reduce(self.sum_dict)
         cal_ave_dist_list = []
-        for key in cluster_count.keys():
+        for key in sorted(cluster_count.keys()):
             count = cluster_count[key]
             cal_ave_dist_list.append([key, count, dist_centroid_dist_table[key] / count])
         return cal_ave_dist_list
@@ -104,7 +121,7 @@ class HeteroKmeansArbiter(BaseKmeansModel):
             dist_sum = self.aggregator.aggregate_tables(suffix=(self.n_iter_,))
             if last_cluster_result is not None:
                 self.cal_dbi(dist_sum, last_cluster_result, self.n_iter_)
-            cluster_result = dist_sum.mapValues(lambda v: np.argmin(v))
+            cluster_result = dist_sum.mapValues(self.cluster_index)
             self.aggregator.send_aggregated_tables(cluster_result, suffix=(self.n_iter_,))
             tol1 = self.transfer_variable.guest_tol.get(idx=0, suffix=(self.n_iter_,))
             tol2 = self.transfer_variable.host_tol.get(idx=0, suffix=(self.n_iter_,))
@@ -124,7 +141,7 @@ class HeteroKmeansArbiter(BaseKmeansModel):
 
         # calculate finall round dbi
         dist_sum = self.aggregator.aggregate_tables(suffix=(self.n_iter_,))
-        cluster_result = dist_sum.mapValues(lambda v: np.argmin(v))
+        cluster_result = dist_sum.mapValues(self.cluster_index)
         self.aggregator.send_aggregated_tables(cluster_result, suffix=(self.n_iter_,))
         self.cal_dbi(dist_sum, last_cluster_result, self.n_iter_)
         dist_sum_dbi = self.aggregator.aggregate_tables(suffix=(self.n_iter_ + 1,))
@@ -134,7 +151,7 @@ class HeteroKmeansArbiter(BaseKmeansModel):
     def predict(self, data_instances=None):
         LOGGER.info("Start predict ...")
         res_dict = self.aggregator.aggregate_tables(suffix='predict')
-        cluster_result = res_dict.mapValues(lambda v: np.argmin(v))
+        cluster_result = res_dict.mapValues(self.cluster_index)
         cluster_dist_result = res_dict.mapValues(lambda v: min(v))
         self.aggregator.send_aggregated_tables(cluster_result, suffix='predict')
 
@@ -15,6 +15,7 @@
 #
 
 import functools
+import zlib
 
 import numpy as np
 
@@ -34,13 +35,85 @@ class HeteroKmeansClient(BaseKmeansModel):
         self.client_dist = None
         self.client_tol = None
         self.aggregator = table_aggregator.Client(enable_secure_aggregate=True)
+        self.mini_batch_fraction = None
+        self._mini_batch_count = None
+
+    def _init_model(self, params):
+        super(HeteroKmeansClient, self)._init_model(params)
+        self.mini_batch_fraction = params.mini_batch_fraction
 
     @staticmethod
     def educl_dist(u, centroid_list):
-        result = []
-        for c in centroid_list:
-            result.append(np.sum(np.square(np.array(c) - u.features)))
-        return np.array(result)
+        return np.sum(np.square(np.array(centroid_list) - u.features), axis=1)
+
+    @staticmethod
+    def _partition_to_blocks(kv_iterator, block_num):
+        blocks = {}
+        for key, instance in kv_iterator:
+            block_id = zlib.crc32(f"{key}".encode("utf-8")) % block_num
+            blocks.setdefault(block_id, []).append((key, instance.features))
+        return list(blocks.items())
+
+    @staticmethod
+    def _stack_block(rows):
+        rows = sorted(rows, key=lambda row: row[0])
+        features = np.array([row[1] for row in rows], dtype=np.float64)
+        return [row[0] for row in rows], features, np.sum(np.square(features), axis=1)
+
+    def sync_block_num(self, data_instances):
+        """
+        guest decides number of feature blocks by partitions of its table and sends it to hosts, so that parties
+        get the same blocks even if their tables have different partitions
+        """
+        if self.role == consts.GUEST:
+            block_num = data_instances.partitions
+            self.transfer_variable.block_num.remote(block_num, role=consts.HOST, idx=-1)
+        else:
+            block_num = self.transfer_variable.block_num.get(idx=0)
+        return block_num
+
+    def get_feature_blocks(self, data_instances, block_num):
+        """
+        Group instances into block_num blocks by hash of keys, so that guest and host get blocks of the same ids
+        with rows in the same order. Every block is (keys, feature matrix, squared norms of rows).
+        """
+        f = functools.partial(self._partition_to_blocks, block_num=block_num)
+        blocks = data_instances.mapReducePartitions(f, lambda rows1, rows2: rows1 + rows2)
+        return blocks.mapValues(self._stack_block)
+
+    @staticmethod
+    def block_dist(block, centroids, centroid_square_norms):
+        """
+        squared euclidean distances of all rows in block to centroids: ||x||^2 - 2xC + ||C||^2
+        """
+        _, features, square_norms = block
+        dist = square_norms[:, np.newaxis] - 2 * np.dot(features, centroids.T) + centroid_square_norms
+        return np.maximum(dist, 0)
+
+    def send_block_dist(self, feature_blocks, centroid_list, suffix):
+        centroids = np.array(centroid_list, dtype=np.float64)
+        d = functools.partial(self.block_dist, centroids=centroids,
+                              centroid_square_norms=np.sum(np.square(centroids), axis=1))
+        dist_all_table = feature_blocks.mapValues(d)
+        return self.aggregator.aggregate_then_get_table(dist_all_table, suffix=suffix, dtype=np.float32)
+
+    @staticmethod
+    def block_cluster_sum(block, cluster_index, k):
+        features = block[1]
+        feature_sum = np.zeros((k, features.shape[1]))
+        np.add.at(feature_sum, cluster_index, features)
+        return feature_sum, np.bincount(cluster_index, minlength=k)
+
+    def sample_mini_batch(self, feature_blocks, block_num):
+        if self.role == consts.GUEST:
+            batch_num = max(1, int(round(block_num * self.mini_batch_fraction)))
+            batch_index = sorted(np.random.choice(block_num, batch_num, replace=False).tolist())
+            self.transfer_variable.mini_batch_index.remote(batch_index, role=consts.HOST, idx=-1,
+                                                           suffix=(self.n_iter_,))
+        else:
+            batch_index = self.transfer_variable.mini_batch_index.get(idx=0, suffix=(self.n_iter_,))
+        batch_index = set(batch_index)
+        return feature_blocks.filter(lambda block_id, block: block_id in batch_index)
 
     def get_centroid(self, data_instances):
         random_key = []
@@ -59,6 +132,42 @@ class HeteroKmeansClient(BaseKmeansModel):
                 cluster_result[v[1]] += v[0]
         return cluster_result
 
+    def block_centroid_cal(self, cluster_result, feature_blocks):
+        """
+        same as centroid_cal, with cluster results and features in blocks
+        """
+        f = functools.partial(self.block_cluster_sum, k=self.k)
+        centroid_feature_sum, cluster_count = feature_blocks.join(cluster_result, f). \
+            reduce(lambda s1, s2: (s1[0] + s2[0], s1[1] + s2[1]))
+        count_all = int(np.sum(cluster_count))
+        centroid_list = []
+        cluster_count_list = []
+        for k in range(self.k):
+            count = int(cluster_count[k])
+            if count == 0:
+                centroid_list.append(self.centroid_list[k])
+            else:
+                centroid_list.append(centroid_feature_sum[k] / count)
+            cluster_count_list.append([k, count, count / count_all])
+        return centroid_list, cluster_count_list, centroid_feature_sum, cluster_count
+
+    def mini_batch_centroid_cal(self, cluster_result, feature_blocks):
+        """
+        move centroids towards means of assigned rows of the mini batch, with per centroid learning rate
+        of 1 / count of rows ever assigned to it
+        """
+        _, cluster_count_list, centroid_feature_sum, cluster_count = \
+            self.block_centroid_cal(cluster_result, feature_blocks)
+        self._mini_batch_count += cluster_count
+        centroid_list = []
+        for k in range(self.k):
+            centroid = np.array(self.centroid_list[k], dtype=np.float64)
+            if cluster_count[k] > 0:
+                centroid = centroid + (centroid_feature_sum[k] - cluster_count[k] * centroid) / \
+                           self._mini_batch_count[k]
+            centroid_list.append(centroid)
+        return centroid_list, cluster_count_list
+
     def centroid_cal(self, cluster_result, data_instances):
         cluster_result_table = data_instances.join(cluster_result, lambda v1, v2: [v1.features, v2])
         centroid_feature_sum = cluster_result_table.applyPartitions(self.cluster_sum).reduce(self.sum_dict)
@@ -106,12 +215,18 @@ class HeteroKmeansClient(BaseKmeansModel):
         centroid_list = list(key_table.join(data_instances, lambda v1, v2: v2.features).collect())
         self.centroid_list = [v[1] for v in centroid_list]
 
+        block_num = self.sync_block_num(data_instances)
+        feature_blocks = self.get_feature_blocks(data_instances, block_num)
+        self._mini_batch_count = np.zeros(self.k)
         while self.n_iter_ < self.max_iter:
             self.send_cluster_dist(self.n_iter_,self.centroid_list)
-            d = functools.partial(self.educl_dist, centroid_list=self.centroid_list)
-            dist_all_table = data_instances.mapValues(d)
-            cluster_result = self.aggregator.aggregate_then_get_table(dist_all_table, suffix=(self.n_iter_,))
-            centroid_new, self.cluster_count = self.centroid_cal(cluster_result, data_instances)
+            if self.mini_batch_fraction is None:
+                cluster_result = self.send_block_dist(feature_blocks, self.centroid_list, suffix=(self.n_iter_,))
+                centroid_new, self.cluster_count, _, _ = self.block_centroid_cal(cluster_result, feature_blocks)
+            else:
+                batch_blocks = self.sample_mini_batch(feature_blocks, block_num)
+                cluster_result = self.send_block_dist(batch_blocks, self.centroid_list, suffix=(self.n_iter_,))
+                centroid_new, self.cluster_count = self.mini_batch_centroid_cal(cluster_result, batch_blocks)
 
             # cluster_dist = self.centroid_dist(self.centroid_list)
             # self.cluster_dist_aggregator.send_model(NumpyWeights(np.array(cluster_dist)), suffix=(self.n_iter_,))
@@ -130,15 +245,13 @@ class HeteroKmeansClient(BaseKmeansModel):
                 break
 
         # calculate finall round dbi
-        self.extra_dbi(data_instances, self.n_iter_, self.centroid_list)
-        centroid_new, self.cluster_count = self.centroid_cal(self.cluster_result, data_instances)
-        self.extra_dbi(data_instances, (self.n_iter_ + 1), centroid_new)
+        self.extra_dbi(feature_blocks, self.n_iter_, self.centroid_list)
+        centroid_new, self.cluster_count, _, _ = self.block_centroid_cal(self.cluster_result, feature_blocks)
+        self.extra_dbi(feature_blocks, (self.n_iter_ + 1), centroid_new)
         # LOGGER.debug(f"Final centroid list: {self.centroid_list}")
 
-    def extra_dbi(self, data_instances, suffix, centroids):
-        d = functools.partial(self.educl_dist, centroid_list=centroids)
-        dist_all_table = data_instances.mapValues(d)
-        self.cluster_result = self.aggregator.aggregate_then_get_table(dist_all_table, suffix=(suffix,))
+    def extra_dbi(self, feature_blocks, suffix, centroids):
+        self.cluster_result = self.send_block_dist(feature_blocks, centroids, suffix=(suffix,))
         self.send_cluster_dist(suffix, centroids)
 
     def send_cluster_dist(self, suffix, centroids):
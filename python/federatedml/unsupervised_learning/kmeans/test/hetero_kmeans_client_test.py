@@ -0,0 +1,94 @@
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.framework.hetero.procedure import table_aggregator
+from federatedml.unsupervised_learning.kmeans.hetero_kmeans.hetero_kmeans_client import HeteroKmeansGuest
+
+
+class TestHeteroKmeansClient(unittest.TestCase):
+    def setUp(self):
+        session.init("test_hetero_kmeans_client" + str(random.random()), 0)
+        self.k = 3
+        self.guest_features = np.random.random((50, 4))
+        self.host_features = np.random.random((50, 2))
+        self.guest_table = self._table(self.guest_features, partition=4)
+        self.host_table = self._table(self.host_features, partition=3)
+        # block computations do not aggregate, skip creating secure aggregator which needs federation
+        with mock.patch.object(table_aggregator, "Client"):
+            self.client = HeteroKmeansGuest()
+        self.client.k = self.k
+        self.client.centroid_list = [self.guest_features[i] for i in range(self.k)]
+
+    @staticmethod
+    def _table(features, partition):
+        data = [(str(i), Instance(features=features[i])) for i in range(len(features))]
+        return session.parallelize(data, include_key=True, partition=partition)
+
+    def test_blocks_with_mismatched_partitions(self):
+        block_num = self.guest_table.partitions
+        guest_blocks = dict(self.client.get_feature_blocks(self.guest_table, block_num).collect())
+        host_blocks = dict(self.client.get_feature_blocks(self.host_table, block_num).collect())
+
+        self.assertEqual(set(guest_blocks), set(host_blocks))
+        self.assertTrue(set(guest_blocks) <= set(range(block_num)))
+        self.assertEqual(sum(len(block[0]) for block in guest_blocks.values()), len(self.guest_features))
+        for block_id, (keys, features, square_norms) in guest_blocks.items():
+            host_keys, host_features, _ = host_blocks[block_id]
+            self.assertListEqual(keys, host_keys)
+            rows = [int(key) for key in keys]
+            self.assertTrue(np.array_equal(features, self.guest_features[rows]))
+            self.assertTrue(np.array_equal(host_features, self.host_features[rows]))
+            self.assertTrue(np.allclose(square_norms, np.sum(np.square(features), axis=1)))
+
+    def test_block_dist(self):
+        blocks = self.client.get_feature_blocks(self.guest_table, 4)
+        centroids = np.array(self.client.centroid_list)
+        for _, block in blocks.collect():
+            dist = self.client.block_dist(block, centroids, np.sum(np.square(centroids), axis=1))
+            for i, key in enumerate(block[0]):
+                expect = self.client.educl_dist(Instance(features=self.guest_features[int(key)]), centroids)
+                self.assertTrue(np.allclose(dist[i], expect))
+            self.assertTrue((dist >= 0).all())
+
+    def test_block_cluster_sum(self):
+        features = np.random.random((20, 4))
+        block = ([str(i) for i in range(20)], features, np.sum(np.square(features), axis=1))
+        cluster_index = np.random.randint(0, self.k, 20).astype(np.int32)
+        feature_sum, count = self.client.block_cluster_sum(block, cluster_index, self.k)
+        for c in range(self.k):
+            self.assertTrue(np.allclose(feature_sum[c], features[cluster_index == c].sum(axis=0)))
+            self.assertEqual(count[c], np.sum(cluster_index == c))
+
+    def test_mini_batch_centroid_cal(self):
+        blocks = self.client.get_feature_blocks(self.guest_table, 4)
+        local_blocks = dict(blocks.collect())
+        self.client._mini_batch_count = np.zeros(self.k)
+        expect_centroids = [np.array(c) for c in self.client.centroid_list]
+        expect_count = np.zeros(self.k)
+        for _ in range(2):
+            cluster_result = blocks.mapValues(lambda block: np.random.randint(0, self.k, len(block[0])))
+            clusters = dict(cluster_result.collect())
+            for c in range(self.k):
+                rows = np.vstack([local_blocks[b][1][clusters[b] == c] for b in local_blocks])
+                expect_count[c] += len(rows)
+                if len(rows):
+                    expect_centroids[c] = expect_centroids[c] + \
+                        (rows.sum(axis=0) - len(rows) * expect_centroids[c]) / expect_count[c]
+
+            centroids, cluster_count_list = self.client.mini_batch_centroid_cal(cluster_result, blocks)
+            self.client.centroid_list = centroids
+            for c in range(self.k):
+                self.assertTrue(np.allclose(centroids[c], expect_centroids[c]))
+            self.assertEqual(sum(count for _, count, _ in cluster_count_list), len(self.guest_features))
+        self.assertTrue(np.array_equal(self.client._mini_batch_count, expect_count))
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,31 +17,102 @@
 from collections import Iterable
 
 import numpy as np
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, issparse
 
 from federatedml.feature.instance import Instance
 from federatedml.feature.sparse_vector import SparseVector
 from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
 
 
+def _zero_like(w):
+    if len(w) > 0 and isinstance(w[0], PaillierEncryptedNumber):
+        return 0 * w[0]
+    return 0
+
+
 def _one_dimension_dot(X, w):
-    res = 0
     # LOGGER.debug("_one_dimension_dot, len of w: {}, len of X: {}".format(len(w), len(X)))
     if isinstance(X, csr_matrix):
-        for idx, value in zip(X.indices, X.data):
-            res += value * w[idx]
+        if X.nnz == 0:
+            return _zero_like(w)
+        indices, values = X.indices, X.data
     else:
-        for i in range(len(X)):
-            if np.fabs(X[i]) < 1e-5:
-                continue
-            res += w[i] * X[i]
+        X = np.asarray(X)
+        indices = np.flatnonzero(np.fabs(X) >= 1e-5)
+        if indices.size == 0:
+            return _zero_like(w)
+        values = X[indices]
+
+    if isinstance(w, np.ndarray):
+        return np.dot(values, w[indices])
+
+    res = 0
+    for idx, value in zip(indices, values):
+        res += value * w[idx]
+    return res
+
 
-    if res == 0:
-        if isinstance(w[0], PaillierEncryptedNumber):
-            res = 0 * w[0]
+def _sparse_dot(X, w):
+    """
+    X * w for scipy sparse matrix X, only rows having non-zero values are computed,
+    which keeps cost proportional to nnz when w is an array of ciphertexts.
+    """
+    w = np.asarray(w)
+    if w.dtype != object:
+        return X.dot(w)
+
+    X = X.tocsr()
+    zero = _zero_like(w)
+    res = np.empty(X.shape[0], dtype=object)
+    res.fill(zero)
+    indptr, indices, data = X.indptr, X.indices, X.data
+    for row in np.flatnonzero(np.diff(indptr)):
+        start, end = indptr[row], indptr[row + 1]
+        res[row] = np.dot(data[start:end], w[indices[start:end]])
     return res
 
 
+def sparse_transpose_dot(X, d):
+    """
+    X^T * d for scipy sparse matrix X, touching only non-zero columns of X,
+    d could be an array of ciphertexts, such as encrypted fore gradients.
+    """
+    return _sparse_dot(X.transpose().tocsr(), d)
+
+
+def sparse_vector_to_row(vec):
+    """
+    compact (indices, data) arrays of a SparseVector, which could be stacked into csr blocks repeatedly
+    without walking through its dict again
+    """
+    sparse_vec = vec.get_sparse_vector()
+    return (np.fromiter(sparse_vec.keys(), dtype=np.int64, count=len(sparse_vec)),
+            np.fromiter(sparse_vec.values(), dtype=np.float64, count=len(sparse_vec)))
+
+
+def sparse_rows_to_csr(rows, shape):
+    """
+    stack compact rows made by `sparse_vector_to_row` as rows of a csr_matrix with `shape` columns
+    """
+    rows = list(rows)
+    if not rows:
+        return csr_matrix((0, shape or 0))
+    indices_list, data_list = zip(*rows)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(indices) for indices in indices_list], out=indptr[1:])
+    return csr_matrix((np.concatenate(data_list), np.concatenate(indices_list), indptr), shape=(len(rows), shape))
+
+
+def sparse_vectors_to_csr(vectors, shape=None):
+    """
+    stack SparseVectors as rows of a csr_matrix, built in one pass without per element appends
+    """
+    vectors = list(vectors)
+    if shape is None and vectors:
+        shape = vectors[0].get_shape()
+    return sparse_rows_to_csr([sparse_vector_to_row(vec) for vec in vectors], shape)
+
+
 def dot(value, w):
     if isinstance(value, Instance):
         X = value.features
@@ -51,9 +122,13 @@ def dot(value, w):
     # # dot(a, b)[i, j, k, m] = sum(a[i, j, :] * b[k, :, m])
     # # One-dimension dot, which is the inner product of these two arrays
 
-    if np.ndim(X) == np.ndim(w) == 1:
+    if issparse(X) and np.ndim(w) == 1:
+        return _sparse_dot(X, w)
+    elif np.ndim(X) == np.ndim(w) == 1:
         return _one_dimension_dot(X, w)
     elif np.ndim(X) == 2 and np.ndim(w) == 1:
+        if isinstance(X, np.ndarray) and isinstance(w, np.ndarray) and w.dtype != object:
+            return np.dot(np.where(np.fabs(X) < 1e-5, 0, X), w)
         res = []
         for x in X:
             res.append(_one_dimension_dot(x, w))
@@ -67,6 +142,11 @@ def dot(value, w):
 def vec_dot(x, w):
     new_data = 0
     if isinstance(x, SparseVector):
+        sparse_vec = x.get_sparse_vector()
+        if isinstance(w, np.ndarray) and sparse_vec:
+            indices = np.fromiter(sparse_vec.keys(), dtype=np.int64, count=len(sparse_vec))
+            values = np.fromiter(sparse_vec.values(), dtype=np.float64, count=len(sparse_vec))
+            return np.dot(values, w[indices])
         for idx, v in x.get_all_data():
             # if idx < len(w):
             new_data += v * w[idx]
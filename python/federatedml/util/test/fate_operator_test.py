@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from federatedml.feature.sparse_vector import SparseVector
+from federatedml.secureprotol.fate_paillier import PaillierKeypair
+from federatedml.util import fate_operator
+
+
+class TestFateOperator(unittest.TestCase):
+    def setUp(self):
+        self.X = sp.random(30, 200, density=0.05, format='csr', random_state=42)
+        self.vectors = []
+        for row in range(self.X.shape[0]):
+            start, end = self.X.indptr[row], self.X.indptr[row + 1]
+            self.vectors.append(SparseVector(self.X.indices[start:end], self.X.data[start:end], 200))
+
+    def test_sparse_vectors_to_csr(self):
+        csr = fate_operator.sparse_vectors_to_csr(self.vectors)
+        self.assertEqual(csr.shape, self.X.shape)
+        self.assertEqual((csr != self.X).nnz, 0)
+
+    def test_sparse_rows_to_csr(self):
+        rows = [fate_operator.sparse_vector_to_row(vec) for vec in self.vectors]
+        # rows are built once, and stacked again for every block
+        for start, end in [(0, 30), (5, 12), (3, 4)]:
+            csr = fate_operator.sparse_rows_to_csr(rows[start:end], 200)
+            self.assertEqual(csr.shape, (end - start, 200))
+            self.assertEqual((csr != self.X[start:end]).nnz, 0)
+        self.assertEqual(fate_operator.sparse_rows_to_csr([], 200).shape, (0, 200))
+
+    def test_sparse_transpose_dot_encrypted(self):
+        public_key, private_key = PaillierKeypair.generate_keypair(1024)
+        d = np.random.rand(self.X.shape[0])
+        encrypted_d = np.array([public_key.encrypt(v) for v in d])
+        gradient = fate_operator.sparse_transpose_dot(self.X, encrypted_d)
+        decrypted = np.array([private_key.decrypt(v) for v in gradient])
+        self.assertTrue(np.allclose(decrypted, self.X.transpose().dot(d)))
+
+    def test_vec_dot(self):
+        w = np.random.rand(200)
+        for row, vec in enumerate(self.vectors):
+            self.assertAlmostEqual(fate_operator.vec_dot(vec, w), self.X[row].dot(w)[0])
+
+    def test_dense_dot(self):
+        X = self.X.toarray()
+        w = np.random.rand(200)
+        self.assertTrue(np.allclose(fate_operator.dot(X, w), X.dot(w)))
+        self.assertAlmostEqual(fate_operator.dot(X[0], w), X[0].dot(w))
+
+
+if __name__ == '__main__':
+    unittest.main()